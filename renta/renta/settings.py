@@ -132,13 +132,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'rental.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'rental.middleware.ReferenceDataMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'rental.middleware.BlockedUserMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'rental.middleware.BlockedUserMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -175,6 +177,25 @@ DATABASES = {
     }
 }
 
+# Кэш - общий для всех процессов (Redis), если задан REDIS_URL.
+# Метки версий статуса блокировки и справочников хранятся в кэше и должны
+# быть видны всем воркерам; кэш в памяти процесса - только для разработки
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'interior',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_USER_MODEL = 'rental.CustomUser'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -239,6 +260,66 @@ DEFAULT_FROM_EMAIL = f'INTERIOR <{EMAIL_HOST_USER}>'
 # Таймаут для SMTP соединения (секунды)
 EMAIL_TIMEOUT = 30
 
+# Очередь исходящих писем (email_outbox).
+# Отправку выполняет: python manage.py send_outbox_emails
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Задержка повтора: BASE * 2^(попытка-1), но не более MAX (секунды)
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+
+# Сводки уведомлений модераторам о платежах.
+# Отправку выполняет: python manage.py send_moderator_digest (по cron)
+MODERATOR_DIGEST_ENABLED = True
+MODERATOR_DIGEST_WINDOW_MINUTES = 60
+
+# Буферизованная запись журнала действий (action_log_writer).
+# Записи сохраняются фоновым потоком пачками не реже раза в FLUSH_INTERVAL секунд.
+ACTION_LOG_BUFFER_SIZE = 10000
+ACTION_LOG_BATCH_SIZE = 200
+ACTION_LOG_FLUSH_INTERVAL = 1.0
+# При переполнении буфера: 'sync' - записать сразу, 'drop' - отбросить запись
+ACTION_LOG_OVERFLOW_POLICY = 'sync'
+
+# Помесячные партиции журнала действий (PostgreSQL).
+# Обслуживание: python manage.py partition_action_logs / prune_action_logs (по cron)
+ACTION_LOG_PARTITIONS_AHEAD = 3
+ACTION_LOG_RETENTION_MONTHS = 12
+
+# Фоновые задания (PDF отчеты, резервные копии): потоки веб-процесса.
+# Статус и прогресс заданий хранятся в таблице background_jobs
+BACKGROUND_JOB_WORKERS = 2
+
+# PDF отчеты: процессы рендеринга (0 - в потоке задания), лимит строк
+# печатной формы, каталог готовых файлов и срок их хранения (дни)
+REPORT_PDF_WORKERS = 2
+REPORT_PDF_MAX_ROWS = 5000
+REPORT_CACHE_DIR = os.path.join(BASE_DIR, 'report_cache')
+REPORT_CACHE_MAX_AGE_DAYS = 7
+
+# Резервные копии: каталог и сжатие ('gzip' или 'zstd' при установленном zstandard).
+# Создание: python manage.py backup_db, восстановление: python manage.py restore_backup
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+BACKUP_COMPRESSION = 'gzip'
+
+# Заголовок Server-Timing с метриками запроса: всем (True) или только staff (False).
+# Сводка по URL: /admin/performance/
+SERVER_TIMING_PUBLIC = DEBUG
+
+# Поиск N+1: одинаковый SQL запрос QUERY_REPEAT_THRESHOLD и более раз за запрос.
+# При QUERY_REPEAT_RAISE вызывается RepeatedQueriesError, иначе предупреждение в лог
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_REPEAT_RAISE = DEBUG
+
+# Метрики Prometheus: /metrics доступен с заголовком
+# "Authorization: Bearer <METRICS_TOKEN>" или с адресов METRICS_ALLOWED_IPS.
+# По умолчанию список адресов пуст: за локальным прокси (nginx) REMOTE_ADDR
+# у всех запросов 127.0.0.1, поэтому адреса задаются только при прямом доступе.
+# Для нескольких воркеров gunicorn задайте PROMETHEUS_MULTIPROC_DIR
+# (см. rental/services/prometheus_metrics.py)
+METRICS_ALLOWED_IPS = [ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Получите данные в личном кабинете ЮKassa:
 YOOKASSA_SHOP_ID = os.environ.get('YOOKASSA_SHOP_ID', '1225524')
 YOOKASSA_SECRET_KEY = os.environ.get('YOOKASSA_SECRET_KEY', 'test_-W5gL0m29-Vj5oYnjMBKZ62jHkNiMBFdsmiaZeGhiQs')
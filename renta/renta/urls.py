@@ -3,9 +3,11 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 from rental.admin import admin_site
+from rental.views.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin_site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('', include('rental.urls')),
 ]
 
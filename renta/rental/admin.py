@@ -8,29 +8,39 @@ from __future__ import annotations
 import json
 import os
 import subprocess
-from datetime import datetime, timedelta
-from io import BytesIO, StringIO
-from typing import Any, Optional
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any
 
 from django.contrib import admin, messages
 from django.contrib.admin import AdminSite
 from django.contrib.auth.admin import UserAdmin
-from django.conf import settings
-from django.db.models import Count, Avg, Sum, QuerySet, Q
-from django.http import HttpRequest, HttpResponse, JsonResponse, FileResponse
+from django.db.models import Count, Avg, Q
+from django.http import HttpRequest, HttpResponse, JsonResponse, FileResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils import timezone
 from django.utils.html import format_html
+from django.utils.http import urlencode
 from django.utils.safestring import mark_safe
 
 from .models import (
     CustomUser, Region, City, SpaceCategory, Space, SpaceImage,
     SpacePrice, PricingPeriod, TransactionStatus, BookingStatus, Booking, Transaction,
-    Review, Favorite, ActionLog
+    Review, Favorite, ActionLog, EmailOutbox, UserStats, BackgroundJob
 )
+from .core import keyset_paginate, parse_int, period_lookup
 from .forms import AdminUserCreationForm, AdminUserChangeForm
+from .services.background_jobs import BackgroundJobs
+from .services.backup_engine import BackupEngine
+from .services.booking_rollup import BookingRollup
+from .services.logging_service import LoggingService
+from .services.reference_data import ReferenceData
+from .services.report_export import EXPORT_FORMATS, REPORTS, ReportExport
+from .services.report_jobs import ReportPdf
+from .services.request_metrics import RequestMetrics
+from .services.review_moderation import ReviewModeration
 
 
 # ============== LOGGING MIXIN ДЛЯ АВТОМАТИЧЕСКОГО ЛОГИРОВАНИЯ ==============
@@ -40,23 +50,23 @@ class LoggingAdminMixin:
 
     def save_model(self, request: HttpRequest, obj: Any, form: Any, change: bool) -> None:
         super().save_model(request, obj, form, change)
-        ActionLog.objects.create(
+        LoggingService.log_action(
             user=request.user,
             action_type=ActionLog.ActionType.UPDATE if change else ActionLog.ActionType.CREATE,
             model_name=obj.__class__.__name__,
             object_id=obj.pk,
             object_repr=str(obj)[:200],
-            ip_address=request.META.get('REMOTE_ADDR')
+            request=request
         )
 
     def delete_model(self, request: HttpRequest, obj: Any) -> None:
-        ActionLog.objects.create(
+        LoggingService.log_action(
             user=request.user,
             action_type=ActionLog.ActionType.DELETE,
             model_name=obj.__class__.__name__,
             object_id=obj.pk,
             object_repr=str(obj)[:200],
-            ip_address=request.META.get('REMOTE_ADDR')
+            request=request
         )
         super().delete_model(request, obj)
 
@@ -76,14 +86,21 @@ class InteriorAdminSite(AdminSite):
         custom_urls = [
             path('reports/', self.admin_view(self.reports_view), name='reports'),
             path('reports/actions/', self.admin_view(self.action_logs_view), name='action_logs'),
+            path('reports/actions/users/', self.admin_view(self.user_autocomplete_view), name='action_logs_users'),
             path('reports/export/json/', self.admin_view(self.export_json_view), name='export_json'),
             path('reports/export/pdf/', self.admin_view(self.export_pdf_view), name='export_pdf'),
+            path('reports/pdf/start/', self.admin_view(self.pdf_job_start_view), name='pdf_job_start'),
+            path('reports/pdf/<int:job_id>/status/', self.admin_view(self.pdf_job_status_view), name='pdf_job_status'),
+            path('reports/pdf/<int:job_id>/download/', self.admin_view(self.pdf_job_download_view), name='pdf_job_download'),
+            path('reports/export/<str:fmt>/', self.admin_view(self.export_report_view), name='export_report'),
             path('reports/dashboard/', self.admin_view(self.dashboard_view), name='reports_dashboard'),
             path('backup/', self.admin_view(self.backup_view), name='backup'),
             path('backup/create/', self.admin_view(self.create_backup), name='create_backup'),
             path('backup/download/<str:filename>/', self.admin_view(self.download_backup), name='download_backup'),
             path('backup/schedule/', self.admin_view(self.schedule_backup_view), name='schedule_backup'),
             path('backup/delete/<str:filename>/', self.admin_view(self.delete_backup), name='delete_backup'),
+            path('backup/jobs/<int:job_id>/status/', self.admin_view(self.backup_job_status_view), name='backup_job_status'),
+            path('performance/', self.admin_view(self.performance_view), name='performance'),
         ]
         return custom_urls + urls
 
@@ -168,31 +185,30 @@ class InteriorAdminSite(AdminSite):
             messages.error(request, 'У вас нет прав для доступа к резервному копированию.')
             return redirect('interior_admin:index')
 
-        backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-        os.makedirs(backup_dir, exist_ok=True)
-
-        backups = []
-        if os.path.exists(backup_dir):
-            for filename in sorted(os.listdir(backup_dir), reverse=True):
-                if filename.endswith('.json') or filename.endswith('.sql'):
-                    filepath = os.path.join(backup_dir, filename)
-                    stat = os.stat(filepath)
-                    backups.append({
-                        'filename': filename,
-                        'size': stat.st_size,
-                        'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                        'created': datetime.fromtimestamp(stat.st_mtime),
-                    })
+        active_jobs = BackgroundJob.objects.filter(
+            kind=BackgroundJob.Kind.BACKUP,
+            status__in=[BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING],
+        ).order_by('-created_at')[:5]
 
         context = {
             **self.each_context(request),
             'title': 'Резервное копирование',
-            'backups': backups[:20],
+            'backups': BackupEngine.list_backups()[:20],
+            'backup_jobs': [
+                {**BackgroundJobs.state(job), 'status_url': reverse('interior_admin:backup_job_status', args=[job.pk])}
+                for job in active_jobs
+            ],
         }
         return TemplateResponse(request, 'admin/backup/index.html', context)
 
     def create_backup(self, request: HttpRequest) -> HttpResponse:
-        """Создание бэкапа базы данных с прямой отдачей файла в браузер."""
+        """
+        Создание бэкапа базы данных.
+
+        download_direct=true — сжатая копия отдается в браузер потоком
+        по мере выгрузки; иначе копия создается фоновым заданием в
+        каталоге бэкапов.
+        """
         if not self._check_backup_permission(request):
             messages.error(request, 'У вас нет прав для создания резервных копий.')
             return redirect('interior_admin:index')
@@ -201,24 +217,10 @@ class InteriorAdminSite(AdminSite):
             return redirect('interior_admin:backup')
 
         download_direct = request.POST.get('download_direct', 'true') == 'true'
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-
-        try:
-            from django.core.management import call_command
-
-            output = StringIO()
-            call_command(
-                'dumpdata',
-                '--natural-foreign',
-                '--natural-primary',
-                '--indent=2',
-                stdout=output,
-                exclude=['contenttypes', 'auth.permission', 'sessions']
-            )
-
-            backup_content = output.getvalue()
-            filename = f'backup_{timestamp}.json'
+        codec = BackupEngine.default_codec()
 
+        if download_direct:
+            filename = BackupEngine.file_name(codec)
             ActionLog.objects.create(
                 user=request.user,
                 action_type=ActionLog.ActionType.OTHER,
@@ -226,40 +228,42 @@ class InteriorAdminSite(AdminSite):
                 object_repr=f'Создан бэкап: {filename}',
                 ip_address=request.META.get('REMOTE_ADDR')
             )
+            response = StreamingHttpResponse(
+                BackupEngine.stream(codec),
+                content_type='application/zstd' if codec == 'zstd' else 'application/gzip'
+            )
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            return response
 
-            if download_direct:
-                response = HttpResponse(
-                    backup_content,
-                    content_type='application/json'
-                )
-                response['Content-Disposition'] = f'attachment; filename="{filename}"'
-                response['Content-Length'] = len(backup_content.encode('utf-8'))
-                return response
-            else:
-                backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-                os.makedirs(backup_dir, exist_ok=True)
-                filepath = os.path.join(backup_dir, filename)
-
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(backup_content)
+        job = BackgroundJobs.enqueue(BackgroundJob.Kind.BACKUP, {'codec': codec}, request.user)
+        ActionLog.objects.create(
+            user=request.user,
+            action_type=ActionLog.ActionType.OTHER,
+            model_name='backup',
+            object_repr=f'Запущено создание бэкапа (задание #{job.pk})',
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+        messages.success(request, 'Создание бэкапа запущено. Файл появится в списке после завершения.')
+        return redirect('interior_admin:backup')
 
-                messages.success(request, f'Бэкап успешно создан и сохранён: {filename}')
-                return redirect('interior_admin:backup')
+    def backup_job_status_view(self, request: HttpRequest, job_id: int) -> JsonResponse:
+        """Состояние и прогресс задания создания бэкапа."""
+        if not self._check_backup_permission(request):
+            return JsonResponse({'error': 'Нет прав для доступа к резервному копированию'}, status=403)
 
-        except Exception as e:
-            messages.error(request, f'Ошибка создания бэкапа: {e}')
-            return redirect('interior_admin:backup')
+        job = BackgroundJob.objects.filter(pk=job_id, kind=BackgroundJob.Kind.BACKUP).first()
+        if job is None:
+            return JsonResponse({'error': 'Задание не найдено'}, status=404)
+        return JsonResponse({**BackgroundJobs.state(job), 'file_name': job.file_name})
 
     def download_backup(self, request: HttpRequest, filename: str) -> HttpResponse:
-        """Скачивание файла бэкапа напрямую в браузер."""
+        """Скачивание файла бэкапа (файл отдается потоком)."""
         if not self._check_backup_permission(request):
             messages.error(request, 'У вас нет прав для скачивания резервных копий.')
             return redirect('interior_admin:index')
 
-        backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-        filepath = os.path.join(backup_dir, filename)
-
-        if not os.path.abspath(filepath).startswith(os.path.abspath(backup_dir)):
+        filepath = BackupEngine.resolve(filename)
+        if filepath is None:
             messages.error(request, 'Недопустимый путь к файлу')
             return redirect('interior_admin:backup')
 
@@ -267,15 +271,6 @@ class InteriorAdminSite(AdminSite):
             messages.error(request, 'Файл не найден')
             return redirect('interior_admin:backup')
 
-        with open(filepath, 'rb') as f:
-            content = f.read()
-
-        content_type = 'application/json' if filename.endswith('.json') else 'application/sql'
-
-        response = HttpResponse(content, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response['Content-Length'] = len(content)
-
         ActionLog.objects.create(
             user=request.user,
             action_type=ActionLog.ActionType.OTHER,
@@ -284,7 +279,7 @@ class InteriorAdminSite(AdminSite):
             ip_address=request.META.get('REMOTE_ADDR')
         )
 
-        return response
+        return FileResponse(open(filepath, 'rb'), as_attachment=True, filename=filename)
 
     def delete_backup(self, request: HttpRequest, filename: str) -> HttpResponse:
         """Удаление файла бэкапа."""
@@ -295,15 +290,13 @@ class InteriorAdminSite(AdminSite):
         if request.method != 'POST':
             return redirect('interior_admin:backup')
 
-        backup_dir = os.path.join(settings.BASE_DIR, 'backups')
-        filepath = os.path.join(backup_dir, filename)
-
-        if not os.path.abspath(filepath).startswith(os.path.abspath(backup_dir)):
+        filepath = BackupEngine.resolve(filename)
+        if filepath is None:
             messages.error(request, 'Недопустимый путь к файлу')
             return redirect('interior_admin:backup')
 
         if os.path.exists(filepath):
-            os.remove(filepath)
+            BackupEngine.delete(filepath)
             messages.success(request, f'Бэкап {filename} удалён')
 
             ActionLog.objects.create(
@@ -336,301 +329,23 @@ class InteriorAdminSite(AdminSite):
 
         return redirect('interior_admin:backup')
 
-    def export_pdf_view(self, request: HttpRequest) -> HttpResponse:
-        """Экспорт отчета в PDF с поддержкой русского языка (DejaVuSans)."""
-        report_type = request.GET.get('type', 'actions')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import cm, mm
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-
-            font_registered = False
-            font_paths = [
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                '/usr/share/fonts/TTF/DejaVuSans.ttf',
-                'C:/Windows/Fonts/DejaVuSans.ttf',
-                '/Library/Fonts/DejaVuSans.ttf',
-                '/System/Library/Fonts/Supplemental/DejaVuSans.ttf',
-                os.path.join(settings.BASE_DIR, 'renta', 'bolt', 'DejaVuSans.ttf'),
-                os.path.join(settings.BASE_DIR, 'bolt', 'DejaVuSans.ttf'),
-            ]
-
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    try:
-                        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                        bold_path = font_path.replace('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf')
-                        if os.path.exists(bold_path):
-                            pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', bold_path))
-                        font_registered = True
-                        break
-                    except Exception:
-                        continue
-
-            font_name = 'DejaVuSans' if font_registered else 'Helvetica'
-
-            buffer = BytesIO()
-
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=landscape(A4),
-                rightMargin=1*cm,
-                leftMargin=1*cm,
-                topMargin=1.5*cm,
-                bottomMargin=1*cm
-            )
-
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                fontName=font_name,
-                fontSize=18,
-                spaceAfter=20,
-                alignment=1,
-                textColor=colors.HexColor('#1a1a1a')
-            )
-
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                fontName=font_name,
-                fontSize=10,
-                spaceAfter=15,
-                alignment=1,
-                textColor=colors.HexColor('#666666')
-            )
-
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                fontName=font_name,
-                fontSize=9,
-            )
-
-            elements = []
-
-            title_text = {
-                'actions': 'Отчёт по действиям пользователей',
-                'bookings': 'Отчёт по бронированиям',
-                'revenue': 'Отчёт по доходам',
-                'users': 'Отчёт по пользователям',
-                'logins': 'Отчёт по подключениям'
-            }.get(report_type, 'Отчёт')
-
-            elements.append(Paragraph(title_text, title_style))
-            elements.append(Paragraph(
-                f"ООО ИНТЕРЬЕР | Сгенерировано: {timezone.now().strftime('%d.%m.%Y %H:%M')}",
-                subtitle_style
-            ))
-            elements.append(Spacer(1, 15))
-
-            if report_type == 'actions':
-                data = self._get_pdf_actions_data(date_from, date_to)
-                headers = ['Дата', 'Пользователь', 'Действие', 'Модель', 'Объект', 'IP']
-            elif report_type == 'bookings':
-                data = self._get_pdf_bookings_data(date_from, date_to)
-                headers = ['ID', 'Помещение', 'Клиент', 'Статус', 'Сумма', 'Дата']
-            elif report_type == 'revenue':
-                data = self._get_pdf_revenue_data(date_from, date_to)
-                headers = ['Период', 'Бронирований', 'Сумма']
-            elif report_type == 'users':
-                data = self._get_pdf_users_data(date_from, date_to)
-                headers = ['Пользователь', 'Email', 'Тип', 'Регистрация', 'Бронирований']
-            elif report_type == 'logins':
-                data = self._get_pdf_logins_data(date_from, date_to)
-                headers = ['Дата', 'Пользователь', 'IP адрес', 'Браузер']
-            else:
-                data = []
-                headers = []
-
-            if data:
-                table_data = [headers] + data
-
-                col_widths = None
-                if report_type == 'actions':
-                    col_widths = [3*cm, 3*cm, 2.5*cm, 2.5*cm, 8*cm, 3*cm]
-                elif report_type == 'bookings':
-                    col_widths = [1.5*cm, 7*cm, 4*cm, 3*cm, 3*cm, 3*cm]
-
-                table = Table(table_data, repeatRows=1, colWidths=col_widths)
-
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d4af37')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1a1a1a')),
-                    ('FONTNAME', (0, 0), (-1, 0), font_name),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                    ('TOPPADDING', (0, 0), (-1, 0), 10),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#1a1a1a')),
-                    ('FONTNAME', (0, 1), (-1, -1), font_name),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d4af37')),
-                    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#b8941f')),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]))
-
-                elements.append(table)
-            else:
-                elements.append(Paragraph("Нет данных для отображения", normal_style))
-
-            doc.build(elements)
-
-            buffer.seek(0)
-            filename = f'report_{report_type}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-
-            response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-            ActionLog.objects.create(
-                user=request.user,
-                action_type=ActionLog.ActionType.OTHER,
-                model_name='report',
-                object_repr=f'Скачан PDF отчёт: {report_type}',
-                ip_address=request.META.get('REMOTE_ADDR')
-            )
-
-            return response
-
-        except ImportError:
-            messages.warning(request, 'Для генерации PDF установите: pip install reportlab')
-            return redirect('interior_admin:reports')
-        except Exception as e:
-            messages.error(request, f'Ошибка генерации PDF: {e}')
-            return redirect('interior_admin:reports')
-
-    def _get_pdf_actions_data(self, date_from: Optional[str], date_to: Optional[str]) -> list:
-        logs = self._get_actions_queryset(date_from, date_to)[:500]
-        return [
-            [
-                log.created_at.strftime('%d.%m.%Y %H:%M'),
-                log.user.username if log.user else 'Аноним',
-                log.get_action_type_display(),
-                log.model_name or '-',
-                (log.object_repr or '-')[:40],
-                log.ip_address or '-'
-            ]
-            for log in logs
-        ]
-
-    def _get_pdf_bookings_data(self, date_from: Optional[str], date_to: Optional[str]) -> list:
-        bookings = self._get_bookings_queryset(date_from, date_to)[:500]
-        return [
-            [
-                str(b.id),
-                (b.space.title[:30] if b.space else '-'),
-                (b.tenant.username[:20] if b.tenant else '-'),
-                (b.status.name if b.status else '-'),
-                f'{int(b.total_amount)} руб.',
-                b.created_at.strftime('%d.%m.%Y')
-            ]
-            for b in bookings
-        ]
-
-    def _get_pdf_revenue_data(self, date_from: Optional[str], date_to: Optional[str]) -> list:
-        bookings = self._get_bookings_queryset(date_from, date_to).filter(
-            status__code__in=['confirmed', 'completed']
-        )
-
-        from django.db.models.functions import TruncDate
-        daily = bookings.annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id'),
-            total=Sum('total_amount')
-        ).order_by('-date')[:30]
-
-        return [
-            [
-                d['date'].strftime('%d.%m.%Y') if d['date'] else '-',
-                str(d['count']),
-                f"{int(d['total'] or 0)} руб."
-            ]
-            for d in daily
-        ]
-
-    def _get_pdf_users_data(self, date_from: Optional[str], date_to: Optional[str]) -> list:
-        users = CustomUser.objects.annotate(
-            bookings_count=Count('bookings')
-        ).order_by('-created_at')
-
-        if date_from:
-            try:
-                dt = datetime.strptime(date_from, '%Y-%m-%d')
-                users = users.filter(created_at__date__gte=dt.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt = datetime.strptime(date_to, '%Y-%m-%d')
-                users = users.filter(created_at__date__lte=dt.date())
-            except ValueError:
-                pass
-
-        return [
-            [
-                u.username[:20],
-                (u.email[:25] if u.email else '-'),
-                u.get_user_type_display(),
-                u.created_at.strftime('%d.%m.%Y'),
-                str(u.bookings_count)
-            ]
-            for u in users[:200]
-        ]
+    def performance_view(self, request: HttpRequest) -> HttpResponse:
+        """Производительность: перцентили времени ответа и метрики по URL (только staff)."""
+        if not (request.user.is_superuser or request.user.is_staff):
+            messages.error(request, 'У вас нет прав для просмотра метрик производительности.')
+            return redirect('interior_admin:index')
 
-    def _get_pdf_logins_data(self, date_from: Optional[str], date_to: Optional[str]) -> list:
-        logs = ActionLog.objects.filter(
-            action_type__in=[ActionLog.ActionType.LOGIN, ActionLog.ActionType.LOGOUT]
-        ).select_related('user').order_by('-created_at')
-
-        if date_from:
-            try:
-                dt = datetime.strptime(date_from, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__gte=dt.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt = datetime.strptime(date_to, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__lte=dt.date())
-            except ValueError:
-                pass
-
-        return [
-            [
-                log.created_at.strftime('%d.%m.%Y %H:%M'),
-                log.user.username if log.user else 'Аноним',
-                log.ip_address or '-',
-                self._parse_browser(log.user_agent)[:30]
-            ]
-            for log in logs[:500]
-        ]
+        if request.method == 'POST':
+            RequestMetrics.aggregator.reset()
+            messages.success(request, 'Статистика производительности сброшена.')
+            return redirect('interior_admin:performance')
 
-    def _parse_browser(self, user_agent: Optional[str]) -> str:
-        if not user_agent:
-            return '-'
-        ua = user_agent
-        if 'Chrome' in ua and 'Edg' not in ua:
-            return 'Chrome'
-        elif 'Firefox' in ua:
-            return 'Firefox'
-        elif 'Safari' in ua and 'Chrome' not in ua:
-            return 'Safari'
-        elif 'Edg' in ua:
-            return 'Edge'
-        elif 'Opera' in ua or 'OPR' in ua:
-            return 'Opera'
-        return ua[:20]
+        context = {
+            **self.each_context(request),
+            'title': 'Производительность',
+            'rows': RequestMetrics.aggregator.snapshot(),
+        }
+        return TemplateResponse(request, 'admin/performance.html', context)
 
     def reports_view(self, request: HttpRequest) -> TemplateResponse:
         if not self._check_reports_permission(request):
@@ -638,6 +353,10 @@ class InteriorAdminSite(AdminSite):
             return redirect('interior_admin:index')
 
         thirty_days_ago = timezone.now() - timedelta(days=30)
+        month_bookings = BookingRollup.summary(timezone.localdate(thirty_days_ago), group_by=())
+        month_revenue = BookingRollup.summary(
+            timezone.localdate(thirty_days_ago), group_by=(), status_codes=UserStats.PAID_STATUSES
+        )
 
         context = {
             **self.each_context(request),
@@ -651,13 +370,8 @@ class InteriorAdminSite(AdminSite):
                 'total_spaces': Space.objects.count(),
                 'active_spaces': Space.objects.filter(is_active=True).count(),
                 'total_bookings': Booking.objects.count(),
-                'bookings_month': Booking.objects.filter(
-                    created_at__gte=thirty_days_ago
-                ).count(),
-                'revenue_month': Booking.objects.filter(
-                    created_at__gte=thirty_days_ago,
-                    status__code__in=['confirmed', 'completed']
-                ).aggregate(total=Sum('total_amount'))['total'] or 0,
+                'bookings_month': month_bookings['bookings'] or 0,
+                'revenue_month': month_revenue['revenue'] or 0,
                 'total_reviews': Review.objects.count(),
                 'pending_reviews': Review.objects.filter(is_approved=False).count(),
                 'logins_month': ActionLog.objects.filter(
@@ -669,7 +383,16 @@ class InteriorAdminSite(AdminSite):
                     is_active=True
                 ).count(),
             },
-            'recent_actions': ActionLog.objects.select_related('user')[:20],
+            'login_browsers': ActionLog.objects.filter(
+                action_type=ActionLog.ActionType.LOGIN,
+                created_at__gte=thirty_days_ago,
+                user_agent__isnull=False
+            ).values('user_agent__browser').annotate(
+                count=Count('id')
+            ).order_by('-count')[:10],
+            'recent_actions': ActionLog.objects.filter(
+                created_at__gte=thirty_days_ago
+            ).select_related('user')[:20],
         }
         return TemplateResponse(request, 'admin/reports/index.html', context)
 
@@ -684,405 +407,218 @@ class InteriorAdminSite(AdminSite):
         date_from = request.GET.get('date_from')
         date_to = request.GET.get('date_to')
 
-        logs = ActionLog.objects.select_related('user').order_by('-created_at')
+        logs = ActionLog.objects.filter(
+            **period_lookup(date_from, date_to)
+        ).select_related('user')
 
+        selected_user = None
         if user_id:
-            logs = logs.filter(user_id=user_id)
+            selected_user = CustomUser.objects.filter(pk=parse_int(user_id)).only('id', 'username').first()
+            logs = logs.filter(user_id=selected_user.pk) if selected_user else logs.none()
         if action_type:
             logs = logs.filter(action_type=action_type)
         if model_name:
             logs = logs.filter(model_name__icontains=model_name)
-        if date_from:
-            try:
-                dt = datetime.strptime(date_from, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__gte=dt.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt = datetime.strptime(date_to, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__lte=dt.date())
-            except ValueError:
-                pass
-
-        from django.core.paginator import Paginator
-        paginator = Paginator(logs, 50)
-        page = request.GET.get('page', 1)
-        logs_page = paginator.get_page(page)
+
+        filters = {
+            'user': user_id,
+            'action_type': action_type,
+            'model': model_name,
+            'date_from': date_from,
+            'date_to': date_to,
+        }
 
         context = {
             **self.each_context(request),
             'title': 'Журнал действий',
-            'logs': logs_page,
-            'users': CustomUser.objects.all(),
+            'logs': keyset_paginate(logs, request, page_size=50),
+            'selected_user': selected_user,
             'action_types': ActionLog.ActionType.choices,
-            'filters': {
-                'user': user_id,
-                'action_type': action_type,
-                'model': model_name,
-                'date_from': date_from,
-                'date_to': date_to,
-            },
+            'filters': filters,
+            'filter_query': urlencode({key: value for key, value in filters.items() if value}),
         }
         return TemplateResponse(request, 'admin/reports/action_logs.html', context)
 
+    def user_autocomplete_view(self, request: HttpRequest) -> JsonResponse:
+        """Поиск пользователей для фильтра журнала действий (AJAX)."""
+        if not self._check_reports_permission(request):
+            return JsonResponse({'results': []}, status=403)
+
+        query = request.GET.get('q', '').strip()
+        if len(query) < 2:
+            return JsonResponse({'results': []})
+
+        users = CustomUser.objects.filter(
+            Q(username__istartswith=query) | Q(email__istartswith=query)
+        ).order_by('username').values('id', 'username', 'email')[:20]
+        return JsonResponse({'results': list(users)})
+
     def export_json_view(self, request: HttpRequest) -> HttpResponse:
+        return self.export_report_view(request, 'json')
+
+    def export_report_view(self, request: HttpRequest, fmt: str) -> HttpResponse:
+        """Потоковая выгрузка отчета (CSV, JSON, JSON Lines, XLSX) без ограничения числа строк."""
         if not self._check_reports_permission(request):
             messages.error(request, 'У вас нет прав для экспорта отчетов.')
             return redirect('interior_admin:index')
 
         report_type = request.GET.get('type', 'actions')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-
-        if report_type == 'actions':
-            data = self._get_actions_export_data(date_from, date_to)
-        elif report_type == 'bookings':
-            data = self._get_bookings_export_data(date_from, date_to)
-        elif report_type == 'revenue':
-            data = self._get_revenue_export_data(date_from, date_to)
-        elif report_type == 'users':
-            data = self._get_users_export_data(date_from, date_to)
-        elif report_type == 'logins':
-            data = self._get_logins_export_data(date_from, date_to)
-        else:
-            data = {'error': 'Unknown report type'}
+        if report_type not in REPORTS or fmt not in EXPORT_FORMATS:
+            messages.error(request, 'Неизвестный тип отчета или формат выгрузки.')
+            return redirect('interior_admin:reports')
 
-        response = HttpResponse(
-            json.dumps(data, ensure_ascii=False, indent=2, default=str),
-            content_type='application/json; charset=utf-8'
+        content_type, extension = EXPORT_FORMATS[fmt]
+        response = StreamingHttpResponse(
+            ReportExport.stream(
+                report_type, fmt, request.GET.get('date_from'), request.GET.get('date_to')
+            ),
+            content_type=content_type
         )
-        filename = f'report_{report_type}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.json'
+        filename = f'report_{report_type}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
-    def dashboard_view(self, request: HttpRequest) -> TemplateResponse:
-        if not self._check_reports_permission(request):
-            messages.error(request, 'У вас нет прав для просмотра дашборда.')
-            return redirect('interior_admin:index')
-
-        today = timezone.now().date()
-        thirty_days_ago = today - timedelta(days=30)
-
-        bookings_by_day = []
-        for i in range(30):
-            date = thirty_days_ago + timedelta(days=i)
-            count = Booking.objects.filter(created_at__date=date).count()
-            bookings_by_day.append({
-                'date': date.strftime('%d.%m'),
-                'count': count
-            })
-
-        revenue_by_day = []
-        for i in range(30):
-            date = thirty_days_ago + timedelta(days=i)
-            total = Booking.objects.filter(
-                created_at__date=date,
-                status__code__in=['confirmed', 'completed']
-            ).aggregate(total=Sum('total_amount'))['total'] or 0
-            revenue_by_day.append({
-                'date': date.strftime('%d.%m'),
-                'amount': float(total)
-            })
-
-        top_spaces = Space.objects.annotate(
-            bookings_count=Count('bookings'),
-            revenue=Sum('bookings__total_amount')
-        ).order_by('-bookings_count')[:5]
-
-        status_distribution = Booking.objects.values(
-            'status__name', 'status__color'
-        ).annotate(count=Count('id'))
-
-        context = {
-            **self.each_context(request),
-            'title': 'Аналитический дашборд',
-            'bookings_by_day': json.dumps(bookings_by_day),
-            'revenue_by_day': json.dumps(revenue_by_day),
-            'top_spaces': top_spaces,
-            'status_distribution': list(status_distribution),
-        }
-        return TemplateResponse(request, 'admin/reports/dashboard.html', context)
-
     def export_pdf_view(self, request: HttpRequest) -> HttpResponse:
+        """PDF отчет: готовый файл отдается сразу, иначе запускается фоновое задание."""
         if not self._check_reports_permission(request):
             messages.error(request, 'У вас нет прав для экспорта PDF отчетов.')
             return redirect('interior_admin:index')
 
         report_type = request.GET.get('type', 'actions')
-        date_from = request.GET.get('date_from')
-        date_to = request.GET.get('date_to')
-
-        try:
-            from reportlab.lib import colors
-            from reportlab.lib.pagesizes import A4, landscape
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import cm, mm
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.pdfbase import pdfmetrics
-            from reportlab.pdfbase.ttfonts import TTFont
-
-            font_registered = False
-            font_paths = [
-                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                '/usr/share/fonts/TTF/DejaVuSans.ttf',
-                'C:/Windows/Fonts/DejaVuSans.ttf',
-                '/Library/Fonts/DejaVuSans.ttf',
-                '/System/Library/Fonts/Supplemental/DejaVuSans.ttf',
-                os.path.join(settings.BASE_DIR, 'renta', 'bolt', 'DejaVuSans.ttf'),
-                os.path.join(settings.BASE_DIR, 'bolt', 'DejaVuSans.ttf'),
-            ]
-
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    try:
-                        pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
-                        bold_path = font_path.replace('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf')
-                        if os.path.exists(bold_path):
-                            pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', bold_path))
-                        font_registered = True
-                        break
-                    except Exception:
-                        continue
-
-            font_name = 'DejaVuSans' if font_registered else 'Helvetica'
-
-            buffer = BytesIO()
-
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=landscape(A4),
-                rightMargin=1*cm,
-                leftMargin=1*cm,
-                topMargin=1.5*cm,
-                bottomMargin=1*cm
-            )
+        if report_type not in REPORTS:
+            messages.error(request, 'Неизвестный тип отчета.')
+            return redirect('interior_admin:reports')
 
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                fontName=font_name,
-                fontSize=18,
-                spaceAfter=20,
-                alignment=1,
-                textColor=colors.HexColor('#1a1a1a')
-            )
+        job = ReportPdf.start(report_type, request.GET.get('date_from'), request.GET.get('date_to'), request.user)
+        if job.status == BackgroundJob.Status.DONE:
+            return self._pdf_file_response(request, job)
 
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                fontName=font_name,
-                fontSize=10,
-                spaceAfter=15,
-                alignment=1,
-                textColor=colors.HexColor('#666666')
-            )
+        messages.info(request, 'PDF отчет формируется. Повторите скачивание через несколько секунд.')
+        return redirect('interior_admin:reports')
 
-            normal_style = ParagraphStyle(
-                'CustomNormal',
-                fontName=font_name,
-                fontSize=9,
-            )
+    def pdf_job_start_view(self, request: HttpRequest) -> JsonResponse:
+        """Запуск формирования PDF отчета (POST), ответ — состояние задания."""
+        if not self._check_reports_permission(request):
+            return JsonResponse({'error': 'Нет прав для экспорта отчетов'}, status=403)
+        if request.method != 'POST':
+            return JsonResponse({'error': 'Метод не поддерживается'}, status=405)
 
-            elements = []
-
-            title_text = {
-                'actions': 'Отчёт по действиям пользователей',
-                'bookings': 'Отчёт по бронированиям',
-                'revenue': 'Отчёт по доходам',
-                'users': 'Отчёт по пользователям',
-                'logins': 'Отчёт по подключениям'
-            }.get(report_type, 'Отчёт')
-
-            elements.append(Paragraph(title_text, title_style))
-            elements.append(Paragraph(
-                f"ООО ИНТЕРЬЕР | Сгенерировано: {timezone.now().strftime('%d.%m.%Y %H:%M')}",
-                subtitle_style
-            ))
-            elements.append(Spacer(1, 15))
-
-            if report_type == 'actions':
-                data = self._get_pdf_actions_data(date_from, date_to)
-                headers = ['Дата', 'Пользователь', 'Действие', 'Модель', 'Объект', 'IP']
-            elif report_type == 'bookings':
-                data = self._get_pdf_bookings_data(date_from, date_to)
-                headers = ['ID', 'Помещение', 'Клиент', 'Статус', 'Сумма', 'Дата']
-            elif report_type == 'revenue':
-                data = self._get_pdf_revenue_data(date_from, date_to)
-                headers = ['Период', 'Бронирований', 'Сумма']
-            elif report_type == 'users':
-                data = self._get_pdf_users_data(date_from, date_to)
-                headers = ['Пользователь', 'Email', 'Тип', 'Регистрация', 'Бронирований']
-            elif report_type == 'logins':
-                data = self._get_pdf_logins_data(date_from, date_to)
-                headers = ['Дата', 'Пользователь', 'IP адрес', 'Браузер']
-            else:
-                data = []
-                headers = []
-
-            if data:
-                table_data = [headers] + data
-
-                col_widths = None
-                if report_type == 'actions':
-                    col_widths = [3*cm, 3*cm, 2.5*cm, 2.5*cm, 8*cm, 3*cm]
-                elif report_type == 'bookings':
-                    col_widths = [1.5*cm, 7*cm, 4*cm, 3*cm, 3*cm, 3*cm]
-
-                table = Table(table_data, repeatRows=1, colWidths=col_widths)
-
-                table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d4af37')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1a1a1a')),
-                    ('FONTNAME', (0, 0), (-1, 0), font_name),
-                    ('FONTSIZE', (0, 0), (-1, 0), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                    ('TOPPADDING', (0, 0), (-1, 0), 10),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#1a1a1a')),
-                    ('FONTNAME', (0, 1), (-1, -1), font_name),
-                    ('FONTSIZE', (0, 1), (-1, -1), 8),
-                    ('TOPPADDING', (0, 1), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 8),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d4af37')),
-                    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#b8941f')),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]))
-
-                elements.append(table)
-            else:
-                elements.append(Paragraph("Нет данных для отображения", normal_style))
+        report_type = request.POST.get('type', 'actions')
+        if report_type not in REPORTS:
+            return JsonResponse({'error': 'Неизвестный тип отчета'}, status=400)
 
-            doc.build(elements)
+        job = ReportPdf.start(report_type, request.POST.get('date_from'), request.POST.get('date_to'), request.user)
+        return JsonResponse(self._pdf_job_state(job))
 
-            buffer.seek(0)
-            filename = f'report_{report_type}_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    def pdf_job_status_view(self, request: HttpRequest, job_id: int) -> JsonResponse:
+        """Состояние и прогресс задания PDF отчета."""
+        if not self._check_reports_permission(request):
+            return JsonResponse({'error': 'Нет прав для экспорта отчетов'}, status=403)
 
-            response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        job = BackgroundJob.objects.filter(pk=job_id, kind=BackgroundJob.Kind.REPORT_PDF).first()
+        if job is None:
+            return JsonResponse({'error': 'Задание не найдено'}, status=404)
+        return JsonResponse(self._pdf_job_state(job))
 
-            ActionLog.objects.create(
-                user=request.user,
-                action_type=ActionLog.ActionType.OTHER,
-                model_name='report',
-                object_repr=f'Скачан PDF отчёт: {report_type}',
-                ip_address=request.META.get('REMOTE_ADDR')
-            )
-
-            return response
+    def pdf_job_download_view(self, request: HttpRequest, job_id: int) -> HttpResponse:
+        """Скачивание готового PDF отчета."""
+        if not self._check_reports_permission(request):
+            messages.error(request, 'У вас нет прав для экспорта PDF отчетов.')
+            return redirect('interior_admin:index')
 
-        except ImportError:
-            messages.warning(request, 'Для генерации PDF установите: pip install reportlab')
+        job = BackgroundJob.objects.filter(pk=job_id, kind=BackgroundJob.Kind.REPORT_PDF).first()
+        if job is None or ReportPdf.file_path(job) is None:
+            messages.error(request, 'PDF отчет не найден или еще не готов.')
             return redirect('interior_admin:reports')
-        except Exception as e:
-            messages.error(request, f'Ошибка генерации PDF: {e}')
+        return self._pdf_file_response(request, job)
+
+    def _pdf_job_state(self, job: BackgroundJob) -> dict[str, Any]:
+        state = BackgroundJobs.state(job)
+        state['status_url'] = reverse('interior_admin:pdf_job_status', args=[job.pk])
+        state['download_url'] = (
+            reverse('interior_admin:pdf_job_download', args=[job.pk])
+            if job.status == BackgroundJob.Status.DONE else None
+        )
+        return state
+
+    def _pdf_file_response(self, request: HttpRequest, job: BackgroundJob) -> HttpResponse:
+        path = ReportPdf.file_path(job)
+        if path is None:
+            messages.error(request, 'PDF отчет не найден или еще не готов.')
             return redirect('interior_admin:reports')
 
-    def _get_actions_queryset(self, date_from: Optional[str], date_to: Optional[str]) -> QuerySet:
-        logs = ActionLog.objects.select_related('user').order_by('-created_at')
-        if date_from:
-            try:
-                dt = datetime.strptime(date_from, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__gte=dt.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt = datetime.strptime(date_to, '%Y-%m-%d')
-                logs = logs.filter(created_at__date__lte=dt.date())
-            except ValueError:
-                pass
-        return logs
-
-    def _get_bookings_queryset(self, date_from: Optional[str], date_to: Optional[str]) -> QuerySet:
-        bookings = Booking.objects.select_related('space', 'tenant', 'status').order_by('-created_at')
-        if date_from:
-            try:
-                dt = datetime.strptime(date_from, '%Y-%m-%d')
-                bookings = bookings.filter(created_at__date__gte=dt.date())
-            except ValueError:
-                pass
-        if date_to:
-            try:
-                dt = datetime.strptime(date_to, '%Y-%m-%d')
-                bookings = bookings.filter(created_at__date__lte=dt.date())
-            except ValueError:
-                pass
-        return bookings
-
-    def _get_actions_export_data(self, date_from: Optional[str], date_to: Optional[str]) -> dict:
-        logs = self._get_actions_queryset(date_from, date_to)[:1000]
-        return {
-            'report_type': 'actions',
-            'generated_at': timezone.now().isoformat(),
-            'count': logs.count(),
-            'data': [
-                {
-                    'datetime': log.created_at.isoformat(),
-                    'user': log.user.username if log.user else None,
-                    'action': log.action_type,
-                    'model': log.model_name,
-                    'object_id': log.object_id,
-                    'object': log.object_repr,
-                    'ip': log.ip_address
-                }
-                for log in logs
-            ]
-        }
+        report_type = job.params.get('report_type', 'report')
+        ActionLog.objects.create(
+            user=request.user,
+            action_type=ActionLog.ActionType.OTHER,
+            model_name='report',
+            object_repr=f'Скачан PDF отчёт: {report_type}',
+            ip_address=request.META.get('REMOTE_ADDR')
+        )
+        filename = f'report_{report_type}_{timezone.localtime(job.finished_at or job.created_at):%Y%m%d_%H%M%S}.pdf'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/pdf')
 
-    def _get_bookings_export_data(self, date_from: Optional[str], date_to: Optional[str]) -> dict:
-        bookings = self._get_bookings_queryset(date_from, date_to)[:1000]
-        return {
-            'report_type': 'bookings',
-            'generated_at': timezone.now().isoformat(),
-            'count': bookings.count(),
-            'data': [
-                {
-                    'id': b.id,
-                    'space': b.space.title if b.space else None,
-                    'tenant': b.tenant.username if b.tenant else None,
-                    'status': b.status.name if b.status else None,
-                    'total_amount': float(b.total_amount),
-                    'created_at': b.created_at.isoformat()
-                }
-                for b in bookings
-            ]
-        }
+    def dashboard_view(self, request: HttpRequest) -> TemplateResponse:
+        if not self._check_reports_permission(request):
+            messages.error(request, 'У вас нет прав для просмотра дашборда.')
+            return redirect('interior_admin:index')
 
-    def _get_revenue_export_data(self, date_from: Optional[str], date_to: Optional[str]) -> dict:
-        data = self._get_pdf_revenue_data(date_from, date_to)
-        return {
-            'report_type': 'revenue',
-            'generated_at': timezone.now().isoformat(),
-            'data': [
-                {'date': d[0], 'count': d[1], 'amount': d[2]}
-                for d in data
-            ]
-        }
+        today = timezone.localdate()
+        thirty_days_ago = today - timedelta(days=30)
+        statuses = {status.pk: status for status in ReferenceData.get().booking_statuses.values()}
+        paid_ids = {pk for pk, status in statuses.items() if status.code in UserStats.PAID_STATUSES}
+
+        # Оба графика строятся по одному запросу к дневным итогам
+        daily_counts: dict[date, int] = {}
+        daily_revenue: dict[date, Decimal] = {}
+        for row in BookingRollup.summary(
+            thirty_days_ago, today - timedelta(days=1), group_by=('date', 'status_id')
+        ):
+            daily_counts[row['date']] = daily_counts.get(row['date'], 0) + row['bookings']
+            if row['status_id'] in paid_ids:
+                daily_revenue[row['date']] = daily_revenue.get(row['date'], 0) + row['revenue']
+
+        days = [thirty_days_ago + timedelta(days=i) for i in range(30)]
+        bookings_by_day = [
+            {'date': day.strftime('%d.%m'), 'count': daily_counts.get(day, 0)}
+            for day in days
+        ]
+        revenue_by_day = [
+            {'date': day.strftime('%d.%m'), 'amount': float(daily_revenue.get(day, 0))}
+            for day in days
+        ]
 
-    def _get_users_export_data(self, date_from: Optional[str], date_to: Optional[str]) -> dict:
-        data = self._get_pdf_users_data(date_from, date_to)
-        return {
-            'report_type': 'users',
-            'generated_at': timezone.now().isoformat(),
-            'data': [
-                {'username': d[0], 'email': d[1], 'type': d[2], 'registered': d[3], 'bookings': d[4]}
-                for d in data
-            ]
-        }
+        top_spaces = [
+            {
+                'pk': row['space_id'],
+                'title': row['space__title'],
+                'bookings_count': row['bookings'],
+                'revenue': row['revenue'],
+            }
+            for row in BookingRollup.summary(
+                group_by=('space_id', 'space__title')
+            ).order_by('-bookings')[:5]
+        ]
+
+        status_distribution = [
+            {
+                'status__name': statuses[row['status_id']].name,
+                'status__color': statuses[row['status_id']].color,
+                'count': row['bookings'],
+            }
+            for row in BookingRollup.summary(group_by=('status_id',))
+            if row['status_id'] in statuses and row['bookings']
+        ]
 
-    def _get_logins_export_data(self, date_from: Optional[str], date_to: Optional[str]) -> dict:
-        data = self._get_pdf_logins_data(date_from, date_to)
-        return {
-            'report_type': 'logins',
-            'generated_at': timezone.now().isoformat(),
-            'data': [
-                {'datetime': d[0], 'user': d[1], 'ip': d[2], 'browser': d[3]}
-                for d in data
-            ]
+        context = {
+            **self.each_context(request),
+            'title': 'Аналитический дашборд',
+            'bookings_by_day': json.dumps(bookings_by_day),
+            'revenue_by_day': json.dumps(revenue_by_day),
+            'top_spaces': top_spaces,
+            'status_distribution': status_distribution,
         }
+        return TemplateResponse(request, 'admin/reports/dashboard.html', context)
 
 
 # Создаём экземпляр кастомного AdminSite
@@ -1180,6 +716,23 @@ class SpaceAdmin(LoggingAdminMixin, admin.ModelAdmin):
     search_fields = ('title', 'description', 'owner__username')
     prepopulated_fields = {'slug': ('title',)}
     inlines = [SpaceImageInline, SpacePriceInline]
+    actions = ['close_spaces']
+
+    @admin.action(description='Закрыть помещения (отменить будущие бронирования и вернуть предоплаты)')
+    def close_spaces(self, request, queryset):
+        from .services.space_closure import SpaceClosureService
+
+        for space in queryset:
+            report = SpaceClosureService.close_space(space, reason='Помещение закрыто')
+            message = (
+                f'«{space.title}»: отменено {report["cancelled"]} бронирований, '
+                f'возвращено {report["refunded"]} из {report["refunds_total"]} предоплат'
+            )
+            if report['failed']:
+                failed_ids = ', '.join(f'#{f["booking_id"]}' for f in report['failed'])
+                self.message_user(request, f'{message}. Ошибки возврата: {failed_ids}', messages.WARNING)
+            else:
+                self.message_user(request, message)
 
 
 @admin.register(SpaceImage, site=interior_admin_site)
@@ -1220,6 +773,7 @@ class TransactionStatusAdmin(LoggingAdminMixin, admin.ModelAdmin):
 @admin.register(Transaction, site=interior_admin_site)
 class TransactionAdmin(LoggingAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'booking', 'amount', 'status', 'payment_method', 'created_at')
+    list_select_related = ('booking__space', 'status')
     list_filter = ('status', 'payment_method', 'created_at')
     search_fields = ('booking__id',)
     date_hierarchy = 'created_at'
@@ -1234,14 +788,19 @@ class ReviewAdmin(LoggingAdminMixin, admin.ModelAdmin):
 
     @admin.action(description='Одобрить выбранные отзывы')
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = ReviewModeration.set_approved(queryset, approved=True)
         self.message_user(request, f'Одобрено {updated} отзывов')
 
     @admin.action(description='Отклонить выбранные отзывы')
     def reject_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = ReviewModeration.set_approved(queryset, approved=False)
         self.message_user(request, f'Отклонено {updated} отзывов')
 
+    def delete_queryset(self, request, queryset):
+        # Счетчики рейтинга пересчитываются один раз на помещение
+        with ReviewModeration.batch():
+            super().delete_queryset(request, queryset)
+
 
 @admin.register(Favorite, site=interior_admin_site)
 class FavoriteAdmin(LoggingAdminMixin, admin.ModelAdmin):
@@ -1253,7 +812,7 @@ class FavoriteAdmin(LoggingAdminMixin, admin.ModelAdmin):
 @admin.register(ActionLog, site=interior_admin_site)
 class ActionLogAdmin(admin.ModelAdmin):
     list_display = ('created_at', 'user', 'action_type', 'model_name', 'object_repr', 'ip_address')
-    list_filter = ('action_type', 'model_name', 'created_at')
+    list_filter = ('action_type', 'model_name', 'user_agent__browser', 'created_at')
     search_fields = ('user__username', 'object_repr', 'ip_address')
     date_hierarchy = 'created_at'
     readonly_fields = ('user', 'action_type', 'model_name', 'object_id', 'object_repr', 'changes', 'ip_address', 'user_agent', 'created_at')
@@ -1264,4 +823,14 @@ class ActionLogAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         return False
 
+@admin.register(EmailOutbox, site=interior_admin_site)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'last_error')
+    readonly_fields = ('subject', 'recipients', 'from_email', 'body_text', 'body_html', 'attempts', 'last_error', 'created_at', 'updated_at', 'sent_at')
+
+    def has_add_permission(self, request):
+        return False
+
 admin_site = interior_admin_site
@@ -9,6 +9,8 @@
 #   - Указывает имя приложения для Django
 #   - Задаёт человекочитаемое название
 #   - Подключает сигналы при загрузке приложения
+#   - Подключает замеры шаблонов и кэша (RequestMetrics)
+#   - Регистрирует проверки конфигурации (rental/checks.py)
 #
 # ПРОЕКТ: ООО "ИНТЕРЬЕР" - Сайт аренды помещений
 # =============================================================================
@@ -39,5 +41,11 @@ class RentalConfig(AppConfig):
         Здесь подключаем сигналы для:
         - Автоматического создания профиля при регистрации
         - Пересчёта рейтинга при добавлении/удалении отзыва
+        А также замеры шаблонов и кэша для метрик запросов и проверки
+        конфигурации.
         """
         import rental.signals  # noqa: F401 - импорт нужен для регистрации сигналов
+        import rental.checks  # noqa: F401 - импорт нужен для регистрации проверок
+
+        from .services.request_metrics import RequestMetrics
+        RequestMetrics.install()
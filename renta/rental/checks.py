@@ -0,0 +1,51 @@
+"""
+====================================================================
+ПРОВЕРКИ КОНФИГУРАЦИИ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит проверки Django для развертывания
+(python manage.py check --deploy).
+
+Проверки:
+- check_shared_cache: Кэш по умолчанию должен быть общим для процессов
+
+Принцип работы:
+- Метки версий справочников (ReferenceData) и статуса блокировки
+  (UserBlockService) хранятся в кэше; процессы сверяют с ними свои
+  данные. С кэшем в памяти процесса смена метки не видна другим
+  воркерам, поэтому вне DEBUG выдается предупреждение
+====================================================================
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Бэкенды кэша, данные которых не видны другим процессам
+PROCESS_LOCAL_CACHES: tuple[str, ...] = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs: Any = None, **kwargs: Any) -> List[Warning]:
+    """
+    Предупредить, если кэш по умолчанию хранится в памяти процесса.
+
+    Returns:
+        List[Warning]: Найденные проблемы
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            'Кэш по умолчанию хранится в памяти процесса: смена справочников '
+            'и блокировка пользователей не будут видны другим воркерам.',
+            hint='Задайте REDIS_URL (общий кэш Redis, см. CACHES в settings.py).',
+            id='rental.W001',
+        )
+    ]
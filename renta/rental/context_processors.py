@@ -17,9 +17,13 @@ CONTEXT PROCESSORS ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕР
 - favorites_count: Количество избранных помещений для авторизованных пользователей
 
 Особенности:
-- Использование кэширования для оптимизации производительности
-- Умное обновление кэша при изменении данных (кэш сбрасывается при CRUD операциях)
-- Динамическое обновление счетчика избранного для каждого пользователя
+- Значения ленивые: вычисляются, только если шаблон к ним обратился
+  (фрагменты вроде spaces/_spaces_grid.html не трогают кэш и БД)
+- Результат запоминается на время запроса: повторные рендеринги
+  шаблонов в одном запросе не повторяют обращения
+- Города и категории берутся из реестра справочников, который
+  перезагружается при изменении справочника
+- Счетчик избранного берется из индекса избранного (FavoritesIndex)
 - Поддержка type hints для лучшей читаемости кода
 ====================================================================
 """
@@ -30,9 +34,10 @@ from typing import Any  # добавлены type hints
 from datetime import datetime  # правильный импорт
 
 from django.http import HttpRequest  # для типизации
-from django.core.cache import cache  # кеширование
+from django.utils.functional import SimpleLazyObject
 
-from .models import City, SpaceCategory
+from .services.favorites_index import FavoritesIndex
+from .services.reference_data import ReferenceData
 
 
 def global_context(request: HttpRequest) -> dict[str, Any]:
@@ -43,6 +48,12 @@ def global_context(request: HttpRequest) -> dict[str, Any]:
     при рендеринге любого шаблона и добавляет указанные данные
     в контекст шаблона.
 
+    Города, категории и счетчик избранного возвращаются ленивыми
+    объектами (SimpleLazyObject): обращение к кэшу или БД происходит
+    при первом использовании в шаблоне. Словарь сохраняется в атрибуте
+    запроса, поэтому вычисленные значения переиспользуются всеми
+    шаблонами этого запроса.
+
     Args:
         request (HttpRequest): Объект HTTP запроса
 
@@ -50,33 +61,25 @@ def global_context(request: HttpRequest) -> dict[str, Any]:
         dict[str, Any]: Словарь с глобальными данными для шаблонов
 
     Ключи словаря:
-        - header_cities: Список активных городов (кешируется на 15 минут)
-        - header_categories: Список активных категорий (кешируется на 15 минут)
+        - header_cities: Список активных городов (из реестра справочников)
+        - header_categories: Список активных категорий (из реестра справочников)
         - company_name: Название компании
         - company_phone: Телефон компании
         - company_email: Email компании
         - current_year: Текущий год для футера
         - favorites_count: Количество избранных помещений (только для авторизованных пользователей)
     """
-    # Кеширование списка городов для хедера
-    header_cities = cache.get('header_cities')
-    if header_cities is None:
-        header_cities = list(City.objects.filter(is_active=True).order_by('name')[:20])
-        cache.set('header_cities', header_cities, 60 * 15)  # 15 минут
-
-    # Кеширование списка категорий для хедера
-    header_categories = cache.get('header_categories')
-    if header_categories is None:
-        header_categories = list(SpaceCategory.objects.filter(is_active=True).order_by('name'))
-        cache.set('header_categories', header_categories, 60 * 15)  # 15 минут
+    context = getattr(request, '_global_context', None)
+    if context is not None:
+        return context
 
     # Базовый контекст
-    context: dict[str, Any] = {
-        # Города для выпадающего списка в хедере (кешируются)
-        'header_cities': header_cities,
+    context = {
+        # Города для выпадающего списка в хедере (из реестра справочников)
+        'header_cities': SimpleLazyObject(lambda: ReferenceData.cities()[:20]),
 
-        # Категории для навигации (кешируются)
-        'header_categories': header_categories,
+        # Категории для навигации
+        'header_categories': SimpleLazyObject(ReferenceData.categories),
 
         # Название компании
         'company_name': 'ООО "ИНТЕРЬЕР"',
@@ -92,19 +95,9 @@ def global_context(request: HttpRequest) -> dict[str, Any]:
     }
 
     # Количество избранного для авторизованных пользователей
-    if request.user.is_authenticated:
-        from .models import Favorite
-
-        # Уникальный ключ кэша для каждого пользователя
-        cache_key = f'favorites_count_{request.user.id}'
-        favorites_count = cache.get(cache_key)
-
-        if favorites_count is None:
-            # Получаем актуальное количество избранных помещений
-            favorites_count = Favorite.objects.filter(user=request.user).count()
-            # Кэшируем на 5 минут
-            cache.set(cache_key, favorites_count, 60 * 5)
-
-        context['favorites_count'] = favorites_count
+    user = request.user
+    if user.is_authenticated:
+        context['favorites_count'] = SimpleLazyObject(lambda: FavoritesIndex.count(user.id))
 
-    return context
\ No newline at end of file
+    request._global_context = context
+    return context
@@ -17,6 +17,7 @@ from .helpers import (
     parse_int,
     parse_float,
     parse_bool,
+    period_lookup,
     format_price,
     format_area,
     truncate_text,
@@ -26,6 +27,8 @@ from .helpers import (
 )
 from .pagination import (
     paginate,
+    keyset_paginate,
+    KeysetPage,
     PaginationMixin,
     DEFAULT_PAGE_SIZE,
     MAX_PAGE_SIZE,
@@ -55,6 +58,7 @@ __all__ = [
     'parse_int',
     'parse_float',
     'parse_bool',
+    'period_lookup',
     'format_price',
     'format_area',
     'truncate_text',
@@ -63,6 +67,8 @@ __all__ = [
     'generate_unique_slug',
     # Пагинация
     'paginate',
+    'keyset_paginate',
+    'KeysetPage',
     'PaginationMixin',
     'DEFAULT_PAGE_SIZE',
     'MAX_PAGE_SIZE',
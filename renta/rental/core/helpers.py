@@ -9,10 +9,12 @@
 from __future__ import annotations
 
 import re
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from typing import Any, Optional, Type
 
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 from unidecode import unidecode
 
@@ -79,6 +81,42 @@ def parse_bool(value: Any, default: bool = False) -> bool:
     return bool(value)
 
 
+def period_lookup(
+    date_from: Optional[str],
+    date_to: Optional[str],
+    field: str = 'created_at'
+) -> dict[str, datetime]:
+    """
+    Фильтр периода по полю даты-времени для отчётов.
+
+    Вместо field__date (приведение типа в SQL, которое мешает индексам
+    и отбору партиций) используются полуоткрытые границы по самому
+    полю. Некорректные даты игнорируются.
+
+    Args:
+        date_from: Начало периода (YYYY-MM-DD, включительно)
+        date_to: Конец периода (YYYY-MM-DD, включительно)
+        field: Имя поля даты-времени
+
+    Returns:
+        Аргументы для QuerySet.filter()
+    """
+    lookup: dict[str, datetime] = {}
+    if date_from:
+        try:
+            day = datetime.strptime(date_from, '%Y-%m-%d').date()
+            lookup[f'{field}__gte'] = timezone.make_aware(datetime.combine(day, time.min))
+        except ValueError:
+            pass
+    if date_to:
+        try:
+            day = datetime.strptime(date_to, '%Y-%m-%d').date() + timedelta(days=1)
+            lookup[f'{field}__lt'] = timezone.make_aware(datetime.combine(day, time.min))
+        except ValueError:
+            pass
+    return lookup
+
+
 # =============================================================================
 # ФОРМАТИРОВАНИЕ
 # =============================================================================
@@ -3,15 +3,23 @@
 ЦЕНТРАЛИЗОВАННАЯ ПАГИНАЦИЯ
 ====================================================================
 Единая точка для пагинации во всех представлениях.
+
+- paginate / PaginationMixin: Постраничная навигация (OFFSET + COUNT)
+- keyset_paginate: Навигация по ключу (created_at, id) без OFFSET и
+  COUNT — для больших таблиц, где глубокие страницы дороги
 ====================================================================
 """
 
 from __future__ import annotations
 
-from typing import Optional
+import base64
+import binascii
+from dataclasses import dataclass, field as dataclass_field
+from datetime import datetime
+from typing import Any, Iterator, Optional
 
 from django.core.paginator import Paginator, Page, EmptyPage, PageNotAnInteger
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
 from django.http import HttpRequest
 
 
@@ -97,3 +105,115 @@ class PaginationMixin:
             self.page_param,
             self.per_page_param
         )
+
+
+@dataclass
+class KeysetPage:
+    """
+    Страница навигации по ключу.
+
+    Attributes:
+        object_list: Объекты страницы (от новых к старым)
+        next_cursor: Курсор следующей (более старой) страницы
+        previous_cursor: Курсор предыдущей (более новой) страницы
+    """
+    object_list: list = dataclass_field(default_factory=list)
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    """Закодировать ключ (дата, id) в строку для URL."""
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    """
+    Раскодировать курсор из URL.
+
+    Returns:
+        Кортеж (дата, id) или None для пустого/некорректного курсора
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def keyset_paginate(
+    queryset: QuerySet,
+    request: HttpRequest,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    field: str = 'created_at',
+    after_param: str = 'after',
+    before_param: str = 'before'
+) -> KeysetPage:
+    """
+    Навигация по ключу (field, id) от новых записей к старым.
+
+    Страница выбирается условием по индексируемому ключу и LIMIT,
+    поэтому стоимость не зависит от глубины страницы, а общее
+    количество записей не считается.
+
+    Args:
+        queryset: QuerySet для пагинации (сортировка задаётся здесь)
+        request: HTTP запрос
+        page_size: Размер страницы
+        field: Поле даты, по которому идёт навигация
+        after_param: Параметр курсора следующей (более старой) страницы
+        before_param: Параметр курсора предыдущей (более новой) страницы
+
+    Returns:
+        KeysetPage: Объекты страницы и курсоры соседних страниц
+    """
+    after = decode_cursor(request.GET.get(after_param))
+    before = decode_cursor(request.GET.get(before_param)) if after is None else None
+
+    if before is not None:
+        value, pk = before
+        rows = list(
+            queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'pk__gt': pk}))
+            .order_by(field, 'pk')[:page_size + 1]
+        )
+        has_newer = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        has_older = True
+    else:
+        if after is not None:
+            value, pk = after
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+        rows = list(queryset.order_by(f'-{field}', '-pk')[:page_size + 1])
+        has_older = len(rows) > page_size
+        rows = rows[:page_size]
+        has_newer = after is not None
+
+    page = KeysetPage(object_list=rows)
+    if rows:
+        if has_older:
+            page.next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].pk)
+        if has_newer:
+            page.previous_cursor = encode_cursor(getattr(rows[0], field), rows[0].pk)
+    return page
@@ -28,6 +28,7 @@ from django.utils.text import slugify
 from unidecode import unidecode
 
 from ..models import Space, SpaceImage, City, SpaceCategory
+from ..services.reference_data import ReferenceData
 
 
 class SpaceFilterForm(forms.Form):
@@ -152,12 +153,16 @@ class SpaceFilterForm(forms.Form):
         """
         super().__init__(*args, **kwargs)
         # Загружаем актуальные данные для select'ов
-        self.fields['city'].queryset = City.objects.filter(
-            is_active=True
-        ).order_by('name')
-        self.fields['category'].queryset = SpaceCategory.objects.filter(
-            is_active=True
-        ).order_by('name')
+        self.fields['city'].queryset = City.objects.filter(is_active=True)
+        self.fields['category'].queryset = SpaceCategory.objects.filter(is_active=True)
+        # Варианты select'ов берутся из реестра справочников без запроса к БД;
+        # queryset остаётся только для валидации выбранного значения
+        self.fields['city'].choices = ReferenceData.model_choices(
+            self.fields['city'], ReferenceData.cities()
+        )
+        self.fields['category'].choices = ReferenceData.model_choices(
+            self.fields['category'], ReferenceData.categories()
+        )
 
 
 class SpaceForm(forms.ModelForm):
@@ -253,12 +258,16 @@ class SpaceForm(forms.ModelForm):
             **kwargs: Именованные аргументы
         """
         super().__init__(*args, **kwargs)
-        self.fields['city'].queryset = City.objects.filter(
-            is_active=True
-        ).order_by('name')
-        self.fields['category'].queryset = SpaceCategory.objects.filter(
-            is_active=True
-        ).order_by('name')
+        self.fields['city'].queryset = City.objects.filter(is_active=True)
+        self.fields['category'].queryset = SpaceCategory.objects.filter(is_active=True)
+        # Варианты select'ов берутся из реестра справочников без запроса к БД;
+        # queryset остаётся только для валидации выбранного значения
+        self.fields['city'].choices = ReferenceData.model_choices(
+            self.fields['city'], ReferenceData.cities()
+        )
+        self.fields['category'].choices = ReferenceData.model_choices(
+            self.fields['category'], ReferenceData.categories()
+        )
 
     def save(self, commit: bool = True) -> Space:
         """
@@ -8,6 +8,20 @@
 # ДОСТУПНЫЕ КОМАНДЫ:
 #   python manage.py populate_db        # Заполнить БД тестовыми данными
 #   python manage.py populate_db --clear  # Очистить и заполнить заново
+#   python manage.py send_outbox_emails # Фоновая отправка писем из очереди
+#   python manage.py send_outbox_emails --once  # Отправить одну пачку
+#   python manage.py send_moderator_digest      # Сводка событий модераторам
+#   python manage.py close_space <id>   # Закрыть помещение, вернуть предоплаты
+#   python manage.py partition_action_logs      # Партиции журнала на будущие месяцы
+#   python manage.py prune_action_logs  # Отсоединить партиции журнала старше срока
+#   python manage.py archive_action_logs        # Выгрузить старый журнал в gzip JSONL
+#   python manage.py backfill_user_agents       # Перенести User-Agent журнала в справочник
+#   python manage.py rebuild_space_ratings      # Пересчитать счетчики рейтинга помещений
+#   python manage.py rebuild_user_stats         # Пересчитать статистику пользователей
+#   python manage.py rebuild_booking_rollup     # Пересчитать дневные итоги бронирований
+#   python manage.py backup_db          # Сжатая резервная копия БД (gzip/zstd JSONL)
+#   python manage.py restore_backup <файл>      # Восстановить БД из резервной копии
+#   python manage.py benchmark_profanity        # Замер скорости фильтра мата
 #
 # СОЗДАНИЕ НОВОЙ КОМАНДЫ:
 #   1. Создать файл my_command.py в этой директории
@@ -0,0 +1,109 @@
+"""
+КОМАНДА ДЛЯ АРХИВАЦИИ СТАРЫХ ЗАПИСЕЙ ЖУРНАЛА ДЕЙСТВИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py archive_action_logs
+Опции:
+    --before YYYY-MM-DD  Архивировать записи раньше этой даты
+                         (по умолчанию начало самого старого хранимого
+                         месяца по ACTION_LOG_RETENTION_MONTHS)
+    --after YYYY-MM-DD   Архивировать записи начиная с этой даты
+    --output-dir PATH    Каталог архива (по умолчанию backups/action_logs)
+    --max-rows N         Строк в одном файле до ротации (по умолчанию 500000)
+    --chunk-size N       Размер пачки чтения и удаления (по умолчанию 2000)
+    --keep-rows          Не удалять выгруженные записи из БД
+
+Записи выгружаются в файлы .jsonl.gz с манифестом контрольных сумм.
+Строки удаляются только после проверки всех файлов по манифесту.
+После архивации опустевшие партиции можно удалить командой
+prune_action_logs --drop.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...services.log_archive import ActionLogArchiver
+from ...services.log_partitions import ActionLogPartitionService, add_months
+
+
+class Command(BaseCommand):
+    """Выгрузка старых записей журнала в сжатые файлы и их удаление."""
+
+    help = 'Архивирует старые записи журнала действий в gzip JSONL и удаляет их из БД'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--before', help='Архивировать записи раньше даты (YYYY-MM-DD)')
+        parser.add_argument('--after', help='Архивировать записи начиная с даты (YYYY-MM-DD)')
+        parser.add_argument(
+            '--output-dir',
+            default=os.path.join(settings.BASE_DIR, 'backups', 'action_logs'),
+            help='Каталог архива',
+        )
+        parser.add_argument('--max-rows', type=int, default=500000, help='Строк в одном файле')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Размер пачки')
+        parser.add_argument(
+            '--keep-rows',
+            action='store_true',
+            help='Не удалять выгруженные записи',
+        )
+
+    def _parse_date(self, value: Optional[str], option: str) -> Optional[datetime]:
+        """Начало указанного дня в часовом поясе проекта."""
+        if not value:
+            return None
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError(f'Неверный формат {option}: {value} (ожидается YYYY-MM-DD)')
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        date_to = self._parse_date(options['before'], '--before')
+        if date_to is None:
+            keep_months = getattr(settings, 'ACTION_LOG_RETENTION_MONTHS', 12)
+            date_to = ActionLogPartitionService.month_start(
+                add_months(ActionLogPartitionService.current_month(), -(max(keep_months, 1) - 1))
+            )
+        date_from = self._parse_date(options['after'], '--after')
+        if date_from and date_from >= date_to:
+            raise CommandError('--after должна быть раньше --before')
+
+        archiver = ActionLogArchiver(
+            output_dir=options['output_dir'],
+            date_to=date_to,
+            date_from=date_from,
+            max_rows_per_file=options['max_rows'],
+            chunk_size=options['chunk_size'],
+        )
+
+        self.stdout.write(f'Архивация записей раньше {date_to:%d.%m.%Y}...')
+        manifest = archiver.archive()
+        for entry in manifest['files']:
+            self.stdout.write(f"  {entry['name']}: {entry['rows']} строк, sha256 {entry['sha256'][:16]}…")
+
+        if not manifest['total_rows']:
+            self.stdout.write('Нет записей для архивации')
+            return
+
+        broken = archiver.verify(manifest)
+        if broken:
+            raise CommandError(f'Файлы архива не прошли проверку: {", ".join(broken)}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Выгружено строк: {manifest['total_rows']}, манифест: {archiver.manifest_path}"
+        ))
+
+        if options['keep_rows']:
+            return
+
+        deleted = archiver.delete_archived(
+            on_progress=lambda count: self.stdout.write(f'  Удалено: {count}')
+        )
+        self.stdout.write(self.style.SUCCESS(f'Удалено записей из БД: {deleted}'))
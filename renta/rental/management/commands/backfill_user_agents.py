@@ -0,0 +1,58 @@
+"""
+КОМАНДА ДЛЯ ПЕРЕНОСА USER-AGENT ЖУРНАЛА ДЕЙСТВИЙ В СПРАВОЧНИК
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск:
+    python manage.py backfill_user_agents --stash   # до migrate
+    python manage.py migrate
+    python manage.py backfill_user_agents           # после migrate
+Опции:
+    --stash         Сохранить строки колонки action_logs.user_agent во временную таблицу
+    --batch-size N  Сколько записей журнала переносить за одну транзакцию (по умолчанию 1000)
+
+Нужна один раз при обновлении базы, где журнал хранил User-Agent
+текстовой колонкой: миграция на справочник user_agents меняет колонку
+на внешний ключ, и без этого шага строки старых записей теряются.
+На новой базе команда ничего не делает.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.user_agents import UserAgentService
+
+
+class Command(BaseCommand):
+    """Перенос строк User-Agent старых записей журнала в справочник."""
+
+    help = 'Переносит User-Agent старых записей журнала действий в справочник user_agents'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--stash',
+            action='store_true',
+            help='Сохранить строки старой колонки до migrate',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество записей журнала в одной транзакции',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options['stash']:
+            try:
+                stashed = UserAgentService.stash_legacy_column()
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'Сохранено строк User-Agent: {stashed}. Выполните migrate и запустите команду без --stash'
+            ))
+            return
+
+        processed = UserAgentService.backfill_legacy(batch_size=max(1, options['batch_size']))
+        self.stdout.write(self.style.SUCCESS(f'Перенесено записей журнала: {processed}'))
@@ -0,0 +1,58 @@
+"""
+КОМАНДА ДЛЯ СОЗДАНИЯ РЕЗЕРВНОЙ КОПИИ БАЗЫ ДАННЫХ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py backup_db
+Опции:
+    --output PATH        Файл копии (по умолчанию новый файл в BACKUP_DIR;
+                         "-" - вывести сжатую копию в stdout)
+    --compression NAME   Сжатие: gzip или zstd (по умолчанию BACKUP_COMPRESSION)
+
+Модели выгружаются пачками в сжатый файл JSON Lines; рядом с файлом
+пишется манифест с количеством объектов и контрольной суммой.
+Подходит для запуска по cron. Восстановление: restore_backup.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.backup_engine import BACKUP_CODECS, BackupEngine
+
+
+class Command(BaseCommand):
+    """Потоковое создание сжатой резервной копии базы данных."""
+
+    help = 'Создает сжатую резервную копию базы данных (JSON Lines, gzip или zstd)'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--output', help='Файл копии или "-" для stdout')
+        parser.add_argument(
+            '--compression',
+            choices=sorted(BACKUP_CODECS),
+            help='Сжатие (по умолчанию BACKUP_COMPRESSION)',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        codec = options['compression'] or BackupEngine.default_codec()
+        if codec not in BackupEngine.codecs():
+            raise CommandError('Для сжатия zstd установите: pip install zstandard')
+
+        if options['output'] == '-':
+            for chunk in BackupEngine.stream(codec):
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        reported = [0]
+
+        def progress(percent: float) -> None:
+            if percent - reported[0] >= 10:
+                reported[0] = int(percent)
+                self.stderr.write(f'  {reported[0]}%')
+
+        path = BackupEngine.write(options['output'], codec, progress)
+        self.stdout.write(self.style.SUCCESS(f'Резервная копия создана: {path}'))
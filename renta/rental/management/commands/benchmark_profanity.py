@@ -0,0 +1,92 @@
+"""
+КОМАНДА ДЛЯ ЗАМЕРА СКОРОСТИ ФИЛЬТРА НЕЦЕНЗУРНОЙ ЛЕКСИКИ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py benchmark_profanity
+Опции:
+    --count N    Количество отзывов в пачке (по умолчанию 20000)
+    --words N    Слов в сгенерированном отзыве (по умолчанию 60)
+    --from-db    Использовать тексты отзывов из БД (повторяются до --count)
+    --rounds N   Количество замеров, берётся лучший (по умолчанию 3)
+
+Выводит пропускную способность contains_profanity, find_profanity
+и censor_text (отзывов в секунду и МБ текста в секунду).
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from itertools import cycle, islice
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Review
+from ...services.profanity_filter import censor_text, contains_profanity, find_profanity
+
+# Словарь для генерации отзывов (около 2% отзывов содержат мат)
+SAMPLE_WORDS = (
+    'отличное помещение светлое просторное удобное расположение рядом метро '
+    'парковка вежливый персонал чисто уютно рекомендую хороший зал проектор '
+    'кондиционер тихо great place nice staff clean'
+).split()
+SAMPLE_PROFANITY = ('сука', 'х.у.й', 'bullshit', 'бляяяять')
+
+
+class Command(BaseCommand):
+    """Замер пропускной способности фильтра нецензурной лексики."""
+
+    help = 'Измеряет скорость проверки и цензуры отзывов на больших пачках'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--count', type=int, default=20000, help='Количество отзывов в пачке')
+        parser.add_argument('--words', type=int, default=60, help='Слов в сгенерированном отзыве')
+        parser.add_argument('--from-db', action='store_true', help='Взять тексты отзывов из БД')
+        parser.add_argument('--rounds', type=int, default=3, help='Количество замеров')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        count = max(1, options['count'])
+        if options['from_db']:
+            comments = list(Review.objects.values_list('comment', flat=True)[:count])
+            if not comments:
+                raise CommandError('В БД нет отзывов')
+            texts = list(islice(cycle(comments), count))
+        else:
+            texts = self._generate(count, max(1, options['words']))
+
+        size_mb = sum(len(text.encode('utf-8')) for text in texts) / 1024 / 1024
+        self.stdout.write(f'Отзывов: {len(texts)}, объём: {size_mb:.1f} МБ')
+
+        for name, func in (
+            ('contains_profanity', contains_profanity),
+            ('find_profanity', find_profanity),
+            ('censor_text', censor_text),
+        ):
+            elapsed = self._measure(func, texts, max(1, options['rounds']))
+            self.stdout.write(
+                f'{name:20} {len(texts) / elapsed:10.0f} отзывов/с {size_mb / elapsed:8.2f} МБ/с'
+            )
+
+    @staticmethod
+    def _generate(count: int, words: int) -> list[str]:
+        """Сгенерировать отзывы (детерминированно)."""
+        rng = random.Random(42)
+        texts = []
+        for index in range(count):
+            text = ' '.join(rng.choice(SAMPLE_WORDS) for _ in range(words))
+            if index % 50 == 0:
+                text += ' ' + rng.choice(SAMPLE_PROFANITY)
+            texts.append(text)
+        return texts
+
+    @staticmethod
+    def _measure(func: Callable[[str], Any], texts: list[str], rounds: int) -> float:
+        """Лучшее время обработки пачки из rounds замеров (секунды)."""
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for text in texts:
+                func(text)
+            best = min(best, time.perf_counter() - start)
+        return best
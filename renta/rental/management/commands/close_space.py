@@ -0,0 +1,74 @@
+"""
+КОМАНДА ДЛЯ ЗАКРЫТИЯ ПОМЕЩЕНИЯ С ОТМЕНОЙ БРОНИРОВАНИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py close_space <space_id>
+Опции:
+    --reason TEXT   Причина закрытия (комментарий модератора в бронированиях)
+    --workers N     Максимум параллельных запросов возврата (по умолчанию 4)
+    --keep-active   Не снимать помещение с публикации
+
+Команду можно безопасно запускать повторно: ключи идемпотентности
+возвратов детерминированы, двойной возврат не будет создан.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Space
+from ...services.space_closure import SpaceClosureService, DEFAULT_REFUND_WORKERS
+
+
+class Command(BaseCommand):
+    """Массовая отмена будущих бронирований и возврат предоплат."""
+
+    help = 'Закрывает помещение: отменяет будущие бронирования и возвращает предоплаты'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('space_id', type=int, help='ID помещения')
+        parser.add_argument('--reason', default='', help='Причина закрытия')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_REFUND_WORKERS,
+            help='Максимум параллельных запросов возврата',
+        )
+        parser.add_argument(
+            '--keep-active',
+            action='store_true',
+            help='Не снимать помещение с публикации',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        try:
+            space = Space.objects.get(pk=options['space_id'])
+        except Space.DoesNotExist:
+            raise CommandError(f"Помещение #{options['space_id']} не найдено")
+
+        def on_progress(done: int, total: int, booking, result: dict) -> None:
+            status = 'OK' if result['success'] else f"ОШИБКА: {result.get('error', '')}"
+            self.stdout.write(f'  [{done}/{total}] Бронирование #{booking.id}: {status}')
+
+        self.stdout.write(f'Закрытие помещения "{space.title}"...')
+        report = SpaceClosureService.close_space(
+            space,
+            reason=options['reason'],
+            deactivate=not options['keep_active'],
+            max_workers=options['workers'],
+            on_progress=on_progress,
+        )
+
+        self.stdout.write(f"Отменено бронирований: {report['cancelled']}")
+        self.stdout.write(
+            f"Возвращено предоплат: {report['refunded']} из {report['refunds_total']} "
+            f"на сумму {report['refunded_amount']} ₽"
+        )
+        if report['failed']:
+            self.stdout.write(self.style.ERROR(f"Ошибок возврата: {len(report['failed'])}"))
+            for failure in report['failed']:
+                self.stdout.write(f"  #{failure['booking_id']}: {failure['error']}")
+        else:
+            self.stdout.write(self.style.SUCCESS('Готово'))
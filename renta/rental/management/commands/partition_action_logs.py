@@ -0,0 +1,79 @@
+"""
+КОМАНДА ДЛЯ ОБСЛУЖИВАНИЯ ПАРТИЦИЙ ЖУРНАЛА ДЕЙСТВИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py partition_action_logs
+Опции:
+    --convert   Однократно перевести таблицу action_logs на помесячные партиции
+    --ahead N   Сколько будущих месяцев создавать (по умолчанию ACTION_LOG_PARTITIONS_AHEAD)
+    --status    Показать список партиций
+
+Без опций создаёт недостающие партиции на ближайшие месяцы.
+Команду нужно запускать по cron (например, ежедневно), чтобы партиция
+следующего месяца всегда существовала заранее.
+Работает только с PostgreSQL.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.log_partitions import ActionLogPartitionService
+
+
+class Command(BaseCommand):
+    """Создание помесячных партиций журнала действий."""
+
+    help = 'Переводит action_logs на помесячные партиции и создаёт партиции на будущие месяцы'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Перевести существующую таблицу на партиции (блокирует запись на время переноса)',
+        )
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=None,
+            help='Количество будущих месяцев',
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Показать список партиций',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not ActionLogPartitionService.is_supported():
+            raise CommandError('Партиционирование поддерживается только в PostgreSQL')
+
+        if options['status']:
+            status = ActionLogPartitionService.get_status()
+            if not status['partitioned']:
+                self.stdout.write('Таблица action_logs не разбита на партиции')
+                return
+            for name in status['partitions']:
+                self.stdout.write(f'  {name}')
+            return
+
+        if options['convert']:
+            try:
+                moved = ActionLogPartitionService.convert_table(options['ahead'])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'Таблица переведена на партиции, перенесено строк: {moved}'
+            ))
+            return
+
+        if not ActionLogPartitionService.is_partitioned():
+            raise CommandError('Таблица не разбита на партиции, сначала выполните --convert')
+
+        created = ActionLogPartitionService.ensure_partitions(options['ahead'])
+        if created:
+            self.stdout.write(self.style.SUCCESS(f'Созданы партиции: {", ".join(created)}'))
+        else:
+            self.stdout.write('Все партиции уже существуют')
@@ -0,0 +1,71 @@
+"""
+КОМАНДА ДЛЯ ОЧИСТКИ СТАРЫХ ПАРТИЦИЙ ЖУРНАЛА ДЕЙСТВИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py prune_action_logs
+Опции:
+    --keep-months N  Сколько месяцев хранить, включая текущий
+                     (по умолчанию ACTION_LOG_RETENTION_MONTHS)
+    --drop           Удалить партиции, а не только отсоединить
+    --dry-run        Только показать партиции, которые будут обработаны
+
+По умолчанию старые партиции отсоединяются и остаются отдельными
+таблицами (action_logs_yYYYYmMM) и могут быть удалены позже.
+Чтобы сохранить данные, сначала выполните archive_action_logs.
+Работает только с PostgreSQL.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...services.log_partitions import ActionLogPartitionService
+
+
+class Command(BaseCommand):
+    """Отсоединение/удаление партиций журнала старше срока хранения."""
+
+    help = 'Отсоединяет или удаляет партиции action_logs старше срока хранения'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--keep-months',
+            type=int,
+            default=None,
+            help='Сколько месяцев хранить, включая текущий',
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Удалить партиции после отсоединения',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать партиции для обработки',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not ActionLogPartitionService.is_partitioned():
+            raise CommandError('Таблица action_logs не разбита на партиции')
+
+        if options['dry_run']:
+            expired = ActionLogPartitionService.expired_partitions(options['keep_months'])
+            if not expired:
+                self.stdout.write('Нет партиций старше срока хранения')
+            for name, _ in expired:
+                self.stdout.write(f'  {name}')
+            return
+
+        processed = ActionLogPartitionService.apply_retention(
+            keep_months=options['keep_months'],
+            drop=options['drop']
+        )
+        if not processed:
+            self.stdout.write('Нет партиций старше срока хранения')
+            return
+
+        action = 'Удалены' if options['drop'] else 'Отсоединены'
+        self.stdout.write(self.style.SUCCESS(f'{action} партиции: {", ".join(processed)}'))
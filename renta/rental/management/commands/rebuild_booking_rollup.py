@@ -0,0 +1,53 @@
+"""
+КОМАНДА ДЛЯ ПЕРЕСЧЕТА ДНЕВНЫХ ИТОГОВ БРОНИРОВАНИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py rebuild_booking_rollup
+Опции:
+    --date-from YYYY-MM-DD  Начало периода (по умолчанию вся история)
+    --date-to YYYY-MM-DD    Конец периода (по умолчанию вся история)
+    --batch-size N          Сколько помещений пересчитывать за один набор запросов (по умолчанию 200)
+
+Заполняет таблицу BookingDailyStats по бронированиям. Нужна один раз
+после добавления таблицы и для восстановления после изменений данных
+в обход сигналов (например, через SQL).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ...models import Space
+from ...services.booking_rollup import BookingRollup
+
+
+class Command(BaseCommand):
+    """Пересчет дневных итогов бронирований по помещениям."""
+
+    help = 'Пересчитывает дневные итоги бронирований (количество и сумма по дням, помещениям и статусам)'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--date-from', default=None, help='Начало периода (YYYY-MM-DD)')
+        parser.add_argument('--date-to', default=None, help='Конец периода (YYYY-MM-DD)')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Количество помещений в одной пачке',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = max(1, options['batch_size'])
+        space_ids = list(Space.objects.order_by('pk').values_list('pk', flat=True))
+
+        rows = 0
+        for start in range(0, len(space_ids), batch_size):
+            rows += BookingRollup.recompute(
+                space_ids[start:start + batch_size], options['date_from'], options['date_to']
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано помещений: {len(space_ids)}, строк итогов: {rows}'
+        ))
@@ -0,0 +1,44 @@
+"""
+КОМАНДА ДЛЯ ПЕРЕСЧЕТА СЧЕТЧИКОВ РЕЙТИНГА ПОМЕЩЕНИЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py rebuild_space_ratings
+Опции:
+    --batch-size N  Сколько помещений пересчитывать за один запрос (по умолчанию 500)
+
+Заполняет поля rating_* модели Space по одобренным отзывам.
+Нужна один раз после добавления полей и для восстановления после
+массовых изменений отзывов в обход сигналов (например, через SQL).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ...models import Space
+from ...services.space_ratings import SpaceRatings
+
+
+class Command(BaseCommand):
+    """Пересчет счетчиков рейтинга всех помещений."""
+
+    help = 'Пересчитывает счетчики рейтинга помещений по одобренным отзывам'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество помещений в одной пачке',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = max(1, options['batch_size'])
+        space_ids = list(Space.objects.order_by('pk').values_list('pk', flat=True))
+
+        for start in range(0, len(space_ids), batch_size):
+            SpaceRatings.recompute(space_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано помещений: {len(space_ids)}'))
@@ -0,0 +1,44 @@
+"""
+КОМАНДА ДЛЯ ПЕРЕСЧЕТА СТАТИСТИКИ ПОЛЬЗОВАТЕЛЕЙ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py rebuild_user_stats
+Опции:
+    --batch-size N  Сколько пользователей пересчитывать за один набор запросов (по умолчанию 500)
+
+Заполняет таблицу UserStats по бронированиям, отзывам и избранному.
+Нужна один раз после добавления таблицы и для восстановления после
+изменений данных в обход сигналов (например, через SQL).
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ...models import CustomUser
+from ...services.user_stats import UserStatsService
+
+
+class Command(BaseCommand):
+    """Пересчет статистики активности всех пользователей."""
+
+    help = 'Пересчитывает статистику пользователей (бронирования, отзывы, избранное)'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество пользователей в одной пачке',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        batch_size = max(1, options['batch_size'])
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+
+        for start in range(0, len(user_ids), batch_size):
+            UserStatsService.recompute(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано пользователей: {len(user_ids)}'))
@@ -0,0 +1,67 @@
+"""
+КОМАНДА ДЛЯ ВОССТАНОВЛЕНИЯ БАЗЫ ДАННЫХ ИЗ РЕЗЕРВНОЙ КОПИИ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py restore_backup путь_к_файлу/backup_YYYYMMDD_HHMMSS.jsonl.gz
+Опции:
+    --no-verify   Не проверять контрольную сумму по манифесту
+    --no-rebuild  Не пересчитывать рейтинги, статистику пользователей
+                  и дневные итоги бронирований после восстановления
+    --noinput     Не запрашивать подтверждение
+
+Файл читается построчно (gzip, zstd, JSON Lines или старый JSON от
+dumpdata) и загружается в одной транзакции: при ошибке база остается
+в прежнем состоянии. Объекты с теми же ключами перезаписываются.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+
+from ...services.backup_engine import BackupEngine
+
+
+class Command(BaseCommand):
+    """Потоковое восстановление базы данных из резервной копии."""
+
+    help = 'Восстанавливает базу данных из резервной копии (backup_db или страница бэкапов)'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('path', help='Файл резервной копии')
+        parser.add_argument('--no-verify', action='store_true', help='Не проверять контрольную сумму')
+        parser.add_argument('--no-rebuild', action='store_true', help='Не пересчитывать производные таблицы')
+        parser.add_argument('--noinput', '--no-input', action='store_true', help='Не запрашивать подтверждение')
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл не найден: {path}')
+
+        if not options['noinput']:
+            answer = input(f'Данные из {path} перезапишут текущие записи. Продолжить? [y/N] ')
+            if answer.strip().lower() not in ('y', 'yes', 'д', 'да'):
+                self.stdout.write('Восстановление отменено')
+                return
+
+        reported = [0]
+
+        def progress(percent: float) -> None:
+            if percent - reported[0] >= 10:
+                reported[0] = int(percent)
+                self.stdout.write(f'  {reported[0]}%')
+
+        try:
+            restored = BackupEngine.restore(
+                path,
+                progress=progress,
+                verify=not options['no_verify'],
+                rebuild=not options['no_rebuild'],
+            )
+        except (ValueError, EOFError, DeserializationError) as e:
+            raise CommandError(f'Ошибка восстановления: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Восстановлено объектов: {restored}'))
@@ -0,0 +1,40 @@
+"""
+КОМАНДА ДЛЯ ОТПРАВКИ СВОДКИ СОБЫТИЙ МОДЕРАТОРАМ
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py send_moderator_digest
+Опции:
+    --force     Отправить сводку, не дожидаясь окончания окна
+
+Команду удобно запускать по cron чаще, чем MODERATOR_DIGEST_WINDOW_MINUTES:
+сводка уходит, только когда самое старое событие старше окна.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ...services.moderator_digest import ModeratorDigestService
+
+
+class Command(BaseCommand):
+    """Формирование сводки уведомлений для модераторов."""
+
+    help = 'Ставит в очередь сводку накопленных событий оплаты для модераторов'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Отправить сводку, не дожидаясь окончания окна',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        count = ModeratorDigestService.send_digest(force=options['force'])
+
+        if count:
+            self.stdout.write(self.style.SUCCESS(f'В сводку включено событий: {count}'))
+        else:
+            self.stdout.write('Нет событий для сводки')
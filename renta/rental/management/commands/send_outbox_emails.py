@@ -0,0 +1,71 @@
+"""
+КОМАНДА ДЛЯ ОТПРАВКИ ПИСЕМ ИЗ ОЧЕРЕДИ EMAIL_OUTBOX
+ООО "ИНТЕРЬЕР" - Аренда помещений
+
+Запуск: python manage.py send_outbox_emails
+Опции:
+    --once          Отправить одну пачку и завершиться (для cron)
+    --interval N    Пауза между опросами очереди в секундах (по умолчанию 2)
+    --batch-size N  Размер пачки писем (по умолчанию EMAIL_OUTBOX_BATCH_SIZE)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from ...services.email_outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    """Фоновый обработчик очереди исходящих писем."""
+
+    help = 'Отправляет письма из очереди email_outbox через одно SMTP-соединение'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить одну пачку и завершиться',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами пустой очереди (секунды)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Размер пачки писем',
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        sender = OutboxSender(batch_size=options['batch_size'])
+
+        try:
+            if options['once']:
+                stats = sender.send_batch()
+                self.stdout.write(self.style.SUCCESS(
+                    f"Отправлено: {stats['sent']}, ошибок: {stats['failed']}"
+                ))
+                return
+
+            self.stdout.write('Обработчик очереди писем запущен (Ctrl+C для остановки)')
+            while True:
+                stats = sender.send_batch()
+                if stats['claimed']:
+                    self.stdout.write(
+                        f"Отправлено: {stats['sent']}, ошибок: {stats['failed']}"
+                    )
+                else:
+                    # Очередь пуста — ждём новых писем
+                    time.sleep(options['interval'])
+
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Обработчик остановлен'))
+        finally:
+            sender.close()
@@ -9,6 +9,8 @@ MIDDLEWARE ДЛЯ ЛОГИРОВАНИЯ ДЕЙСТВИЙ САЙТА АРЕНД
 Основные компоненты:
 - ActionLoggingMiddleware: Middleware для логирования HTTP запросов
 - BlockedUserMiddleware: Middleware для проверки заблокированных пользователей
+- ReferenceDataMiddleware: Проверка версии реестра справочников раз в запрос
+- ServerTimingMiddleware: Метрики запроса и заголовок Server-Timing
 - log_action: Утилитарная функция для создания записей в журнале действий
 - get_client_ip: Вспомогательная функция для получения IP-адреса клиента
 - log_user_login, log_user_logout: Обработчики сигналов для логирования входа/выхода
@@ -30,16 +32,23 @@ MIDDLEWARE ДЛЯ ЛОГИРОВАНИЯ ДЕЙСТВИЙ САЙТА АРЕНД
 
 import json
 import logging
+import time
 from typing import Callable, Optional
 
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.signals import user_logged_in, user_logged_out
-from django.contrib.auth import logout
+from django.contrib.auth import SESSION_KEY as SESSION_KEY_USER_ID, logout
 from django.shortcuts import redirect
 from django.contrib import messages
 
 from .models import ActionLog, CustomUser
+from .services.logging_service import LoggingService
+from .services.reference_data import ReferenceData
+from .services.prometheus_metrics import PrometheusMetrics
+from .services.request_metrics import RequestMetrics
+from .services.user_block import SESSION_KEY as BLOCK_VERSION_SESSION_KEY, UserBlockService
 
 logger = logging.getLogger('rental')
 
@@ -79,6 +88,8 @@ def log_action(
 
     Утилитарная функция для создания стандартизированных записей
     в журнале действий с автоматическим извлечением метаданных из запроса.
+    Запись передаётся буферизованному писателю через LoggingService
+    и сохраняется в БД фоновым потоком.
 
     Args:
         user (Optional[CustomUser]): Пользователь, совершивший действие
@@ -93,27 +104,16 @@ def log_action(
             IP-адреса и User-Agent
 
     Returns:
-        ActionLog: Созданная запись в журнале действий
-
-    Raises:
-        Exception: Возможны любые исключения при создании записи в БД
+        ActionLog: Запись журнала, поставленная в очередь (ещё без pk)
     """
-    ip_address = None
-    user_agent = ''
-
-    if request:
-        ip_address = get_client_ip(request)
-        user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
-
-    return ActionLog.objects.create(
+    return LoggingService.log_action(
         user=user,
         action_type=action_type,
         model_name=model_name,
         object_id=object_id,
-        object_repr=object_repr[:255],
-        changes=changes or {},
-        ip_address=ip_address,
-        user_agent=user_agent
+        object_repr=object_repr,
+        changes=changes,
+        request=request
     )
 
 
@@ -123,6 +123,12 @@ class BlockedUserMiddleware(MiddlewareMixin):
 
     Если пользователь заблокирован (is_blocked=True), он автоматически
     выбрасывается из сессии и перенаправляется на страницу входа.
+
+    Статус не читается из БД на каждом запросе: метка версии статуса
+    из сессии сверяется с меткой в кэше (UserBlockService). Только
+    если метка изменилась (блокировка/разблокировка/правка пользователя),
+    статус один раз перечитывается из БД. Должен стоять после
+    AuthenticationMiddleware.
     """
 
     # Пути, которые доступны даже для заблокированных
@@ -140,37 +146,111 @@ class BlockedUserMiddleware(MiddlewareMixin):
         if any(request.path.startswith(path) for path in self.ALLOWED_PATHS):
             return None
 
-        # Проверяем наличие атрибута user (добавляется AuthenticationMiddleware)
-        if not hasattr(request, 'user'):
+        # ID пользователя берём из сессии, не загружая request.user
+        session = getattr(request, 'session', None)
+        user_id = session.get(SESSION_KEY_USER_ID) if session is not None else None
+        if not user_id:
             return None
 
-        # Проверяем только аутентифицированных пользователей
-        if request.user.is_authenticated:
-            try:
-                # Перезагружаем пользователя из БД для актуальных данных
-                user = CustomUser.objects.get(pk=request.user.pk)
-
-                # Проверяем флаг is_blocked
-                if hasattr(user, 'is_blocked') and user.is_blocked:
-                    # Разлогиниваем заблокированного пользователя
-                    logout(request)
-                    block_message = 'Ваш аккаунт заблокирован.'
-                    if hasattr(user, 'block_reason') and user.block_reason:
-                        block_message += f' Причина: {user.block_reason}'
-                    block_message += ' Обратитесь к администратору.'
-                    messages.error(request, block_message)
-                    return redirect('login')
-
-            except CustomUser.DoesNotExist:
+        try:
+            version = UserBlockService.get_version(user_id)
+            if session.get(BLOCK_VERSION_SESSION_KEY) == version:
+                return None
+
+            # Метка изменилась — перечитываем статус из БД
+            user = CustomUser.objects.filter(pk=user_id).only(
+                'id', 'is_blocked', 'block_reason'
+            ).first()
+
+            if user is None:
+                logout(request)
+                return redirect('login')
+
+            if user.is_blocked:
+                # Разлогиниваем заблокированного пользователя
                 logout(request)
+                block_message = 'Ваш аккаунт заблокирован.'
+                if user.block_reason:
+                    block_message += f' Причина: {user.block_reason}'
+                block_message += ' Обратитесь к администратору.'
+                messages.error(request, block_message)
                 return redirect('login')
-            except Exception as e:
-                # Логируем ошибку но не блокируем запрос
-                logger.error(f"BlockedUserMiddleware error: {e}")
+
+            session[BLOCK_VERSION_SESSION_KEY] = version
+        except Exception as e:
+            # Логируем ошибку но не блокируем запрос
+            logger.error(f"BlockedUserMiddleware error: {e}")
 
         return None
 
 
+class ReferenceDataMiddleware(MiddlewareMixin):
+    """
+    Middleware для проверки актуальности реестра справочников.
+
+    В начале запроса один раз сверяет метку версии справочников
+    (один cache.get); дальше в рамках запроса статусы, периоды,
+    города и категории берутся из памяти без обращений к кэшу и БД.
+    """
+
+    def process_request(self, request: HttpRequest) -> None:
+        """Проверка версии справочников в начале запроса."""
+        ReferenceData.begin_request()
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Сброс признака проверки по окончании запроса."""
+        ReferenceData.end_request()
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Middleware для сбора метрик выполнения запроса.
+
+    Считает SQL запросы и их время, время рендеринга шаблонов,
+    обращения к кэшу и внешние HTTP вызовы, добавляет их в заголовок
+    Server-Timing и учитывает в агрегатах по имени URL и в метриках
+    Prometheus.
+
+    Повторяющиеся SQL запросы (N+1) проверяет
+    RequestMetrics.check_repeated_queries.
+
+    Заголовок отдаётся всем при SERVER_TIMING_PUBLIC=True, иначе
+    только сотрудникам (staff). Должен стоять первым в MIDDLEWARE,
+    чтобы учитывать запросы сессий и аутентификации.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        with RequestMetrics.track() as stats:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match and match.view_name else 'unresolved'
+        RequestMetrics.aggregator.add(url_name, total, stats)
+        PrometheusMetrics.observe_request(url_name, request.method, response.status_code, total, stats)
+        RequestMetrics.check_repeated_queries(stats, url_name)
+
+        if self._show_header(request):
+            response['Server-Timing'] = RequestMetrics.server_timing_header(stats, total)
+        return response
+
+    @staticmethod
+    def _show_header(request: HttpRequest) -> bool:
+        """Отдавать ли заголовок Server-Timing этому клиенту."""
+        if getattr(settings, 'SERVER_TIMING_PUBLIC', False):
+            return True
+        session = getattr(request, 'session', None)
+        if session is None or SESSION_KEY_USER_ID not in session:
+            return False
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
 class ActionLoggingMiddleware(MiddlewareMixin):
     """
     Middleware для автоматического логирования действий пользователей.
@@ -290,6 +370,8 @@ def log_user_logout(sender, request, user, **kwargs):
         user (CustomUser): Пользователь, выходящий из системы
         **kwargs: Дополнительные аргументы сигнала
     """
+    if user is None:
+        return
     try:
         log_action(
             user=user,
@@ -302,6 +384,29 @@ def log_user_logout(sender, request, user, **kwargs):
         logger.error(f"Error logging logout: {e}")
 
 
+def remember_block_version(sender, request, user, **kwargs):
+    """
+    Сохранение метки версии статуса блокировки в сессии при входе.
+
+    Пока метка не изменится, BlockedUserMiddleware не обращается к БД.
+    Для заблокированного пользователя метка не сохраняется, и первый
+    же запрос завершит сессию.
+
+    Args:
+        sender: Отправитель сигнала
+        request (HttpRequest): Объект HTTP запроса
+        user (CustomUser): Аутентифицированный пользователь
+        **kwargs: Дополнительные аргументы сигнала
+    """
+    if request is None or getattr(user, 'is_blocked', False):
+        return
+    try:
+        request.session[BLOCK_VERSION_SESSION_KEY] = UserBlockService.get_version(user.pk)
+    except Exception as e:
+        logger.error(f"Error storing block version: {e}")
+
+
 # Подключаем сигналы Django для автоматического логирования входа/выхода
 user_logged_in.connect(log_user_login)
+user_logged_in.connect(remember_block_version)
 user_logged_out.connect(log_user_logout)
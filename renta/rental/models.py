@@ -14,7 +14,8 @@ from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
 
 from django.db import models
-from django.db.models import Avg, QuerySet
+from django.db.models import QuerySet
+from django.db.models.functions import Cast
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -322,6 +323,14 @@ class SpaceQuerySet(models.QuerySet):
             'images', 'prices', 'prices__period'
         )
 
+    def with_avg_rating(self) -> 'SpaceQuerySet':
+        """Добавить avg_rating по счетчикам рейтинга (для сортировки, без JOIN отзывов)."""
+        return self.annotate(avg_rating=models.Case(
+            models.When(rating_count=0, then=models.Value(0.0)),
+            default=Cast('rating_sum', models.FloatField()) / models.F('rating_count'),
+            output_field=models.FloatField(),
+        ))
+
 
 class SpaceManager(models.Manager):
     """Менеджер для модели Space."""
@@ -358,6 +367,13 @@ class Space(models.Model):
         views_count: Счетчик просмотров
         latitude: Широта для карты
         longitude: Долгота для карты
+        rating_sum: Сумма оценок одобренных отзывов
+        rating_count: Количество одобренных отзывов
+        rating_1_count..rating_5_count: Количество оценок по звездам
+
+    Счетчики рейтинга обновляются сигналами отзывов
+    (services/space_ratings.py) и не перезаписываются обычным save():
+    save() записывает только поля, изменённые после загрузки.
     """
 
     title = models.CharField(max_length=200, verbose_name='Название помещения')
@@ -415,11 +431,25 @@ class Space(models.Model):
         verbose_name='Долгота'
     )
 
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок')
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 1')
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 2')
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 3')
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 4')
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Оценок 5')
+
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания', db_index=True)
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
     objects = SpaceManager()
 
+    # Поля, изменяемые только через F() дельты (SpaceRatings)
+    RATING_FIELDS: tuple[str, ...] = (
+        'rating_sum', 'rating_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+
     class Meta:
         verbose_name = 'Помещение'
         verbose_name_plural = 'Помещения'
@@ -435,22 +465,102 @@ class Space(models.Model):
     def __str__(self) -> str:
         return self.title
 
+    def _get_prefetched(self, name: str) -> Optional[list]:
+        """Связанные объекты из prefetch_related (None, если не загружены)."""
+        cache = getattr(self, '_prefetched_objects_cache', {})
+        return list(cache[name]) if name in cache else None
+
     def get_main_image(self) -> Optional['SpaceImage']:
-        """Получить главное изображение."""
+        """Получить главное изображение (из prefetch_related('images'), если загружены)."""
+        images = self._get_prefetched('images')
+        if images is not None:
+            return next((image for image in images if image.is_primary), images[0] if images else None)
         return self.images.filter(is_primary=True).first() or self.images.first()
 
     def get_min_price(self) -> Optional['SpacePrice']:
-        """Получить минимальную цену."""
-        return self.prices.filter(is_active=True).order_by('price').first()
+        """Получить минимальную цену (из prefetch_related('prices'), если загружены)."""
+        prices = self._get_prefetched('prices')
+        if prices is not None:
+            return min((price for price in prices if price.is_active), key=lambda price: price.price, default=None)
+        return self.prices.filter(is_active=True).select_related('period').order_by('price').first()
+
+    @classmethod
+    def from_db(cls, db, field_names, values) -> 'Space':
+        """Загрузить помещение, запомнив значения полей для save()."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        """Перечитать поля из БД, обновив запомненные для save() значения."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        requested = set(fields) if fields is not None else None
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        loaded.update(
+            (field.attname, self.__dict__[field.attname])
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (requested is None or field.name in requested or field.attname in requested)
+        )
+
+    def _changed_fields(self) -> list[str]:
+        """
+        Поля, которые нужно записать при полном сохранении.
+
+        Отложенные поля (only/defer) не записываются и не загружаются.
+        У загруженного из БД объекта берутся только поля, изменённые
+        после загрузки (и поля, догруженные позже), иначе — все
+        загруженные. Счетчики рейтинга не записываются никогда.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.name in self.RATING_FIELDS or field.attname not in self.__dict__:
+                continue
+            if loaded is None or field.attname not in loaded or loaded[field.attname] != self.__dict__[field.attname]:
+                changed.append(field.name)
+        if changed:
+            changed.extend(
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in changed
+            )
+        return changed
+
+    def save(self, *args, **kwargs) -> None:
+        """
+        Сохранить помещение, не перезаписывая счетчики рейтинга.
+
+        Полное сохранение существующего помещения (формы, админка)
+        обновляет только изменённые поля: счетчики рейтинга и просмотров,
+        измененные в БД после загрузки объекта, не затираются, а
+        отложенные поля не загружаются ради записи. Если ничего не
+        изменилось, запрос не выполняется.
+        """
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = self._changed_fields()
+        super().save(*args, **kwargs)
+        if hasattr(self, '_loaded_values'):
+            saved = kwargs.get('update_fields')
+            self._loaded_values.update(
+                (field.attname, self.__dict__[field.attname])
+                for field in self._meta.concrete_fields
+                if field.attname in self.__dict__
+                and (saved is None or field.name in saved or field.attname in saved)
+            )
 
     def get_avg_rating(self) -> float:
-        """Получить средний рейтинг."""
-        result = self.reviews.filter(is_approved=True).aggregate(avg=Avg('rating'))
-        return round(result['avg'] or 0, 1)
+        """Получить средний рейтинг (по счетчикам, без запроса)."""
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 1)
 
     def get_reviews_count(self) -> int:
-        """Получить количество одобренных отзывов."""
-        return self.reviews.filter(is_approved=True).count()
+        """Получить количество одобренных отзывов (по счетчикам, без запроса)."""
+        return self.rating_count
+
+    def get_rating_distribution(self) -> dict[int, int]:
+        """Получить количество оценок по звездам {5: 10, 4: 3, ...}."""
+        return {star: getattr(self, f'rating_{star}_count') for star in range(1, 6)}
 
     def get_all_images(self) -> QuerySet['SpaceImage']:
         """Получить все изображения в правильном порядке."""
@@ -919,6 +1029,49 @@ class Favorite(models.Model):
 
 # ============== ЛОГИРОВАНИЕ ДЕЙСТВИЙ ==============
 
+class UserAgent(models.Model):
+    """
+    Справочник User-Agent браузеров.
+
+    Каждая уникальная строка хранится один раз, а браузер, ОС и тип
+    устройства определяются при первом появлении строки.
+
+    Attributes:
+        ua_hash: SHA-256 строки User-Agent
+        user_agent: Исходная строка (до 500 символов)
+        browser: Браузер
+        os: Операционная система
+        device: Тип устройства
+    """
+
+    class Device(models.TextChoices):
+        DESKTOP = 'desktop', 'Компьютер'
+        MOBILE = 'mobile', 'Телефон'
+        TABLET = 'tablet', 'Планшет'
+        BOT = 'bot', 'Бот'
+        OTHER = 'other', 'Другое'
+
+    ua_hash = models.CharField(max_length=64, unique=True, verbose_name='Хэш')
+    user_agent = models.TextField(verbose_name='User-Agent')
+    browser = models.CharField(max_length=50, db_index=True, verbose_name='Браузер')
+    os = models.CharField(max_length=50, verbose_name='ОС')
+    device = models.CharField(
+        max_length=20,
+        choices=Device.choices,
+        default=Device.OTHER,
+        verbose_name='Устройство'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Впервые замечен')
+
+    class Meta:
+        verbose_name = 'User-Agent'
+        verbose_name_plural = 'User-Agent'
+        db_table = 'user_agents'
+
+    def __str__(self) -> str:
+        return f"{self.browser} / {self.os}"
+
+
 class ActionLog(models.Model):
     """
     Журнал действий пользователей для системы отчетности.
@@ -931,7 +1084,10 @@ class ActionLog(models.Model):
         object_repr: Строковое представление объекта
         changes: JSON с изменениями
         ip_address: IP адрес пользователя
-        user_agent: User-Agent браузера
+        user_agent: User-Agent браузера (справочник UserAgent)
+
+    В PostgreSQL таблица может быть разбита на помесячные партиции
+    по created_at (см. services/log_partitions.py).
     """
 
     class ActionType(models.TextChoices):
@@ -962,8 +1118,15 @@ class ActionLog(models.Model):
     object_repr = models.CharField(max_length=255, verbose_name='Представление объекта')
     changes = models.JSONField(default=dict, blank=True, verbose_name='Изменения')
     ip_address = models.GenericIPAddressField(null=True, blank=True, verbose_name='IP адрес')
-    user_agent = models.TextField(blank=True, verbose_name='User-Agent')
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата действия', db_index=True)
+    user_agent = models.ForeignKey(
+        UserAgent,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='action_logs',
+        verbose_name='User-Agent'
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Дата действия', db_index=True)
 
     class Meta:
         verbose_name = 'Журнал действий'
@@ -979,3 +1142,284 @@ class ActionLog(models.Model):
     def __str__(self) -> str:
         user_str = self.user.username if self.user else 'Аноним'
         return f"{user_str} - {self.get_action_type_display()} - {self.model_name}"
+
+
+# ============== ОЧЕРЕДЬ ИСХОДЯЩИХ ПИСЕМ ==============
+
+class EmailOutbox(models.Model):
+    """
+    Очередь исходящих писем (transactional outbox).
+
+    Письмо записывается в таблицу в той же транзакции, что и бизнес-операция,
+    а фоновый обработчик (команда send_outbox_emails) отправляет его позже
+    пачками через одно SMTP-соединение.
+
+    Attributes:
+        subject: Тема письма
+        recipients: Список адресов получателей
+        from_email: Адрес отправителя
+        body_text: Текстовая версия письма
+        body_html: HTML версия письма
+        status: Статус доставки
+        attempts: Количество выполненных попыток отправки
+        next_attempt_at: Время следующей попытки
+        last_error: Текст последней ошибки
+        sent_at: Время успешной отправки
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Ожидает отправки'
+        SENDING = 'sending', 'Отправляется'
+        SENT = 'sent', 'Отправлено'
+        FAILED = 'failed', 'Ошибка'
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    recipients = models.JSONField(default=list, verbose_name='Получатели')
+    from_email = models.CharField(max_length=255, blank=True, verbose_name='Отправитель')
+    body_text = models.TextField(blank=True, verbose_name='Текст письма')
+    body_html = models.TextField(blank=True, verbose_name='HTML письма')
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток отправки')
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки')
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        db_table = 'email_outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='idx_outbox_status_next'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.get_status_display()})"
+
+
+# ============== УВЕДОМЛЕНИЯ МОДЕРАТОРОВ ==============
+
+class ModeratorNotification(models.Model):
+    """
+    Событие для модераторов, ожидающее включения в сводку (digest).
+
+    Обычные события копятся в таблице и раз в окно рассылки отправляются
+    каждому модератору одним письмом. События с высоким приоритетом
+    отправляются сразу и в таблицу не попадают.
+
+    Attributes:
+        booking: Связанное бронирование
+        subject: Краткое название события
+        message: Текст события
+        created_at: Время события
+        digested_at: Время включения в отправленную сводку
+    """
+
+    booking = models.ForeignKey(
+        'Booking',
+        on_delete=models.CASCADE,
+        related_name='moderator_notifications',
+        verbose_name='Бронирование'
+    )
+    subject = models.CharField(max_length=255, verbose_name='Событие')
+    message = models.TextField(verbose_name='Сообщение')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата события')
+    digested_at = models.DateTimeField(null=True, blank=True, verbose_name='Включено в сводку')
+
+    class Meta:
+        verbose_name = 'Уведомление модераторам'
+        verbose_name_plural = 'Уведомления модераторам'
+        db_table = 'moderator_notifications'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['digested_at', 'created_at'], name='idx_modnotify_pending'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} - Бронирование #{self.booking_id}"
+
+
+# ============== СТАТИСТИКА ПОЛЬЗОВАТЕЛЕЙ ==============
+
+class UserStats(models.Model):
+    """
+    Денормализованные счетчики активности пользователя.
+
+    Поддерживаются сигналами бронирований, отзывов и избранного
+    (services/user_stats.py); страницы пользователя читают одну строку
+    вместо нескольких count() и aggregate().
+
+    Attributes:
+        user: Пользователь
+        bookings_total: Всего бронирований
+        bookings_pending .. bookings_cancelled: Бронирования по статусам
+        total_spent: Сумма подтвержденных и завершенных бронирований
+        reviews_count: Всего отзывов
+        reviews_approved: Одобренных отзывов
+        favorites_count: Помещений в избранном
+        updated_at: Дата пересчета или изменения
+    """
+
+    # Счетчики бронирований по коду статуса
+    BOOKING_STATUS_FIELDS: dict[str, str] = {
+        'pending': 'bookings_pending',
+        'confirmed': 'bookings_confirmed',
+        'completed': 'bookings_completed',
+        'cancelled': 'bookings_cancelled',
+    }
+    # Статусы, учитываемые в total_spent
+    PAID_STATUSES: tuple[str, ...] = ('confirmed', 'completed')
+
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='activity_stats',
+        verbose_name='Пользователь'
+    )
+    bookings_total = models.PositiveIntegerField(default=0, verbose_name='Всего бронирований')
+    bookings_pending = models.PositiveIntegerField(default=0, verbose_name='Ожидают подтверждения')
+    bookings_confirmed = models.PositiveIntegerField(default=0, verbose_name='Подтверждено')
+    bookings_completed = models.PositiveIntegerField(default=0, verbose_name='Завершено')
+    bookings_cancelled = models.PositiveIntegerField(default=0, verbose_name='Отменено')
+    total_spent = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'), verbose_name='Потрачено'
+    )
+    reviews_count = models.PositiveIntegerField(default=0, verbose_name='Всего отзывов')
+    reviews_approved = models.PositiveIntegerField(default=0, verbose_name='Одобренных отзывов')
+    favorites_count = models.PositiveIntegerField(default=0, verbose_name='В избранном')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+        db_table = 'user_stats'
+
+    def __str__(self) -> str:
+        return f"Статистика пользователя #{self.user_id}"
+
+    @property
+    def bookings_active(self) -> int:
+        """Активные бронирования (ожидание + подтверждено)."""
+        return self.bookings_pending + self.bookings_confirmed
+
+    @property
+    def bookings_paid(self) -> int:
+        """Подтвержденные и завершенные бронирования."""
+        return self.bookings_confirmed + self.bookings_completed
+
+
+class BookingDailyStats(models.Model):
+    """
+    Дневные итоги бронирований по помещению и статусу.
+
+    Поддерживаются сигналами бронирований (services/booking_rollup.py);
+    аналитический дашборд и отчеты по доходам читают итоги за любой
+    период одним сгруппированным запросом вместо агрегатов по Booking.
+    Итоги по городам получаются группировкой по space__city.
+
+    Attributes:
+        date: День создания бронирований (локальная дата)
+        space: Помещение
+        status: Текущий статус бронирований
+        bookings_count: Количество бронирований
+        revenue: Сумма бронирований
+    """
+
+    date = models.DateField(verbose_name='Дата', db_index=True)
+    space = models.ForeignKey(
+        Space,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Помещение'
+    )
+    status = models.ForeignKey(
+        BookingStatus,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='Статус'
+    )
+    bookings_count = models.IntegerField(default=0, verbose_name='Бронирований')
+    revenue = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'), verbose_name='Сумма'
+    )
+
+    class Meta:
+        verbose_name = 'Дневные итоги бронирований'
+        verbose_name_plural = 'Дневные итоги бронирований'
+        db_table = 'booking_daily_stats'
+        unique_together = ['date', 'space', 'status']
+
+    def __str__(self) -> str:
+        return f"{self.date}: помещение #{self.space_id}, статус #{self.status_id}"
+
+
+class BackgroundJob(models.Model):
+    """
+    Фоновое задание с прогрессом (PDF отчет, резервная копия).
+
+    Задание создается в запросе, выполняется вне его (services/background_jobs.py),
+    а страница опрашивает статус и прогресс и скачивает готовый файл.
+
+    Attributes:
+        kind: Тип задания
+        params: Параметры задания
+        cache_key: Ключ результата (одинаковые задания используют один файл)
+        status: Статус выполнения
+        progress: Прогресс в процентах
+        file_name: Имя файла результата
+        error: Текст ошибки
+        created_by: Пользователь, запустивший задание
+        finished_at: Время завершения
+    """
+
+    class Kind(models.TextChoices):
+        REPORT_PDF = 'report_pdf', 'PDF отчет'
+        # Резервная копия БД (services/backup_engine.py)
+        BACKUP = 'backup', 'Резервная копия БД'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    kind = models.CharField(max_length=20, choices=Kind.choices, verbose_name='Тип')
+    params = models.JSONField(default=dict, blank=True, verbose_name='Параметры')
+    cache_key = models.CharField(max_length=64, blank=True, db_index=True, verbose_name='Ключ результата')
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус'
+    )
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Прогресс, %')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='Файл результата')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_jobs',
+        verbose_name='Запустил'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата завершения')
+
+    class Meta:
+        verbose_name = 'Фоновое задание'
+        verbose_name_plural = 'Фоновые задания'
+        db_table = 'background_jobs'
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()}, {self.progress}%)"
@@ -18,7 +18,29 @@
 #
 # ДОПОЛНИТЕЛЬНЫЕ МОДУЛИ:
 #   email_service   - Отправка email уведомлений
+#   email_outbox    - Очередь исходящих писем и фоновый отправитель
+#   moderator_digest - Сводки уведомлений модераторам
+#   space_closure   - Закрытие помещения с отменой бронирований и возвратами
+#   reference_data  - Реестр справочников (статусы, периоды, города, категории)
 #   logging_service - Логирование действий пользователей
+#   action_log_writer - Буферизованная запись журнала действий пачками
+#   log_partitions  - Помесячные партиции журнала действий (PostgreSQL)
+#   log_archive     - Архивация журнала действий в сжатые файлы JSONL
+#   user_agents     - Справочник User-Agent с разбором браузера и ОС
+#   user_block      - Блокировка пользователей и метка версии статуса
+#   request_metrics - Метрики запросов (SQL, шаблоны, кэш, внешние вызовы)
+#   prometheus_metrics - Метрики Prometheus и их выдача на /metrics
+#   favorites_index - Кэшированное множество избранных помещений пользователя
+#   space_ratings   - Счетчики рейтинга помещений (F() дельты и пересчет)
+#   review_moderation - Массовая модерация отзывов (пересчет рейтинга по помещениям)
+#   review_feed     - Лента отзывов помещения (курсор по created_at, кэш страниц)
+#   user_stats      - Счетчики активности пользователей (модель UserStats)
+#   stats_service   - Сводные счетчики панелей модераторов (условные агрегаты, кэш)
+#   booking_rollup  - Дневные итоги бронирований (дашборд и отчеты по доходам)
+#   report_export   - Потоковая выгрузка отчетов (CSV, JSON, JSON Lines, XLSX)
+#   background_jobs - Фоновые задания с прогрессом (модель BackgroundJob)
+#   report_jobs     - PDF отчеты в фоне (пул процессов, дисковый кэш файлов)
+#   backup_engine   - Потоковые сжатые резервные копии БД и их восстановление
 #   validators      - Валидаторы (телефон и др.) [DEPRECATED: use core.validators]
 #
 # ПРОЕКТ: ООО "ИНТЕРЬЕР" - Сайт аренды помещений
@@ -37,6 +59,7 @@ from .profanity_filter import (
     validate_comment,
     censor_text,
     normalize_text,
+    find_profanity,
 )
 
 __all__ = [
@@ -51,4 +74,5 @@ __all__ = [
     'validate_comment',
     'censor_text',
     'normalize_text',
+    'find_profanity',
 ]
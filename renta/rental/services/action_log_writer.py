@@ -0,0 +1,192 @@
+"""
+====================================================================
+БУФЕРИЗОВАННАЯ ЗАПИСЬ ЖУРНАЛА ДЕЙСТВИЙ ДЛЯ САЙТА "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит фоновый писатель журнала действий (ActionLog).
+Запись в журнал не выполняется в ходе запроса: запись помещается
+в очередь в памяти процесса, а фоновый поток сохраняет накопленные
+записи пачками через bulk_create.
+
+Основные компоненты:
+- ActionLogWriter: Очередь записей и фоновый поток сохранения
+- action_log_writer: Экземпляр писателя для процесса
+
+Настройки (settings.py):
+- ACTION_LOG_BUFFER_SIZE: Максимальный размер очереди
+- ACTION_LOG_BATCH_SIZE: Размер пачки bulk_create
+- ACTION_LOG_FLUSH_INTERVAL: Максимальная задержка записи (секунды)
+- ACTION_LOG_OVERFLOW_POLICY: Поведение при переполнении очереди
+  ('sync' — записать синхронно, 'drop' — отбросить запись)
+
+Особенности:
+- Запись ставится в очередь только после коммита текущей транзакции,
+  поэтому журнал не ссылается на откатившиеся объекты
+- При завершении процесса очередь сбрасывается в БД (atexit)
+- Ошибки записи журнала не влияют на обработку запросов
+====================================================================
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from ..models import ActionLog
+from .prometheus_metrics import PrometheusMetrics
+from .user_agents import UserAgentService
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_SYNC = 'sync'
+OVERFLOW_DROP = 'drop'
+
+
+class ActionLogWriter:
+    """
+    Буферизованный писатель журнала действий.
+
+    Args:
+        max_buffer: Максимальный размер очереди
+        batch_size: Размер пачки bulk_create
+        flush_interval: Максимальная задержка записи (секунды)
+        overflow_policy: 'sync' или 'drop' при переполнении очереди
+        autostart: Запускать фоновый поток при первой записи
+    """
+
+    def __init__(
+        self,
+        max_buffer: int = 10000,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        overflow_policy: str = OVERFLOW_SYNC,
+        autostart: bool = True
+    ) -> None:
+        self.queue: queue.Queue[ActionLog] = queue.Queue(maxsize=max_buffer)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.autostart = autostart
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+
+    @classmethod
+    def from_settings(cls) -> 'ActionLogWriter':
+        """Создать писатель с параметрами из settings."""
+        return cls(
+            max_buffer=getattr(settings, 'ACTION_LOG_BUFFER_SIZE', 10000),
+            batch_size=getattr(settings, 'ACTION_LOG_BATCH_SIZE', 200),
+            flush_interval=getattr(settings, 'ACTION_LOG_FLUSH_INTERVAL', 1.0),
+            overflow_policy=getattr(settings, 'ACTION_LOG_OVERFLOW_POLICY', OVERFLOW_SYNC),
+        )
+
+    def submit(self, entry: ActionLog) -> None:
+        """
+        Поставить запись журнала в очередь после коммита транзакции.
+
+        Args:
+            entry: Несохранённый объект ActionLog
+        """
+        transaction.on_commit(lambda: self._enqueue(entry))
+
+    def _enqueue(self, entry: ActionLog) -> None:
+        """Поместить запись в очередь с учётом политики переполнения."""
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            if self.overflow_policy == OVERFLOW_DROP:
+                self.dropped += 1
+                PrometheusMetrics.action_log_dropped()
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning(f"ActionLog buffer full, dropped {self.dropped} entries")
+            else:
+                self._write([entry])
+
+    def _ensure_started(self) -> None:
+        """Запустить фоновый поток при первой записи."""
+        if not self.autostart or (self._thread and self._thread.is_alive()):
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='action-log-writer', daemon=True
+            )
+            self._thread.start()
+            # Перезапуск потока не должен добавлять повторные обработчики
+            if not self._atexit_registered:
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _run(self) -> None:
+        """Цикл фонового потока: собрать пачку и сохранить её."""
+        while True:
+            batch = self._take_batch(block=True)
+            if batch:
+                self._write(batch)
+                for _ in batch:
+                    self.queue.task_done()
+                close_old_connections()
+
+    def _take_batch(self, block: bool) -> list[ActionLog]:
+        """
+        Забрать из очереди до batch_size записей.
+
+        Args:
+            block: Ждать первую запись не дольше flush_interval
+
+        Returns:
+            list[ActionLog]: Пачка записей (может быть пустой)
+        """
+        batch: list[ActionLog] = []
+        try:
+            if block:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: list[ActionLog]) -> None:
+        """Сохранить пачку записей одним bulk_create (со ссылками на user_agents)."""
+        try:
+            UserAgentService.attach(batch)
+            ActionLog.objects.bulk_create(batch, batch_size=self.batch_size)
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} ActionLog entries: {e}")
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """
+        Сбросить все накопленные записи в БД.
+
+        Оставшиеся в очереди записи сохраняются в текущем потоке,
+        затем ожидается завершение пачки, которую пишет фоновый поток.
+
+        Args:
+            timeout: Максимальное время ожидания фонового потока (секунды)
+        """
+        while True:
+            batch = self._take_batch(block=False)
+            if not batch:
+                break
+            self._write(batch)
+            for _ in batch:
+                self.queue.task_done()
+
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and time.monotonic() < deadline:
+                self.queue.all_tasks_done.wait(deadline - time.monotonic())
+
+
+action_log_writer = ActionLogWriter.from_settings()
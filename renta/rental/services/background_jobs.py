@@ -0,0 +1,218 @@
+"""
+====================================================================
+ФОНОВЫЕ ЗАДАНИЯ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит выполнение долгих операций (PDF отчеты, резервные
+копии) вне HTTP запроса с сохранением статуса и прогресса в таблице
+background_jobs (модель BackgroundJob).
+
+Основные компоненты:
+- JOB_HANDLERS: Обработчики заданий по типу
+- BackgroundJobs.enqueue: Создать задание и запустить его после коммита
+- BackgroundJobs.find_active: Готовое или выполняющееся задание с тем же ключом
+- BackgroundJobs.run: Выполнить задание (захват, прогресс, результат)
+- BackgroundJobs.state: Состояние задания для ответа JSON
+
+Принцип работы:
+- Задание выполняется в пуле потоков процесса (BACKGROUND_JOB_WORKERS);
+  запрос только создает запись и сразу возвращает ответ
+- Обработчик получает задание и функцию прогресса, возвращает имя
+  файла результата. Прогресс записывается в БД с шагом PROGRESS_STEP
+- Захват задания — UPDATE со статусом «в очереди» в условии, поэтому
+  одно задание не выполняется дважды
+- Задание, прогресс которого не менялся STALE_JOB_SECONDS (процесс
+  перезапущен), не считается активным: следующий запрос создает новое
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from ..models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Обработчики заданий: функция handler(job, progress) -> имя файла результата
+JOB_HANDLERS: dict[str, str] = {
+    BackgroundJob.Kind.REPORT_PDF: 'rental.services.report_jobs.build_report_pdf',
+    BackgroundJob.Kind.BACKUP: 'rental.services.backup_engine.build_backup',
+}
+
+# Задание без изменений прогресса дольше этого времени считается брошенным
+STALE_JOB_SECONDS: int = 1800
+
+# Минимальное изменение прогресса (в процентах), которое записывается в БД
+PROGRESS_STEP: int = 5
+
+# Функция прогресса: принимает процент выполнения
+ProgressCallback = Callable[[float], None]
+
+
+class BackgroundJobs:
+    """
+    Сервис фоновых заданий.
+    """
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        """Пул потоков заданий (создается при первом задании)."""
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=getattr(settings, 'BACKGROUND_JOB_WORKERS', 2),
+                        thread_name_prefix='background-job',
+                    )
+        return cls._executor
+
+    @staticmethod
+    def find_active(kind: str, cache_key: str) -> Optional[BackgroundJob]:
+        """
+        Найти готовое или выполняющееся задание с тем же ключом результата.
+
+        Args:
+            kind: Тип задания
+            cache_key: Ключ результата
+
+        Returns:
+            BackgroundJob или None
+        """
+        fresh = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+        return BackgroundJob.objects.filter(kind=kind, cache_key=cache_key).filter(
+            Q(status=BackgroundJob.Status.DONE)
+            | Q(status__in=[BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING], updated_at__gte=fresh)
+        ).order_by('-created_at').first()
+
+    @classmethod
+    def enqueue(
+        cls,
+        kind: str,
+        params: dict[str, Any],
+        user: Any = None,
+        cache_key: str = '',
+    ) -> BackgroundJob:
+        """
+        Создать задание и запустить его после коммита транзакции.
+
+        Args:
+            kind: Тип задания (BackgroundJob.Kind)
+            params: Параметры для обработчика (JSON)
+            user: Пользователь, запустивший задание
+            cache_key: Ключ результата
+
+        Returns:
+            BackgroundJob: Созданное задание
+        """
+        job = BackgroundJob.objects.create(
+            kind=kind,
+            params=params,
+            cache_key=cache_key,
+            created_by=user if getattr(user, 'is_authenticated', False) else None,
+        )
+        transaction.on_commit(lambda: cls.submit(job.pk))
+        logger.info(f"Background job #{job.pk} ({kind}) queued")
+        return job
+
+    @classmethod
+    def submit(cls, job_id: int) -> None:
+        """Передать задание в пул потоков."""
+        cls._get_executor().submit(cls._run_in_thread, job_id)
+
+    @classmethod
+    def _run_in_thread(cls, job_id: int) -> None:
+        try:
+            cls.run(job_id)
+        finally:
+            # Поток пула не обрабатывает запросы — соединения закрываем сами
+            connections.close_all()
+
+    @staticmethod
+    def _progress_callback(job_id: int) -> ProgressCallback:
+        """Функция прогресса задания с записью в БД не чаще шага PROGRESS_STEP."""
+        last = [0]
+
+        def report(percent: float) -> None:
+            percent = max(0, min(99, int(percent)))
+            if percent - last[0] >= PROGRESS_STEP:
+                last[0] = percent
+                BackgroundJob.objects.filter(pk=job_id).update(progress=percent, updated_at=timezone.now())
+
+        return report
+
+    @classmethod
+    def run(cls, job_id: int) -> Optional[BackgroundJob]:
+        """
+        Выполнить задание.
+
+        Args:
+            job_id: ID задания
+
+        Returns:
+            BackgroundJob: Задание после выполнения или None, если оно
+                           уже захвачено другим обработчиком
+        """
+        now = timezone.now()
+        jobs = BackgroundJob.objects.filter(pk=job_id)
+        if not jobs.filter(status=BackgroundJob.Status.PENDING).update(
+            status=BackgroundJob.Status.RUNNING, progress=0, updated_at=now
+        ):
+            return None
+
+        job = jobs.get()
+        try:
+            handler = import_string(JOB_HANDLERS[job.kind])
+            file_name = handler(job, cls._progress_callback(job.pk))
+        except Exception as e:
+            logger.exception(f"Background job #{job.pk} ({job.kind}) failed")
+            jobs.update(
+                status=BackgroundJob.Status.FAILED,
+                error=str(e)[:2000],
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        else:
+            jobs.update(
+                status=BackgroundJob.Status.DONE,
+                progress=100,
+                file_name=file_name,
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+            logger.info(f"Background job #{job.pk} ({job.kind}) done: {file_name}")
+
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def state(job: BackgroundJob) -> dict[str, Any]:
+        """
+        Состояние задания для ответа JSON.
+
+        Args:
+            job: Задание
+
+        Returns:
+            dict: id, kind, status, status_display, progress, error
+        """
+        return {
+            'id': job.pk,
+            'kind': job.kind,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'progress': job.progress,
+            'error': job.error,
+        }
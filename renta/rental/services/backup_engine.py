@@ -0,0 +1,473 @@
+"""
+====================================================================
+РЕЗЕРВНОЕ КОПИРОВАНИЕ БАЗЫ ДАННЫХ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит потоковое создание резервных копий базы данных в
+сжатые файлы JSON Lines и их потоковое восстановление.
+
+Основные компоненты:
+- BackupEngine.stream: Части сжатой копии для StreamingHttpResponse
+- BackupEngine.write: Копия в файл с манифестом (количество, SHA-256)
+- BackupEngine.restore: Восстановление копии (gzip, zstd, JSON Lines, JSON)
+- BackupEngine.rebuild_derived: Пересчет производных таблиц после восстановления
+- build_backup: Обработчик фонового задания резервного копирования
+
+Формат копии:
+- backup_<дата>_<время>.jsonl.gz (или .jsonl.zst) — по одному объекту
+  на строку в формате сериализатора Django jsonl с исходными
+  первичными ключами и натуральными внешними ключами; gzip копию
+  можно загрузить и штатной командой loaddata
+- backup_<дата>_<время>.manifest.json — количество объектов по
+  моделям и контрольная сумма SHA-256 файла копии
+
+Принцип работы:
+- Модели выгружаются по очереди в порядке зависимостей, строки каждой
+  модели читаются курсором пачками по BACKUP_CHUNK_SIZE и сразу
+  сжимаются: в памяти находится одна пачка, а не вся база
+- На PostgreSQL выгрузка идет в одной транзакции REPEATABLE READ,
+  поэтому копия согласована
+- zstd используется при установленном пакете zstandard, иначе gzip
+- Восстановление читает файл построчно в одной транзакции (как
+  loaddata), затем проверяет внешние ключи, сбрасывает счетчики
+  первичных ключей и пересчитывает производные таблицы
+====================================================================
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Any, BinaryIO, Iterator, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Model
+from django.utils import timezone
+
+from ..models import BackgroundJob, CustomUser, Space
+from .background_jobs import ProgressCallback
+from .booking_rollup import BookingRollup
+from .log_archive import file_sha256
+from .report_export import _ChunkBuffer
+from .space_ratings import SpaceRatings
+from .user_stats import UserStatsService
+
+logger = logging.getLogger(__name__)
+
+# Приложения и модели, не попадающие в копию. Производные таблицы
+# (статистика пользователей, дневные итоги) пересчитываются после
+# восстановления (rebuild_derived)
+BACKUP_EXCLUDE: tuple[str, ...] = (
+    'contenttypes', 'auth.permission', 'sessions', 'rental.backgroundjob',
+    'rental.userstats', 'rental.bookingdailystats',
+)
+
+# Размер пачки объектов при чтении из БД и при восстановлении
+BACKUP_CHUNK_SIZE: int = 1000
+
+# Кодеки сжатия: расширение файла и сигнатура начала файла
+BACKUP_CODECS: dict[str, tuple[str, bytes]] = {
+    'gzip': ('.jsonl.gz', b'\x1f\x8b'),
+    'zstd': ('.jsonl.zst', b'\x28\xb5\x2f\xfd'),
+}
+
+# Расширения файлов, показываемых на странице резервного копирования
+BACKUP_SUFFIXES: tuple[str, ...] = ('.jsonl.gz', '.jsonl.zst', '.jsonl', '.json', '.sql')
+
+GZIP_LEVEL: int = 6
+ZSTD_LEVEL: int = 3
+
+
+def _zstandard() -> Any:
+    """Модуль zstandard или None, если пакет не установлен."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _manifest_path(path: str) -> str:
+    for extension, _magic in BACKUP_CODECS.values():
+        if path.endswith(extension):
+            return path[:-len(extension)] + '.manifest.json'
+    return os.path.splitext(path)[0] + '.manifest.json'
+
+
+@contextmanager
+def _snapshot(using: str) -> Iterator[None]:
+    """Транзакция с согласованным снимком данных (PostgreSQL) на время выгрузки."""
+    with transaction.atomic(using=using):
+        connection = connections[using]
+        if connection.vendor == 'postgresql' and not connection.savepoint_ids:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+class BackupEngine:
+    """
+    Сервис резервного копирования базы данных.
+    """
+
+    @staticmethod
+    def backup_dir() -> str:
+        """Каталог резервных копий (создается при необходимости)."""
+        path = str(getattr(settings, 'BACKUP_DIR', os.path.join(settings.BASE_DIR, 'backups')))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def codecs() -> list[str]:
+        """Доступные кодеки сжатия."""
+        return ['gzip', 'zstd'] if _zstandard() else ['gzip']
+
+    @classmethod
+    def default_codec(cls) -> str:
+        """Кодек по умолчанию: BACKUP_COMPRESSION, если он доступен, иначе gzip."""
+        codec = getattr(settings, 'BACKUP_COMPRESSION', 'gzip')
+        return codec if codec in cls.codecs() else 'gzip'
+
+    @staticmethod
+    def file_name(codec: str) -> str:
+        """Имя файла новой копии."""
+        return f"backup_{timezone.localtime():%Y%m%d_%H%M%S}{BACKUP_CODECS[codec][0]}"
+
+    @classmethod
+    def resolve(cls, filename: str) -> Optional[str]:
+        """
+        Путь к файлу копии внутри каталога копий.
+
+        Args:
+            filename: Имя файла из URL
+
+        Returns:
+            str или None, если имя выходит за пределы каталога
+        """
+        backup_dir = os.path.abspath(cls.backup_dir())
+        path = os.path.abspath(os.path.join(backup_dir, filename))
+        return path if os.path.dirname(path) == backup_dir else None
+
+    @classmethod
+    def list_backups(cls) -> list[dict[str, Any]]:
+        """
+        Файлы резервных копий, новые первыми.
+
+        Returns:
+            list: Словари filename, size, size_mb, created
+        """
+        backup_dir = cls.backup_dir()
+        backups = []
+        for filename in sorted(os.listdir(backup_dir), reverse=True):
+            path = os.path.join(backup_dir, filename)
+            if filename.endswith('.manifest.json') or not filename.endswith(BACKUP_SUFFIXES):
+                continue
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            backups.append({
+                'filename': filename,
+                'size': stat.st_size,
+                'size_mb': round(stat.st_size / (1024 * 1024), 2),
+                'created': datetime.fromtimestamp(stat.st_mtime),
+            })
+        return backups
+
+    @staticmethod
+    def delete(path: str) -> None:
+        """Удалить файл копии вместе с манифестом."""
+        for file_path in (path, _manifest_path(path)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    @staticmethod
+    def models() -> list[type[Model]]:
+        """Модели копии в порядке зависимостей (как dumpdata --natural-foreign)."""
+        app_list: dict[Any, Optional[list[type[Model]]]] = {}
+        for app_config in apps.get_app_configs():
+            if app_config.label in BACKUP_EXCLUDE or app_config.models_module is None:
+                continue
+            app_list[app_config] = [
+                model for model in app_config.get_models()
+                if model._meta.label_lower not in BACKUP_EXCLUDE and not model._meta.proxy
+            ]
+        return serializers.sort_dependencies(app_list.items(), allow_cycles=True)
+
+    @staticmethod
+    def _queryset(model: type[Model], using: str) -> Any:
+        """Объекты модели с загрузкой связей, нужных для натуральных ключей."""
+        related = [
+            field.name for field in model._meta.concrete_fields
+            if field.many_to_one and hasattr(field.remote_field.model, 'natural_key')
+        ]
+        m2m = [field.name for field in model._meta.many_to_many if field.remote_field.through._meta.auto_created]
+        return model._base_manager.using(using).select_related(*related).prefetch_related(*m2m).order_by(
+            model._meta.pk.name
+        )
+
+    @classmethod
+    def _dump(
+        cls,
+        raw: BinaryIO,
+        codec: str,
+        counts: dict[str, int],
+        progress: Optional[ProgressCallback] = None,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> Iterator[None]:
+        """
+        Записать сжатую копию в raw, уступая управление после каждой пачки.
+
+        Args:
+            raw: Двоичный поток для сжатых данных
+            codec: Кодек сжатия
+            counts: Словарь, заполняемый количеством объектов по моделям
+            progress: Функция прогресса
+            using: Псевдоним БД
+        """
+        if codec == 'zstd':
+            compressed = _zstandard().ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=False)
+        else:
+            compressed = gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=GZIP_LEVEL)
+        stream = io.TextIOWrapper(compressed, encoding='utf-8', newline='\n')
+        serializer = serializers.get_serializer('jsonl')()
+
+        with _snapshot(using):
+            models = [model for model in cls.models() if router.allow_migrate_model(using, model)]
+            totals = {model: model._base_manager.using(using).count() for model in models}
+            total = max(1, sum(totals.values()))
+            done = 0
+
+            for model in models:
+                counts[model._meta.label_lower] = 0
+                objects = cls._queryset(model, using).iterator(chunk_size=BACKUP_CHUNK_SIZE)
+                while chunk := list(islice(objects, BACKUP_CHUNK_SIZE)):
+                    # Первичные ключи сохраняются как есть: таблицы с первичным
+                    # ключом-связью (UserStats) ссылаются на исходные id
+                    serializer.serialize(chunk, stream=stream, use_natural_foreign_keys=True)
+                    counts[model._meta.label_lower] += len(chunk)
+                    done += len(chunk)
+                    if progress:
+                        progress(100 * done / total)
+                    stream.flush()
+                    yield
+
+        stream.flush()
+        stream.detach()
+        compressed.close()
+        yield
+
+    @classmethod
+    def stream(cls, codec: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Части сжатой копии для StreamingHttpResponse.
+
+        Args:
+            codec: Кодек сжатия (None — по умолчанию)
+
+        Yields:
+            bytes: Очередная часть файла копии
+        """
+        buffer = _ChunkBuffer()
+        for _ in cls._dump(buffer, codec or cls.default_codec(), {}):
+            data = buffer.drain()
+            if data:
+                yield data
+
+    @classmethod
+    def write(
+        cls,
+        path: Optional[str] = None,
+        codec: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """
+        Записать копию в файл и манифест рядом с ним.
+
+        Файл пишется во временный и переименовывается после записи,
+        поэтому в каталоге не бывает недописанных копий.
+
+        Args:
+            path: Путь к файлу (None — новый файл в каталоге копий)
+            codec: Кодек сжатия (None — по умолчанию)
+            progress: Функция прогресса
+
+        Returns:
+            str: Путь к файлу копии
+        """
+        codec = codec or cls.default_codec()
+        path = path or os.path.join(cls.backup_dir(), cls.file_name(codec))
+        tmp_path = f'{path}.tmp'
+        counts: dict[str, int] = {}
+
+        try:
+            with open(tmp_path, 'wb') as f:
+                for _ in cls._dump(f, codec, counts, progress):
+                    pass
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        manifest = {
+            'file': os.path.basename(path),
+            'codec': codec,
+            'created_at': timezone.now().isoformat(),
+            'objects': sum(counts.values()),
+            'models': counts,
+            'sha256': file_sha256(path),
+        }
+        with open(_manifest_path(path), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"Backup written: {path} ({manifest['objects']} objects)")
+        return path
+
+    @staticmethod
+    def _open(raw: BinaryIO) -> BinaryIO:
+        """Распаковывающий поток по сигнатуре файла (без сжатия — сам файл)."""
+        magic = raw.read(4)
+        raw.seek(0)
+        if magic.startswith(BACKUP_CODECS['gzip'][1]):
+            return gzip.GzipFile(fileobj=raw, mode='rb')
+        if magic.startswith(BACKUP_CODECS['zstd'][1]):
+            zstandard = _zstandard()
+            if zstandard is None:
+                raise ValueError('Для восстановления копии zstd установите: pip install zstandard')
+            return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        return raw
+
+    @classmethod
+    def verify(cls, path: str) -> bool:
+        """
+        Проверить файл копии по манифесту.
+
+        Args:
+            path: Путь к файлу копии
+
+        Returns:
+            bool: True — контрольная сумма совпадает или манифеста нет
+
+        Raises:
+            ValueError: Контрольная сумма не совпадает
+        """
+        manifest_path = _manifest_path(path)
+        if not os.path.exists(manifest_path):
+            return True
+        with open(manifest_path, encoding='utf-8') as f:
+            expected = json.load(f).get('sha256')
+        if expected and expected != file_sha256(path):
+            raise ValueError(f'Контрольная сумма {os.path.basename(path)} не совпадает с манифестом')
+        return True
+
+    @classmethod
+    def restore(
+        cls,
+        path: str,
+        progress: Optional[ProgressCallback] = None,
+        verify: bool = True,
+        rebuild: bool = True,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> int:
+        """
+        Восстановить копию из файла.
+
+        Объекты читаются построчно и сохраняются в одной транзакции,
+        как в loaddata: при ошибке база остается в прежнем состоянии.
+
+        Args:
+            path: Путь к файлу копии (.jsonl.gz, .jsonl.zst, .jsonl или .json)
+            progress: Функция прогресса (по доле прочитанного файла)
+            verify: Проверить контрольную сумму по манифесту
+            rebuild: Пересчитать производные таблицы после восстановления
+            using: Псевдоним БД
+
+        Returns:
+            int: Количество восстановленных объектов
+        """
+        if verify:
+            cls.verify(path)
+
+        connection = connections[using]
+        size = max(1, os.path.getsize(path))
+        fmt = 'json' if path.endswith('.json') else 'jsonl'
+        loaded_models: set[type[Model]] = set()
+        deferred = []
+        restored = 0
+
+        with open(path, 'rb') as raw, transaction.atomic(using=using):
+            stream = io.TextIOWrapper(cls._open(raw), encoding='utf-8')
+            with connection.constraint_checks_disabled():
+                objects = serializers.deserialize(fmt, stream, using=using, handle_forward_references=True)
+                for obj in objects:
+                    if not router.allow_migrate_model(using, obj.object.__class__):
+                        continue
+                    obj.save(using=using)
+                    loaded_models.add(obj.object.__class__)
+                    if obj.deferred_fields:
+                        deferred.append(obj)
+                    restored += 1
+                    if progress and restored % BACKUP_CHUNK_SIZE == 0:
+                        progress(95 * raw.tell() / size)
+
+                for obj in deferred:
+                    obj.save_deferred_fields(using=using)
+
+            connection.check_constraints(table_names=[model._meta.db_table for model in loaded_models])
+            sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(loaded_models))
+            if sequence_sql:
+                with connection.cursor() as cursor:
+                    for line in sequence_sql:
+                        cursor.execute(line)
+
+            if rebuild:
+                cls.rebuild_derived()
+
+        cache.clear()
+        logger.info(f"Backup restored: {path} ({restored} objects)")
+        return restored
+
+    @staticmethod
+    def rebuild_derived(batch_size: int = 500) -> None:
+        """
+        Пересчитать производные таблицы по восстановленным данным.
+
+        Сигналы сохранения во время восстановления меняют счетчики
+        (рейтинги помещений, статистику пользователей, дневные итоги)
+        в зависимости от порядка загрузки, поэтому они пересчитываются
+        заново, как командами rebuild_*.
+        """
+        space_ids = list(Space.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(space_ids), batch_size):
+            SpaceRatings.recompute(space_ids[start:start + batch_size])
+
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(user_ids), batch_size):
+            UserStatsService.recompute(user_ids[start:start + batch_size])
+
+        BookingRollup.recompute()
+
+
+def build_backup(job: BackgroundJob, progress: ProgressCallback) -> str:
+    """
+    Обработчик задания резервного копирования.
+
+    Args:
+        job: Задание (params: codec)
+        progress: Функция прогресса
+
+    Returns:
+        str: Имя файла копии в каталоге копий
+    """
+    path = BackupEngine.write(codec=job.params.get('codec'), progress=progress)
+    return os.path.basename(path)
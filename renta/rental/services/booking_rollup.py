@@ -0,0 +1,212 @@
+"""
+====================================================================
+ДНЕВНЫЕ ИТОГИ БРОНИРОВАНИЙ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит обновление и чтение таблицы дневных итогов
+бронирований (модель BookingDailyStats): количество и сумма
+бронирований по дню создания, помещению и статусу.
+
+Основные компоненты:
+- rollup_state: Вклад бронирования в итоги (день, помещение, статус, сумма)
+- BookingRollup.changed: Учесть создание, изменение или удаление бронирования
+- BookingRollup.recompute: Пересчитать итоги по исходной таблице
+- BookingRollup.summary: Итоги за период с группировкой (один запрос)
+
+Принцип работы:
+- Сигналы модели Booking (signals.py) вычитают прежний вклад
+  бронирования из строки итогов и добавляют новый одним UPDATE с F()
+  выражениями; отсутствующая строка сначала вставляется с нулями
+  (INSERT ... ON CONFLICT DO NOTHING), поэтому одновременные изменения
+  не теряются
+- Массовые изменения в обход save() (закрытие помещения) и команда
+  rebuild_booking_rollup пересчитывают итоги сгруппированным запросом
+- Дашборд, отчет по доходам и экспорт читают итоги через summary:
+  размер выборки зависит от числа дней, а не бронирований
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, QuerySet, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import Booking, BookingDailyStats
+from .reference_data import ReferenceData
+
+logger = logging.getLogger(__name__)
+
+# Вклад бронирования в итоги: (ID помещения, день, ID статуса, сумма)
+RollupState = tuple[int, date, int, Decimal]
+
+
+def rollup_state(values: dict[str, Any]) -> Optional[RollupState]:
+    """
+    Вклад бронирования в дневные итоги.
+
+    Args:
+        values: Поля бронирования (instance.__dict__)
+
+    Returns:
+        RollupState или None, если поля не загружены или бронирование
+        еще не сохранено
+    """
+    created_at = values.get('created_at')
+    if created_at is None or any(
+        name not in values for name in ('space_id', 'status_id', 'total_amount')
+    ):
+        return None
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    return values['space_id'], day, values['status_id'], values['total_amount'] or Decimal('0')
+
+
+def _parse_day(value: date | str | None) -> Optional[date]:
+    """Дата из объекта date или строки YYYY-MM-DD (некорректная — None)."""
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+class BookingRollup:
+    """
+    Сервис дневных итогов бронирований.
+    """
+
+    @staticmethod
+    def _apply(state: RollupState, count: int, revenue: Decimal) -> None:
+        """Прибавить count и revenue к строке итогов (создать ее при необходимости)."""
+        space_id, day, status_id, _amount = state
+        rows = BookingDailyStats.objects.filter(date=day, space_id=space_id, status_id=status_id)
+        changes = {'bookings_count': F('bookings_count') + count, 'revenue': F('revenue') + revenue}
+        if rows.update(**changes) or count < 0:
+            return
+        BookingDailyStats.objects.bulk_create(
+            [BookingDailyStats(date=day, space_id=space_id, status_id=status_id)],
+            ignore_conflicts=True,
+        )
+        rows.update(**changes)
+
+    @classmethod
+    def changed(cls, old: Optional[RollupState], new: Optional[RollupState]) -> None:
+        """
+        Учесть создание, изменение или удаление бронирования.
+
+        Args:
+            old: Прежний вклад (None — бронирование создано)
+            new: Новый вклад (None — бронирование удалено)
+        """
+        if old == new:
+            return
+        if old is not None and new is not None and old[:3] == new[:3]:
+            cls._apply(new, 0, new[3] - old[3])
+            return
+        if old is not None:
+            cls._apply(old, -1, -old[3])
+        if new is not None:
+            cls._apply(new, 1, new[3])
+
+    @staticmethod
+    def recompute(
+        space_ids: Optional[Iterable[int]] = None,
+        date_from: date | str | None = None,
+        date_to: date | str | None = None,
+    ) -> int:
+        """
+        Пересчитать итоги по исходной таблице бронирований.
+
+        Строки в пределах отбора удаляются и вставляются заново
+        по одному сгруппированному запросу.
+
+        Args:
+            space_ids: ID помещений (None — все)
+            date_from: Начало периода включительно (None — без ограничения)
+            date_to: Конец периода включительно (None — без ограничения)
+
+        Returns:
+            int: Количество записанных строк итогов
+        """
+        bookings = Booking.objects.all()
+        rows = BookingDailyStats.objects.all()
+        if space_ids is not None:
+            space_ids = set(space_ids)
+            bookings = bookings.filter(space_id__in=space_ids)
+            rows = rows.filter(space_id__in=space_ids)
+
+        day_from, day_to = _parse_day(date_from), _parse_day(date_to)
+        bookings = bookings.annotate(day=TruncDate('created_at'))
+        if day_from:
+            bookings = bookings.filter(day__gte=day_from)
+            rows = rows.filter(date__gte=day_from)
+        if day_to:
+            bookings = bookings.filter(day__lte=day_to)
+            rows = rows.filter(date__lte=day_to)
+
+        totals = bookings.values('day', 'space_id', 'status_id').annotate(
+            bookings_count=Count('id'),
+            revenue=Sum('total_amount'),
+        ).order_by()
+
+        with transaction.atomic():
+            rows.delete()
+            objects = BookingDailyStats.objects.bulk_create(
+                [
+                    BookingDailyStats(
+                        date=row['day'], space_id=row['space_id'], status_id=row['status_id'],
+                        bookings_count=row['bookings_count'], revenue=row['revenue'] or Decimal('0'),
+                    )
+                    for row in totals
+                ],
+                batch_size=1000,
+            )
+
+        logger.debug(f"Recomputed {len(objects)} booking rollup rows")
+        return len(objects)
+
+    @staticmethod
+    def summary(
+        date_from: date | str | None = None,
+        date_to: date | str | None = None,
+        group_by: Iterable[str] = ('date',),
+        status_codes: Optional[Iterable[str]] = None,
+    ) -> QuerySet | dict[str, Any]:
+        """
+        Итоги бронирований за период.
+
+        Args:
+            date_from: Начало периода включительно (date или YYYY-MM-DD)
+            date_to: Конец периода включительно (date или YYYY-MM-DD)
+            group_by: Поля группировки ('date', 'space_id', 'status_id',
+                      'space__city_id' и т.п.)
+            status_codes: Учитывать только статусы с этими кодами
+
+        Returns:
+            QuerySet: Словари полей группировки с bookings и revenue,
+                      упорядоченные по полям группировки; при пустом
+                      group_by — словарь итогов за период
+        """
+        rows = BookingDailyStats.objects.all()
+        day_from, day_to = _parse_day(date_from), _parse_day(date_to)
+        if day_from:
+            rows = rows.filter(date__gte=day_from)
+        if day_to:
+            rows = rows.filter(date__lte=day_to)
+        if status_codes is not None:
+            statuses = ReferenceData.get().booking_statuses
+            rows = rows.filter(status_id__in=[
+                statuses[code].pk for code in status_codes if code in statuses
+            ])
+
+        group_by = tuple(group_by)
+        totals = {'bookings': Sum('bookings_count'), 'revenue': Sum('revenue')}
+        if not group_by:
+            return rows.aggregate(**totals)
+        return rows.values(*group_by).annotate(**totals).order_by(*group_by)
@@ -0,0 +1,315 @@
+"""
+====================================================================
+ОЧЕРЕДЬ ИСХОДЯЩИХ ПИСЕМ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит реализацию transactional outbox для email.
+Письма не отправляются в ходе обработки HTTP запроса: они
+записываются в таблицу email_outbox в той же транзакции, что и
+бизнес-операция, а фоновый обработчик отправляет их пачками.
+
+Основные компоненты:
+- EmailOutboxService.enqueue: Постановка письма в очередь
+- EmailOutboxService.enqueue_each: Одно письмо отдельно каждому получателю
+- EmailOutboxService.claim_batch: Захват пачки писем для отправки
+- OutboxSender: Отправка пачек через одно постоянное SMTP-соединение
+
+Настройки (settings.py):
+- EMAIL_OUTBOX_BATCH_SIZE: Размер пачки писем
+- EMAIL_OUTBOX_MAX_ATTEMPTS: Максимум попыток отправки письма
+- EMAIL_OUTBOX_RETRY_BASE_SECONDS: Базовая задержка повтора
+- EMAIL_OUTBOX_RETRY_MAX_SECONDS: Максимальная задержка повтора
+
+Особенности:
+- Латентность входа, регистрации и webhook не зависит от SMTP
+- Экспоненциальная задержка между повторными попытками
+- Захват пачки через SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+  можно запускать несколько обработчиков одновременно
+- Письма, «зависшие» в статусе отправки, возвращаются в очередь;
+  брошенная отправка засчитывается как попытка
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import Optional, Sequence, Union
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from ..models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# Письмо в статусе «отправляется» дольше этого времени считается брошенным
+STALE_SENDING_SECONDS: int = 600
+
+
+class EmailOutboxService:
+    """
+    Сервис очереди исходящих писем.
+    """
+
+    @staticmethod
+    def get_batch_size() -> int:
+        """Размер пачки писем из настроек."""
+        return getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+
+    @staticmethod
+    def get_max_attempts() -> int:
+        """Максимальное количество попыток отправки из настроек."""
+        return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+
+    @staticmethod
+    def get_retry_delay(attempts: int) -> timedelta:
+        """
+        Рассчитать задержку перед следующей попыткой.
+
+        Args:
+            attempts: Количество уже выполненных попыток
+
+        Returns:
+            timedelta: Задержка (экспоненциальная, с ограничением сверху)
+        """
+        base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30)
+        maximum = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+        return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), maximum))
+
+    @classmethod
+    def enqueue(
+        cls,
+        subject: str,
+        recipients: Union[str, Sequence[str]],
+        html_content: str,
+        from_email: Optional[str] = None,
+        text_content: Optional[str] = None
+    ) -> EmailOutbox:
+        """
+        Поставить письмо в очередь.
+
+        Запись создаётся в текущей транзакции: если бизнес-операция
+        откатится, письмо тоже не будет отправлено.
+
+        Args:
+            subject: Тема письма
+            recipients: Адрес или список адресов получателей
+            html_content: HTML версия письма
+            from_email: Адрес отправителя (по умолчанию из settings)
+            text_content: Текстовая версия (по умолчанию из HTML)
+
+        Returns:
+            EmailOutbox: Созданная запись очереди
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+
+        return EmailOutbox.objects.create(
+            subject=subject[:255],
+            recipients=list(recipients),
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            body_text=text_content if text_content is not None else strip_tags(html_content),
+            body_html=html_content,
+        )
+
+    @classmethod
+    def enqueue_each(
+        cls,
+        subject: str,
+        recipients: Sequence[str],
+        html_content: str,
+        from_email: Optional[str] = None
+    ) -> list[EmailOutbox]:
+        """
+        Поставить в очередь одно и то же письмо отдельно каждому получателю.
+
+        Письмо рендерится один раз вызывающей стороной, а записи очереди
+        создаются одним запросом (bulk_create).
+
+        Args:
+            subject: Тема письма
+            recipients: Список адресов получателей
+            html_content: HTML версия письма
+            from_email: Адрес отправителя (по умолчанию из settings)
+
+        Returns:
+            list[EmailOutbox]: Созданные записи очереди
+        """
+        text_content = strip_tags(html_content)
+        from_email = from_email or settings.DEFAULT_FROM_EMAIL
+
+        return EmailOutbox.objects.bulk_create([
+            EmailOutbox(
+                subject=subject[:255],
+                recipients=[recipient],
+                from_email=from_email,
+                body_text=text_content,
+                body_html=html_content,
+            )
+            for recipient in recipients
+        ])
+
+    @classmethod
+    def claim_batch(cls, batch_size: Optional[int] = None) -> list[EmailOutbox]:
+        """
+        Захватить пачку писем, готовых к отправке.
+
+        Письма переводятся в статус SENDING, чтобы другие обработчики
+        их не взяли. Зависшие письма в статусе SENDING захватываются
+        повторно; брошенная отправка считается попыткой, и после
+        исчерпания попыток письмо переводится в статус FAILED.
+
+        Args:
+            batch_size: Размер пачки (по умолчанию из настроек)
+
+        Returns:
+            list[EmailOutbox]: Захваченные письма в порядке постановки
+        """
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=STALE_SENDING_SECONDS)
+        max_attempts = cls.get_max_attempts()
+
+        with transaction.atomic():
+            rows = list(
+                EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                    Q(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now) |
+                    Q(status=EmailOutbox.Status.SENDING, updated_at__lt=stale_before)
+                ).order_by('id').values_list('id', 'status', 'attempts')[:batch_size or cls.get_batch_size()]
+            )
+            stale = [pk for pk, status, _ in rows if status == EmailOutbox.Status.SENDING]
+            exhausted = {
+                pk for pk, status, attempts in rows
+                if status == EmailOutbox.Status.SENDING and attempts + 1 >= max_attempts
+            }
+            if stale:
+                EmailOutbox.objects.filter(id__in=stale).update(
+                    attempts=F('attempts') + 1,
+                    last_error='Отправка прервана (обработчик не завершил попытку)',
+                )
+            if exhausted:
+                EmailOutbox.objects.filter(id__in=exhausted).update(
+                    status=EmailOutbox.Status.FAILED,
+                    updated_at=now
+                )
+                logger.warning(f"Outbox emails failed after abandoned attempts: {sorted(exhausted)}")
+
+            ids = [pk for pk, _, _ in rows if pk not in exhausted]
+            if ids:
+                EmailOutbox.objects.filter(id__in=ids).update(
+                    status=EmailOutbox.Status.SENDING,
+                    updated_at=now
+                )
+
+        return list(EmailOutbox.objects.filter(id__in=ids).order_by('id'))
+
+    @classmethod
+    def mark_sent(cls, ids: Sequence[int]) -> None:
+        """Отметить письма как отправленные одним запросом."""
+        if ids:
+            EmailOutbox.objects.filter(id__in=ids).update(
+                status=EmailOutbox.Status.SENT,
+                attempts=F('attempts') + 1,
+                sent_at=timezone.now(),
+                last_error='',
+                updated_at=timezone.now()
+            )
+
+    @classmethod
+    def mark_failed(cls, message: EmailOutbox, error: str) -> None:
+        """
+        Зафиксировать неудачную попытку и запланировать повтор.
+
+        После исчерпания попыток письмо переводится в статус FAILED.
+
+        Args:
+            message: Запись очереди
+            error: Текст ошибки
+        """
+        attempts = message.attempts + 1
+        if attempts >= cls.get_max_attempts():
+            status = EmailOutbox.Status.FAILED
+        else:
+            status = EmailOutbox.Status.PENDING
+
+        EmailOutbox.objects.filter(pk=message.pk).update(
+            status=status,
+            attempts=attempts,
+            next_attempt_at=timezone.now() + cls.get_retry_delay(attempts),
+            last_error=error[:1000],
+            updated_at=timezone.now()
+        )
+
+
+class OutboxSender:
+    """
+    Отправитель писем из очереди.
+
+    Держит одно SMTP-соединение открытым, пока в очереди есть письма,
+    и закрывает его, когда очередь опустела. При ошибке соединение
+    сбрасывается и открывается заново для следующего письма.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None) -> None:
+        self.batch_size = batch_size
+        self.connection = None
+
+    def _get_connection(self):
+        """Получить (при необходимости открыть) SMTP-соединение."""
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close(self) -> None:
+        """Закрыть SMTP-соединение."""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception as e:
+                logger.warning(f"Error closing SMTP connection: {e}")
+            self.connection = None
+
+    def send_batch(self) -> dict[str, int]:
+        """
+        Отправить одну пачку писем.
+
+        Returns:
+            dict: Статистика пачки (claimed, sent, failed)
+        """
+        batch = EmailOutboxService.claim_batch(self.batch_size)
+        stats = {'claimed': len(batch), 'sent': 0, 'failed': 0}
+
+        if not batch:
+            self.close()
+            return stats
+
+        sent_ids: list[int] = []
+        for message in batch:
+            try:
+                email = EmailMultiAlternatives(
+                    subject=message.subject,
+                    body=message.body_text,
+                    from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                    to=message.recipients,
+                    connection=self._get_connection()
+                )
+                if message.body_html:
+                    email.attach_alternative(message.body_html, 'text/html')
+                email.send(fail_silently=False)
+                sent_ids.append(message.pk)
+            except Exception as e:
+                logger.error(f"Failed to send outbox email #{message.pk}: {e}")
+                EmailOutboxService.mark_failed(message, str(e))
+                stats['failed'] += 1
+                # Соединение могло оборваться — откроем новое для следующего письма
+                self.close()
+
+        EmailOutboxService.mark_sent(sent_ids)
+        stats['sent'] = len(sent_ids)
+
+        logger.info(f"Outbox batch processed: {stats}")
+        return stats
@@ -7,13 +7,15 @@
 кодов верификации, сброса пароля и других уведомлений.
 
 Основные функции:
-- send_email: Базовая функция отправки email с HTML и текстовой версией
+- send_email: Постановка письма с HTML и текстовой версией в очередь отправки
 - generate_token: Генерация безопасных токенов ��ля ссылок
 - send_verification_code: Отправка 6-значного кода подтверждения
 - send_verification_email: Отправка письма с ссылкой подтверждения email
 - send_password_reset_email: Отправка письма для сброса пароля
 
 Особенности:
+- Письма не отправляются в запросе, а пишутся в очередь email_outbox
+  (см. email_outbox.py) и отправляются командой send_outbox_emails
 - Использование Django шаблонов для HTML-писем
 - Автоматическое создание текстовой версии из HTML
 - Отладочный вывод в консоль для тестирования
@@ -26,13 +28,13 @@ from __future__ import annotations
 import logging
 import secrets
 from datetime import timedelta
-from typing import Optional
+from typing import Optional, Sequence, Union
 
-from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.html import strip_tags
+
+from .email_outbox import EmailOutboxService
 
 logger = logging.getLogger(__name__)
 
@@ -53,52 +55,47 @@ def generate_token() -> str:
 
 def send_email(
     subject: str,
-    to_email: str,
+    to_email: Union[str, Sequence[str]],
     template_name: str,
     context: dict,
     from_email: Optional[str] = None
 ) -> bool:
     """
-    Отправка email с HTML и текстовой версией.
+    Постановка email с HTML и текстовой версией в очередь отправки.
 
-    Рендерит HTML-шаблон письма, создает текстовую версию
-    и отправляет через SMTP. Логирует результат отправки.
+    Рендерит HTML-шаблон письма и записывает его в таблицу email_outbox
+    в текущей транзакции. Фактическая отправка выполняется фоновым
+    обработчиком (python manage.py send_outbox_emails).
 
     Args:
         subject (str): Тема письма
-        to_email (str): Email получателя
+        to_email (Union[str, Sequence[str]]): Email или список email получателей
         template_name (str): Имя шаблона без расширения (ищется в templates/emails/)
         context (dict): Контекстные данные для шаблона
         from_email (Optional[str]): Email отправителя (по умолчанию из settings)
 
     Returns:
-        bool: True если отправка успешна, False при ошибке
+        bool: True если письмо поставлено в очередь, False при ошибке
     """
     try:
-        from_email = from_email or settings.DEFAULT_FROM_EMAIL
-
-        # Рендерим HTML версию
+        # Рендерим HTML версию (текстовая создаётся при постановке в очередь)
         html_content = render_to_string(f'emails/{template_name}.html', context)
-        # Создаём текстовую версию
-        text_content = strip_tags(html_content)
-
-        # Создаём письмо
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_content,
-            from_email=from_email,
-            to=[to_email]
-        )
-        email.attach_alternative(html_content, 'text/html')
-
-        # Отправляем
-        email.send(fail_silently=False)
-
-        logger.info(f"Email sent successfully to {to_email}: {subject}")
+
+        # Точка сохранения: ошибка записи в очередь не ломает транзакцию
+        # вызывающего кода, который продолжает работу после False
+        with transaction.atomic():
+            message = EmailOutboxService.enqueue(
+                subject=subject,
+                recipients=to_email,
+                html_content=html_content,
+                from_email=from_email
+            )
+
+        logger.info(f"Email #{message.pk} queued for {to_email}: {subject}")
         return True
 
     except Exception as e:
-        logger.error(f"Failed to send email to {to_email}: {e}", exc_info=True)
+        logger.error(f"Failed to queue email to {to_email}: {e}", exc_info=True)
         return False
 
 
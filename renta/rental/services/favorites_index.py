@@ -0,0 +1,112 @@
+"""
+====================================================================
+ИНДЕКС ИЗБРАННОГО ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит кэшированный индекс избранного: множество ID
+помещений, добавленных пользователем в избранное.
+
+Основные компоненты:
+- FavoritesIndex.get: Множество ID избранных помещений пользователя
+- FavoritesIndex.contains / count: Проверка и количество без запросов
+- FavoritesIndex.add / discard: Обновление индекса (write-through)
+
+Принцип работы:
+- Множество загружается из БД одним запросом при первом обращении
+  и хранится в кэше
+- Добавление и удаление избранного (сигналы модели Favorite) после
+  коммита обновляют множество в кэше, а не сбрасывают его, поэтому
+  страницы каталога, помещения и счетчик в шаблонах не обращаются к БД
+- Срок хранения ограничен FAVORITES_INDEX_TIMEOUT: при гонке
+  одновременных изменений индекс восстановится не позже этого срока
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import Favorite
+
+logger = logging.getLogger(__name__)
+
+# Время хранения индекса в кэше (секунды)
+FAVORITES_INDEX_TIMEOUT: int = 60 * 60 * 24
+
+
+class FavoritesIndex:
+    """
+    Кэшированный индекс избранных помещений пользователей.
+    """
+
+    @staticmethod
+    def _cache_key(user_id: int) -> str:
+        return f'favorites_index:{user_id}'
+
+    @classmethod
+    def get(cls, user_id: Optional[int]) -> frozenset[int]:
+        """
+        Получить ID избранных помещений пользователя.
+
+        Args:
+            user_id: ID пользователя (None — анонимный пользователь)
+
+        Returns:
+            frozenset[int]: Множество ID помещений
+        """
+        if user_id is None:
+            return frozenset()
+
+        key = cls._cache_key(user_id)
+        space_ids = cache.get(key)
+        if space_ids is None:
+            space_ids = frozenset(
+                Favorite.objects.filter(user_id=user_id).values_list('space_id', flat=True)
+            )
+            cache.set(key, space_ids, FAVORITES_INDEX_TIMEOUT)
+        return space_ids
+
+    @classmethod
+    def contains(cls, user_id: Optional[int], space_id: int) -> bool:
+        """Находится ли помещение в избранном у пользователя."""
+        return space_id in cls.get(user_id)
+
+    @classmethod
+    def count(cls, user_id: Optional[int]) -> int:
+        """Количество избранных помещений пользователя."""
+        return len(cls.get(user_id))
+
+    @classmethod
+    def _update(cls, user_id: int, space_id: int, add: bool) -> None:
+        """Изменить множество в кэше (если оно загружено)."""
+        key = cls._cache_key(user_id)
+        space_ids = cache.get(key)
+        if space_ids is None:
+            return
+        space_ids = space_ids | {space_id} if add else space_ids - {space_id}
+        cache.set(key, frozenset(space_ids), FAVORITES_INDEX_TIMEOUT)
+
+    @classmethod
+    def add(cls, user_id: int, space_id: int) -> None:
+        """
+        Добавить помещение в индекс после коммита транзакции.
+
+        Args:
+            user_id: ID пользователя
+            space_id: ID помещения
+        """
+        transaction.on_commit(lambda: cls._update(user_id, space_id, add=True))
+
+    @classmethod
+    def discard(cls, user_id: int, space_id: int) -> None:
+        """
+        Убрать помещение из индекса после коммита транзакции.
+
+        Args:
+            user_id: ID пользователя
+            space_id: ID помещения
+        """
+        transaction.on_commit(lambda: cls._update(user_id, space_id, add=False))
@@ -25,6 +25,8 @@ import requests
 from typing import Optional, Tuple
 from django.conf import settings
 
+from .request_metrics import RequestMetrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,16 +54,17 @@ def geocode_address(city: str, address: str) -> Optional[Tuple[float, float]]:
     full_address = f"{city}, {address}"
 
     try:
-        response = requests.get(
-            'https://geocode-maps.yandex.ru/1.x/',
-            params={
-                'apikey': api_key,
-                'geocode': full_address,
-                'format': 'json',
-                'results': 1,
-            },
-            timeout=5
-        )
+        with RequestMetrics.external_call('geocoder'):
+            response = requests.get(
+                'https://geocode-maps.yandex.ru/1.x/',
+                params={
+                    'apikey': api_key,
+                    'geocode': full_address,
+                    'format': 'json',
+                    'results': 1,
+                },
+                timeout=5
+            )
         response.raise_for_status()
 
         data = response.json()
@@ -0,0 +1,222 @@
+"""
+====================================================================
+АРХИВАЦИЯ ЖУРНАЛА ДЕЙСТВИЙ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит выгрузку старых записей журнала действий в
+сжатые файлы JSON Lines перед их удалением из базы данных.
+
+Основные компоненты:
+- ActionLogArchiver.archive: Потоковая выгрузка периода в файлы
+- ActionLogArchiver.delete_archived: Удаление выгруженных строк пачками
+- ActionLogArchiver.verify: Проверка файлов архива по манифесту
+
+Формат архива:
+- action_logs_<от>_<до>_0001.jsonl.gz, ... — по одной записи JSON
+  на строку, новый файл после max_rows_per_file строк
+- action_logs_<от>_<до>_manifest.json — список файлов с количеством
+  строк и контрольной суммой SHA-256
+
+Особенности:
+- Строки читаются серверным курсором (QuerySet.iterator), поэтому
+  расход памяти не зависит от размера таблицы
+- Удаляются только строки, попавшие в архив (id не больше последнего
+  выгруженного), пачками по chunk_size
+====================================================================
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from ..models import ActionLog
+
+logger = logging.getLogger(__name__)
+
+# Поля записи журнала, попадающие в архив
+ARCHIVE_FIELDS: tuple[str, ...] = (
+    'id', 'created_at', 'user_id', 'user__username', 'action_type', 'model_name',
+    'object_id', 'object_repr', 'changes', 'ip_address', 'user_agent__user_agent',
+)
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """Контрольная сумма SHA-256 файла (читается блоками)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ActionLogArchiver:
+    """
+    Выгрузка журнала действий за период в сжатые файлы JSON Lines.
+
+    Args:
+        output_dir: Каталог для файлов архива
+        date_to: Выгружать записи строго раньше этого момента
+        date_from: Выгружать записи не раньше этого момента (необязательно)
+        max_rows_per_file: Строк в одном файле до ротации
+        chunk_size: Размер пачки чтения курсора и удаления
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        date_to: datetime,
+        date_from: Optional[datetime] = None,
+        max_rows_per_file: int = 500000,
+        chunk_size: int = 2000
+    ) -> None:
+        self.output_dir = output_dir
+        self.date_to = date_to
+        self.date_from = date_from
+        self.max_rows_per_file = max_rows_per_file
+        self.chunk_size = chunk_size
+        self.max_id: Optional[int] = None
+
+    @property
+    def prefix(self) -> str:
+        """Общий префикс имён файлов архива."""
+        start = self.date_from.strftime('%Y%m%d') if self.date_from else 'start'
+        return f'action_logs_{start}_{self.date_to.strftime("%Y%m%d")}'
+
+    @property
+    def manifest_path(self) -> str:
+        """Путь к файлу манифеста."""
+        return os.path.join(self.output_dir, f'{self.prefix}_manifest.json')
+
+    def get_queryset(self) -> QuerySet:
+        """Записи журнала за период архивации."""
+        logs = ActionLog.objects.filter(created_at__lt=self.date_to)
+        if self.date_from:
+            logs = logs.filter(created_at__gte=self.date_from)
+        return logs
+
+    def _iter_rows(self) -> Iterator[dict[str, Any]]:
+        """Потоковое чтение записей периода в порядке id."""
+        return self.get_queryset().order_by('id').values(*ARCHIVE_FIELDS).iterator(
+            chunk_size=self.chunk_size
+        )
+
+    def archive(self) -> dict[str, Any]:
+        """
+        Выгрузить записи периода в файлы и записать манифест.
+
+        Returns:
+            dict: Манифест (period, files, total_rows, max_id, created_at)
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        files: list[dict[str, Any]] = []
+        total = 0
+        current = None
+        current_rows = 0
+        current_path = ''
+
+        def close_current() -> None:
+            current.close()
+            files.append({
+                'name': os.path.basename(current_path),
+                'rows': current_rows,
+                'sha256': file_sha256(current_path),
+            })
+
+        try:
+            for row in self._iter_rows():
+                if current is None or current_rows >= self.max_rows_per_file:
+                    if current is not None:
+                        close_current()
+                    current_path = os.path.join(
+                        self.output_dir, f'{self.prefix}_{len(files) + 1:04d}.jsonl.gz'
+                    )
+                    current = gzip.open(current_path, 'wt', encoding='utf-8')
+                    current_rows = 0
+
+                row['username'] = row.pop('user__username')
+                row['user_agent'] = row.pop('user_agent__user_agent') or ''
+                current.write(json.dumps(row, ensure_ascii=False, cls=DjangoJSONEncoder))
+                current.write('\n')
+                current_rows += 1
+                total += 1
+                self.max_id = row['id']
+
+            if current is not None:
+                close_current()
+                current = None
+        finally:
+            if current is not None:
+                current.close()
+
+        manifest = {
+            'period': {
+                'from': self.date_from.isoformat() if self.date_from else None,
+                'to': self.date_to.isoformat(),
+            },
+            'files': files,
+            'total_rows': total,
+            'max_id': self.max_id,
+            'created_at': timezone.now().isoformat(),
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        logger.info(f"ActionLog archive written: {total} rows in {len(files)} files ({self.prefix})")
+        return manifest
+
+    def verify(self, manifest: dict[str, Any]) -> list[str]:
+        """
+        Проверить файлы архива по контрольным суммам манифеста.
+
+        Args:
+            manifest: Манифест, возвращённый archive()
+
+        Returns:
+            list[str]: Имена отсутствующих или повреждённых файлов
+        """
+        broken = []
+        for entry in manifest['files']:
+            path = os.path.join(self.output_dir, entry['name'])
+            if not os.path.exists(path) or file_sha256(path) != entry['sha256']:
+                broken.append(entry['name'])
+        return broken
+
+    def delete_archived(self, on_progress=None) -> int:
+        """
+        Удалить выгруженные записи пачками по chunk_size.
+
+        Каждая пачка удаляется отдельным коротким запросом, поэтому
+        блокировки не держатся долго и журнал продолжает записываться.
+
+        Args:
+            on_progress: Callback с количеством удалённых строк
+
+        Returns:
+            int: Количество удалённых строк
+        """
+        if self.max_id is None:
+            return 0
+
+        archived = self.get_queryset().filter(id__lte=self.max_id)
+        deleted = 0
+        while True:
+            ids = list(archived.order_by('id').values_list('id', flat=True)[:self.chunk_size])
+            if not ids:
+                break
+            count, _ = ActionLog.objects.filter(id__in=ids).delete()
+            deleted += count
+            if on_progress:
+                on_progress(deleted)
+
+        logger.info(f"ActionLog archived rows deleted: {deleted}")
+        return deleted
@@ -0,0 +1,374 @@
+"""
+====================================================================
+ПАРТИЦИОНИРОВАНИЕ ЖУРНАЛА ДЕЙСТВИЙ ДЛЯ САЙТА "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит обслуживание таблицы action_logs, разбитой на
+помесячные партиции (декларативное партиционирование PostgreSQL,
+PARTITION BY RANGE (created_at)).
+
+Основные компоненты:
+- ActionLogPartitionService.convert_table: Перевод таблицы на партиции
+- ActionLogPartitionService.ensure_partitions: Создание будущих партиций
+- ActionLogPartitionService.apply_retention: Отсоединение/удаление старых
+
+Настройки (settings.py):
+- ACTION_LOG_PARTITIONS_AHEAD: Сколько будущих месяцев создавать заранее
+- ACTION_LOG_RETENTION_MONTHS: Сколько месяцев хранить в основной таблице
+
+Особенности:
+- Партиции называются action_logs_yYYYYmMM, границы — начало месяца
+  в часовом поясе проекта
+- Партиция action_logs_default принимает строки вне созданных месяцев;
+  при создании партиции месяца его строки переносятся из неё
+- Фильтры периода отчётов (core.period_lookup) строятся как
+  created_at >= X AND created_at < Y, чтобы планировщик отбрасывал
+  лишние партиции
+- На других СУБД (SQLite в тестах) операции с партициями пропускаются
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from datetime import date, datetime, time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME: str = 'action_logs'
+LEGACY_TABLE_NAME: str = 'action_logs_legacy'
+DEFAULT_PARTITION: str = 'action_logs_default'
+SEQUENCE_NAME: str = 'action_logs_id_seq'
+
+PARTITION_RE = re.compile(r'^action_logs_y(\d{4})m(\d{2})$')
+
+
+def add_months(month: date, count: int) -> date:
+    """Первое число месяца, отстоящего от month на count месяцев."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class ActionLogPartitionService:
+    """
+    Сервис обслуживания помесячных партиций журнала действий.
+    """
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Поддерживает ли текущая БД декларативное партиционирование."""
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def is_partitioned(cls) -> bool:
+        """Переведена ли таблица action_logs на партиции."""
+        if not cls.is_supported():
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+                [TABLE_NAME]
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def partition_name(month: date) -> str:
+        """Имя партиции для месяца (action_logs_yYYYYmMM)."""
+        return f'{TABLE_NAME}_y{month.year:04d}m{month.month:02d}'
+
+    @staticmethod
+    def month_start(month: date) -> datetime:
+        """Начало месяца в часовом поясе проекта."""
+        return timezone.make_aware(datetime.combine(month.replace(day=1), time.min))
+
+    @staticmethod
+    def current_month() -> date:
+        """Первое число текущего месяца."""
+        return timezone.localdate().replace(day=1)
+
+    # ------------------------------------------------------------------
+    # Партиции
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def list_partitions(cls) -> list[tuple[str, date]]:
+        """
+        Получить помесячные партиции action_logs.
+
+        Returns:
+            list: Пары (имя партиции, первое число месяца) по возрастанию
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+                [TABLE_NAME]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        partitions = []
+        for name in names:
+            match = PARTITION_RE.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda item: item[1])
+
+    @classmethod
+    def _create_partition_sql(cls, month: date) -> str:
+        """SQL создания партиции месяца (границы — литералы с часовым поясом)."""
+        start, end = cls._month_bounds(month)
+        return (
+            f'CREATE TABLE IF NOT EXISTS "{cls.partition_name(month)}" '
+            f'PARTITION OF "{TABLE_NAME}" FOR VALUES FROM (\'{start}\') TO (\'{end}\')'
+        )
+
+    @classmethod
+    def _month_bounds(cls, month: date) -> tuple[str, str]:
+        """Границы месяца литералами с часовым поясом (начало, конец)."""
+        return (
+            cls.month_start(month).isoformat(sep=' '),
+            cls.month_start(add_months(month, 1)).isoformat(sep=' '),
+        )
+
+    @classmethod
+    def _move_from_default_sql(cls, month: date) -> list[str]:
+        """
+        SQL создания партиции месяца, строки которого уже лежат в action_logs_default.
+
+        PostgreSQL не создаёт партицию, пока в партиции по умолчанию есть
+        строки её диапазона. Поэтому партиция по умолчанию отсоединяется,
+        создаётся новая партиция, строки месяца переносятся в неё, и
+        партиция по умолчанию присоединяется обратно. Выполняется внутри
+        транзакции ensure_partitions.
+        """
+        start, end = cls._month_bounds(month)
+        name = cls.partition_name(month)
+        in_month = f'created_at >= \'{start}\' AND created_at < \'{end}\''
+        return [
+            f'ALTER TABLE "{TABLE_NAME}" DETACH PARTITION "{DEFAULT_PARTITION}"',
+            cls._create_partition_sql(month),
+            f'INSERT INTO "{name}" SELECT * FROM "{DEFAULT_PARTITION}" WHERE {in_month}',
+            f'DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month}',
+            f'ALTER TABLE "{TABLE_NAME}" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT',
+        ]
+
+    @classmethod
+    def _default_has_rows(cls, cursor: Any, month: date) -> bool:
+        """Есть ли в action_logs_default строки за месяц."""
+        cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+        if cursor.fetchone()[0] is None:
+            return False
+        start, end = cls._month_bounds(month)
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" '
+            f'WHERE created_at >= %s AND created_at < %s)',
+            [start, end]
+        )
+        return cursor.fetchone()[0]
+
+    @classmethod
+    def ensure_partitions(cls, months_ahead: Optional[int] = None) -> list[str]:
+        """
+        Создать партиции с текущего месяца на months_ahead месяцев вперёд.
+
+        Если строки месяца уже попали в action_logs_default (команда не
+        запускалась вовремя), они переносятся в созданную партицию.
+        Все партиции создаются в одной транзакции.
+
+        Args:
+            months_ahead: Количество будущих месяцев (по умолчанию из настроек)
+
+        Returns:
+            list[str]: Имена созданных партиций
+        """
+        if not cls.is_partitioned():
+            return []
+        if months_ahead is None:
+            months_ahead = getattr(settings, 'ACTION_LOG_PARTITIONS_AHEAD', 3)
+
+        existing = {name for name, _ in cls.list_partitions()}
+        created = []
+        month = cls.current_month()
+        with transaction.atomic(), connection.cursor() as cursor:
+            for offset in range(months_ahead + 1):
+                target = add_months(month, offset)
+                name = cls.partition_name(target)
+                if name in existing:
+                    continue
+                if cls._default_has_rows(cursor, target):
+                    for sql in cls._move_from_default_sql(target):
+                        cursor.execute(sql)
+                    logger.info(f"ActionLog rows moved from {DEFAULT_PARTITION} to {name}")
+                else:
+                    cursor.execute(cls._create_partition_sql(target))
+                created.append(name)
+
+        if created:
+            logger.info(f"ActionLog partitions created: {', '.join(created)}")
+        return created
+
+    @classmethod
+    def convert_table(cls, months_ahead: Optional[int] = None) -> int:
+        """
+        Перевести обычную таблицу action_logs на помесячные партиции.
+
+        Выполняется одной транзакцией: таблица переименовывается, создаётся
+        партиционированная таблица с теми же колонками и индексами,
+        партиции на весь период данных, строки копируются, старая
+        таблица удаляется. На время копирования запись в журнал блокируется.
+
+        Args:
+            months_ahead: Количество будущих месяцев для создания партиций
+
+        Returns:
+            int: Количество перенесённых строк
+
+        Raises:
+            RuntimeError: Если БД не PostgreSQL или таблица уже партиционирована
+        """
+        if not cls.is_supported():
+            raise RuntimeError('Партиционирование поддерживается только в PostgreSQL')
+        if cls.is_partitioned():
+            raise RuntimeError('Таблица action_logs уже разбита на партиции')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE "{TABLE_NAME}" IN ACCESS EXCLUSIVE MODE')
+
+            # Определения индексов (кроме первичного ключа) до переименования
+            cursor.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE tablename = %s AND indexname NOT IN ("
+                "  SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass"
+                ")",
+                [TABLE_NAME, TABLE_NAME]
+            )
+            indexes = cursor.fetchall()
+
+            cursor.execute(f'ALTER TABLE "{TABLE_NAME}" RENAME TO "{LEGACY_TABLE_NAME}"')
+            for index_name, _ in indexes:
+                cursor.execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"')
+
+            # Колонки копируются без identity: у партиционированной таблицы
+            # значения id выдаёт отдельная последовательность
+            cursor.execute(
+                f'CREATE TABLE "{TABLE_NAME}" (LIKE "{LEGACY_TABLE_NAME}" INCLUDING DEFAULTS) '
+                f'PARTITION BY RANGE (created_at)'
+            )
+            cursor.execute(f'ALTER TABLE "{TABLE_NAME}" ADD PRIMARY KEY (id, created_at)')
+            cursor.execute(
+                f'ALTER TABLE "{TABLE_NAME}" ADD FOREIGN KEY (user_id) '
+                f'REFERENCES users (id) ON DELETE SET NULL DEFERRABLE INITIALLY DEFERRED'
+            )
+            # Справочник User-Agent защищён от удаления используемых строк (PROTECT)
+            cursor.execute(
+                f'ALTER TABLE "{TABLE_NAME}" ADD FOREIGN KEY (user_agent_id) '
+                f'REFERENCES user_agents (id) ON DELETE RESTRICT DEFERRABLE INITIALLY DEFERRED'
+            )
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{SEQUENCE_NAME}_part"')
+            cursor.execute(
+                f'ALTER TABLE "{TABLE_NAME}" ALTER COLUMN id '
+                f'SET DEFAULT nextval(\'"{SEQUENCE_NAME}_part"\')'
+            )
+            # Индексы партиционированной таблицы наследуются всеми партициями
+            for _, index_def in indexes:
+                cursor.execute(index_def)
+
+            # Партиции на весь период существующих данных
+            cursor.execute(f'SELECT MIN(created_at) FROM "{LEGACY_TABLE_NAME}"')
+            oldest = cursor.fetchone()[0]
+            month = cls.current_month()
+            first = timezone.localtime(oldest).date().replace(day=1) if oldest else month
+            if months_ahead is None:
+                months_ahead = getattr(settings, 'ACTION_LOG_PARTITIONS_AHEAD', 3)
+            target = first
+            while target <= add_months(month, months_ahead):
+                cursor.execute(cls._create_partition_sql(target))
+                target = add_months(target, 1)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{TABLE_NAME}" DEFAULT'
+            )
+
+            cursor.execute(f'INSERT INTO "{TABLE_NAME}" SELECT * FROM "{LEGACY_TABLE_NAME}"')
+            moved = cursor.rowcount
+            cursor.execute(
+                f'SELECT setval(\'"{SEQUENCE_NAME}_part"\', '
+                f'COALESCE((SELECT MAX(id) FROM "{TABLE_NAME}"), 0) + 1, false)'
+            )
+            cursor.execute(f'DROP TABLE "{LEGACY_TABLE_NAME}"')
+            cursor.execute(f'ALTER SEQUENCE "{SEQUENCE_NAME}_part" OWNED BY "{TABLE_NAME}".id')
+
+        logger.info(f"ActionLog table converted to monthly partitions, {moved} rows moved")
+        return moved
+
+    @classmethod
+    def expired_partitions(cls, keep_months: Optional[int] = None) -> list[tuple[str, date]]:
+        """
+        Получить партиции старше срока хранения.
+
+        Args:
+            keep_months: Сколько месяцев хранить, включая текущий
+                (по умолчанию из настроек)
+
+        Returns:
+            list: Пары (имя партиции, месяц) для отсоединения
+        """
+        if keep_months is None:
+            keep_months = getattr(settings, 'ACTION_LOG_RETENTION_MONTHS', 12)
+        cutoff = add_months(cls.current_month(), -(max(keep_months, 1) - 1))
+        return [(name, month) for name, month in cls.list_partitions() if month < cutoff]
+
+    @classmethod
+    def apply_retention(cls, keep_months: Optional[int] = None, drop: bool = False) -> list[str]:
+        """
+        Отсоединить (и при drop=True удалить) партиции старше срока хранения.
+
+        Отсоединённая партиция остаётся обычной таблицей с тем же именем:
+        её можно выгрузить в архив и удалить позже. Отсоединение и удаление
+        партиции не требуют DELETE по строкам и не создают «мёртвых» строк.
+
+        Args:
+            keep_months: Сколько месяцев хранить, включая текущий
+            drop: Удалить отсоединённые партиции
+
+        Returns:
+            list[str]: Имена обработанных партиций
+        """
+        if not cls.is_partitioned():
+            return []
+
+        processed = []
+        with connection.cursor() as cursor:
+            for name, _ in cls.expired_partitions(keep_months):
+                cursor.execute(f'ALTER TABLE "{TABLE_NAME}" DETACH PARTITION "{name}"')
+                if drop:
+                    cursor.execute(f'DROP TABLE "{name}"')
+                processed.append(name)
+
+        if processed:
+            action = 'dropped' if drop else 'detached'
+            logger.info(f"ActionLog partitions {action}: {', '.join(processed)}")
+        return processed
+
+    @classmethod
+    def get_status(cls) -> dict[str, Any]:
+        """
+        Сводка о партициях для вывода командой.
+
+        Returns:
+            dict: supported, partitioned и список partitions
+        """
+        partitioned = cls.is_partitioned()
+        return {
+            'supported': cls.is_supported(),
+            'partitioned': partitioned,
+            'partitions': [name for name, _ in cls.list_partitions()] if partitioned else [],
+        }
@@ -17,6 +17,7 @@
 - Запись IP-адреса, User-Agent и других метаданных запроса
 - Фиксация изменений объектов в формате JSON
 - Обработка ошибок логирования без прерывания основного потока
+- Буферизованная запись пачками в фоновом потоке (action_log_writer)
 ====================================================================
 """
 
@@ -92,31 +93,37 @@ class LoggingService:
             request (Optional[HttpRequest]): HTTP запрос для получения
                 IP-адреса и User-Agent
 
-        Returns:
-            ActionLog: Созданная запись в журнале действий
+        Запись не сохраняется в ходе запроса: она передаётся буферизованному
+        писателю (action_log_writer) и сохраняется фоновым потоком пачкой
+        после коммита текущей транзакции.
 
-        Raises:
-            Exception: Возможны любые исключения при создании записи в БД
+        Returns:
+            ActionLog: Запись журнала, поставленная в очередь (ещё без pk)
         """
         from ..models import ActionLog
+        from .action_log_writer import action_log_writer
+        from .user_agents import MAX_USER_AGENT_LENGTH
 
         ip_address = None
         user_agent = ''
 
         if request:
             ip_address = LoggingService.get_client_ip(request)
-            user_agent = request.META.get('HTTP_USER_AGENT', '')[:500]
+            user_agent = request.META.get('HTTP_USER_AGENT', '')[:MAX_USER_AGENT_LENGTH]
 
-        return ActionLog.objects.create(
+        entry = ActionLog(
             user=user,
             action_type=action_type,
             model_name=model_name,
             object_id=object_id,
             object_repr=object_repr[:255],
             changes=changes or {},
-            ip_address=ip_address,
-            user_agent=user_agent
+            ip_address=ip_address
         )
+        # Ссылка на справочник user_agents проставляется при записи пачки
+        entry.raw_user_agent = user_agent
+        action_log_writer.submit(entry)
+        return entry
 
     @staticmethod
     def log_login(user: 'CustomUser', request: 'HttpRequest') -> None:
@@ -0,0 +1,193 @@
+"""
+====================================================================
+СВОДКИ УВЕДОМЛЕНИЙ МОДЕРАТОРАМ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит логику уведомления модераторов о событиях оплаты.
+Вместо письма на каждое событие обычные события копятся в таблице
+moderator_notifications и раз в окно рассылки отправляются каждому
+модератору одним письмом-сводкой (digest).
+
+Основные компоненты:
+- NotificationPriority: Приоритеты событий
+- ModeratorDigestService.notify: Регистрация события (сводка или сразу)
+- ModeratorDigestService.send_immediate: Немедленное уведомление
+- ModeratorDigestService.send_digest: Формирование и отправка сводки
+
+Настройки (settings.py):
+- MODERATOR_DIGEST_ENABLED: Включить режим сводок
+- MODERATOR_DIGEST_WINDOW_MINUTES: Окно накопления событий
+
+Особенности:
+- Сводка рендерится один раз и ставится в очередь email_outbox
+  отдельным письмом каждому модератору
+- События с высоким приоритетом отправляются немедленно
+- Отметка событий и постановка писем выполняются в одной транзакции
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import CustomUser, ModeratorNotification
+from .email_outbox import EmailOutboxService
+
+if TYPE_CHECKING:
+    from ..models import Booking
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationPriority:
+    """Приоритеты уведомлений модераторам."""
+    NORMAL = 'normal'
+    HIGH = 'high'
+
+
+class ModeratorDigestService:
+    """
+    Сервис уведомлений модераторов со сводками по окну времени.
+    """
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Включён ли режим сводок."""
+        return getattr(settings, 'MODERATOR_DIGEST_ENABLED', True)
+
+    @staticmethod
+    def get_window() -> timedelta:
+        """Окно накопления событий для одной сводки."""
+        return timedelta(minutes=getattr(settings, 'MODERATOR_DIGEST_WINDOW_MINUTES', 60))
+
+    @staticmethod
+    def get_moderator_emails() -> list[str]:
+        """Email всех активных модераторов и администраторов."""
+        return list(
+            CustomUser.objects.filter(
+                is_active=True,
+                user_type__in=['admin', 'moderator']
+            ).exclude(email='').values_list('email', flat=True)
+        )
+
+    @classmethod
+    def notify(
+        cls,
+        booking: 'Booking',
+        subject_suffix: str,
+        message: str,
+        priority: str = NotificationPriority.NORMAL
+    ) -> bool:
+        """
+        Зарегистрировать событие для модераторов.
+
+        Обычные события откладываются до следующей сводки,
+        события с высоким приоритетом отправляются сразу.
+
+        Args:
+            booking: Объект бронирования
+            subject_suffix: Краткое название события
+            message: Текст сообщения
+            priority: Приоритет события (NotificationPriority)
+
+        Returns:
+            bool: True если событие принято
+        """
+        if priority == NotificationPriority.HIGH or not cls.is_enabled():
+            return cls.send_immediate(booking, subject_suffix, message)
+
+        ModeratorNotification.objects.create(
+            booking=booking,
+            subject=subject_suffix,
+            message=message
+        )
+        return True
+
+    @classmethod
+    def send_immediate(cls, booking: 'Booking', subject_suffix: str, message: str) -> bool:
+        """
+        Немедленно поставить уведомление модераторам в очередь писем.
+
+        Args:
+            booking: Объект бронирования
+            subject_suffix: Дополнение к теме письма
+            message: Текст сообщения
+
+        Returns:
+            bool: True если письма поставлены в очередь
+        """
+        moderator_emails = cls.get_moderator_emails()
+        if not moderator_emails:
+            logger.warning("No moderators found to send notification")
+            return False
+
+        html_content = render_to_string('emails/moderator_notification.html', {
+            'booking': booking,
+            'message': message,
+            'site_name': 'INTERIOR',
+            'year': timezone.now().year,
+        })
+        EmailOutboxService.enqueue_each(
+            f'{subject_suffix} - Бронирование #{booking.id} | INTERIOR',
+            moderator_emails,
+            html_content
+        )
+        return True
+
+    @classmethod
+    def send_digest(cls, force: bool = False) -> int:
+        """
+        Сформировать и поставить в очередь сводку накопленных событий.
+
+        Сводка отправляется, когда самое старое неотправленное событие
+        старше окна рассылки (или сразу при force=True).
+
+        Args:
+            force: Отправить сводку, не дожидаясь окончания окна
+
+        Returns:
+            int: Количество событий, вошедших в сводку
+        """
+        now = timezone.now()
+
+        with transaction.atomic():
+            events = list(
+                ModeratorNotification.objects.select_for_update().filter(
+                    digested_at__isnull=True
+                ).order_by('created_at')
+            )
+            if not events:
+                return 0
+            if not force and events[0].created_at > now - cls.get_window():
+                return 0
+
+            moderator_emails = cls.get_moderator_emails()
+            if moderator_emails:
+                # Рендерим один раз на всю сводку
+                html_content = render_to_string('emails/moderator_digest.html', {
+                    'events': events,
+                    'period_start': events[0].created_at,
+                    'period_end': now,
+                    'site_name': 'INTERIOR',
+                    'year': now.year,
+                })
+                EmailOutboxService.enqueue_each(
+                    f'Сводка событий оплаты ({len(events)}) | INTERIOR',
+                    moderator_emails,
+                    html_content
+                )
+            else:
+                logger.warning("No moderators found to send digest")
+
+            ModeratorNotification.objects.filter(
+                id__in=[event.id for event in events]
+            ).update(digested_at=now)
+
+        logger.info(f"Moderator digest queued: {len(events)} events, {len(moderator_emails)} recipients")
+        return len(events)
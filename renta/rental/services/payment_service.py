@@ -23,6 +23,7 @@
 - Предоплата 10% от суммы бронирования
 - Предоплата сгорает при отмене менее чем за 24 часа
 - Квитанция отправляется на email пользователя
+- Уведомления модераторам собираются в периодические сводки
 ====================================================================
 """
 
@@ -34,11 +35,14 @@ from decimal import Decimal
 from typing import TYPE_CHECKING, Optional, Dict, Any
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.db import transaction as db_transaction
 from django.utils import timezone
 
+from .email_service import send_email
+from .moderator_digest import ModeratorDigestService, NotificationPriority
+from .reference_data import ReferenceData
+from .request_metrics import RequestMetrics
+
 if TYPE_CHECKING:
     from ..models import Booking, Transaction
 
@@ -48,6 +52,9 @@ logger = logging.getLogger(__name__)
 PREPAYMENT_PERCENT = Decimal('10')  # 10% предоплаты
 CANCELLATION_HOURS = 24  # Часов до начала для бесплатной отмены
 
+# Причины отмены платежа, о которых модераторы узнают немедленно
+URGENT_CANCELLATION_REASONS = ('fraud_suspected', 'permission_revoked')
+
 
 class PaymentStatus:
     """Статусы платежа ЮKassa."""
@@ -138,7 +145,8 @@ class PaymentService:
         booking: 'Booking',
         return_url: str,
         description: Optional[str] = None,
-        capture: bool = True  # Добавлен параметр capture для двухстадийной оплаты
+        capture: bool = True,  # Добавлен параметр capture для двухстадийной оплаты
+        idempotence_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Создать платеж в ЮKassa.
@@ -148,6 +156,8 @@ class PaymentService:
             return_url: URL для возврата после оплаты
             description: Описание платежа
             capture: True для автоматического списания, False для холдирования
+            idempotence_key: Ключ идемпотентности ЮKassa (по умолчанию случайный).
+                Повторный запрос с тем же ключом не создаёт второй платёж.
 
         Returns:
             dict: Информация о платеже с ключами:
@@ -166,49 +176,50 @@ class PaymentService:
             from yookassa import Payment
 
             prepayment_amount = cls.calculate_prepayment(booking.total_amount)
-            idempotence_key = str(uuid.uuid4())
+            idempotence_key = idempotence_key or str(uuid.uuid4())
 
             if not description:
                 description = f"Предоплата 10% за бронирование #{booking.id} - {booking.space.title}"
 
             # Создаем платеж
-            payment = Payment.create({
-                "amount": {
-                    "value": str(prepayment_amount),
-                    "currency": "RUB"
-                },
-                "confirmation": {
-                    "type": "redirect",
-                    "return_url": return_url
-                },
-                "capture": capture,  # Автоматическое списание или холдирование
-                "description": description[:128],  # Макс. 128 символов
-                "metadata": {
-                    "booking_id": booking.id,
-                    "user_id": booking.tenant.id,
-                    "user_email": booking.tenant.email,
-                    "prepayment_percent": str(PREPAYMENT_PERCENT),
-                    "space_title": booking.space.title[:64]
-                },
-                "receipt": {
-                    "customer": {
-                        "email": booking.tenant.email
+            with RequestMetrics.external_call('yookassa'):
+                payment = Payment.create({
+                    "amount": {
+                        "value": str(prepayment_amount),
+                        "currency": "RUB"
                     },
-                    "items": [
-                        {
-                            "description": f"Предоплата за аренду: {booking.space.title[:64]}",
-                            "quantity": "1.00",
-                            "amount": {
-                                "value": str(prepayment_amount),
-                                "currency": "RUB"
-                            },
-                            "vat_code": 1,  # НДС не облагается
-                            "payment_mode": "full_prepayment",
-                            "payment_subject": "service"
-                        }
-                    ]
-                }
-            }, idempotence_key)
+                    "confirmation": {
+                        "type": "redirect",
+                        "return_url": return_url
+                    },
+                    "capture": capture,  # Автоматическое списание или холдирование
+                    "description": description[:128],  # Макс. 128 символов
+                    "metadata": {
+                        "booking_id": booking.id,
+                        "user_id": booking.tenant.id,
+                        "user_email": booking.tenant.email,
+                        "prepayment_percent": str(PREPAYMENT_PERCENT),
+                        "space_title": booking.space.title[:64]
+                    },
+                    "receipt": {
+                        "customer": {
+                            "email": booking.tenant.email
+                        },
+                        "items": [
+                            {
+                                "description": f"Предоплата за аренду: {booking.space.title[:64]}",
+                                "quantity": "1.00",
+                                "amount": {
+                                    "value": str(prepayment_amount),
+                                    "currency": "RUB"
+                                },
+                                "vat_code": 1,  # НДС не облагается
+                                "payment_mode": "full_prepayment",
+                                "payment_subject": "service"
+                            }
+                        ]
+                    }
+                }, idempotence_key)
 
             logger.info(f"Payment created: {payment.id} for booking #{booking.id}, capture={capture}")
 
@@ -227,7 +238,12 @@ class PaymentService:
             }
 
     @classmethod
-    def capture_payment(cls, payment_id: str, amount: Optional[Decimal] = None) -> Dict[str, Any]:
+    def capture_payment(
+        cls,
+        payment_id: str,
+        amount: Optional[Decimal] = None,
+        idempotence_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Подтвердить холдированный платеж (списать средства).
 
@@ -236,6 +252,7 @@ class PaymentService:
         Args:
             payment_id: ID платежа в ЮKassa
             amount: Сумма для списания (если None - списывается вся сумма)
+            idempotence_key: Ключ идемпотентности ЮKassa (по умолчанию случайный)
 
         Returns:
             dict: Результат операции
@@ -246,7 +263,7 @@ class PaymentService:
         try:
             from yookassa import Payment
 
-            idempotence_key = str(uuid.uuid4())
+            idempotence_key = idempotence_key or str(uuid.uuid4())
 
             capture_data = {}
             if amount is not None:
@@ -255,7 +272,8 @@ class PaymentService:
                     "currency": "RUB"
                 }
 
-            payment = Payment.capture(payment_id, capture_data, idempotence_key)
+            with RequestMetrics.external_call('yookassa'):
+                payment = Payment.capture(payment_id, capture_data, idempotence_key)
 
             logger.info(f"Payment captured: {payment_id}, status: {payment.status}")
 
@@ -270,7 +288,7 @@ class PaymentService:
             return {'success': False, 'error': str(e)}
 
     @classmethod
-    def cancel_payment(cls, payment_id: str) -> Dict[str, Any]:
+    def cancel_payment(cls, payment_id: str, idempotence_key: Optional[str] = None) -> Dict[str, Any]:
         """
         Отменить холдированный платеж.
 
@@ -278,6 +296,7 @@ class PaymentService:
 
         Args:
             payment_id: ID платежа в ЮKassa
+            idempotence_key: Ключ идемпотентности ЮKassa (по умолчанию случайный)
 
         Returns:
             dict: Результат операции
@@ -288,8 +307,9 @@ class PaymentService:
         try:
             from yookassa import Payment
 
-            idempotence_key = str(uuid.uuid4())
-            payment = Payment.cancel(payment_id, idempotence_key)
+            idempotence_key = idempotence_key or str(uuid.uuid4())
+            with RequestMetrics.external_call('yookassa'):
+                payment = Payment.cancel(payment_id, idempotence_key)
 
             logger.info(f"Payment canceled: {payment_id}, status: {payment.status}")
 
@@ -307,7 +327,8 @@ class PaymentService:
         cls,
         payment_id: str,
         amount: Decimal,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        idempotence_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Создать возврат средств.
@@ -316,6 +337,8 @@ class PaymentService:
             payment_id: ID оригинального платежа
             amount: Сумма возврата
             description: Описание причины возврата
+            idempotence_key: Ключ идемпотентности ЮKassa (по умолчанию случайный).
+                Повторный запрос с тем же ключом не создаёт второй возврат.
 
         Returns:
             dict: Результат операции с refund_id
@@ -326,7 +349,7 @@ class PaymentService:
         try:
             from yookassa import Refund
 
-            idempotence_key = str(uuid.uuid4())
+            idempotence_key = idempotence_key or str(uuid.uuid4())
 
             refund_data = {
                 "payment_id": payment_id,
@@ -339,7 +362,8 @@ class PaymentService:
             if description:
                 refund_data["description"] = description[:250]
 
-            refund = Refund.create(refund_data, idempotence_key)
+            with RequestMetrics.external_call('yookassa'):
+                refund = Refund.create(refund_data, idempotence_key)
 
             logger.info(f"Refund created: {refund.id} for payment {payment_id}, amount: {amount}")
 
@@ -376,7 +400,8 @@ class PaymentService:
         try:
             from yookassa import Payment
 
-            payment = Payment.find_one(payment_id)
+            with RequestMetrics.external_call('yookassa'):
+                payment = Payment.find_one(payment_id)
 
             return {
                 'success': True,
@@ -415,18 +440,22 @@ class PaymentService:
 
             logger.info(f"Processing webhook event: {event_type}")
 
-            # Роутинг по типу события
+            # Роутинг по типу события. Изменения бронирования и письма
+            # в очереди (email_outbox) фиксируются одной транзакцией
             if event_type == WebhookEvent.PAYMENT_WAITING_FOR_CAPTURE:
                 return cls._handle_payment_waiting_for_capture(payment_object)
 
             elif event_type == WebhookEvent.PAYMENT_SUCCEEDED:
-                return cls._handle_payment_succeeded(payment_object)
+                with db_transaction.atomic():
+                    return cls._handle_payment_succeeded(payment_object)
 
             elif event_type == WebhookEvent.PAYMENT_CANCELED:
-                return cls._handle_payment_canceled(payment_object)
+                with db_transaction.atomic():
+                    return cls._handle_payment_canceled(payment_object)
 
             elif event_type == WebhookEvent.REFUND_SUCCEEDED:
-                return cls._handle_refund_succeeded(payment_object)
+                with db_transaction.atomic():
+                    return cls._handle_refund_succeeded(payment_object)
 
             else:
                 logger.warning(f"Unknown webhook event type: {event_type}")
@@ -510,7 +539,7 @@ class PaymentService:
             logger.warning(f"Payment {payment_id} succeeded but has no booking_id")
             return {'success': False, 'error': 'No booking_id in metadata'}
 
-        from ..models import Booking, Transaction, TransactionStatus
+        from ..models import Booking, Transaction
 
         try:
             booking = Booking.objects.select_related('tenant', 'space', 'status').get(id=booking_id)
@@ -518,11 +547,8 @@ class PaymentService:
             logger.error(f"Booking not found: {booking_id}")
             return {'success': False, 'error': 'Booking not found'}
 
-        # Получаем или создаем статус транзакции
-        success_status, _ = TransactionStatus.objects.get_or_create(
-            code='success',
-            defaults={'name': 'Успешно'}
-        )
+        # Статус транзакции из реестра справочников (без запроса к БД)
+        success_status = ReferenceData.transaction_status('success', 'Успешно')
 
         # Создаем транзакцию (если еще не существует)
         transaction, created = Transaction.objects.get_or_create(
@@ -586,7 +612,7 @@ class PaymentService:
         if not booking_id:
             return {'success': True, 'action': 'payment_canceled_no_booking'}
 
-        from ..models import Booking, Transaction, TransactionStatus
+        from ..models import Booking, Transaction
 
         try:
             booking = Booking.objects.select_related('tenant', 'space').get(id=booking_id)
@@ -595,10 +621,7 @@ class PaymentService:
             return {'success': True, 'action': 'payment_canceled_booking_not_found'}
 
         # Создаем транзакцию с отменой
-        canceled_status, _ = TransactionStatus.objects.get_or_create(
-            code='canceled',
-            defaults={'name': 'Отменен'}
-        )
+        canceled_status = ReferenceData.transaction_status('canceled', 'Отменен')
 
         Transaction.objects.get_or_create(
             external_id=payment_id,
@@ -618,6 +641,16 @@ class PaymentService:
         # Отправляем уведомление пользователю
         cls._send_payment_canceled_notification(booking, reason)
 
+        # Модераторам: подозрительные отмены сразу, остальные в сводке
+        cls._send_moderator_notification(
+            booking,
+            'Платеж отменен',
+            f'Платеж {payment_id} по бронированию #{booking.id} отменен '
+            f'(причина: {reason}, инициатор: {party}).',
+            NotificationPriority.HIGH if reason in URGENT_CANCELLATION_REASONS
+            else NotificationPriority.NORMAL
+        )
+
         return {'success': True, 'action': 'payment_canceled', 'reason': reason}
 
     @classmethod
@@ -637,7 +670,7 @@ class PaymentService:
 
         logger.info(f"Refund succeeded: {refund_id}, payment: {payment_id}, amount: {amount}")
 
-        from ..models import Booking, Transaction, TransactionStatus
+        from ..models import Booking, Transaction
 
         # Ищем бронирование по payment_id
         try:
@@ -647,10 +680,7 @@ class PaymentService:
             return {'success': True, 'action': 'refund_succeeded_booking_not_found'}
 
         # Создаем транзакцию возврата
-        refund_status, _ = TransactionStatus.objects.get_or_create(
-            code='refunded',
-            defaults={'name': 'Возвращен'}
-        )
+        refund_status = ReferenceData.transaction_status('refunded', 'Возвращен')
 
         transaction, created = Transaction.objects.get_or_create(
             external_id=refund_id,
@@ -699,19 +729,10 @@ class PaymentService:
                 'year': timezone.now().year,
             }
 
-            html_content = render_to_string('emails/payment_receipt.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[booking.tenant.email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
+            if not send_email(subject, [booking.tenant.email], 'payment_receipt', context):
+                return False
 
-            logger.info(f"Payment receipt sent to {booking.tenant.email} for booking #{booking.id}")
+            logger.info(f"Payment receipt queued for {booking.tenant.email} for booking #{booking.id}")
             return True
 
         except Exception as e:
@@ -740,19 +761,10 @@ class PaymentService:
                 'year': timezone.now().year,
             }
 
-            html_content = render_to_string('emails/refund_receipt.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[booking.tenant.email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
+            if not send_email(subject, [booking.tenant.email], 'refund_receipt', context):
+                return False
 
-            logger.info(f"Refund receipt sent to {booking.tenant.email} for booking #{booking.id}")
+            logger.info(f"Refund receipt queued for {booking.tenant.email} for booking #{booking.id}")
             return True
 
         except Exception as e:
@@ -805,19 +817,10 @@ class PaymentService:
                 'year': timezone.now().year,
             }
 
-            html_content = render_to_string('emails/payment_canceled.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[booking.tenant.email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
+            if not send_email(subject, [booking.tenant.email], 'payment_canceled', context):
+                return False
 
-            logger.info(f"Payment canceled notification sent to {booking.tenant.email}")
+            logger.info(f"Payment canceled notification queued for {booking.tenant.email}")
             return True
 
         except Exception as e:
@@ -825,56 +828,30 @@ class PaymentService:
             return False
 
     @classmethod
-    def _send_moderator_notification(cls, booking: 'Booking', subject_suffix: str, message: str) -> bool:
+    def _send_moderator_notification(
+        cls,
+        booking: 'Booking',
+        subject_suffix: str,
+        message: str,
+        priority: str = NotificationPriority.NORMAL
+    ) -> bool:
         """
-        Отправить уведомление модераторам о событии оплаты.
+        Уведомить модераторов о событии оплаты.
+
+        Обычные события попадают в периодическую сводку (см. moderator_digest.py),
+        события с высоким приоритетом отправляются немедленно.
 
         Args:
             booking: Объект бронирования
             subject_suffix: Дополнение к теме письма
             message: Текст сообщения
+            priority: Приоритет события (NotificationPriority)
 
         Returns:
-            bool: True если отправка успешна
+            bool: True если событие принято
         """
         try:
-            from ..models import CustomUser
-
-            # Получаем email всех модераторов и администраторов
-            moderator_emails = list(
-                CustomUser.objects.filter(
-                    is_active=True,
-                    role__in=['admin', 'moderator']
-                ).values_list('email', flat=True)
-            )
-
-            if not moderator_emails:
-                logger.warning("No moderators found to send notification")
-                return False
-
-            subject = f'{subject_suffix} - Бронирование #{booking.id} | INTERIOR'
-
-            context = {
-                'booking': booking,
-                'message': message,
-                'site_name': 'INTERIOR',
-                'year': timezone.now().year,
-            }
-
-            html_content = render_to_string('emails/moderator_notification.html', context)
-            text_content = strip_tags(html_content)
-
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=moderator_emails
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=False)
-
-            logger.info(f"Moderator notification sent to {len(moderator_emails)} recipients")
-            return True
+            return ModeratorDigestService.notify(booking, subject_suffix, message, priority)
 
         except Exception as e:
             logger.error(f"Failed to send moderator notification: {e}")
@@ -1031,11 +1008,8 @@ class PaymentService:
         )
 
         if refund_result['success']:
-            from ..models import Transaction, TransactionStatus
-            refund_status, _ = TransactionStatus.objects.get_or_create(
-                code='refunded',
-                defaults={'name': 'Возврат'}
-            )
+            from ..models import Transaction
+            refund_status = ReferenceData.transaction_status('refunded', 'Возврат')
             Transaction.objects.create(
                 booking=booking,
                 status=refund_status,
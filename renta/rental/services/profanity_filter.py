@@ -4,11 +4,25 @@
 ====================================================================
 Автоматическая проверка текста на наличие нецензурной лексики.
 Поддерживает русский и английский языки.
+
+Принцип работы:
+- Нормализация (регистр, leetspeak, разделители) — одна таблица
+  str.translate, построенная при импорте
+- contains_profanity ищет корни в нормализованном тексте встроенным
+  поиском подстрок (выполняется на C и для ~100 коротких корней
+  быстрее посимвольного цикла на Python)
+- find_profanity проходит текст один раз автоматами Ахо–Корасик,
+  построенными при импорте, и возвращает совпадения с позициями
+  в исходном тексте; censor_text заменяет найденные слова за тот же
+  проход вместо десятков регулярных выражений
+
+Производительность: python manage.py benchmark_profanity
 ====================================================================
 """
 
 import re
-from typing import Tuple, List
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
 
 # Список матерных слов (русский язык) - базовые корни
 RUSSIAN_PROFANITY_ROOTS = [
@@ -55,20 +69,178 @@ CHAR_REPLACEMENTS = {
 }
 
 
+# Таблица нормализации для str.translate (применяется к тексту в нижнем регистре)
+_NORMALIZE_TABLE = str.maketrans({
+    char: replacement or None for char, replacement in CHAR_REPLACEMENTS.items()
+})
+
+# Та же таблица без удаления символов: удаляемые заменяются на '\0',
+# чтобы позиции нормализованного текста совпадали с исходными
+_DELETED_CHAR = '\0'
+_NORMALIZE_KEEP_TABLE = str.maketrans({
+    char: replacement or _DELETED_CHAR for char, replacement in CHAR_REPLACEMENTS.items()
+})
+
+_REPEAT_RE = re.compile(r'(.)\1{2,}')
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо–Корасик для поиска множества подстрок за один проход.
+
+    Переходы по ссылкам неудачи вычислены заранее (полный ДКА), поэтому
+    каждый символ текста обрабатывается одним обращением к словарю.
+
+    Attributes:
+        delta: Переходы состояний: delta[state][char] -> state (нет ключа — 0)
+        outputs: Найденные в состоянии шаблоны: (шаблон, длина)
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, int]]] = [[]]
+
+        for pattern in dict.fromkeys(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            outputs[state].append((pattern, len(pattern)))
+
+        # Обход в ширину: ссылки неудачи и полные переходы
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state].extend(outputs[fail[state]])
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+
+        self.delta = delta
+        self.outputs: List[Tuple[Tuple[str, int], ...]] = [tuple(items) for items in outputs]
+
+    def find(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Найти все вхождения шаблонов.
+
+        Returns:
+            List[Tuple[str, int, int]]: (шаблон, начало, конец)
+        """
+        delta, outputs = self.delta, self.outputs
+        found = []
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            for pattern, length in outputs[state]:
+                found.append((pattern, index - length + 1, index + 1))
+        return found
+
+
+# Корни, сохраняющиеся при нормализации. Варианты с 'ё' покрываются
+# вариантами с 'е' ('ё' в тексте заменяется на 'е'); для 'жёп' псевдоним
+# 'жеп' не добавляется — он совпадает со стыком слов ("тоже п...")
+_RUSSIAN_ROOTS: Dict[str, str] = {
+    _root: _root for _root in RUSSIAN_PROFANITY_ROOTS
+    if _root.translate(_NORMALIZE_TABLE) == _root
+}
+
+_RUSSIAN_ROOT_ITEMS: Tuple[Tuple[str, str], ...] = tuple(_RUSSIAN_ROOTS.items())
+_RUSSIAN_MATCHER = AhoCorasick(_RUSSIAN_ROOTS)
+_ENGLISH_MATCHER = AhoCorasick(ENGLISH_PROFANITY)
+_ENGLISH_WORDS = frozenset(ENGLISH_PROFANITY)
+
+
 def normalize_text(text: str) -> str:
     """
     Нормализует текст для проверки на мат.
     Заменяет leetspeak символы на буквы и удаляет разделители.
     """
-    result = text.lower()
-
-    for char, replacement in CHAR_REPLACEMENTS.items():
-        result = result.replace(char, replacement)
+    result = text.lower().translate(_NORMALIZE_TABLE)
 
     # Удаляем повторяющиеся символы (напр. "хххуууууй" -> "хуй")
-    result = re.sub(r'(.)\1{2,}', r'\1', result)
+    return _REPEAT_RE.sub(r'\1', result)
+
 
-    return result
+def find_profanity(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Найти нецензурные слова за один проход по тексту.
+
+    Русские корни ищутся в нормализованном потоке (как normalize_text:
+    серия из трёх и более одинаковых символов считается одним
+    символом), английские слова — в тексте в нижнем регистре.
+
+    Args:
+        text: Текст для проверки
+
+    Returns:
+        List[Tuple[str, int, int]]: (корень или слово, начало, конец)
+            с позициями в исходном тексте
+    """
+    if not text:
+        return []
+
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Редкие символы, меняющие длину при lower() (например, 'İ')
+        lowered = ''.join(char.lower()[:1] for char in text)
+    normalized = lowered.translate(_NORMALIZE_KEEP_TABLE)
+
+    r_delta, r_outputs = _RUSSIAN_MATCHER.delta, _RUSSIAN_MATCHER.outputs
+    e_delta, e_outputs = _ENGLISH_MATCHER.delta, _ENGLISH_MATCHER.outputs
+    roots = _RUSSIAN_ROOTS
+    found: List[Tuple[str, int, int]] = []
+
+    # Позиции в исходном тексте символов, поданных в русский автомат
+    positions: List[int] = []
+    r_state = e_state = 0
+    previous = ''
+    run = 0
+    held = 0
+
+    for index, (char, normalized_char) in enumerate(zip(lowered, normalized)):
+        e_state = e_delta[e_state].get(char, 0)
+        if e_outputs[e_state]:
+            for word, length in e_outputs[e_state]:
+                found.append((word, index - length + 1, index + 1))
+
+        if normalized_char == _DELETED_CHAR:
+            continue
+        if normalized_char == previous:
+            # Второй символ серии придерживается: серия из трёх и более
+            # схлопывается в один символ, серия из двух остаётся
+            run += 1
+            if run == 2:
+                held = index
+            continue
+
+        if run == 2:
+            r_state = r_delta[r_state].get(previous, 0)
+            positions.append(held)
+            for root, length in r_outputs[r_state]:
+                found.append((roots[root], positions[-length], held + 1))
+        previous, run = normalized_char, 1
+
+        r_state = r_delta[r_state].get(normalized_char, 0)
+        positions.append(index)
+        if r_outputs[r_state]:
+            for root, length in r_outputs[r_state]:
+                found.append((roots[root], positions[-length], index + 1))
+
+    if run == 2:
+        r_state = r_delta[r_state].get(previous, 0)
+        positions.append(held)
+        for root, length in r_outputs[r_state]:
+            found.append((roots[root], positions[-length], held + 1))
+
+    return found
 
 
 def contains_profanity(text: str) -> Tuple[bool, List[str]]:
@@ -85,59 +257,56 @@ def contains_profanity(text: str) -> Tuple[bool, List[str]]:
         return False, []
 
     found_words = []
-    normalized = normalize_text(text)
     original_lower = text.lower()
+    normalized = _REPEAT_RE.sub(r'\1', original_lower.translate(_NORMALIZE_TABLE))
 
     # Проверка русских матерных корней
-    for root in RUSSIAN_PROFANITY_ROOTS:
-        if root in normalized:
+    for normalized_root, root in _RUSSIAN_ROOT_ITEMS:
+        if normalized_root in normalized:
             found_words.append(root)
 
     # Проверка английских матерных слов
     for word in ENGLISH_PROFANITY:
-        if word in original_lower or word in normalized:
+        if word in original_lower:
             found_words.append(word)
 
     return len(found_words) > 0, list(set(found_words))
 
 
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
 def censor_text(text: str) -> str:
     """
     Цензурирует матерные слова в тексте, заменяя их звёздочками.
 
+    Звёздочками заменяется всё слово, содержащее русский корень,
+    и слово, начинающееся с английского матерного слова.
+
     Args:
         text: Исходный текст
 
     Returns:
         str: Текст с заменёнными матерными словами
     """
-    if not text:
+    matches = find_profanity(text)
+    if not matches:
         return text
 
-    result = text
-
-    # Паттерны для замены (с учётом разных форм слов)
-    patterns = []
-
-    for root in RUSSIAN_PROFANITY_ROOTS:
-        # Создаём паттерн, который ловит слово и его окончания
-        pattern = re.compile(
-            r'\b\w*' + re.escape(root) + r'\w*\b',
-            re.IGNORECASE | re.UNICODE
-        )
-        patterns.append(pattern)
-
-    for word in ENGLISH_PROFANITY:
-        pattern = re.compile(
-            r'\b' + re.escape(word) + r'\w*\b',
-            re.IGNORECASE
-        )
-        patterns.append(pattern)
-
-    for pattern in patterns:
-        result = pattern.sub(lambda m: '*' * len(m.group()), result)
-
-    return result
+    chars = list(text)
+    for word, start, end in matches:
+        if word in _ENGLISH_WORDS and start > 0 and _is_word_char(text[start - 1]):
+            continue
+        while start > 0 and _is_word_char(text[start - 1]):
+            start -= 1
+        while end < len(text) and _is_word_char(text[end]):
+            end += 1
+        for index in range(start, end):
+            if not text[index].isspace():
+                chars[index] = '*'
+
+    return ''.join(chars)
 
 
 def validate_comment(text: str) -> Tuple[bool, str]:
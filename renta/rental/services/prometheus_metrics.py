@@ -0,0 +1,231 @@
+"""
+====================================================================
+МЕТРИКИ PROMETHEUS ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит метрики приложения в формате Prometheus и их
+выдачу по адресу /metrics.
+
+Метрики:
+- interior_http_request_duration_seconds: Гистограмма времени ответа
+  по имени view и методу
+- interior_http_requests_total: Запросы по view, методу и коду ответа
+- interior_db_queries_total, interior_db_query_seconds_total: SQL
+  запросы и их время по view
+- interior_cache_lookups_total: Обращения к кэшу (result=hit|miss),
+  доля попаданий считается в PromQL
+- interior_external_call_duration_seconds,
+  interior_external_call_errors_total: Вызовы ЮKassa и геокодера
+- interior_booking_transitions_total,
+  interior_payment_transitions_total: Переходы статусов бронирований
+  и транзакций
+- interior_action_log_buffer, interior_action_log_dropped_total:
+  Буфер журнала действий процесса
+- interior_email_outbox_pending, interior_moderator_notifications_pending:
+  Глубина очередей (читается из БД при каждом сборе)
+
+Несколько процессов (gunicorn):
+- Задайте переменную окружения PROMETHEUS_MULTIPROC_DIR (пустой
+  каталог, очищаемый перед запуском). Каждый воркер пишет значения
+  в свои mmap-файлы, /metrics суммирует файлы всех воркеров
+- В gunicorn.conf.py отметьте завершённые воркеры:
+      def child_exit(server, worker):
+          from rental.services.prometheus_metrics import mark_process_dead
+          mark_process_dead(worker.pid)
+- Без переменной метрики хранятся в памяти процесса
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, Iterator
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+if TYPE_CHECKING:
+    from .request_metrics import RequestStats
+
+logger = logging.getLogger(__name__)
+
+# Методы HTTP, сохраняемые как значение метки (остальные — 'other')
+KNOWN_METHODS: frozenset[str] = frozenset({'GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS'})
+
+# Границы корзин гистограмм (секунды)
+REQUEST_BUCKETS: tuple[float, ...] = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXTERNAL_BUCKETS: tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+# Метрики не регистрируются в глобальном REGISTRY: реестр собирается
+# при выдаче (в многопроцессном режиме значения читаются из файлов)
+REQUEST_LATENCY = Histogram(
+    'interior_http_request_duration_seconds', 'Время обработки HTTP запроса',
+    ['view', 'method'], buckets=REQUEST_BUCKETS, registry=None,
+)
+REQUESTS = Counter(
+    'interior_http_requests', 'HTTP запросы',
+    ['view', 'method', 'status'], registry=None,
+)
+DB_QUERIES = Counter(
+    'interior_db_queries', 'SQL запросы', ['view'], registry=None,
+)
+DB_TIME = Counter(
+    'interior_db_query_seconds', 'Время выполнения SQL запросов', ['view'], registry=None,
+)
+CACHE_LOOKUPS = Counter(
+    'interior_cache_lookups', 'Обращения к кэшу', ['result'], registry=None,
+)
+EXTERNAL_LATENCY = Histogram(
+    'interior_external_call_duration_seconds', 'Время вызова внешнего сервиса',
+    ['service'], buckets=EXTERNAL_BUCKETS, registry=None,
+)
+EXTERNAL_ERRORS = Counter(
+    'interior_external_call_errors', 'Ошибки вызова внешнего сервиса', ['service'], registry=None,
+)
+BOOKING_TRANSITIONS = Counter(
+    'interior_booking_transitions', 'Переходы статусов бронирований',
+    ['from_status', 'to_status'], registry=None,
+)
+PAYMENT_TRANSITIONS = Counter(
+    'interior_payment_transitions', 'Переходы статусов транзакций оплаты',
+    ['from_status', 'to_status'], registry=None,
+)
+ACTION_LOG_BUFFER = Gauge(
+    'interior_action_log_buffer', 'Записей журнала действий в буфере процесса',
+    registry=None, multiprocess_mode='livesum',
+)
+ACTION_LOG_DROPPED = Counter(
+    'interior_action_log_dropped', 'Записи журнала, отброшенные при переполнении буфера', registry=None,
+)
+
+_METRICS = (
+    REQUEST_LATENCY, REQUESTS, DB_QUERIES, DB_TIME, CACHE_LOOKUPS,
+    EXTERNAL_LATENCY, EXTERNAL_ERRORS, BOOKING_TRANSITIONS, PAYMENT_TRANSITIONS,
+    ACTION_LOG_BUFFER, ACTION_LOG_DROPPED,
+)
+
+
+def multiprocess_dir() -> str:
+    """Каталог mmap-файлов многопроцессного режима ('' — режим выключен)."""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR', '')
+
+
+def mark_process_dead(pid: int) -> None:
+    """Убрать значения livesum-метрик завершённого воркера (хук child_exit gunicorn)."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(pid)
+
+
+class QueueDepthCollector:
+    """
+    Глубина очередей, читаемая из БД в момент сбора метрик.
+    """
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        from ..models import EmailOutbox, ModeratorNotification
+
+        try:
+            outbox = EmailOutbox.objects.filter(status=EmailOutbox.Status.PENDING).count()
+            notifications = ModeratorNotification.objects.filter(digested_at__isnull=True).count()
+        except Exception as e:
+            logger.error(f"Failed to collect queue depth metrics: {e}")
+            return
+
+        yield GaugeMetricFamily(
+            'interior_email_outbox_pending', 'Писем в очереди на отправку', value=outbox
+        )
+        yield GaugeMetricFamily(
+            'interior_moderator_notifications_pending', 'Событий, ожидающих сводки модераторам',
+            value=notifications
+        )
+
+
+class PrometheusMetrics:
+    """
+    Запись и выдача метрик Prometheus.
+    """
+
+    @staticmethod
+    def observe_request(view: str, method: str, status: int, duration: float, stats: RequestStats) -> None:
+        """
+        Учесть завершённый HTTP запрос.
+
+        Args:
+            view: Имя view (имя URL)
+            method: Метод HTTP
+            status: Код ответа
+            duration: Время обработки (секунды)
+            stats: Метрики запроса (SQL, кэш)
+        """
+        method = method if method in KNOWN_METHODS else 'other'
+        REQUEST_LATENCY.labels(view, method).observe(duration)
+        REQUESTS.labels(view, method, str(status)).inc()
+        if stats.queries:
+            DB_QUERIES.labels(view).inc(stats.queries)
+            DB_TIME.labels(view).inc(stats.sql_time)
+        if stats.cache_hits:
+            CACHE_LOOKUPS.labels('hit').inc(stats.cache_hits)
+        if stats.cache_misses:
+            CACHE_LOOKUPS.labels('miss').inc(stats.cache_misses)
+
+        from .action_log_writer import action_log_writer
+        ACTION_LOG_BUFFER.set(action_log_writer.queue.qsize())
+
+    @staticmethod
+    def observe_external_call(service: str, duration: float, error: bool) -> None:
+        """
+        Учесть вызов внешнего сервиса.
+
+        Args:
+            service: Имя сервиса ('yookassa', 'geocoder')
+            duration: Время вызова (секунды)
+            error: Вызов завершился исключением
+        """
+        EXTERNAL_LATENCY.labels(service).observe(duration)
+        if error:
+            EXTERNAL_ERRORS.labels(service).inc()
+
+    @staticmethod
+    def booking_transition(from_status: str, to_status: str) -> None:
+        """Учесть смену статуса бронирования ('new' — создание)."""
+        BOOKING_TRANSITIONS.labels(from_status, to_status).inc()
+
+    @staticmethod
+    def payment_transition(from_status: str, to_status: str) -> None:
+        """Учесть смену статуса транзакции оплаты ('new' — создание)."""
+        PAYMENT_TRANSITIONS.labels(from_status, to_status).inc()
+
+    @staticmethod
+    def action_log_dropped() -> None:
+        """Учесть отброшенную запись журнала действий."""
+        ACTION_LOG_DROPPED.inc()
+
+    @staticmethod
+    def build_registry() -> CollectorRegistry:
+        """
+        Собрать реестр для выдачи.
+
+        В многопроцессном режиме значения суммируются по mmap-файлам
+        всех воркеров, иначе берутся из памяти текущего процесса.
+        """
+        registry = CollectorRegistry()
+        if multiprocess_dir():
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            for metric in _METRICS:
+                registry.register(metric)
+        registry.register(QueueDepthCollector())
+        return registry
+
+    @classmethod
+    def render(cls) -> tuple[bytes, str]:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        Returns:
+            tuple: (тело ответа, Content-Type)
+        """
+        return generate_latest(cls.build_registry()), CONTENT_TYPE_LATEST
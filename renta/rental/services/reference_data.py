@@ -0,0 +1,228 @@
+"""
+====================================================================
+РЕЕСТР СПРАВОЧНЫХ ДАННЫХ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит реестр небольших справочных таблиц, которые нужны
+почти на каждой странице: статусы бронирований и транзакций, периоды
+аренды, активные города и категории.
+
+Основные компоненты:
+- ReferenceSnapshot: Неизменяемый снимок всех справочников
+- ReferenceData: Реестр снимка в памяти процесса
+
+Принцип работы:
+- Справочники загружаются в память процесса одним снимком (5 запросов)
+- Актуальность снимка проверяется по метке версии в кэше Django:
+  один cache.get на запрос (ReferenceDataMiddleware), вне запросов —
+  при каждом обращении
+- При изменении справочника сигнал вызывает ReferenceData.invalidate(),
+  метка версии меняется, и все процессы перезагружают снимок
+- Метку видят все процессы только при общем кэше (Redis, REDIS_URL);
+  кэш в памяти процесса вне DEBUG отмечается проверкой rental.W001
+
+Особенности:
+- Объекты в снимке используются только для чтения
+- Отсутствующие статусы создаются по требованию с обновлением версии
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Ключ кэша с меткой версии справочников
+VERSION_CACHE_KEY: str = 'reference_data_version'
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    """
+    Неизменяемый снимок справочных данных.
+
+    Attributes:
+        version: Метка версии, для которой загружен снимок
+        booking_statuses: Статусы бронирований по коду
+        transaction_statuses: Статусы транзакций по коду
+        pricing_periods: Периоды аренды в порядке сортировки
+        cities: Активные города по алфавиту
+        categories: Активные категории по алфавиту
+    """
+    version: str
+    booking_statuses: Mapping[str, Any]
+    transaction_statuses: Mapping[str, Any]
+    pricing_periods: tuple
+    cities: tuple
+    categories: tuple
+
+
+class ReferenceData:
+    """
+    Реестр справочных данных, загружаемых один раз на процесс.
+    """
+
+    _snapshot: Optional[ReferenceSnapshot] = None
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def _current_version(cls) -> str:
+        """Получить метку версии из кэша (создать, если её нет)."""
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_CACHE_KEY)
+        return version
+
+    @classmethod
+    def _load(cls, version: str) -> ReferenceSnapshot:
+        """Загрузить справочники из БД в новый снимок."""
+        from ..models import BookingStatus, City, PricingPeriod, SpaceCategory, TransactionStatus
+
+        snapshot = ReferenceSnapshot(
+            version=version,
+            booking_statuses=MappingProxyType(
+                {status.code: status for status in BookingStatus.objects.all()}
+            ),
+            transaction_statuses=MappingProxyType(
+                {status.code: status for status in TransactionStatus.objects.all()}
+            ),
+            pricing_periods=tuple(PricingPeriod.objects.order_by('sort_order', 'hours_count')),
+            cities=tuple(City.objects.filter(is_active=True).order_by('name')),
+            categories=tuple(SpaceCategory.objects.filter(is_active=True).order_by('name')),
+        )
+        logger.debug(f"Reference data loaded, version {version}")
+        return snapshot
+
+    @classmethod
+    def _refresh(cls) -> ReferenceSnapshot:
+        """Перезагрузить снимок, если метка версии изменилась."""
+        version = cls._current_version()
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.version != version:
+            with cls._lock:
+                snapshot = cls._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = cls._load(version)
+                    cls._snapshot = snapshot
+        return snapshot
+
+    @classmethod
+    def begin_request(cls) -> None:
+        """Проверить версию один раз в начале запроса."""
+        cls._local.verified = False
+        cls._refresh()
+        cls._local.verified = True
+
+    @classmethod
+    def end_request(cls) -> None:
+        """Сбросить признак проверки версии по окончании запроса."""
+        cls._local.verified = False
+
+    @classmethod
+    def get(cls) -> ReferenceSnapshot:
+        """
+        Получить актуальный снимок справочников.
+
+        Внутри запроса версия уже проверена middleware, поэтому
+        возвращается текущий снимок без обращения к кэшу.
+
+        Returns:
+            ReferenceSnapshot: Снимок справочных данных
+        """
+        snapshot = cls._snapshot
+        if snapshot is None or not getattr(cls._local, 'verified', False):
+            snapshot = cls._refresh()
+        return snapshot
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Сменить метку версии: все процессы перезагрузят снимок."""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+        cls._local.verified = False
+
+    # ------------------------------------------------------------------
+    # Доступ к справочникам
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def booking_status(cls, code: str, defaults: Optional[dict[str, Any]] = None):
+        """
+        Получить статус бронирования по коду (создать при отсутствии).
+
+        Args:
+            code: Код статуса
+            defaults: Значения полей для создания статуса
+
+        Returns:
+            BookingStatus: Статус бронирования
+        """
+        status = cls.get().booking_statuses.get(code)
+        if status is None:
+            from ..models import BookingStatus
+            status, _ = BookingStatus.objects.get_or_create(code=code, defaults=defaults or {})
+            cls.invalidate()
+        return status
+
+    @classmethod
+    def transaction_status(cls, code: str, name: str):
+        """
+        Получить статус транзакции по коду (создать при отсутствии).
+
+        Args:
+            code: Код статуса
+            name: Название статуса для создания
+
+        Returns:
+            TransactionStatus: Статус транзакции
+        """
+        status = cls.get().transaction_statuses.get(code)
+        if status is None:
+            from ..models import TransactionStatus
+            status, _ = TransactionStatus.objects.get_or_create(code=code, defaults={'name': name})
+            cls.invalidate()
+        return status
+
+    @classmethod
+    def pricing_periods(cls) -> tuple:
+        """Все периоды аренды в порядке сортировки."""
+        return cls.get().pricing_periods
+
+    @classmethod
+    def cities(cls) -> tuple:
+        """Активные города по алфавиту."""
+        return cls.get().cities
+
+    @classmethod
+    def categories(cls) -> tuple:
+        """Активные категории по алфавиту."""
+        return cls.get().categories
+
+    @staticmethod
+    def model_choices(field, objects: Iterable) -> list[tuple[Any, str]]:
+        """
+        Построить choices для ModelChoiceField из объектов снимка.
+
+        Позволяет отрисовать select без запроса к БД; queryset поля
+        по-прежнему используется для валидации отправленного значения.
+
+        Args:
+            field: Поле формы ModelChoiceField
+            objects: Объекты справочника
+
+        Returns:
+            list: Пары (pk, подпись) с пустым вариантом, если он нужен полю
+        """
+        choices: list[tuple[Any, str]] = []
+        if field.empty_label is not None:
+            choices.append(('', field.empty_label))
+        choices.extend((obj.pk, field.label_from_instance(obj)) for obj in objects)
+        return choices
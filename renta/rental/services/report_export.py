@@ -0,0 +1,404 @@
+"""
+====================================================================
+ПОТОКОВЫЙ ЭКСПОРТ ОТЧЕТОВ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит описания отчетов (действия, бронирования, доходы,
+пользователи, подключения) и их потоковую выдачу в форматах CSV,
+JSON, JSON Lines и XLSX.
+
+Основные компоненты:
+- REPORTS: Описания отчетов (заголовок, колонки, выборка строк)
+- EXPORT_FORMATS: Форматы выгрузки (тип содержимого, расширение)
+- ReportExport.rows: Строки отчета за период (итератор)
+- ReportExport.stream: Части файла отчета для StreamingHttpResponse
+
+Принцип работы:
+- Строки выбираются проекцией values_list() с нужными соединениями
+  через .iterator(chunk_size=EXPORT_CHUNK_SIZE): в памяти находится
+  одна пачка строк, а не весь QuerySet
+- Каждый формат кодирует строки по мере чтения; ответ отдается
+  частями, поэтому размер выгрузки не ограничен
+- XLSX собирается в zip-архив без временных файлов: лист пишется
+  построчно в поток zipfile, готовые байты отдаются сразу
+- Значения, начинающиеся с =, +, - или @, в CSV экранируются
+  апострофом (защита от выполнения формул в Excel)
+====================================================================
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..core.helpers import period_lookup
+from ..models import ActionLog, Booking, CustomUser, UserStats
+from .booking_rollup import BookingRollup
+
+# Размер пачки строк, читаемой из БД за один раз
+EXPORT_CHUNK_SIZE: int = 2000
+
+# Количество строк, накапливаемых перед отдачей части ответа
+EXPORT_FLUSH_ROWS: int = 500
+
+
+@dataclass(frozen=True)
+class ReportSpec:
+    """
+    Описание отчета.
+
+    Attributes:
+        title: Название отчета
+        columns: Колонки (ключ для JSON, заголовок для CSV/XLSX/PDF)
+        fetch: Функция (date_from, date_to) -> итератор строк
+    """
+    title: str
+    columns: tuple[tuple[str, str], ...]
+    fetch: Callable[[Optional[str], Optional[str]], Iterable[tuple]]
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        return tuple(key for key, _header in self.columns)
+
+    @property
+    def headers(self) -> tuple[str, ...]:
+        return tuple(header for _key, header in self.columns)
+
+
+def _actions_rows(date_from: Optional[str], date_to: Optional[str]) -> Iterable[tuple]:
+    return ActionLog.objects.filter(
+        **period_lookup(date_from, date_to)
+    ).order_by('-created_at').values_list(
+        'created_at', 'user__username', 'action_type', 'model_name',
+        'object_id', 'object_repr', 'ip_address',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _bookings_rows(date_from: Optional[str], date_to: Optional[str]) -> Iterable[tuple]:
+    return Booking.objects.filter(
+        **period_lookup(date_from, date_to)
+    ).order_by('-created_at').values_list(
+        'id', 'space__title', 'tenant__username', 'status__name', 'total_amount', 'created_at',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _revenue_rows(date_from: Optional[str], date_to: Optional[str]) -> Iterable[tuple]:
+    daily = BookingRollup.summary(
+        date_from, date_to, status_codes=UserStats.PAID_STATUSES
+    ).filter(bookings__gt=0).order_by('-date')
+    return (
+        (row['date'], row['bookings'], row['revenue'])
+        for row in daily.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def _users_rows(date_from: Optional[str], date_to: Optional[str]) -> Iterable[tuple]:
+    user_types = dict(CustomUser.UserType.choices)
+    users = CustomUser.objects.filter(
+        **period_lookup(date_from, date_to)
+    ).order_by('-created_at').values_list(
+        'username', 'email', 'user_type', 'created_at',
+        Coalesce('activity_stats__bookings_total', Value(0)),
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return (
+        (username, email, user_types.get(user_type, user_type), created_at, bookings)
+        for username, email, user_type, created_at, bookings in users
+    )
+
+
+def _logins_rows(date_from: Optional[str], date_to: Optional[str]) -> Iterable[tuple]:
+    return ActionLog.objects.filter(
+        action_type__in=[ActionLog.ActionType.LOGIN, ActionLog.ActionType.LOGOUT],
+        **period_lookup(date_from, date_to)
+    ).order_by('-created_at').values_list(
+        'created_at', 'user__username', 'ip_address', 'user_agent__browser',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+# Начальные символы, с которыми табличные редакторы читают ячейку CSV
+# как формулу: такие значения экранируются апострофом
+CSV_FORMULA_PREFIXES: tuple[str, ...] = ('=', '+', '-', '@', '\t', '\r')
+
+# Отчеты по типу
+REPORTS: dict[str, ReportSpec] = {
+    'actions': ReportSpec(
+        'Отчёт по действиям пользователей',
+        (('datetime', 'Дата'), ('user', 'Пользователь'), ('action', 'Действие'),
+         ('model', 'Модель'), ('object_id', 'ID объекта'), ('object', 'Объект'), ('ip', 'IP')),
+        _actions_rows,
+    ),
+    'bookings': ReportSpec(
+        'Отчёт по бронированиям',
+        (('id', 'ID'), ('space', 'Помещение'), ('tenant', 'Клиент'), ('status', 'Статус'),
+         ('total_amount', 'Сумма'), ('created_at', 'Дата')),
+        _bookings_rows,
+    ),
+    'revenue': ReportSpec(
+        'Отчёт по доходам',
+        (('date', 'Период'), ('count', 'Бронирований'), ('amount', 'Сумма')),
+        _revenue_rows,
+    ),
+    'users': ReportSpec(
+        'Отчёт по пользователям',
+        (('username', 'Пользователь'), ('email', 'Email'), ('type', 'Тип'),
+         ('registered', 'Регистрация'), ('bookings', 'Бронирований')),
+        _users_rows,
+    ),
+    'logins': ReportSpec(
+        'Отчёт по подключениям',
+        (('datetime', 'Дата'), ('user', 'Пользователь'), ('ip', 'IP адрес'), ('browser', 'Браузер')),
+        _logins_rows,
+    ),
+}
+
+# Форматы выгрузки: (тип содержимого, расширение файла)
+EXPORT_FORMATS: dict[str, tuple[str, str]] = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'json': ('application/json; charset=utf-8', 'json'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# Символы, недопустимые в XML 1.0
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text(value: Any) -> str:
+    """Значение ячейки в виде строки (даты — в локальном времени)."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_value(value: Any) -> Any:
+    """Значение для JSON (Decimal — число, даты — ISO 8601)."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return (timezone.localtime(value) if timezone.is_aware(value) else value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Поток без перемотки, накапливающий записанные байты до выдачи."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_XLSX_STATIC_PARTS: tuple[tuple[str, str], ...] = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+     'Target="xl/workbook.xml"/>'
+     '</Relationships>'),
+    ('xl/workbook.xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+     '<sheets><sheet name="Report" sheetId="1" r:id="rId1"/></sheets>'
+     '</workbook>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+     'Target="worksheets/sheet1.xml"/>'
+     '</Relationships>'),
+)
+
+
+def _xlsx_cell(value: Any) -> str:
+    """Ячейка листа XLSX (числа — числовые, остальное — строки)."""
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_ILLEGAL.sub('', _text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+class ReportExport:
+    """
+    Потоковая выгрузка отчетов.
+    """
+
+    @staticmethod
+    def rows(report_type: str, date_from: Optional[str] = None, date_to: Optional[str] = None) -> Iterable[tuple]:
+        """
+        Строки отчета за период.
+
+        Args:
+            report_type: Тип отчета (ключ REPORTS)
+            date_from: Начало периода (YYYY-MM-DD, включительно)
+            date_to: Конец периода (YYYY-MM-DD, включительно)
+
+        Returns:
+            Iterable: Кортежи значений в порядке колонок отчета
+        """
+        return REPORTS[report_type].fetch(date_from, date_to)
+
+    @classmethod
+    def stream(
+        cls,
+        report_type: str,
+        fmt: str,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> Iterator[bytes]:
+        """
+        Части файла отчета для StreamingHttpResponse.
+
+        Args:
+            report_type: Тип отчета (ключ REPORTS)
+            fmt: Формат (ключ EXPORT_FORMATS)
+            date_from: Начало периода (YYYY-MM-DD, включительно)
+            date_to: Конец периода (YYYY-MM-DD, включительно)
+
+        Returns:
+            Iterator[bytes]: Части файла
+        """
+        spec = REPORTS[report_type]
+        rows = cls.rows(report_type, date_from, date_to)
+        encoder = getattr(cls, f'_encode_{fmt}')
+        return encoder(report_type, spec, rows)
+
+    @staticmethod
+    def _batched(parts: Iterable[str]) -> Iterator[bytes]:
+        """Склеить мелкие части по EXPORT_FLUSH_ROWS перед отдачей."""
+        batch: list[str] = []
+        for part in parts:
+            batch.append(part)
+            if len(batch) >= EXPORT_FLUSH_ROWS:
+                yield ''.join(batch).encode('utf-8')
+                batch.clear()
+        if batch:
+            yield ''.join(batch).encode('utf-8')
+
+    @classmethod
+    def _encode_csv(cls, report_type: str, spec: ReportSpec, rows: Iterable[tuple]) -> Iterator[bytes]:
+        writer = csv.writer(_Echo())
+
+        def lines() -> Iterator[str]:
+            # BOM: Excel распознает UTF-8 и показывает кириллицу
+            yield '\ufeff' + writer.writerow(spec.headers)
+            for row in rows:
+                values = []
+                for value in row:
+                    text = _text(value)
+                    if text[:1] in CSV_FORMULA_PREFIXES and not isinstance(value, (int, float, Decimal)):
+                        text = "'" + text
+                    values.append(text)
+                yield writer.writerow(values)
+
+        return cls._batched(lines())
+
+    @classmethod
+    def _encode_jsonl(cls, report_type: str, spec: ReportSpec, rows: Iterable[tuple]) -> Iterator[bytes]:
+        keys = spec.keys
+        return cls._batched(
+            json.dumps(
+                {key: _json_value(value) for key, value in zip(keys, row)}, ensure_ascii=False
+            ) + '\n'
+            for row in rows
+        )
+
+    @classmethod
+    def _encode_json(cls, report_type: str, spec: ReportSpec, rows: Iterable[tuple]) -> Iterator[bytes]:
+        keys = spec.keys
+
+        def parts() -> Iterator[str]:
+            yield (
+                '{"report_type": ' + json.dumps(report_type)
+                + ', "generated_at": ' + json.dumps(timezone.now().isoformat())
+                + ', "data": ['
+            )
+            count = 0
+            for row in rows:
+                item = json.dumps(
+                    {key: _json_value(value) for key, value in zip(keys, row)}, ensure_ascii=False
+                )
+                yield ('\n' if count == 0 else ',\n') + item
+                count += 1
+            yield f'\n], "count": {count}}}\n'
+
+        return cls._batched(parts())
+
+    @staticmethod
+    def _encode_xlsx(report_type: str, spec: ReportSpec, rows: Iterable[tuple]) -> Iterator[bytes]:
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, content in _XLSX_STATIC_PARTS:
+                archive.writestr(name, content)
+            yield buffer.drain()
+
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write((
+                    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    '<sheetData>' + _xlsx_row(spec.headers)
+                ).encode('utf-8'))
+                batch: list[str] = []
+                for row in rows:
+                    batch.append(_xlsx_row(row))
+                    if len(batch) >= EXPORT_FLUSH_ROWS:
+                        sheet.write(''.join(batch).encode('utf-8'))
+                        batch.clear()
+                        data = buffer.drain()
+                        if data:
+                            yield data
+                sheet.write((''.join(batch) + '</sheetData></worksheet>').encode('utf-8'))
+        yield buffer.drain()
@@ -0,0 +1,453 @@
+"""
+====================================================================
+ФОНОВОЕ ФОРМИРОВАНИЕ PDF ОТЧЕТОВ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит формирование PDF отчетов фоновыми заданиями
+(BackgroundJob) и дисковый кэш готовых файлов.
+
+Основные компоненты:
+- register_fonts: Регистрация шрифта DejaVuSans один раз на процесс
+- render_pdf: Сборка PDF документа (выполняется в пуле процессов)
+- ReportPdf.start: Готовое, выполняющееся или новое задание отчета
+- ReportPdf.file_path: Путь к файлу готового отчета
+- build_report_pdf: Обработчик задания (выборка строк и рендер)
+
+Принцип работы:
+- Ключ отчета — (тип, период, версия данных). Версия — количество и
+  последнее изменение строк основной таблицы отчета за период (один
+  агрегатный запрос), поэтому новый или измененный объект дает новый
+  ключ, а повторное скачивание того же отчета отдает готовый файл
+- Строки выбираются в потоке задания (ReportExport.rows) и
+  форматируются в строки; сборка документа ReportLab выполняется в
+  пуле процессов (REPORT_PDF_WORKERS, 0 — в потоке задания), чтобы
+  не занимать GIL веб-процесса
+- Файлы хранятся в REPORT_CACHE_DIR; файлы старше
+  REPORT_CACHE_MAX_AGE_DAYS удаляются после формирования нового отчета
+- PDF — печатная форма: в него попадают первые REPORT_PDF_MAX_ROWS
+  строк, полные выгрузки — CSV/XLSX (report_export.py)
+====================================================================
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+
+import django
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from ..core.helpers import period_lookup
+from ..models import ActionLog, BackgroundJob, Booking, CustomUser
+from .background_jobs import BackgroundJobs, ProgressCallback
+from .report_export import REPORTS, ReportExport
+
+logger = logging.getLogger(__name__)
+
+# Колонки PDF отчетов: (ключ колонки отчета, ширина в см или None)
+PDF_COLUMNS: dict[str, tuple[tuple[str, Optional[float]], ...]] = {
+    'actions': (('datetime', 3), ('user', 3), ('action', 2.5), ('model', 2.5), ('object', 8), ('ip', 3)),
+    'bookings': (('id', 1.5), ('space', 7), ('tenant', 4), ('status', 3), ('total_amount', 3), ('created_at', 3)),
+    'revenue': (('date', None), ('count', None), ('amount', None)),
+    'users': (('username', None), ('email', None), ('type', None), ('registered', None), ('bookings', None)),
+    'logins': (('datetime', None), ('user', None), ('ip', None), ('browser', None)),
+}
+
+# Максимальная длина текста в ячейке PDF
+PDF_CELL_MAX_LENGTH: int = 40
+
+_font_lock = threading.Lock()
+_font_name: Optional[str] = None
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _font_paths() -> list[str]:
+    """Возможные расположения DejaVuSans.ttf."""
+    return [
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        '/usr/share/fonts/TTF/DejaVuSans.ttf',
+        'C:/Windows/Fonts/DejaVuSans.ttf',
+        '/Library/Fonts/DejaVuSans.ttf',
+        '/System/Library/Fonts/Supplemental/DejaVuSans.ttf',
+        os.path.join(settings.BASE_DIR, 'renta', 'bolt', 'DejaVuSans.ttf'),
+        os.path.join(settings.BASE_DIR, 'bolt', 'DejaVuSans.ttf'),
+    ]
+
+
+def register_fonts() -> str:
+    """
+    Зарегистрировать шрифт с кириллицей один раз на процесс.
+
+    Returns:
+        str: Имя шрифта для стилей ('Helvetica', если DejaVuSans не найден)
+    """
+    global _font_name
+    if _font_name is not None:
+        return _font_name
+
+    with _font_lock:
+        if _font_name is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+
+            name = 'Helvetica'
+            for font_path in _font_paths():
+                if not os.path.exists(font_path):
+                    continue
+                try:
+                    pdfmetrics.registerFont(TTFont('DejaVuSans', font_path))
+                    bold_path = font_path.replace('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf')
+                    if os.path.exists(bold_path):
+                        pdfmetrics.registerFont(TTFont('DejaVuSans-Bold', bold_path))
+                    name = 'DejaVuSans'
+                    break
+                except Exception:
+                    continue
+            _font_name = name
+    return _font_name
+
+
+def render_pdf(
+    path: str,
+    title: str,
+    subtitle: str,
+    headers: Sequence[str],
+    rows: Sequence[Sequence[str]],
+    col_widths: Optional[Sequence[float]] = None,
+    note: str = '',
+) -> str:
+    """
+    Собрать PDF отчет с таблицей и записать его в файл.
+
+    Функция выполняется в процессе пула, поэтому получает только
+    готовые строки и не обращается к БД.
+
+    Args:
+        path: Путь к файлу результата
+        title: Заголовок отчета
+        subtitle: Подзаголовок (организация, дата, период)
+        headers: Заголовки колонок
+        rows: Строки таблицы
+        col_widths: Ширины колонок в см (None — автоматически)
+        note: Примечание под таблицей
+
+    Returns:
+        str: Путь к файлу результата
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    font_name = register_fonts()
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    doc = SimpleDocTemplate(
+        tmp_path,
+        pagesize=landscape(A4),
+        rightMargin=1*cm,
+        leftMargin=1*cm,
+        topMargin=1.5*cm,
+        bottomMargin=1*cm
+    )
+
+    title_style = ParagraphStyle(
+        'CustomTitle', fontName=font_name, fontSize=18, spaceAfter=20,
+        alignment=1, textColor=colors.HexColor('#1a1a1a')
+    )
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle', fontName=font_name, fontSize=10, spaceAfter=15,
+        alignment=1, textColor=colors.HexColor('#666666')
+    )
+    normal_style = ParagraphStyle('CustomNormal', fontName=font_name, fontSize=9)
+
+    elements: list[Any] = [
+        Paragraph(title, title_style),
+        Paragraph(subtitle, subtitle_style),
+        Spacer(1, 15),
+    ]
+
+    if rows:
+        widths = [width * cm for width in col_widths] if col_widths else None
+        table = Table([list(headers), *rows], repeatRows=1, colWidths=widths)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d4af37')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1a1a1a')),
+            ('FONTNAME', (0, 0), (-1, 0), font_name),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+            ('TOPPADDING', (0, 0), (-1, 0), 10),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#1a1a1a')),
+            ('FONTNAME', (0, 1), (-1, -1), font_name),
+            ('FONTSIZE', (0, 1), (-1, -1), 8),
+            ('TOPPADDING', (0, 1), (-1, -1), 6),
+            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9f9f9')]),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#d4af37')),
+            ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#b8941f')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ]))
+        elements.append(table)
+    else:
+        elements.append(Paragraph('Нет данных для отображения', normal_style))
+
+    if note:
+        elements.append(Spacer(1, 10))
+        elements.append(Paragraph(note, normal_style))
+
+    doc.build(elements)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """Пул процессов рендеринга (None — рендер в потоке задания)."""
+    global _pool
+    workers = getattr(settings, 'REPORT_PDF_WORKERS', 2)
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn вместо fork: копия процесса с потоками и соединениями БД
+                # небезопасна; django.setup() — новый процесс импортирует приложение
+                _pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup
+                )
+    return _pool
+
+
+def _reset_pool() -> None:
+    """Сбросить сломанный пул (процесс завершился аварийно)."""
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _pdf_cell(key: str, value: Any) -> str:
+    """Значение ячейки PDF отчета."""
+    if value is None or value == '':
+        return 'Аноним' if key == 'user' else '-'
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%d.%m.%Y %H:%M')
+    if isinstance(value, date):
+        return value.strftime('%d.%m.%Y')
+    if isinstance(value, Decimal):
+        return f'{int(value)} руб.'
+    if key == 'action':
+        return str(ActionLog.ActionType(value).label) if value in ActionLog.ActionType.values else str(value)
+    return str(value)[:PDF_CELL_MAX_LENGTH]
+
+
+def _clean_day(value: Optional[str]) -> Optional[str]:
+    """Дата YYYY-MM-DD или None (некорректная дата игнорируется, как в отчетах)."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        return None
+
+
+def _cache_dir() -> str:
+    path = str(getattr(settings, 'REPORT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'report_cache')))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class ReportPdf:
+    """
+    Сервис PDF отчетов.
+    """
+
+    @staticmethod
+    def data_version(report_type: str, date_from: Optional[str], date_to: Optional[str]) -> str:
+        """
+        Версия данных отчета за период (один агрегатный запрос).
+
+        Args:
+            report_type: Тип отчета
+            date_from: Начало периода (YYYY-MM-DD)
+            date_to: Конец периода (YYYY-MM-DD)
+
+        Returns:
+            str: Количество строк и метка последнего изменения
+        """
+        period = period_lookup(date_from, date_to)
+        if report_type in ('actions', 'logins'):
+            data = ActionLog.objects.filter(**period).aggregate(count=Count('id'), last=Max('id'))
+        elif report_type in ('bookings', 'revenue'):
+            data = Booking.objects.filter(**period).aggregate(count=Count('id'), last=Max('updated_at'))
+        else:
+            data = CustomUser.objects.filter(**period).aggregate(
+                count=Count('id'), last=Max('updated_at'), stats=Max('activity_stats__updated_at')
+            )
+        return ':'.join(str(data[key]) for key in sorted(data))
+
+    @classmethod
+    def cache_key(cls, report_type: str, date_from: Optional[str], date_to: Optional[str]) -> str:
+        """Ключ файла отчета: хэш (тип, период, версия данных)."""
+        version = cls.data_version(report_type, date_from, date_to)
+        raw = f'{report_type}|{date_from or ""}|{date_to or ""}|{version}'
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:40]
+
+    @staticmethod
+    def file_name(report_type: str, cache_key: str) -> str:
+        return f'report_{report_type}_{cache_key}.pdf'
+
+    @classmethod
+    def file_path(cls, job: BackgroundJob) -> Optional[str]:
+        """
+        Путь к файлу готового отчета.
+
+        Args:
+            job: Задание PDF отчета
+
+        Returns:
+            str или None, если отчет не готов или файл удален
+        """
+        if job.status != BackgroundJob.Status.DONE or not job.file_name:
+            return None
+        path = os.path.join(_cache_dir(), os.path.basename(job.file_name))
+        return path if os.path.exists(path) else None
+
+    @classmethod
+    def start(
+        cls,
+        report_type: str,
+        date_from: Optional[str],
+        date_to: Optional[str],
+        user: Any = None,
+    ) -> BackgroundJob:
+        """
+        Получить задание отчета: готовое, выполняющееся или новое.
+
+        Args:
+            report_type: Тип отчета (ключ REPORTS)
+            date_from: Начало периода (YYYY-MM-DD)
+            date_to: Конец периода (YYYY-MM-DD)
+            user: Пользователь, запросивший отчет
+
+        Returns:
+            BackgroundJob: Задание (status DONE — файл можно отдавать сразу)
+        """
+        date_from, date_to = _clean_day(date_from), _clean_day(date_to)
+        cache_key = cls.cache_key(report_type, date_from, date_to)
+
+        job = BackgroundJobs.find_active(BackgroundJob.Kind.REPORT_PDF, cache_key)
+        if job is not None and (job.status != BackgroundJob.Status.DONE or cls.file_path(job)):
+            return job
+
+        params = {'report_type': report_type, 'date_from': date_from, 'date_to': date_to}
+        name = cls.file_name(report_type, cache_key)
+        if os.path.exists(os.path.join(_cache_dir(), name)):
+            # Файл уже сформирован (например, другим процессом) — задание не нужно
+            return BackgroundJob.objects.create(
+                kind=BackgroundJob.Kind.REPORT_PDF, params=params, cache_key=cache_key,
+                status=BackgroundJob.Status.DONE, progress=100, file_name=name,
+                created_by=user if getattr(user, 'is_authenticated', False) else None,
+                finished_at=timezone.now(),
+            )
+        return BackgroundJobs.enqueue(BackgroundJob.Kind.REPORT_PDF, params, user, cache_key)
+
+    @staticmethod
+    def prune_cache() -> int:
+        """
+        Удалить файлы отчетов старше REPORT_CACHE_MAX_AGE_DAYS.
+
+        Returns:
+            int: Количество удаленных файлов
+        """
+        max_age = getattr(settings, 'REPORT_CACHE_MAX_AGE_DAYS', 7) * 86400
+        directory = _cache_dir()
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if time.time() - os.path.getmtime(path) > max_age:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+def build_report_pdf(job: BackgroundJob, progress: ProgressCallback) -> str:
+    """
+    Обработчик задания PDF отчета.
+
+    Args:
+        job: Задание (params: report_type, date_from, date_to)
+        progress: Функция прогресса
+
+    Returns:
+        str: Имя файла отчета в REPORT_CACHE_DIR
+    """
+    report_type = job.params['report_type']
+    date_from, date_to = job.params.get('date_from'), job.params.get('date_to')
+    spec = REPORTS[report_type]
+    columns = PDF_COLUMNS[report_type]
+    indexes = [spec.keys.index(key) for key, _width in columns]
+    max_rows = getattr(settings, 'REPORT_PDF_MAX_ROWS', 5000)
+
+    rows: list[list[str]] = []
+    truncated = False
+    for row in ReportExport.rows(report_type, date_from, date_to):
+        if len(rows) >= max_rows:
+            truncated = True
+            break
+        rows.append([_pdf_cell(spec.keys[i], row[i]) for i in indexes])
+        if len(rows) % 500 == 0:
+            progress(60 * len(rows) / max_rows)
+    progress(60)
+
+    period = ' — '.join(
+        datetime.strptime(value, '%Y-%m-%d').strftime('%d.%m.%Y') if value else '...'
+        for value in (date_from, date_to)
+    )
+    subtitle = f"ООО ИНТЕРЬЕР | Сгенерировано: {timezone.localtime().strftime('%d.%m.%Y %H:%M')}"
+    if date_from or date_to:
+        subtitle += f' | Период: {period}'
+    note = (
+        f'Показаны первые {max_rows} строк. Полный отчет доступен в выгрузке CSV или XLSX.'
+        if truncated else ''
+    )
+    widths = [width for _key, width in columns]
+    args = (
+        os.path.join(_cache_dir(), ReportPdf.file_name(report_type, job.cache_key)),
+        spec.title, subtitle, [spec.headers[i] for i in indexes], rows,
+        widths if all(widths) else None, note,
+    )
+
+    pool = _get_pool()
+    if pool is None:
+        render_pdf(*args)
+    else:
+        try:
+            pool.submit(render_pdf, *args).result()
+        except BrokenProcessPool:
+            _reset_pool()
+            raise
+
+    ReportPdf.prune_cache()
+    return os.path.basename(args[0])
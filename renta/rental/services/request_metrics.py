@@ -0,0 +1,377 @@
+"""
+====================================================================
+МЕТРИКИ ВЫПОЛНЕНИЯ ЗАПРОСОВ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит сбор метрик по каждому HTTP запросу: количество
+и время SQL запросов, время рендеринга шаблонов, попадания и промахи
+кэша, время внешних HTTP вызовов (ЮKassa, геокодер).
+
+Основные компоненты:
+- RequestStats: Метрики одного запроса
+- RequestMetrics.track: Контекст сбора метрик запроса
+- RequestMetrics.external_call: Замер внешнего вызова
+- RequestMetrics.install: Подключение замеров шаблонов и кэша
+- TimingAggregator: Перцентили p50/p95/p99 по имени URL
+- find_repeated_queries: Поиск повторяющихся SQL запросов (N+1)
+
+Использование:
+- ServerTimingMiddleware (middleware.py) оборачивает каждый запрос
+  в RequestMetrics.track и добавляет заголовок Server-Timing
+- Агрегаты доступны на странице /admin/performance/ (только staff)
+
+Особенности:
+- SQL замеряется через connection.execute_wrapper
+- Агрегаты хранятся в памяти процесса (последние N запросов на URL)
+- Вне запроса (команды, фоновые потоки) замеры ничего не делают
+- Итоги запросов и внешних вызовов передаются в метрики Prometheus
+  (prometheus_metrics.py)
+- Повторы одного SQL запроса (N+1) при QUERY_REPEAT_RAISE (по
+  умолчанию DEBUG) вызывают RepeatedQueriesError, иначе пишутся в лог
+====================================================================
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from .prometheus_metrics import PrometheusMetrics
+
+logger = logging.getLogger(__name__)
+
+# Количество последних запросов на один URL для расчёта перцентилей
+SAMPLES_PER_URL: int = 1000
+
+# Сколько одинаковых по форме SQL запросов за HTTP запрос считается N+1
+DEFAULT_REPEAT_THRESHOLD: int = 5
+
+_MISSING = object()
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|%s|\b\d+\b")
+_SPACES_RE = re.compile(r'\s+')
+
+
+class RepeatedQueriesError(Exception):
+    """Однотипный SQL запрос повторяется в одном HTTP запросе (N+1)."""
+
+
+def sql_shape(sql: str) -> str:
+    """
+    Форма SQL запроса без значений параметров.
+
+    Списки IN (%s, %s, ...) любой длины, параметры и литералы
+    заменяются заполнителями, чтобы запросы одного цикла давали
+    одну форму.
+    """
+    shape = _IN_LIST_RE.sub('IN (...)', sql)
+    shape = _LITERAL_RE.sub('?', shape)
+    return _SPACES_RE.sub(' ', shape).strip()
+
+
+def find_repeated_queries(sql: list[str], threshold: int = DEFAULT_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+    """
+    Найти SQL запросы, повторившиеся не меньше threshold раз.
+
+    Args:
+        sql: Тексты выполненных запросов
+        threshold: Минимальное число повторов
+
+    Returns:
+        list: Пары (форма запроса, количество), по убыванию количества
+    """
+    counts = Counter(sql_shape(item) for item in sql)
+    return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+
+@dataclass
+class RequestStats:
+    """
+    Метрики одного HTTP запроса.
+
+    Attributes:
+        queries: Количество SQL запросов
+        sql_time: Суммарное время SQL (секунды)
+        template_time: Время рендеринга шаблонов (секунды)
+        cache_hits: Попадания в кэш
+        cache_misses: Промахи кэша
+        http_calls: Количество внешних HTTP вызовов
+        http_time: Время внешних HTTP вызовов (секунды)
+        sql: Тексты выполненных SQL запросов
+    """
+    queries: int = 0
+    sql_time: float = 0.0
+    template_time: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    http_calls: int = 0
+    http_time: float = 0.0
+    sql: list[str] = field(default_factory=list)
+    _template_depth: int = 0
+
+    def record_query(self, execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+        """Обёртка connection.execute_wrapper: считает запросы и их время."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.sql.append(sql)
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    'request_stats', default=None
+)
+
+
+class TimingAggregator:
+    """
+    Агрегатор времени запросов по имени URL в памяти процесса.
+    """
+
+    def __init__(self, samples: int = SAMPLES_PER_URL) -> None:
+        self._samples = samples
+        self._lock = threading.Lock()
+        self._durations: dict[str, deque] = defaultdict(lambda: deque(maxlen=self._samples))
+        self._totals: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(self, url_name: str, duration: float, stats: RequestStats) -> None:
+        """Учесть завершённый запрос."""
+        with self._lock:
+            self._durations[url_name].append(duration)
+            totals = self._totals[url_name]
+            totals['count'] += 1
+            totals['queries'] += stats.queries
+            totals['sql_time'] += stats.sql_time
+            totals['template_time'] += stats.template_time
+            totals['cache_hits'] += stats.cache_hits
+            totals['cache_misses'] += stats.cache_misses
+            totals['http_time'] += stats.http_time
+
+    @staticmethod
+    def percentile(values: list[float], percent: float) -> float:
+        """Перцентиль по отсортированному списку (ближайший ранг)."""
+        if not values:
+            return 0.0
+        index = max(0, min(len(values) - 1, math.ceil(percent / 100 * len(values)) - 1))
+        return values[index]
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """
+        Сводка по всем URL, отсортированная по p95.
+
+        Returns:
+            list[dict]: url_name, count, p50/p95/p99 (мс) и средние значения
+        """
+        with self._lock:
+            items = [
+                (name, sorted(durations), dict(self._totals[name]))
+                for name, durations in self._durations.items()
+            ]
+
+        rows = []
+        for name, durations, totals in items:
+            count = totals['count'] or 1
+            lookups = totals['cache_hits'] + totals['cache_misses']
+            rows.append({
+                'url_name': name,
+                'count': int(totals['count']),
+                'p50': self.percentile(durations, 50) * 1000,
+                'p95': self.percentile(durations, 95) * 1000,
+                'p99': self.percentile(durations, 99) * 1000,
+                'avg_queries': totals['queries'] / count,
+                'avg_sql_ms': totals['sql_time'] / count * 1000,
+                'avg_template_ms': totals['template_time'] / count * 1000,
+                'avg_http_ms': totals['http_time'] / count * 1000,
+                'cache_hit_ratio': totals['cache_hits'] / lookups if lookups else None,
+            })
+        return sorted(rows, key=lambda row: row['p95'], reverse=True)
+
+    def reset(self) -> None:
+        """Очистить накопленные данные."""
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+
+
+class RequestMetrics:
+    """
+    Сбор метрик выполнения запросов.
+    """
+
+    aggregator = TimingAggregator()
+    _installed = False
+
+    @staticmethod
+    def current() -> Optional[RequestStats]:
+        """Метрики текущего запроса (None вне запроса)."""
+        return _current.get()
+
+    @classmethod
+    @contextmanager
+    def track(cls) -> Iterator[RequestStats]:
+        """
+        Собирать метрики внутри блока.
+
+        Yields:
+            RequestStats: Метрики, заполняемые по ходу выполнения
+        """
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            with connection.execute_wrapper(stats.record_query):
+                yield stats
+        finally:
+            _current.reset(token)
+
+    @classmethod
+    @contextmanager
+    def external_call(cls, service: str) -> Iterator[None]:
+        """
+        Замерить внешний HTTP вызов.
+
+        Args:
+            service: Имя внешнего сервиса ('yookassa', 'geocoder')
+        """
+        start = time.perf_counter()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            stats = _current.get()
+            if stats is not None:
+                stats.http_calls += 1
+                stats.http_time += duration
+            if error:
+                logger.debug(f"External call to {service} failed after {duration:.3f}s")
+            PrometheusMetrics.observe_external_call(service, duration, error)
+
+    @classmethod
+    def install(cls) -> None:
+        """
+        Подключить замеры рендеринга шаблонов и обращений к кэшу.
+
+        Вызывается один раз из RentalConfig.ready().
+        """
+        if cls._installed:
+            return
+        cls._installed = True
+        cls._install_template_timing()
+        cls._install_cache_counting()
+
+    @staticmethod
+    def _install_template_timing() -> None:
+        """Обернуть рендеринг шаблона бэкенда Django (вложенные include не суммируются)."""
+        from django.template.backends.django import Template
+
+        original_render = Template.render
+
+        def render(self, context=None, request=None):
+            stats = _current.get()
+            if stats is None or stats._template_depth:
+                return original_render(self, context, request)
+            stats._template_depth += 1
+            start = time.perf_counter()
+            try:
+                return original_render(self, context, request)
+            finally:
+                stats._template_depth -= 1
+                stats.template_time += time.perf_counter() - start
+
+        Template.render = render
+
+    @staticmethod
+    def _install_cache_counting() -> None:
+        """Обернуть get/get_many бэкенда кэша по умолчанию для подсчёта попаданий."""
+        from django.core.cache import caches
+        from django.core.cache.backends.base import BaseCache
+
+        backend_class = type(caches['default'])
+        original_get = backend_class.get
+        original_get_many = backend_class.get_many
+
+        def get(self, key, default=None, version=None):
+            value = original_get(self, key, _MISSING, version=version)
+            stats = _current.get()
+            if stats is not None:
+                if value is _MISSING:
+                    stats.cache_misses += 1
+                else:
+                    stats.cache_hits += 1
+            return default if value is _MISSING else value
+
+        def get_many(self, keys, version=None):
+            keys = list(keys)
+            found = original_get_many(self, keys, version=version)
+            stats = _current.get()
+            if stats is not None:
+                stats.cache_hits += len(found)
+                stats.cache_misses += len(keys) - len(found)
+            return found
+
+        backend_class.get = get
+        # Базовый get_many вызывает get для каждого ключа — уже учтено
+        if original_get_many is not BaseCache.get_many:
+            backend_class.get_many = get_many
+
+    @staticmethod
+    def check_repeated_queries(stats: RequestStats, url_name: str) -> None:
+        """
+        Проверить запрос на повторяющиеся SQL запросы (N+1).
+
+        При QUERY_REPEAT_RAISE (по умолчанию DEBUG) вызывает
+        RepeatedQueriesError, иначе пишет предупреждение в лог.
+
+        Args:
+            stats: Метрики запроса
+            url_name: Имя URL для сообщения
+
+        Raises:
+            RepeatedQueriesError: Найдены повторы при QUERY_REPEAT_RAISE
+        """
+        threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+        repeated = find_repeated_queries(stats.sql, threshold)
+        if not repeated:
+            return
+
+        details = '; '.join(f'{count}x {shape[:200]}' for shape, count in repeated)
+        message = f"Repeated queries in {url_name}: {details}"
+        if getattr(settings, 'QUERY_REPEAT_RAISE', settings.DEBUG):
+            raise RepeatedQueriesError(message)
+        logger.warning(message)
+
+    @staticmethod
+    def server_timing_header(stats: RequestStats, total: float) -> str:
+        """
+        Сформировать значение заголовка Server-Timing.
+
+        Args:
+            stats: Метрики запроса
+            total: Полное время обработки (секунды)
+
+        Returns:
+            str: Значение заголовка
+        """
+        return ', '.join([
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="hits={stats.cache_hits} misses={stats.cache_misses}"',
+            f'http;dur={stats.http_time * 1000:.1f};desc="{stats.http_calls} calls"',
+            f'total;dur={total * 1000:.1f}',
+        ])
@@ -0,0 +1,184 @@
+"""
+====================================================================
+ЛЕНТА ОТЗЫВОВ ПОМЕЩЕНИЯ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит постраничную ленту одобренных отзывов помещения
+и кэш её страниц.
+
+Основные компоненты:
+- ReviewFeed.get_page: Страница ленты (HTML фрагмент или данные JSON)
+- ReviewFeed.invalidate: Сброс кэша страниц ленты помещения
+
+Принцип работы:
+- Отзывы выбираются по ключу (created_at, id) через keyset_paginate:
+  страница — один запрос с LIMIT, без OFFSET и COUNT
+- Готовая страница кэшируется по ключу (помещение, версия ленты,
+  раскодированный курсор, формат); страницы с некорректным курсором
+  не кэшируются. Версия — метка в кэше; одобрение, правка и
+  удаление отзыва (сигналы модели Review и массовая модерация)
+  меняют метку после коммита, и все страницы помещения перестают
+  использоваться
+- Для модераторов фрагмент содержит кнопки управления и CSRF токен,
+  поэтому он не кэшируется
+- Смена имени или аватара автора отражается в ленте не позже
+  REVIEW_FEED_TIMEOUT
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from typing import Any, Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+
+from ..core.pagination import decode_cursor, encode_cursor, keyset_paginate
+from ..models import Review
+
+logger = logging.getLogger(__name__)
+
+# Количество отзывов на странице ленты
+REVIEW_FEED_PAGE_SIZE: int = 10
+
+# Время хранения страницы ленты в кэше (секунды)
+REVIEW_FEED_TIMEOUT: int = 60 * 10
+
+# Форматы ответа ленты
+REVIEW_FEED_FORMATS: frozenset[str] = frozenset({'html', 'json'})
+
+
+class ReviewFeed:
+    """
+    Лента одобренных отзывов помещения.
+    """
+
+    @staticmethod
+    def _version_key(space_id: int) -> str:
+        return f'review_feed_version:{space_id}'
+
+    @classmethod
+    def get_version(cls, space_id: int) -> str:
+        """
+        Получить метку версии ленты помещения (создать, если её нет).
+
+        Args:
+            space_id: ID помещения
+
+        Returns:
+            str: Метка версии
+        """
+        key = cls._version_key(space_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def invalidate(cls, space_ids: Iterable[int]) -> None:
+        """
+        Сбросить кэш страниц ленты помещений после коммита транзакции.
+
+        Args:
+            space_ids: ID помещений
+        """
+        keys = [cls._version_key(space_id) for space_id in set(space_ids)]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @staticmethod
+    def _serialize(review: Review) -> dict[str, Any]:
+        """Отзыв в виде словаря для ответа JSON."""
+        author = review.author
+        return {
+            'id': review.pk,
+            'rating': review.rating,
+            'comment': review.comment,
+            'created_at': review.created_at.isoformat(),
+            'author': {
+                'id': author.pk,
+                'name': author.get_full_name_or_username(),
+                'avatar': author.avatar.url if author.avatar else None,
+            },
+        }
+
+    @classmethod
+    def _build_page(cls, request: HttpRequest, space_id: int, fmt: str, can_moderate: bool) -> dict[str, Any]:
+        """Выбрать отзывы страницы и подготовить ответ."""
+        reviews = Review.objects.filter(
+            space_id=space_id, is_approved=True
+        ).select_related('author')
+        page = keyset_paginate(reviews, request, page_size=REVIEW_FEED_PAGE_SIZE)
+
+        data: dict[str, Any] = {
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next,
+        }
+        if fmt == 'json':
+            data['reviews'] = [cls._serialize(review) for review in page]
+        else:
+            data['html'] = render_to_string(
+                'spaces/_reviews_page.html',
+                {'reviews': page, 'can_moderate': can_moderate},
+                request=request if can_moderate else None,
+            )
+        return data
+
+    @staticmethod
+    def _cache_cursor(request: HttpRequest) -> Optional[str]:
+        """
+        Часть ключа кэша для курсора страницы.
+
+        Строится из раскодированного курсора так же, как его выбирает
+        keyset_paginate, поэтому произвольные строки в after/before не
+        порождают новые ключи кэша.
+
+        Returns:
+            str или None, если в запросе некорректный курсор (страница
+            не кэшируется)
+        """
+        raw_after = request.GET.get('after')
+        raw_before = request.GET.get('before')
+        after = decode_cursor(raw_after)
+        if after is not None:
+            return f'after:{encode_cursor(*after)}'
+        if raw_after:
+            return None
+        before = decode_cursor(raw_before)
+        if before is not None:
+            return f'before:{encode_cursor(*before)}'
+        return None if raw_before else 'first'
+
+    @classmethod
+    def get_page(cls, request: HttpRequest, space_id: int, fmt: str = 'html') -> dict[str, Any]:
+        """
+        Получить страницу ленты отзывов помещения.
+
+        Курсор берётся из параметров after/before запроса.
+
+        Args:
+            request: HTTP запрос
+            space_id: ID помещения
+            fmt: Формат ('html' — фрагмент шаблона, 'json' — данные отзывов)
+
+        Returns:
+            dict: html или reviews, а также next_cursor и has_next
+        """
+        can_moderate = fmt == 'html' and getattr(request.user, 'can_moderate', False)
+        if can_moderate:
+            return cls._build_page(request, space_id, fmt, can_moderate=True)
+
+        cursor = cls._cache_cursor(request)
+        if cursor is None:
+            return cls._build_page(request, space_id, fmt, can_moderate=False)
+
+        key = f'review_feed:{space_id}:{cls.get_version(space_id)}:{fmt}:{cursor}'
+        data = cache.get(key)
+        if data is None:
+            data = cls._build_page(request, space_id, fmt, can_moderate=False)
+            cache.set(key, data, REVIEW_FEED_TIMEOUT)
+        return data
@@ -0,0 +1,138 @@
+"""
+====================================================================
+МАССОВАЯ МОДЕРАЦИЯ ОТЗЫВОВ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит одобрение и отклонение отзывов набором с
+обновлением счетчиков рейтинга один раз на помещение.
+
+Основные компоненты:
+- ReviewModeration.set_approved: Одобрить или отклонить отзывы набором
+- ReviewModeration.batch: Отложить обновление рейтинга из сигналов
+  до конца блока (один пересчет на помещение)
+- ReviewModeration.defer: Проверка сигналами, отложено ли обновление
+
+Принцип работы:
+- set_approved выбирает только отзывы, статус которых меняется,
+  считает их итоги по помещениям одним сгруппированным запросом,
+  меняет is_approved одним UPDATE и прибавляет (вычитает) итоги
+  к счетчикам каждого помещения одним UPDATE с F() выражениями;
+  так же меняются счетчики одобренных отзывов авторов, кэш ленты
+  отзывов этих помещений и сводные счетчики отзывов сбрасываются
+- Внутри batch() сигналы модели Review не обновляют счетчики, а
+  запоминают помещения; при выходе из блока они пересчитываются
+  одним сгруппированным запросом (SpaceRatings.recompute). Так
+  выполняется, например, массовое удаление отзывов в админке
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+from django.db import transaction
+from django.db.models import Count
+
+from ..models import Review
+from .review_feed import ReviewFeed
+from .space_ratings import SpaceRatings, rating_aggregates
+from .stats_service import StatsService
+from .user_stats import UserStatsService
+
+logger = logging.getLogger(__name__)
+
+# Помещения, счетчики которых пересчитываются в конце batch() (None — вне блока)
+_deferred_spaces: ContextVar[Optional[set[int]]] = ContextVar('deferred_rating_spaces', default=None)
+
+
+class ReviewModeration:
+    """
+    Сервис массовой модерации отзывов.
+    """
+
+    @staticmethod
+    @contextmanager
+    def batch() -> Iterator[None]:
+        """
+        Отложить обновление счетчиков рейтинга из сигналов до конца блока.
+
+        Блок выполняется в транзакции (без точки сохранения внутри
+        внешней транзакции); вложенные блоки присоединяются к внешнему.
+        """
+        if _deferred_spaces.get() is not None:
+            yield
+            return
+
+        space_ids: set[int] = set()
+        token = _deferred_spaces.set(space_ids)
+        try:
+            with transaction.atomic(savepoint=False):
+                yield
+                SpaceRatings.recompute(space_ids)
+        finally:
+            _deferred_spaces.reset(token)
+
+    @staticmethod
+    def defer(*space_ids: int) -> bool:
+        """
+        Отложить обновление счетчиков помещений, если идет batch().
+
+        Args:
+            space_ids: ID помещений, затронутых изменением отзыва
+
+        Returns:
+            bool: True, если обновление отложено (сигнал ничего не делает)
+        """
+        deferred = _deferred_spaces.get()
+        if deferred is None:
+            return False
+        deferred.update(space_ids)
+        return True
+
+    @classmethod
+    def set_approved(cls, review_ids: Iterable[int], approved: bool) -> int:
+        """
+        Одобрить или отклонить отзывы набором.
+
+        Args:
+            review_ids: ID отзывов (список или QuerySet отзывов)
+            approved: True — одобрить, False — отклонить
+
+        Returns:
+            int: Количество отзывов, статус которых изменился
+        """
+        with cls.batch():
+            changed = list(
+                Review.objects.select_for_update()
+                .filter(pk__in=review_ids)
+                .exclude(is_approved=approved)
+                .values_list('pk', flat=True)
+            )
+            if not changed:
+                return 0
+
+            totals = list(
+                Review.objects.filter(pk__in=changed)
+                .values('space_id').annotate(**rating_aggregates()).order_by()
+            )
+            authors = list(
+                Review.objects.filter(pk__in=changed)
+                .values('author_id').annotate(reviews=Count('id')).order_by()
+            )
+            Review.objects.filter(pk__in=changed).update(is_approved=approved)
+
+            sign = 1 if approved else -1
+            for row in totals:
+                SpaceRatings.apply_totals(row['space_id'], row, sign)
+            for row in authors:
+                UserStatsService.apply(row['author_id'], reviews_approved=sign * row['reviews'])
+            ReviewFeed.invalidate(row['space_id'] for row in totals)
+            StatsService.invalidate('reviews')
+
+        logger.info(
+            f"{'Approved' if approved else 'Rejected'} {len(changed)} reviews "
+            f"in {len(totals)} spaces"
+        )
+        return len(changed)
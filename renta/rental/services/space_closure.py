@@ -0,0 +1,276 @@
+"""
+====================================================================
+СЕРВИС ЗАКРЫТИЯ ПОМЕЩЕНИЯ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит массовую операцию закрытия помещения: отмену всех
+будущих бронирований и возврат внесённых предоплат.
+
+Основные компоненты:
+- SpaceClosureService.close_space: Полный цикл закрытия помещения
+- SpaceClosureService.get_affected_bookings: Выборка затронутых бронирований
+- SpaceClosureService.get_unrefunded_bookings: Отменённые бронирования
+  с невозвращённой предоплатой (повтор возвратов при повторном запуске)
+
+Порядок работы:
+1. Затронутые бронирования выбираются одним запросом
+2. Статусы меняются одним UPDATE в транзакции, помещение снимается с публикации
+3. Возвраты создаются параллельно (не более max_workers запросов к ЮKassa)
+   с детерминированными ключами идемпотентности — повторный запуск
+   не создаёт двойных возвратов и повторяет неудавшиеся: отменённые
+   бронирования с невозвращённой предоплатой выбираются снова
+4. Транзакции возврата и флаги предоплаты сохраняются пакетно
+
+Особенности:
+- Прогресс сообщается через callback после каждого возврата
+- Ошибки возвратов не прерывают операцию и попадают в отчёт
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal
+from typing import Any, Callable, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Booking, Space, Transaction
+from .payment_service import PaymentService
+from .booking_rollup import BookingRollup
+from .reference_data import ReferenceData
+from .stats_service import StatsService
+from .status_service import StatusCodes, StatusService
+from .user_stats import UserStatsService
+
+logger = logging.getLogger(__name__)
+
+# Максимум одновременных запросов к ЮKassa по умолчанию
+DEFAULT_REFUND_WORKERS: int = 4
+
+ProgressCallback = Callable[[int, int, Booking, dict[str, Any]], None]
+
+
+class SpaceClosureService:
+    """
+    Сервис массовой отмены бронирований и возврата предоплат при закрытии помещения.
+    """
+
+    @staticmethod
+    def get_affected_bookings(space: Space) -> list[Booking]:
+        """
+        Получить будущие активные бронирования помещения одним запросом.
+
+        Args:
+            space: Закрываемое помещение
+
+        Returns:
+            list[Booking]: Бронирования в статусах ожидания/подтверждения
+        """
+        return list(
+            Booking.objects.filter(
+                space=space,
+                start_datetime__gt=timezone.now(),
+                status__code__in=StatusCodes.ACTIVE
+            ).select_related('tenant', 'space').prefetch_related('transactions__status')
+        )
+
+    @staticmethod
+    def get_unrefunded_bookings(space: Space) -> list[Booking]:
+        """
+        Получить отменённые бронирования помещения с невозвращённой предоплатой.
+
+        Сюда попадают бронирования, возврат по которым не удался при
+        предыдущем закрытии: статус уже отменён, но флаг предоплаты
+        не сброшен.
+
+        Args:
+            space: Закрываемое помещение
+
+        Returns:
+            list[Booking]: Бронирования для повторного возврата
+        """
+        return list(
+            Booking.objects.filter(
+                space=space,
+                status__code=StatusCodes.CANCELLED,
+                prepayment_paid=True,
+                prepayment_amount__gt=0
+            ).select_related('tenant', 'space').prefetch_related('transactions__status')
+        )
+
+    @staticmethod
+    def get_refund_key(booking: Booking, payment_id: str) -> str:
+        """Детерминированный ключ идемпотентности возврата (не длиннее 64 символов)."""
+        return f'closure-{booking.id}-{payment_id}'[:64]
+
+    @staticmethod
+    def _get_payment_id(booking: Booking) -> str:
+        """ID платежа бронирования (из бронирования или успешной транзакции)."""
+        if booking.payment_id:
+            return booking.payment_id
+        for tx in sorted(booking.transactions.all(), key=lambda t: t.created_at, reverse=True):
+            if tx.status.code == 'success' and tx.external_id:
+                return tx.external_id
+        return ''
+
+    @classmethod
+    def close_space(
+        cls,
+        space: Space,
+        reason: str = '',
+        deactivate: bool = True,
+        max_workers: int = DEFAULT_REFUND_WORKERS,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> dict[str, Any]:
+        """
+        Закрыть помещение: отменить будущие бронирования и вернуть предоплаты.
+
+        Args:
+            space: Закрываемое помещение
+            reason: Причина закрытия (записывается в комментарий модератора)
+            deactivate: Снять помещение с публикации
+            max_workers: Максимум параллельных запросов возврата
+            on_progress: Callback (выполнено, всего, бронирование, результат)
+
+        Returns:
+            dict: Отчёт с ключами cancelled, refunds_total, refunded,
+                refunded_amount и failed (список {booking_id, error})
+        """
+        bookings = cls.get_affected_bookings(space)
+        # Возвраты, не удавшиеся при прошлом запуске (выбираются до отмены новых)
+        unrefunded = cls.get_unrefunded_bookings(space)
+        booking_ids = [booking.id for booking in bookings]
+        now = timezone.now()
+
+        # Смена статусов одним запросом
+        with transaction.atomic():
+            update_fields: dict[str, Any] = {
+                'status': StatusService.get_cancelled_status(),
+                'updated_at': now,
+            }
+            if reason:
+                update_fields['moderator_comment'] = reason
+            cancelled = Booking.objects.filter(id__in=booking_ids).update(**update_fields)
+            # update() не вызывает сигналы — пересчитываем статистику арендаторов
+            # и дневные итоги помещения за дни создания этих бронирований
+            UserStatsService.recompute({booking.tenant_id for booking in bookings})
+            if bookings:
+                days = [timezone.localdate(booking.created_at) for booking in bookings]
+                BookingRollup.recompute([space.pk], min(days), max(days))
+            StatsService.invalidate('bookings', 'spaces')
+
+            if deactivate and space.is_active:
+                Space.objects.filter(pk=space.pk).update(is_active=False)
+                space.is_active = False
+
+        logger.info(f"Space #{space.pk} closure: {cancelled} bookings cancelled")
+
+        to_refund = [b for b in bookings if b.prepayment_paid and b.prepayment_amount] + unrefunded
+        report: dict[str, Any] = {
+            'cancelled': cancelled,
+            'refunds_total': len(to_refund),
+            'refunded': 0,
+            'refunded_amount': Decimal('0'),
+            'failed': [],
+        }
+        if not to_refund:
+            return report
+
+        results = cls._refund_concurrently(to_refund, max_workers, on_progress)
+
+        # Пакетное сохранение результатов (в основном потоке)
+        refunded = [(booking, result) for booking, result in results if result['success']]
+        for booking, result in results:
+            if not result['success']:
+                report['failed'].append({'booking_id': booking.id, 'error': result.get('error', '')})
+
+        if refunded:
+            refund_status = ReferenceData.transaction_status('refunded', 'Возврат')
+            with transaction.atomic():
+                Transaction.objects.bulk_create([
+                    Transaction(
+                        booking=booking,
+                        status=refund_status,
+                        amount=booking.prepayment_amount,
+                        payment_method='yookassa',
+                        external_id=result.get('refund_id', '')
+                    )
+                    for booking, result in refunded
+                ])
+                Booking.objects.filter(
+                    id__in=[booking.id for booking, _ in refunded]
+                ).update(prepayment_paid=False)
+
+                for booking, _ in refunded:
+                    PaymentService.send_refund_receipt(booking, booking.prepayment_amount)
+
+        report['refunded'] = len(refunded)
+        report['refunded_amount'] = sum(
+            (booking.prepayment_amount for booking, _ in refunded), Decimal('0')
+        )
+
+        logger.info(
+            f"Space #{space.pk} closure: {report['refunded']}/{report['refunds_total']} refunds, "
+            f"{len(report['failed'])} failed"
+        )
+        return report
+
+    @classmethod
+    def _refund_concurrently(
+        cls,
+        bookings: list[Booking],
+        max_workers: int,
+        on_progress: Optional[ProgressCallback]
+    ) -> list[tuple[Booking, dict[str, Any]]]:
+        """
+        Создать возвраты параллельно с ограничением числа потоков.
+
+        В потоках выполняются только HTTP-запросы к ЮKassa, без обращений к БД.
+
+        Args:
+            bookings: Бронирования с внесённой предоплатой
+            max_workers: Максимум параллельных запросов
+            on_progress: Callback прогресса
+
+        Returns:
+            list: Пары (бронирование, результат create_refund)
+        """
+        jobs = []
+        results: list[tuple[Booking, dict[str, Any]]] = []
+        total = len(bookings)
+
+        def finish(booking: Booking, result: dict[str, Any]) -> None:
+            results.append((booking, result))
+            if on_progress:
+                on_progress(len(results), total, booking, result)
+
+        for booking in bookings:
+            payment_id = cls._get_payment_id(booking)
+            if payment_id:
+                jobs.append((booking, payment_id))
+            else:
+                finish(booking, {'success': False, 'error': 'Не найден платеж для возврата'})
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(
+                    PaymentService.create_refund,
+                    payment_id=payment_id,
+                    amount=booking.prepayment_amount,
+                    description=f'Возврат предоплаты - помещение закрыто, бронирование #{booking.id}',
+                    idempotence_key=cls.get_refund_key(booking, payment_id)
+                ): booking
+                for booking, payment_id in jobs
+            }
+            for future in as_completed(futures):
+                booking = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+
+                finish(booking, result)
+
+        return results
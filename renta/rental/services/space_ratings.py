@@ -0,0 +1,133 @@
+"""
+====================================================================
+СЧЕТЧИКИ РЕЙТИНГА ПОМЕЩЕНИЙ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит обновление денормализованных счетчиков рейтинга
+помещения: суммы оценок, количества одобренных отзывов и количества
+оценок по каждой звезде (поля rating_* модели Space).
+
+Основные компоненты:
+- SpaceRatings.apply: Изменить счетчики на вклад одного отзыва (F() дельты)
+- SpaceRatings.apply_totals: Изменить счетчики на итоги группы отзывов
+- SpaceRatings.recompute: Пересчитать счетчики помещений по отзывам
+
+Принцип работы:
+- Одобренный отзыв добавляет свою оценку к сумме, количеству и
+  счетчику звезды; снятие одобрения, правка и удаление вычитают
+  прежний вклад. Изменения выполняются одним UPDATE с F() выражениями,
+  поэтому одновременные изменения не теряются
+- Сигналы модели Review (signals.py) вызывают apply при сохранении
+  и удалении отзыва
+- apply_totals используется массовой модерацией (review_moderation.py):
+  итоги изменяемых отзывов по помещениям считаются одним запросом
+- recompute используется для восстановления (команда
+  rebuild_space_ratings) и после массовых изменений отзывов
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable, Optional
+
+from django.db.models import Count, F, Q, Sum
+
+from ..models import Review, Space
+
+logger = logging.getLogger(__name__)
+
+# Диапазон оценок отзыва
+MIN_RATING: int = 1
+MAX_RATING: int = 5
+
+
+def star_field(rating: int) -> str:
+    """Имя поля счетчика оценок rating (rating_5_count и т.п.)."""
+    return f'rating_{rating}_count'
+
+
+def rating_aggregates() -> dict[str, Any]:
+    """Агрегаты счетчиков рейтинга для values('space_id').annotate()."""
+    aggregates: dict[str, Any] = {'rating_sum': Sum('rating'), 'rating_count': Count('id')}
+    aggregates.update({
+        star_field(i): Count('id', filter=Q(rating=i))
+        for i in range(MIN_RATING, MAX_RATING + 1)
+    })
+    return aggregates
+
+
+class SpaceRatings:
+    """
+    Сервис счетчиков рейтинга помещений.
+    """
+
+    @staticmethod
+    def apply(space_id: int, removed: Optional[int] = None, added: Optional[int] = None) -> None:
+        """
+        Изменить счетчики помещения на вклад отзыва.
+
+        Args:
+            space_id: ID помещения
+            removed: Оценка, которую нужно вычесть (прежний вклад отзыва)
+            added: Оценка, которую нужно добавить (новый вклад отзыва)
+        """
+        if removed == added:
+            return
+
+        deltas: dict[str, int] = {'rating_sum': 0, 'rating_count': 0}
+        if removed is not None:
+            deltas['rating_sum'] -= removed
+            deltas['rating_count'] -= 1
+            deltas[star_field(removed)] = deltas.get(star_field(removed), 0) - 1
+        if added is not None:
+            deltas['rating_sum'] += added
+            deltas['rating_count'] += 1
+            deltas[star_field(added)] = deltas.get(star_field(added), 0) + 1
+
+        Space.objects.filter(pk=space_id).update(**{
+            name: F(name) + delta for name, delta in deltas.items() if delta
+        })
+
+    @staticmethod
+    def apply_totals(space_id: int, totals: dict[str, int], sign: int = 1) -> None:
+        """
+        Изменить счетчики помещения на итоги группы отзывов.
+
+        Args:
+            space_id: ID помещения
+            totals: Итоги отзывов помещения (ключи rating_aggregates())
+            sign: 1 — добавить отзывы к счетчикам, -1 — вычесть
+        """
+        Space.objects.filter(pk=space_id).update(**{
+            name: F(name) + sign * totals[name]
+            for name in rating_aggregates() if totals.get(name)
+        })
+
+    @staticmethod
+    def recompute(space_ids: Iterable[int]) -> None:
+        """
+        Пересчитать счетчики помещений по одобренным отзывам.
+
+        Один сгруппированный запрос на все помещения и один UPDATE
+        на каждое помещение.
+
+        Args:
+            space_ids: ID помещений
+        """
+        space_ids = set(space_ids)
+        if not space_ids:
+            return
+
+        rows = {
+            row.pop('space_id'): row
+            for row in Review.objects.filter(
+                space_id__in=space_ids, is_approved=True
+            ).values('space_id').annotate(**rating_aggregates()).order_by()
+        }
+
+        empty = {'rating_sum': 0, 'rating_count': 0}
+        empty.update({star_field(i): 0 for i in range(MIN_RATING, MAX_RATING + 1)})
+        for space_id in space_ids:
+            Space.objects.filter(pk=space_id).update(**rows.get(space_id, empty))
+
+        logger.debug(f"Recomputed rating counters for {len(space_ids)} spaces")
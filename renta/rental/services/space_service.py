@@ -18,10 +18,11 @@
 ====================================================================
 """
 
-from django.db.models import Q, Avg, Count, Min
+from django.db.models import Q, Min
 from django.core.paginator import Paginator
 
 from ..models import Space, City, SpaceCategory, Favorite, Review
+from .favorites_index import FavoritesIndex
 
 
 class SpaceService:
@@ -119,10 +120,8 @@ class SpaceService:
 
         # Аннотации для сортировки
         spaces = spaces.annotate(
-            min_price_value=Min('prices__price'),
-            avg_rating=Avg('reviews__rating'),
-            reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
-        )
+            min_price_value=Min('prices__price')
+        ).with_avg_rating()
 
         # Сортировка
         sort_mapping = {
@@ -243,21 +242,11 @@ class SpaceService:
                 - views_count: Количество просмотров
                 - bookings_count: Количество бронирований
         """
-        reviews = space.reviews.filter(is_approved=True)
-        stats = reviews.aggregate(
-            avg_rating=Avg('rating'),
-            total_reviews=Count('id')
-        )
-
-        # Распределение рейтингов
-        rating_distribution = {}
-        for i in range(1, 6):
-            rating_distribution[i] = reviews.filter(rating=i).count()
-
+        # Рейтинг и распределение — из счетчиков помещения (без запросов)
         return {
-            'avg_rating': round(stats['avg_rating'] or 0, 1),
-            'total_reviews': stats['total_reviews'] or 0,
-            'rating_distribution': rating_distribution,
+            'avg_rating': space.get_avg_rating(),
+            'total_reviews': space.get_reviews_count(),
+            'rating_distribution': space.get_rating_distribution(),
             'views_count': space.views_count,
             'bookings_count': space.bookings.count(),
         }
@@ -304,7 +293,7 @@ class SpaceService:
         """
         if not user.is_authenticated:
             return False
-        return Favorite.objects.filter(user=user, space_id=space_id).exists()
+        return FavoritesIndex.contains(user.id, space_id)
 
     @staticmethod
     def get_user_favorites(user):
@@ -0,0 +1,210 @@
+"""
+====================================================================
+СВОДНАЯ СТАТИСТИКА ДЛЯ ПАНЕЛЕЙ МОДЕРАТОРОВ САЙТА "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит счетчики для панели управления и страниц
+управления помещениями, бронированиями, отзывами и пользователями.
+
+Основные компоненты:
+- StatsService.spaces: Помещения (всего, активных, неактивных, рекомендуемых)
+- StatsService.categories: Категории (всего, активных, отключенных)
+- StatsService.bookings: Бронирования (всего и по кодам статусов)
+- StatsService.reviews: Отзывы (всего, на модерации, одобренных, рейтинг)
+- StatsService.users: Пользователи (всего, по типам, заблокированных и т.п.)
+- StatsService.cities: Города (всего, активных)
+- StatsService.invalidate: Сброс кэша счетчиков моделей
+
+Принцип работы:
+- Все счетчики одной модели считаются одним запросом с условными
+  агрегатами (Count('id', filter=Q(...)))
+- Результат кэшируется на STATS_TIMEOUT секунд по ключу модели
+- Сигналы сохранения и удаления моделей (signals.py) и массовые
+  изменения в обход save() сбрасывают кэш после коммита
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+from ..models import Booking, City, CustomUser, Review, Space, SpaceCategory
+from .reference_data import ReferenceData
+
+logger = logging.getLogger(__name__)
+
+# Время хранения счетчиков в кэше (секунды)
+STATS_TIMEOUT: int = 60
+
+# Имена наборов счетчиков (части ключей кэша)
+STATS_NAMES: frozenset[str] = frozenset({
+    'spaces', 'categories', 'bookings', 'reviews', 'users', 'cities',
+})
+
+
+class StatsService:
+    """
+    Сервис сводной статистики для панелей модераторов.
+    """
+
+    @staticmethod
+    def _cache_key(name: str) -> str:
+        return f'dashboard_stats:{name}'
+
+    @classmethod
+    def _cached(cls, name: str, compute: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Получить счетчики из кэша или посчитать и сохранить их."""
+        key = cls._cache_key(name)
+        data = cache.get(key)
+        if data is None:
+            data = compute()
+            cache.set(key, data, STATS_TIMEOUT)
+            logger.debug(f"Dashboard stats '{name}' recomputed")
+        return data
+
+    @classmethod
+    def invalidate(cls, *names: str) -> None:
+        """
+        Сбросить кэш счетчиков после коммита транзакции.
+
+        Args:
+            names: Имена наборов счетчиков (без аргументов — все)
+        """
+        keys = [cls._cache_key(name) for name in (names or STATS_NAMES)]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    @classmethod
+    def spaces(cls) -> dict[str, int]:
+        """
+        Статистика помещений.
+
+        Returns:
+            dict: total, active, inactive, featured
+        """
+        return cls._cached('spaces', lambda: Space.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            inactive=Count('id', filter=Q(is_active=False)),
+            featured=Count('id', filter=Q(is_featured=True)),
+        ))
+
+    @classmethod
+    def categories(cls) -> dict[str, int]:
+        """
+        Статистика категорий.
+
+        Returns:
+            dict: total, active, inactive
+        """
+        return cls._cached('categories', lambda: SpaceCategory.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            inactive=Count('id', filter=Q(is_active=False)),
+        ))
+
+    @classmethod
+    def bookings(cls) -> dict[str, int]:
+        """
+        Статистика бронирований.
+
+        Статусы берутся из справочника, поэтому запрос не соединяется
+        с таблицей статусов.
+
+        Returns:
+            dict: total и количество бронирований по коду каждого статуса
+        """
+        def compute() -> dict[str, int]:
+            statuses = ReferenceData.get().booking_statuses
+            return Booking.objects.aggregate(
+                total=Count('id'),
+                **{
+                    code: Count('id', filter=Q(status_id=status.pk))
+                    for code, status in statuses.items()
+                }
+            )
+
+        return cls._cached('bookings', compute)
+
+    @classmethod
+    def booking_statuses(cls) -> list[dict[str, Any]]:
+        """
+        Количество бронирований по статусам для фильтра по статусу.
+
+        Returns:
+            list: Словари status__code, status__name, status__color и count
+                  в порядке сортировки статусов
+        """
+        counts = cls.bookings()
+        statuses = sorted(ReferenceData.get().booking_statuses.values(), key=lambda s: s.sort_order)
+        return [
+            {
+                'status__code': status.code,
+                'status__name': status.name,
+                'status__color': status.color,
+                'count': counts.get(status.code, 0),
+            }
+            for status in statuses
+        ]
+
+    @classmethod
+    def reviews(cls) -> dict[str, Any]:
+        """
+        Статистика отзывов.
+
+        Returns:
+            dict: total, pending, approved, avg_rating (по одобренным),
+                  avg_rating_all (по всем отзывам)
+        """
+        def compute() -> dict[str, Any]:
+            data = Review.objects.aggregate(
+                total=Count('id'),
+                pending=Count('id', filter=Q(is_approved=False)),
+                approved=Count('id', filter=Q(is_approved=True)),
+                avg_rating=Avg('rating', filter=Q(is_approved=True)),
+                avg_rating_all=Avg('rating'),
+            )
+            data['avg_rating'] = data['avg_rating'] or 0
+            data['avg_rating_all'] = data['avg_rating_all'] or 0
+            return data
+
+        return cls._cached('reviews', compute)
+
+    @classmethod
+    def users(cls) -> dict[str, int]:
+        """
+        Статистика пользователей.
+
+        Returns:
+            dict: total, active, blocked, verified, admins, moderators,
+                  а также без суперпользователей: regular_total,
+                  regular_users, regular_verified
+        """
+        not_superuser = Q(is_superuser=False)
+        return cls._cached('users', lambda: CustomUser.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            blocked=Count('id', filter=Q(is_blocked=True)),
+            verified=Count('id', filter=Q(email_verified=True)),
+            admins=Count('id', filter=Q(is_staff=True) | Q(user_type='admin')),
+            moderators=Count('id', filter=Q(user_type='moderator')),
+            regular_total=Count('id', filter=not_superuser),
+            regular_users=Count('id', filter=not_superuser & Q(user_type='user')),
+            regular_verified=Count('id', filter=not_superuser & Q(email_verified=True)),
+        ))
+
+    @classmethod
+    def cities(cls) -> dict[str, int]:
+        """
+        Статистика городов.
+
+        Returns:
+            dict: total, active
+        """
+        return cls._cached('cities', lambda: City.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+        ))
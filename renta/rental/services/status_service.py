@@ -19,6 +19,7 @@
 
 Особенности:
 - Конфигурация статусов по умолчанию в словаре DEFAULT_STATUSES
+- Статусы берутся из реестра справочников (ReferenceData) без запросов к БД
 - Автоматическое создание отсутствующих статусов
 - Проверка корректности кодов статусов
 - Единообразное использование во всем приложении
@@ -30,6 +31,8 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING, Any
 
+from .reference_data import ReferenceData
+
 if TYPE_CHECKING:
     from ..models import BookingStatus
 
@@ -78,20 +81,18 @@ class StatusService:
     бронирований с гарантией их существования в базе данных.
     """
 
-    # Кэш статусов для оптимизации
-    _cache: dict[str, 'BookingStatus'] = {}
-
     @classmethod
     def clear_cache(cls) -> None:
-        """Очистить кэш статусов."""
-        cls._cache.clear()
+        """Сбросить снимок справочников (статусы перечитаются из БД)."""
+        ReferenceData.invalidate()
 
     @classmethod
     def get_or_create(cls, code: str) -> 'BookingStatus':
         """
         Получить или создать статус по коду.
 
-        Получает статус бронирования из базы данных по его коду.
+        Получает статус бронирования из реестра справочников
+        (см. reference_data.py) без запроса к базе данных.
         Если статус с таким кодом не существует, создает его
         используя конфигурацию из DEFAULT_STATUSES.
 
@@ -109,20 +110,12 @@ class StatusService:
             ValueError: Если передан неизвестный код статуса
             Exception: При любых других ошибках работы с базой данных
         """
-        # Проверяем кэш
-        if code in cls._cache:
-            return cls._cache[code]
-
-        from ..models import BookingStatus
-
         defaults = DEFAULT_STATUSES.get(code)
         if not defaults:
             raise ValueError(f'Неизвестный код статуса: {code}')
 
         try:
-            status, _ = BookingStatus.objects.get_or_create(code=code, defaults=defaults)
-            cls._cache[code] = status
-            return status
+            return ReferenceData.booking_status(code, defaults)
         except Exception as e:
             logger.error(f"Ошибка получения статуса '{code}': {e}")
             raise
@@ -0,0 +1,262 @@
+"""
+====================================================================
+СПРАВОЧНИК USER-AGENT ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит ведение справочника user_agents: каждая строка
+User-Agent хранится один раз, а журнал действий ссылается на неё.
+
+Основные компоненты:
+- UserAgentService.parse: Определение браузера, ОС и типа устройства
+- UserAgentService.resolve_many: Получение id справочника для строк
+- UserAgentService.attach: Проставление ссылок в пачке записей журнала
+- UserAgentService.stash_legacy_column / backfill_legacy: Перенос строк
+  из прежней текстовой колонки action_logs.user_agent в справочник
+
+Особенности:
+- Разбор строки выполняется один раз — при первом появлении
+- Соответствие хэш -> id кэшируется в памяти процесса
+- Новые строки добавляются одним bulk_create на пачку журнала
+
+Перенос старых записей журнала (команда backfill_user_agents):
+- До migrate строки старой колонки копируются во временную таблицу
+  action_log_user_agents_legacy, а колонка заменяется пустой: иначе
+  миграция на внешний ключ не сможет привести текст к числу
+- После migrate строки пачками переводятся в справочник, ссылки
+  проставляются в журнал, временная таблица удаляется
+====================================================================
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import connection, transaction
+
+from ..models import ActionLog, UserAgent
+
+logger = logging.getLogger(__name__)
+
+# Максимальная длина хранимой строки User-Agent
+MAX_USER_AGENT_LENGTH: int = 500
+
+# Размер кэша хэш -> id в памяти процесса
+MAX_CACHED_IDS: int = 10000
+
+# Временная таблица со строками прежней колонки action_logs.user_agent
+LEGACY_TABLE: str = 'action_log_user_agents_legacy'
+
+BOT_MARKERS: tuple[str, ...] = ('bot', 'crawl', 'spider', 'slurp', 'curl', 'python-requests')
+
+# Порядок важен: Edge и Opera содержат «Chrome», Chrome содержит «Safari»
+BROWSER_MARKERS: tuple[tuple[str, str], ...] = (
+    ('Edg', 'Edge'),
+    ('OPR', 'Opera'),
+    ('Opera', 'Opera'),
+    ('YaBrowser', 'Яндекс Браузер'),
+    ('Firefox', 'Firefox'),
+    ('FxiOS', 'Firefox'),
+    ('CriOS', 'Chrome'),
+    ('Chrome', 'Chrome'),
+    ('Safari', 'Safari'),
+)
+
+OS_MARKERS: tuple[tuple[str, str], ...] = (
+    ('Windows', 'Windows'),
+    ('Android', 'Android'),
+    ('iPhone', 'iOS'),
+    ('iPad', 'iOS'),
+    ('Mac OS X', 'macOS'),
+    ('Macintosh', 'macOS'),
+    ('CrOS', 'ChromeOS'),
+    ('Linux', 'Linux'),
+)
+
+
+class UserAgentService:
+    """
+    Сервис справочника User-Agent.
+    """
+
+    _ids: dict[str, int] = {}
+
+    @staticmethod
+    def get_hash(user_agent: str) -> str:
+        """SHA-256 строки User-Agent."""
+        return hashlib.sha256(user_agent.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def parse(user_agent: str) -> dict[str, str]:
+        """
+        Определить браузер, ОС и тип устройства по строке User-Agent.
+
+        Args:
+            user_agent: Строка User-Agent
+
+        Returns:
+            dict: Ключи browser, os и device
+        """
+        lowered = user_agent.lower()
+        if any(marker in lowered for marker in BOT_MARKERS):
+            return {'browser': 'Бот', 'os': '-', 'device': UserAgent.Device.BOT}
+
+        browser = next(
+            (name for marker, name in BROWSER_MARKERS if marker in user_agent),
+            user_agent[:20] or '-'
+        )
+        os_name = next((name for marker, name in OS_MARKERS if marker in user_agent), 'Другая')
+
+        if 'iPad' in user_agent or 'Tablet' in user_agent or (
+            'Android' in user_agent and 'Mobile' not in user_agent
+        ):
+            device = UserAgent.Device.TABLET
+        elif 'Mobile' in user_agent or 'iPhone' in user_agent:
+            device = UserAgent.Device.MOBILE
+        elif os_name in ('Windows', 'macOS', 'Linux', 'ChromeOS'):
+            device = UserAgent.Device.DESKTOP
+        else:
+            device = UserAgent.Device.OTHER
+
+        return {'browser': browser, 'os': os_name, 'device': device}
+
+    @classmethod
+    def resolve_many(cls, user_agents: Iterable[str]) -> dict[str, int]:
+        """
+        Получить id справочника для набора строк, добавив новые.
+
+        Args:
+            user_agents: Строки User-Agent (уже обрезанные)
+
+        Returns:
+            dict: Строка User-Agent -> id записи справочника
+        """
+        hashes = {ua: cls.get_hash(ua) for ua in set(user_agents) if ua}
+        missing = {h for h in hashes.values() if h not in cls._ids}
+
+        if missing:
+            found = dict(UserAgent.objects.filter(ua_hash__in=missing).values_list('ua_hash', 'id'))
+            new = [
+                UserAgent(ua_hash=h, user_agent=ua, **cls.parse(ua))
+                for ua, h in hashes.items() if h in missing and h not in found
+            ]
+            if new:
+                # Параллельный процесс мог добавить ту же строку — конфликт не ошибка
+                UserAgent.objects.bulk_create(new, ignore_conflicts=True)
+                found.update(UserAgent.objects.filter(
+                    ua_hash__in=[item.ua_hash for item in new]
+                ).values_list('ua_hash', 'id'))
+
+            if len(cls._ids) + len(found) > MAX_CACHED_IDS:
+                cls._ids = {}
+            cls._ids.update(found)
+
+        return {ua: cls._ids[h] for ua, h in hashes.items() if h in cls._ids}
+
+    @classmethod
+    def attach(cls, entries: Iterable[ActionLog]) -> None:
+        """
+        Проставить ссылки на справочник в записях журнала.
+
+        Исходная строка берётся из атрибута raw_user_agent записи
+        (его заполняет LoggingService.log_action).
+
+        Args:
+            entries: Несохранённые записи журнала
+        """
+        entries = [entry for entry in entries if getattr(entry, 'raw_user_agent', '')]
+        if not entries:
+            return
+
+        ids = cls.resolve_many(entry.raw_user_agent for entry in entries)
+        for entry in entries:
+            entry.user_agent_id = ids.get(entry.raw_user_agent)
+
+    @staticmethod
+    def _legacy_column_present(cursor) -> bool:
+        """Хранит ли action_logs строки User-Agent в прежней текстовой колонке."""
+        columns = {
+            column.name for column in
+            connection.introspection.get_table_description(cursor, ActionLog._meta.db_table)
+        }
+        return 'user_agent' in columns and 'user_agent_id' not in columns
+
+    @classmethod
+    def stash_legacy_column(cls) -> int:
+        """
+        Сохранить строки прежней колонки во временную таблицу (до migrate).
+
+        Колонка action_logs.user_agent заменяется пустой колонкой, которую
+        миграция переименует и приведёт к внешнему ключу.
+
+        Returns:
+            int: Количество сохранённых строк (0, если колонки уже нет)
+        """
+        table = ActionLog._meta.db_table
+        with transaction.atomic(), connection.cursor() as cursor:
+            if LEGACY_TABLE in connection.introspection.table_names(cursor):
+                raise RuntimeError(f'Таблица {LEGACY_TABLE} уже существует: выполните перенос после migrate')
+            if not cls._legacy_column_present(cursor):
+                return 0
+
+            cursor.execute(
+                f'CREATE TABLE "{LEGACY_TABLE}" AS '
+                f'SELECT id AS log_id, user_agent FROM "{table}" WHERE user_agent <> \'\''
+            )
+            cursor.execute(f'SELECT COUNT(*) FROM "{LEGACY_TABLE}"')
+            stashed = cursor.fetchone()[0]
+            cursor.execute(f'ALTER TABLE "{table}" DROP COLUMN "user_agent"')
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN "user_agent" text NULL')
+
+        logger.info(f"Legacy user agents stashed: {stashed} rows")
+        return stashed
+
+    @classmethod
+    def backfill_legacy(cls, batch_size: int = 1000) -> int:
+        """
+        Перенести сохранённые строки в справочник и проставить ссылки (после migrate).
+
+        Каждая пачка обрабатывается в своей транзакции; при повторном
+        запуске уже проставленные ссылки просто перезаписываются.
+        Временная таблица удаляется после переноса всех строк.
+
+        Args:
+            batch_size: Количество записей журнала в пачке
+
+        Returns:
+            int: Количество обработанных записей журнала
+        """
+        with connection.cursor() as cursor:
+            if LEGACY_TABLE not in connection.introspection.table_names(cursor):
+                return 0
+
+        processed = 0
+        last_id = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT log_id, user_agent FROM "{LEGACY_TABLE}" '
+                    f'WHERE log_id > %s ORDER BY log_id LIMIT %s',
+                    [last_id, batch_size]
+                )
+                rows = [(log_id, user_agent[:MAX_USER_AGENT_LENGTH]) for log_id, user_agent in cursor.fetchall()]
+                if not rows:
+                    break
+
+                ids = cls.resolve_many(user_agent for _, user_agent in rows)
+                logs_by_agent: dict[int, list[int]] = defaultdict(list)
+                for log_id, user_agent in rows:
+                    if user_agent in ids:
+                        logs_by_agent[ids[user_agent]].append(log_id)
+                for agent_id, log_ids in logs_by_agent.items():
+                    ActionLog.objects.filter(pk__in=log_ids).update(user_agent_id=agent_id)
+
+            processed += len(rows)
+            last_id = rows[-1][0]
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+
+        logger.info(f"Legacy user agents backfilled: {processed} log rows")
+        return processed
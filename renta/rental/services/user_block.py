@@ -0,0 +1,118 @@
+"""
+====================================================================
+БЛОКИРОВКА ПОЛЬЗОВАТЕЛЕЙ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит блокировку/разблокировку пользователей и метку
+версии статуса блокировки, по которой BlockedUserMiddleware проверяет
+сессию без запроса к БД.
+
+Основные компоненты:
+- UserBlockService.block / unblock: Смена статуса с обновлением версии
+- UserBlockService.get_version: Текущая версия статуса пользователя
+- UserBlockService.bump: Сменить версию (сессии перепроверят статус)
+
+Принцип работы:
+- Для каждого пользователя в кэше хранится метка версии статуса;
+  кэш должен быть общим для всех процессов (Redis, см. CACHES в
+  settings.py), иначе блокировка не дойдет до сессий других воркеров
+- При входе метка сохраняется в сессии
+- Пока метка в сессии совпадает с меткой в кэше, запрос проходит
+  без обращения к БД (один cache.get)
+- Блокировка меняет метку: на следующем запросе middleware один раз
+  читает статус из БД и разлогинивает заблокированного пользователя
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+# Ключ сессии с меткой версии, проверенной для этой сессии
+SESSION_KEY: str = '_block_version'
+
+
+class UserBlockService:
+    """
+    Сервис блокировки пользователей.
+    """
+
+    @staticmethod
+    def _cache_key(user_id: int) -> str:
+        return f'user_block_version:{user_id}'
+
+    @classmethod
+    def get_version(cls, user_id: int) -> str:
+        """
+        Получить метку версии статуса пользователя (создать, если её нет).
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            str: Метка версии
+        """
+        key = cls._cache_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def bump(cls, user_id: int) -> None:
+        """
+        Сменить метку версии статуса пользователя.
+
+        Метка меняется после коммита транзакции, чтобы перепроверка
+        статуса в другом процессе не прочитала старое значение.
+
+        Args:
+            user_id: ID пользователя
+        """
+        transaction.on_commit(
+            lambda: cache.set(cls._cache_key(user_id), uuid.uuid4().hex, None)
+        )
+
+    @classmethod
+    def block(cls, user: CustomUser, reason: str = '', blocked_by: Optional[CustomUser] = None) -> None:
+        """
+        Заблокировать пользователя.
+
+        Все активные сессии пользователя завершаются на следующем запросе.
+
+        Args:
+            user: Блокируемый пользователь
+            reason: Причина блокировки
+            blocked_by: Модератор, выполнивший блокировку
+        """
+        user.is_blocked = True
+        user.block_reason = reason
+        user.blocked_at = timezone.now()
+        user.blocked_by = blocked_by
+        user.save(update_fields=['is_blocked', 'block_reason', 'blocked_at', 'blocked_by', 'updated_at'])
+        cls.bump(user.pk)
+
+    @classmethod
+    def unblock(cls, user: CustomUser) -> None:
+        """
+        Разблокировать пользователя.
+
+        Args:
+            user: Разблокируемый пользователь
+        """
+        user.is_blocked = False
+        user.block_reason = ''
+        user.blocked_at = None
+        user.blocked_by = None
+        user.save(update_fields=['is_blocked', 'block_reason', 'blocked_at', 'blocked_by', 'updated_at'])
+        cls.bump(user.pk)
@@ -17,9 +17,10 @@
 ====================================================================
 """
 
-from django.db.models import Sum, Count, Avg
+from django.db.models import Sum
 
-from ..models import CustomUser, Booking, Review, Favorite
+from ..models import CustomUser, Booking, Review
+from .user_stats import UserStatsService
 
 
 class UserService:
@@ -37,6 +38,7 @@ class UserService:
 
         Собирает статистику по активностям пользователя как клиента:
         бронирования, избранные помещения, оставленные отзывы и общая сумма потраченных средств.
+        Значения читаются из одной строки UserStats (services/user_stats.py).
 
         Args:
             user (CustomUser): Пользователь, для которого собирается статистика
@@ -50,21 +52,15 @@ class UserService:
                 - reviews_count: Количество оставленных отзывов
                 - total_spent: Общая сумма потраченных средств (только подтвержденные и завершенные бронирования)
         """
-        bookings = Booking.objects.filter(tenant=user)
+        user_stats = UserStatsService.get(user.pk)
 
         stats = {
-            'bookings_total': bookings.count(),
-            'bookings_active': bookings.filter(
-                status__code__in=['pending', 'confirmed']
-            ).count(),
-            'bookings_completed': bookings.filter(
-                status__code='completed'
-            ).count(),
-            'favorites_count': Favorite.objects.filter(user=user).count(),
-            'reviews_count': Review.objects.filter(author=user).count(),
-            'total_spent': bookings.filter(
-                status__code__in=['confirmed', 'completed']
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
+            'bookings_total': user_stats.bookings_total,
+            'bookings_active': user_stats.bookings_active,
+            'bookings_completed': user_stats.bookings_completed,
+            'favorites_count': user_stats.favorites_count,
+            'reviews_count': user_stats.reviews_count,
+            'total_spent': user_stats.total_spent,
         }
 
         return stats
@@ -96,6 +92,9 @@ class UserService:
         spaces = user.owned_spaces.all()
         bookings = Booking.objects.filter(space__owner=user)
 
+        # Средний рейтинг по счетчикам помещений (только одобренные отзывы)
+        ratings = spaces.aggregate(sum=Sum('rating_sum'), count=Sum('rating_count'))
+
         stats = {
             'spaces_count': spaces.count(),
             'spaces_active': spaces.filter(is_active=True).count(),
@@ -104,9 +103,7 @@ class UserService:
             'revenue': bookings.filter(
                 status__code__in=['confirmed', 'completed']
             ).aggregate(total=Sum('total_amount'))['total'] or 0,
-            'avg_rating': spaces.aggregate(
-                avg=Avg('reviews__rating')
-            )['avg'] or 0,
+            'avg_rating': round(ratings['sum'] / ratings['count'], 1) if ratings['count'] else 0,
         }
 
         return stats
@@ -0,0 +1,178 @@
+"""
+====================================================================
+СЧЕТЧИКИ АКТИВНОСТИ ПОЛЬЗОВАТЕЛЕЙ ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит обновление денормализованной статистики
+пользователя (модель UserStats): бронирования по статусам, сумма
+оплаченных бронирований, отзывы и избранное.
+
+Основные компоненты:
+- UserStatsService.get: Статистика пользователя (одна строка)
+- UserStatsService.apply: Изменить счетчики F() дельтами
+- UserStatsService.booking_changed: Дельты при изменении бронирования
+- UserStatsService.recompute: Пересчитать статистику по исходным таблицам
+
+Принцип работы:
+- Строка создается при первом чтении пересчетом (три сгруппированных
+  запроса: бронирования, отзывы, избранное)
+- Сигналы бронирований, отзывов и избранного (signals.py) меняют
+  счетчики существующей строки одним UPDATE с F() выражениями;
+  если строки еще нет, изменение учтется при ее создании
+- Массовые изменения в обход save() (закрытие помещения, массовая
+  модерация) обновляют статистику сами
+- recompute используется для восстановления (команда rebuild_user_stats)
+====================================================================
+"""
+
+from __future__ import annotations
+
+import logging
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..models import Booking, CustomUser, Favorite, Review, UserStats
+
+logger = logging.getLogger(__name__)
+
+# Поля-счетчики (вычитание не опускает их ниже нуля)
+COUNTER_FIELDS: tuple[str, ...] = (
+    'bookings_total', *UserStats.BOOKING_STATUS_FIELDS.values(),
+    'reviews_count', 'reviews_approved', 'favorites_count',
+)
+
+# Состояние бронирования для статистики: (ID арендатора, код статуса, сумма)
+BookingState = tuple[int, str, Optional[Decimal]]
+
+
+def _booking_contribution(state: Optional[BookingState], sign: int) -> dict[str, Decimal | int]:
+    """Вклад бронирования в счетчики арендатора со знаком sign."""
+    if state is None:
+        return {}
+    _tenant_id, code, amount = state
+    deltas: dict[str, Decimal | int] = {'bookings_total': sign}
+    if code in UserStats.BOOKING_STATUS_FIELDS:
+        deltas[UserStats.BOOKING_STATUS_FIELDS[code]] = sign
+    if code in UserStats.PAID_STATUSES and amount:
+        deltas['total_spent'] = sign * amount
+    return deltas
+
+
+class UserStatsService:
+    """
+    Сервис статистики активности пользователей.
+    """
+
+    @classmethod
+    def get(cls, user_id: int) -> UserStats:
+        """
+        Получить статистику пользователя (создать пересчетом, если ее нет).
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            UserStats: Статистика пользователя
+        """
+        stats = UserStats.objects.filter(user_id=user_id).first()
+        if stats is None:
+            stats = cls.recompute([user_id]).get(user_id) or UserStats(user_id=user_id)
+        return stats
+
+    @staticmethod
+    def apply(user_id: int, **deltas: Decimal | int) -> None:
+        """
+        Изменить счетчики пользователя на дельты.
+
+        Строка, которой еще нет, не создается: она будет пересчитана
+        по исходным таблицам при первом чтении.
+
+        Args:
+            user_id: ID пользователя
+            **deltas: Изменения полей (bookings_total=1, total_spent=-100 и т.п.)
+        """
+        updates = {}
+        for name, delta in deltas.items():
+            if not delta:
+                continue
+            value = F(name) + delta
+            updates[name] = Greatest(value, 0) if name in COUNTER_FIELDS else value
+        if updates:
+            UserStats.objects.filter(user_id=user_id).update(updated_at=timezone.now(), **updates)
+
+    @classmethod
+    def booking_changed(cls, old: Optional[BookingState], new: Optional[BookingState]) -> None:
+        """
+        Учесть создание, изменение или удаление бронирования.
+
+        Args:
+            old: Прежнее состояние (None — бронирование создано)
+            new: Новое состояние (None — бронирование удалено)
+        """
+        if old == new:
+            return
+        if old is not None and new is not None and old[0] != new[0]:
+            cls.apply(old[0], **_booking_contribution(old, -1))
+            cls.apply(new[0], **_booking_contribution(new, 1))
+            return
+
+        deltas = _booking_contribution(old, -1)
+        for name, delta in _booking_contribution(new, 1).items():
+            deltas[name] = deltas.get(name, 0) + delta
+        cls.apply((new or old)[0], **deltas)
+
+    @staticmethod
+    def recompute(user_ids: Iterable[int]) -> dict[int, UserStats]:
+        """
+        Пересчитать статистику пользователей по исходным таблицам.
+
+        Три сгруппированных запроса на все переданные ID и одна
+        вставка с обновлением при конфликте.
+
+        Args:
+            user_ids: ID пользователей
+
+        Returns:
+            dict: Статистика по ID пользователя
+        """
+        user_ids = set(CustomUser.objects.filter(pk__in=set(user_ids)).values_list('pk', flat=True))
+        if not user_ids:
+            return {}
+
+        rows: dict[int, dict] = {user_id: {} for user_id in user_ids}
+        bookings = Booking.objects.filter(tenant_id__in=user_ids).values('tenant_id').annotate(
+            bookings_total=Count('id'),
+            total_spent=Sum('total_amount', filter=Q(status__code__in=UserStats.PAID_STATUSES)),
+            **{
+                field: Count('id', filter=Q(status__code=code))
+                for code, field in UserStats.BOOKING_STATUS_FIELDS.items()
+            }
+        ).order_by()
+        for row in bookings:
+            rows[row.pop('tenant_id')].update(row, total_spent=row['total_spent'] or Decimal('0'))
+
+        reviews = Review.objects.filter(author_id__in=user_ids).values('author_id').annotate(
+            reviews_count=Count('id'),
+            reviews_approved=Count('id', filter=Q(is_approved=True)),
+        ).order_by()
+        for row in reviews:
+            rows[row.pop('author_id')].update(row)
+
+        favorites = Favorite.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            favorites_count=Count('id'),
+        ).order_by()
+        for row in favorites:
+            rows[row.pop('user_id')].update(row)
+
+        objects = [UserStats(user_id=user_id, **values) for user_id, values in rows.items()]
+        UserStats.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=[*COUNTER_FIELDS, 'total_spent', 'updated_at'],
+        )
+        logger.debug(f"Recomputed activity stats for {len(objects)} users")
+        return {stats.user_id: stats for stats in objects}
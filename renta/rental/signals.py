@@ -6,16 +6,28 @@
 выполнения действий при возникновении определенных событий в моделях.
 
 Основные обработчики сигналов:
-- update_space_rating_on_review: Обновление рейтинга при сохранении отзыва
-- update_space_rating_on_review_delete: Обновление рейтинга при удалении отзыва
+- update_space_rating_on_review: Обновление счетчиков рейтинга при сохранении отзыва
+- update_space_rating_on_review_delete: Обновление счетчиков рейтинга при удалении отзыва
+- invalidate_review_feed: Сброс кэша ленты отзывов помещения
 - handle_category_status_change: Управление статусом помещений при изменении категории
+- invalidate_reference_data: Сброс реестра справочников при изменении справочника
+- bump_user_block_version: Перепроверка блокировки после правки пользователя
+- count_status_transition: Счётчики переходов статусов бронирований и оплат
+- update_favorites_index_on_save / _on_delete: Обновление индекса избранного
+  и счетчика избранного пользователя
+- create_user_stats: Пустая статистика нового пользователя
+- recompute_user_stats_on_space_delete: Пересчет статистики после
+  каскадного удаления помещения
+- update_user_stats_on_booking / _on_review (и _delete): Статистика
+  активности пользователя (UserStats)
 
 Вспомогательные функции:
-- update_space_rating: Пересчет среднего рейтинга помещения
+- update_space_rating: Полный пересчет счетчиков рейтинга помещения
 
 Функционал:
-1. Автоматическое обновление кэшированного рейтинга помещений
-   при добавлении, изменении или удалении отзывов
+1. Обновление счетчиков рейтинга помещений (сумма, количество,
+   оценки по звездам) F() дельтами при одобрении, снятии одобрения,
+   правке и удалении отзывов
 2. Подсчет общего количества отзывов для каждого помещения
 3. Деактивация/реактивация помещений при изменении статуса категории
 
@@ -23,57 +35,153 @@
 - Использование сигналов post_save и post_delete для реагирования на изменения
 - Использование pre_save для отслеживания изменений статуса категории
 - Логирование всех автоматических действий для отладки
-- Проверка на наличие полей перед обновлением (безопасная работа с моделями)
-- Оптимизация через кэширование рейтингов в модели Space
+- Оптимизация через денормализованные счетчики рейтинга в модели Space
+- Внутри ReviewModeration.batch() обработчики отзывов только запоминают
+  помещения, счетчики пересчитываются один раз в конце блока
+- При загрузке данных (loaddata, восстановление копии, raw=True)
+  счетчики не меняются: они пересчитываются после загрузки
 ====================================================================
 """
 
 from __future__ import annotations
 
-from typing import Any, Type
+from typing import Any, Optional, Type
 import logging
 
-from django.db.models.signals import post_save, post_delete, pre_save
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from .models import CustomUser, Review, Space, SpaceCategory
+from .models import (
+    CustomUser, Review, Space, SpaceCategory, Booking, Transaction, Favorite,
+    BookingStatus, TransactionStatus, PricingPeriod, City, UserStats
+)
+from .services.booking_rollup import BookingRollup, rollup_state
+from .services.favorites_index import FavoritesIndex
+from .services.prometheus_metrics import PrometheusMetrics
+from .services.reference_data import ReferenceData
+from .services.review_feed import ReviewFeed
+from .services.review_moderation import ReviewModeration
+from .services.space_ratings import SpaceRatings
+from .services.stats_service import StatsService
+from .services.user_block import UserBlockService
+from .services.user_stats import UserStatsService
 
 logger = logging.getLogger(__name__)
 
 
 def update_space_rating(space: Space) -> None:
     """
-    Пересчитывает и обновляет средний рейтинг помещения.
+    Пересчитывает счетчики рейтинга помещения по одобренным отзывам.
     """
-    result = Review.objects.filter(
-        space=space,
-        is_approved=True
-    ).aggregate(
-        avg_rating=Avg('rating'),
-        total_reviews=Count('id')
-    )
+    SpaceRatings.recompute([space.pk])
 
-    avg_rating = result['avg_rating']
 
-    if hasattr(space, 'cached_rating'):
-        space.cached_rating = avg_rating or 0
-        space.reviews_count = result['total_reviews'] or 0
-        space.save(update_fields=['cached_rating', 'reviews_count'])
-        logger.debug(f"Обновлён рейтинг помещения {space.id}: {avg_rating}")
+def _rating_contribution(state: Optional[tuple]) -> Optional[int]:
+    """Оценка, учтенная в счетчиках помещения (None — отзыв не одобрен)."""
+    if state is None:
+        return None
+    _space_id, rating, is_approved = state
+    return rating if is_approved else None
+
+
+@receiver(post_init, sender=Review)
+def store_initial_review_state(sender: Type[Review], instance: Review, **kwargs: Any) -> None:
+    """
+    Запоминает помещение, оценку и статус одобрения загруженного отзыва.
+
+    Если поля отложены (only/defer), состояние неизвестно.
+    """
+    values = instance.__dict__
+    if all(name in values for name in ('space_id', 'rating', 'is_approved')):
+        instance._rating_state = (values['space_id'], values['rating'], values['is_approved'])
+    else:
+        instance._rating_state = None
+
+
+@receiver(post_save, sender=Review)
+def update_user_stats_on_review(
+        sender: Type[Review],
+        instance: Review,
+        created: bool,
+        raw: bool = False,
+        **kwargs: Any
+) -> None:
+    """
+    Обновление счетчиков отзывов автора при добавлении и одобрении отзыва.
+
+    Регистрируется до update_space_rating_on_review: читает прежнее
+    состояние _rating_state до его обновления.
+    """
+    if raw:
+        return
+    if created:
+        UserStatsService.apply(instance.author_id, reviews_count=1, reviews_approved=int(instance.is_approved))
+        return
+
+    old_state = getattr(instance, '_rating_state', None)
+    if old_state is None:
+        UserStatsService.recompute([instance.author_id])
+    elif old_state[2] != instance.is_approved:
+        UserStatsService.apply(instance.author_id, reviews_approved=1 if instance.is_approved else -1)
 
 
 @receiver(post_save, sender=Review)
 def update_space_rating_on_review(
+        sender: Type[Review],
+        instance: Review,
+        created: bool,
+        raw: bool = False,
+        **kwargs: Any
+) -> None:
+    """
+    Обновление счетчиков рейтинга при добавлении, одобрении, снятии
+    одобрения и правке отзыва.
+
+    Прежний вклад отзыва вычитается, новый добавляется F() дельтами.
+    """
+    if raw:
+        return
+    new_state = (instance.space_id, instance.rating, instance.is_approved)
+    old_state = None if created else getattr(instance, '_rating_state', None)
+    instance._rating_state = new_state
+
+    old_space_id = old_state[0] if old_state else instance.space_id
+    if ReviewModeration.defer(old_space_id, instance.space_id):
+        # Идет массовая операция — помещение пересчитается в ее конце
+        return
+
+    if not created and old_state is None:
+        # Прежнее состояние неизвестно — пересчитываем помещение целиком
+        SpaceRatings.recompute([instance.space_id])
+        return
+
+    removed = _rating_contribution(old_state)
+    added = _rating_contribution(new_state)
+
+    if old_space_id == instance.space_id:
+        SpaceRatings.apply(instance.space_id, removed=removed, added=added)
+    else:
+        SpaceRatings.apply(old_space_id, removed=removed)
+        SpaceRatings.apply(instance.space_id, added=added)
+
+
+@receiver(post_delete, sender=Review)
+def update_user_stats_on_review_delete(
         sender: Type[Review],
         instance: Review,
         **kwargs: Any
 ) -> None:
     """
-    Обновление среднего рейтинга помещения при добавлении/изменении отзыва.
+    Вычитание удаленного отзыва из счетчиков автора.
+
+    При каскадном удалении вместе с пользователем статистика удаляется
+    сама, вместе с помещением — пересчитывается один раз.
     """
-    if instance.space and instance.is_approved:
-        update_space_rating(instance.space)
+    origin = kwargs.get('origin')
+    if isinstance(origin, CustomUser) or _defer_stats_to_space(origin, instance.author_id):
+        return
+    UserStatsService.apply(instance.author_id, reviews_count=-1, reviews_approved=-int(instance.is_approved))
 
 
 @receiver(post_delete, sender=Review)
@@ -83,10 +191,34 @@ def update_space_rating_on_review_delete(
         **kwargs: Any
 ) -> None:
     """
-    Обновление рейтинга при удалении отзыва.
+    Вычитание оценки удаленного одобренного отзыва из счетчиков.
+
+    При каскадном удалении вместе с помещением обновление не нужно.
     """
-    if instance.space:
-        update_space_rating(instance.space)
+    if isinstance(kwargs.get('origin'), Space):
+        return
+    if ReviewModeration.defer(instance.space_id):
+        return
+    if instance.is_approved:
+        SpaceRatings.apply(instance.space_id, removed=instance.rating)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_feed(
+        sender: Type[Review],
+        instance: Review,
+        created: bool = False,
+        **kwargs: Any
+) -> None:
+    """
+    Сброс кэша страниц ленты отзывов помещения после изменения отзыва.
+
+    Новый неодобренный отзыв в ленте не виден — сброс не нужен.
+    """
+    if isinstance(kwargs.get('origin'), Space) or (created and not instance.is_approved):
+        return
+    ReviewFeed.invalidate([instance.space_id])
 
 
 @receiver(pre_save, sender=SpaceCategory)
@@ -200,3 +332,360 @@ def handle_category_status_change(
                     f"Восстановлено {updated_count} помещений "
                     f"при активации категории '{instance.name}' (все неактивные)"
                 )
+
+
+@receiver(post_save, sender=BookingStatus)
+@receiver(post_delete, sender=BookingStatus)
+@receiver(post_save, sender=TransactionStatus)
+@receiver(post_delete, sender=TransactionStatus)
+@receiver(post_save, sender=PricingPeriod)
+@receiver(post_delete, sender=PricingPeriod)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=SpaceCategory)
+@receiver(post_delete, sender=SpaceCategory)
+def invalidate_reference_data(sender: Type[Any], **kwargs: Any) -> None:
+    """
+    Сброс реестра справочников при изменении справочной таблицы.
+
+    Версия меняется сразу (для текущего процесса) и повторно после
+    коммита, чтобы другие процессы не закэшировали незакоммиченное состояние.
+    """
+    ReferenceData.invalidate()
+    transaction.on_commit(ReferenceData.invalidate)
+
+
+# Наборы счетчиков StatsService, зависящие от модели
+_STATS_BY_MODEL: dict[type, tuple[str, ...]] = {
+    Space: ('spaces',),
+    SpaceCategory: ('categories', 'spaces'),
+    Booking: ('bookings',),
+    BookingStatus: ('bookings',),
+    Review: ('reviews',),
+    CustomUser: ('users',),
+    City: ('cities',),
+}
+
+
+@receiver(post_save, sender=Space)
+@receiver(post_delete, sender=Space)
+@receiver(post_save, sender=SpaceCategory)
+@receiver(post_delete, sender=SpaceCategory)
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=BookingStatus)
+@receiver(post_delete, sender=BookingStatus)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_dashboard_stats(sender: Type[Any], **kwargs: Any) -> None:
+    """
+    Сброс кэша сводных счетчиков панелей модераторов после изменения модели.
+
+    Изменение категории сбрасывает и счетчики помещений: смена ее
+    активности меняет помещения одним UPDATE без сигналов.
+    """
+    StatsService.invalidate(*_STATS_BY_MODEL[sender])
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_user_block_version(
+    sender: Type[CustomUser],
+    instance: CustomUser,
+    created: bool,
+    update_fields: Any = None,
+    **kwargs: Any
+) -> None:
+    """
+    Смена метки статуса блокировки при полном сохранении пользователя.
+
+    Полное сохранение (форма модератора, админка) могло изменить
+    is_blocked, поэтому активные сессии перепроверят статус на следующем
+    запросе. Частичные сохранения (last_login и т.п.) метку не меняют;
+    UserBlockService.block/unblock меняют её сами.
+    """
+    if created or update_fields is not None:
+        return
+    UserBlockService.bump(instance.pk)
+
+
+def _defer_stats_to_space(origin: Any, user_id: int) -> bool:
+    """
+    При каскадном удалении вместе с помещением запомнить пользователя
+    на удаляемом помещении: статистика пересчитается один раз в
+    recompute_user_stats_on_space_delete.
+
+    Returns:
+        bool: True, если обновление отложено
+    """
+    if not isinstance(origin, Space):
+        return False
+    origin.__dict__.setdefault('_stats_user_ids', set()).add(user_id)
+    return True
+
+
+@receiver(post_save, sender=CustomUser)
+def create_user_stats(
+    sender: Type[CustomUser],
+    instance: CustomUser,
+    created: bool,
+    raw: bool = False,
+    **kwargs: Any
+) -> None:
+    """
+    Создание пустой статистики нового пользователя.
+
+    Сигналы бронирований, отзывов и избранного меняют только
+    существующую строку, поэтому она создается сразу.
+    """
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_init, sender=Booking)
+@receiver(post_init, sender=Transaction)
+def store_initial_status(sender: Type[Any], instance: Any, **kwargs: Any) -> None:
+    """
+    Запоминает статус, с которым объект загружен, для подсчёта переходов.
+
+    Отложенное поле (only() при каскадном удалении) не загружается.
+    """
+    instance._initial_status_id = instance.__dict__.get('status_id')
+
+
+@receiver(post_init, sender=Booking)
+def store_initial_booking_stats_state(sender: Type[Booking], instance: Booking, **kwargs: Any) -> None:
+    """
+    Запоминает арендатора, статус и сумму загруженного бронирования.
+
+    Если поля отложены (only/defer), состояние неизвестно.
+    """
+    values = instance.__dict__
+    if all(name in values for name in ('tenant_id', 'status_id', 'total_amount')):
+        instance._stats_state = (values['tenant_id'], values['status_id'], values['total_amount'])
+    else:
+        instance._stats_state = None
+
+
+def _booking_stats_state(state: Optional[tuple]) -> Optional[tuple]:
+    """Состояние бронирования для статистики с кодом статуса вместо id."""
+    if state is None:
+        return None
+    tenant_id, status_id, total_amount = state
+    return tenant_id, _status_code(ReferenceData.get().booking_statuses, status_id), total_amount
+
+
+def _status_code(statuses: Any, status_id: Any) -> str:
+    """Код статуса по id через реестр справочников ('unknown' — не найден)."""
+    for code, status in statuses.items():
+        if status.pk == status_id:
+            return code
+    return 'unknown'
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_save, sender=Transaction)
+def count_status_transition(
+    sender: Type[Any],
+    instance: Any,
+    created: bool,
+    raw: bool = False,
+    **kwargs: Any
+) -> None:
+    """
+    Учитывает переход статуса бронирования или транзакции в метриках.
+
+    Создание считается переходом из 'new'. Массовые update() мимо
+    save() не учитываются.
+    """
+    if raw:
+        return
+    previous_id = getattr(instance, '_initial_status_id', None)
+    if not created and previous_id == instance.status_id:
+        return
+    instance._initial_status_id = instance.status_id
+
+    snapshot = ReferenceData.get()
+    statuses = snapshot.booking_statuses if sender is Booking else snapshot.transaction_statuses
+    cached_status = instance._state.fields_cache.get('status')
+    to_code = cached_status.code if cached_status is not None else _status_code(statuses, instance.status_id)
+    from_code = 'new' if created else _status_code(statuses, previous_id)
+
+    if sender is Booking:
+        PrometheusMetrics.booking_transition(from_code, to_code)
+    else:
+        PrometheusMetrics.payment_transition(from_code, to_code)
+
+
+@receiver(post_save, sender=Booking)
+def update_user_stats_on_booking(
+        sender: Type[Booking],
+        instance: Booking,
+        created: bool,
+        raw: bool = False,
+        **kwargs: Any
+) -> None:
+    """
+    Обновление статистики арендатора при создании и изменении бронирования.
+    """
+    if raw:
+        return
+    new_state = (instance.tenant_id, instance.status_id, instance.total_amount)
+    old_state = None if created else getattr(instance, '_stats_state', None)
+    instance._stats_state = new_state
+
+    if old_state == new_state:
+        return
+    if not created and old_state is None:
+        # Прежнее состояние неизвестно — пересчитываем арендатора целиком
+        UserStatsService.recompute([instance.tenant_id])
+        return
+    UserStatsService.booking_changed(_booking_stats_state(old_state), _booking_stats_state(new_state))
+
+
+@receiver(post_delete, sender=Booking)
+def update_user_stats_on_booking_delete(
+        sender: Type[Booking],
+        instance: Booking,
+        **kwargs: Any
+) -> None:
+    """
+    Вычитание удаленного бронирования из статистики арендатора.
+
+    При каскадном удалении вместе с пользователем статистика удаляется
+    сама, вместе с помещением — пересчитывается один раз.
+    """
+    origin = kwargs.get('origin')
+    if isinstance(origin, CustomUser) or _defer_stats_to_space(origin, instance.tenant_id):
+        return
+    state = (instance.tenant_id, instance.status_id, instance.total_amount)
+    UserStatsService.booking_changed(_booking_stats_state(state), None)
+
+
+@receiver(post_delete, sender=Space)
+def recompute_user_stats_on_space_delete(
+        sender: Type[Space],
+        instance: Space,
+        **kwargs: Any
+) -> None:
+    """
+    Пересчет статистики пользователей, чьи бронирования, отзывы и
+    избранное удалены вместе с помещением (одним набором запросов).
+    """
+    user_ids = instance.__dict__.pop('_stats_user_ids', None)
+    if user_ids:
+        UserStatsService.recompute(user_ids)
+
+
+@receiver(post_init, sender=Booking)
+def store_initial_booking_rollup_state(sender: Type[Booking], instance: Booking, **kwargs: Any) -> None:
+    """
+    Запоминает вклад загруженного бронирования в дневные итоги.
+
+    Если поля отложены (only/defer), вклад неизвестен.
+    """
+    instance._rollup_state = rollup_state(instance.__dict__)
+
+
+@receiver(post_save, sender=Booking)
+def update_booking_rollup(
+        sender: Type[Booking],
+        instance: Booking,
+        created: bool,
+        raw: bool = False,
+        **kwargs: Any
+) -> None:
+    """
+    Обновление дневных итогов при создании и изменении бронирования.
+    """
+    if raw:
+        return
+    new_state = rollup_state(instance.__dict__)
+    old_state = None if created else getattr(instance, '_rollup_state', None)
+    instance._rollup_state = new_state
+
+    if old_state == new_state:
+        return
+    if not created and old_state is None:
+        # Прежний вклад неизвестен — пересчитываем помещение целиком
+        BookingRollup.recompute([instance.space_id])
+        return
+    BookingRollup.changed(old_state, new_state)
+
+
+@receiver(post_delete, sender=Booking)
+def update_booking_rollup_on_delete(
+        sender: Type[Booking],
+        instance: Booking,
+        **kwargs: Any
+) -> None:
+    """
+    Вычитание удаленного бронирования из дневных итогов.
+
+    При каскадном удалении вместе с помещением итоги удаляются сами,
+    вместе с пользователем — пересчитываются один раз после удаления.
+    """
+    origin = kwargs.get('origin')
+    if isinstance(origin, Space):
+        return
+    state = rollup_state(instance.__dict__)
+    if isinstance(origin, CustomUser):
+        if state is not None:
+            origin.__dict__.setdefault('_rollup_states', []).append(state)
+        return
+    BookingRollup.changed(state, None)
+
+
+@receiver(post_delete, sender=CustomUser)
+def recompute_booking_rollup_on_user_delete(
+        sender: Type[CustomUser],
+        instance: CustomUser,
+        **kwargs: Any
+) -> None:
+    """
+    Пересчет дневных итогов помещений, бронирования которых удалены
+    вместе с пользователем (один набор запросов на весь период).
+    """
+    states = instance.__dict__.pop('_rollup_states', None)
+    if states:
+        days = [state[1] for state in states]
+        BookingRollup.recompute({state[0] for state in states}, min(days), max(days))
+
+
+@receiver(post_save, sender=Favorite)
+def update_favorites_index_on_save(
+    sender: Type[Favorite],
+    instance: Favorite,
+    created: bool,
+    raw: bool = False,
+    **kwargs: Any
+) -> None:
+    """
+    Добавляет помещение в индекс избранного пользователя (write-through)
+    и увеличивает счетчик избранного в статистике пользователя.
+    """
+    if raw:
+        return
+    if created:
+        FavoritesIndex.add(instance.user_id, instance.space_id)
+        UserStatsService.apply(instance.user_id, favorites_count=1)
+
+
+@receiver(post_delete, sender=Favorite)
+def update_favorites_index_on_delete(
+    sender: Type[Favorite],
+    instance: Favorite,
+    **kwargs: Any
+) -> None:
+    """
+    Убирает помещение из индекса избранного пользователя (write-through),
+    в том числе при каскадном удалении помещения или пользователя, и
+    уменьшает счетчик избранного в статистике пользователя.
+    """
+    FavoritesIndex.discard(instance.user_id, instance.space_id)
+    origin = kwargs.get('origin')
+    if not isinstance(origin, CustomUser) and not _defer_stats_to_space(origin, instance.user_id):
+        UserStatsService.apply(instance.user_id, favorites_count=-1)
@@ -0,0 +1,347 @@
+"""
+====================================================================
+БЮДЖЕТЫ SQL ЗАПРОСОВ ДЛЯ СТРАНИЦ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл проверяет, что каждая страница из rental/urls.py на
+заполненной базе укладывается в свой бюджет SQL запросов и не
+содержит повторяющихся однотипных запросов (N+1).
+
+Основные компоненты:
+- QUERY_BUDGETS: Максимум SQL запросов на имя URL
+- QueryBudgetTestCase: Обход всех URL приложения с проверкой бюджета
+
+Как поправить бюджет:
+- Новый URL в rental/urls.py должен получить бюджет и сценарий
+  запроса в QueryBudgetTestCase.get_cases, иначе тест упадёт
+- Бюджет повышается только вместе с объяснением в коммите: рост
+  числа запросов обычно означает потерянный select_related/prefetch
+- Бюджет считается для повторного запроса (кэш прогрет первым)
+  и включает загрузку сессии и пользователя
+- Первый запрос с пустым кэшем проверяется на N+1
+  (QUERY_REPEAT_RAISE=True)
+====================================================================
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from typing import Optional
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from . import urls as rental_urls
+from .models import (
+    BookingStatus, Booking, City, Favorite, PricingPeriod, Region, Review,
+    Space, SpaceCategory, SpaceImage, SpacePrice, Transaction, TransactionStatus
+)
+from .services.payment_service import PaymentService
+
+User = get_user_model()
+
+# Максимум SQL запросов на один HTTP запрос по имени URL
+QUERY_BUDGETS: dict[str, int] = {
+    # Главная и панель управления
+    'home': 9,
+    'admin_panel': 2,
+    # Помещения
+    'spaces_list': 7,
+    'space_detail': 9,
+    'spaces_ajax': 7,
+    'manage_spaces': 5,
+    'add_space': 2,
+    'edit_space': 7,
+    'delete_space': 21,
+    # Категории
+    'manage_categories': 8,
+    'add_category': 2,
+    'edit_category': 4,
+    'delete_category': 4,
+    'toggle_category_status': 12,
+    # Аутентификация
+    'login': 0,
+    'register': 0,
+    'logout': 0,
+    'verify_email_code': 0,
+    'resend_code': 0,
+    'verify_email': 1,
+    'resend_verification': 0,
+    'password_reset': 0,
+    'password_reset_confirm': 1,
+    # Личный кабинет
+    'dashboard': 8,
+    'profile': 2,
+    'my_bookings': 5,
+    'my_favorites': 7,
+    'my_reviews': 5,
+    'view_user_profile': 5,
+    'public_user_profile': 5,
+    # Пользователи
+    'manage_users': 4,
+    'users_ajax': 4,
+    'user_detail_mod': 6,
+    'edit_user': 3,
+    'block_user': 4,
+    'unblock_user': 4,
+    'verify_user_email_mod': 4,
+    # Избранное
+    'toggle_favorite': 6,
+    'check_favorite': 2,
+    # Бронирования и оплата
+    'create_booking': 8,
+    'get_price_for_period': 3,
+    'booking_detail': 5,
+    'cancel_booking': 8,
+    'confirm_booking': 8,
+    'reject_booking': 8,
+    'manage_bookings': 5,
+    'initiate_payment': 3,
+    'payment_return': 3,
+    'payment_status': 3,
+    'check_cancellation_penalty': 3,
+    'payment_webhook': 0,
+    # Отзывы
+    'space_reviews': 4,
+    'create_review': 7,
+    'delete_review': 7,
+    'user_edit_review': 5,
+    'edit_review': 3,
+    'admin_delete_review': 6,
+    'approve_review': 9,
+    'bulk_moderate_reviews': 6,
+    'manage_reviews': 4,
+    # API (AJAX)
+    'get_price': 3,
+}
+
+# Объём тестовых данных: достаточно, чтобы N+1 превысил порог повторов
+SPACES_COUNT: int = 8
+REVIEWS_PER_SPACE: int = 6
+
+
+@override_settings(
+    QUERY_REPEAT_RAISE=True,
+    YOOKASSA_SHOP_ID='',
+    YOOKASSA_SECRET_KEY='',
+    YANDEX_GEOCODER_API_KEY='',
+)
+class QueryBudgetTestCase(TestCase):
+    """Бюджеты SQL запросов и поиск N+1 по всем URL приложения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Заполненная база: несколько помещений с фото, ценами, отзывами и бронированиями."""
+        cls.admin = User.objects.create_superuser(
+            username='budget_admin', email='budget_admin@test.com',
+            password='AdminPass123!', user_type='admin'
+        )
+        cls.moderator = User.objects.create_user(
+            username='budget_moderator', email='budget_moderator@test.com',
+            password='ModeratorPass123!', user_type='moderator'
+        )
+        cls.user = User.objects.create_user(
+            username='budget_user', email='budget_user@test.com',
+            password='UserPass123!', user_type='user'
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'budget_author_{i}', email=f'budget_author_{i}@test.com',
+                password='AuthorPass123!', user_type='user'
+            )
+            for i in range(REVIEWS_PER_SPACE)
+        ]
+
+        region = Region.objects.create(name='Регион', code='BDG')
+        city = City.objects.create(name='Город', region=region, is_active=True)
+        categories = [
+            SpaceCategory.objects.create(name=f'Категория {i}', slug=f'budget-category-{i}', is_active=True)
+            for i in range(3)
+        ]
+        periods = [
+            PricingPeriod.objects.create(name='hour', description='Час', hours_count=1),
+            PricingPeriod.objects.create(name='day', description='День', hours_count=24),
+        ]
+        cls.period = periods[0]
+
+        statuses = {
+            code: BookingStatus.objects.create(name=name, code=code)
+            for code, name in (
+                ('pending', 'Ожидание'), ('confirmed', 'Подтверждено'),
+                ('cancelled', 'Отменено'), ('completed', 'Завершено'),
+            )
+        }
+        paid = TransactionStatus.objects.create(name='Оплачено', code='paid')
+
+        now = timezone.now()
+        cls.spaces = []
+        for i in range(SPACES_COUNT):
+            space = Space.objects.create(
+                title=f'Помещение {i}', slug=f'budget-space-{i}', description='Описание',
+                city=city, category=categories[i % len(categories)], address=f'ул. Тестовая, {i}',
+                area_sqm=Decimal('50.00') + i, max_capacity=10 + i,
+                is_active=True, is_featured=i < 4, owner=cls.admin
+            )
+            cls.spaces.append(space)
+            for j in range(2):
+                SpaceImage.objects.create(space=space, image=f'spaces/budget_{i}_{j}.jpg', is_primary=j == 0)
+            for period in periods:
+                SpacePrice.objects.create(
+                    space=space, period=period, price=Decimal('1000.00') * period.hours_count, is_active=True
+                )
+            for author in authors:
+                Review.objects.create(
+                    space=space, author=author, rating=1 + (author.pk + i) % 5,
+                    comment='Отзыв о помещении', is_approved=author is not authors[0]
+                )
+
+        cls.space = cls.spaces[0]
+        cls.review = Review.objects.filter(space=cls.space, is_approved=False).first()
+        cls.user_review = Review.objects.create(
+            space=cls.spaces[1], author=cls.user, rating=5, comment='Мой отзыв', is_approved=True
+        )
+
+        cls.bookings = []
+        for i, space in enumerate(cls.spaces):
+            for status in statuses.values():
+                booking = Booking.objects.create(
+                    space=space, tenant=cls.user, period=cls.period, status=status,
+                    start_datetime=now + timedelta(days=i + 1),
+                    end_datetime=now + timedelta(days=i + 1, hours=2),
+                    periods_count=2, price_per_period=Decimal('1000.00'), total_amount=Decimal('2000.00')
+                )
+                Transaction.objects.create(booking=booking, status=paid, amount=Decimal('200.00'))
+                cls.bookings.append(booking)
+        cls.booking = Booking.objects.filter(tenant=cls.user, status=statuses['pending']).first()
+
+        for space in cls.spaces[:5]:
+            Favorite.objects.create(user=cls.user, space=space)
+
+    def get_cases(self) -> list[tuple[str, str, Optional[User], str, dict]]:
+        """
+        Сценарии запросов: (имя URL, путь, пользователь, метод, данные).
+        """
+        space, booking, review = self.space, self.booking, self.review
+        return [
+            ('home', reverse('home'), None, 'get', {}),
+            ('admin_panel', reverse('admin_panel'), self.moderator, 'get', {}),
+            ('spaces_list', reverse('spaces_list'), self.user, 'get', {}),
+            ('space_detail', reverse('space_detail', args=[space.pk]), self.user, 'get', {}),
+            ('spaces_ajax', reverse('spaces_ajax'), self.user, 'get', {}),
+            ('manage_spaces', reverse('manage_spaces'), self.moderator, 'get', {}),
+            ('add_space', reverse('add_space'), self.moderator, 'get', {}),
+            ('edit_space', reverse('edit_space', args=[space.pk]), self.moderator, 'get', {}),
+            ('delete_space', reverse('delete_space', args=[space.pk]), self.moderator, 'post', {}),
+            ('manage_categories', reverse('manage_categories'), self.moderator, 'get', {}),
+            ('add_category', reverse('add_category'), self.moderator, 'get', {}),
+            ('edit_category', reverse('edit_category', args=[space.category_id]), self.moderator, 'get', {}),
+            ('delete_category', reverse('delete_category', args=[space.category_id]), self.moderator, 'post', {}),
+            ('toggle_category_status', reverse('toggle_category_status', args=[space.category_id]),
+             self.moderator, 'post', {}),
+            ('login', reverse('login'), None, 'get', {}),
+            ('register', reverse('register'), None, 'get', {}),
+            ('logout', reverse('logout'), self.user, 'post', {}),
+            ('verify_email_code', reverse('verify_email_code'), None, 'get', {}),
+            ('resend_code', reverse('resend_code'), None, 'get', {}),
+            ('verify_email', reverse('verify_email', args=['invalid']), None, 'get', {}),
+            ('resend_verification', reverse('resend_verification'), None, 'get', {}),
+            ('password_reset', reverse('password_reset'), None, 'get', {}),
+            ('password_reset_confirm', reverse('password_reset_confirm', args=['invalid']), None, 'get', {}),
+            ('dashboard', reverse('dashboard'), self.user, 'get', {}),
+            ('profile', reverse('profile'), self.user, 'get', {}),
+            ('my_bookings', reverse('my_bookings'), self.user, 'get', {}),
+            ('my_favorites', reverse('my_favorites'), self.user, 'get', {}),
+            ('my_reviews', reverse('my_reviews'), self.user, 'get', {}),
+            ('view_user_profile', reverse('view_user_profile', args=[self.user.pk]), self.moderator, 'get', {}),
+            ('public_user_profile', reverse('public_user_profile', args=[self.user.pk]), self.moderator, 'get', {}),
+            ('manage_users', reverse('manage_users'), self.moderator, 'get', {}),
+            ('users_ajax', reverse('users_ajax'), self.moderator, 'get', {}),
+            ('user_detail_mod', reverse('user_detail_mod', args=[self.user.pk]), self.moderator, 'get', {}),
+            ('edit_user', reverse('edit_user', args=[self.user.pk]), self.admin, 'get', {}),
+            ('block_user', reverse('block_user', args=[self.user.pk]), self.moderator, 'post', {'reason': 'Спам'}),
+            ('unblock_user', reverse('unblock_user', args=[self.user.pk]), self.moderator, 'post', {}),
+            ('verify_user_email_mod', reverse('verify_user_email_mod', args=[self.user.pk]),
+             self.moderator, 'post', {}),
+            ('toggle_favorite', reverse('toggle_favorite', args=[space.pk]), self.user, 'post', {}),
+            ('check_favorite', reverse('check_favorite', args=[space.pk]), self.user, 'get', {}),
+            ('create_booking', reverse('create_booking', args=[space.pk]), self.user, 'get', {}),
+            ('get_price_for_period', reverse('get_price_for_period'), self.user, 'get',
+             {'space_id': space.pk, 'period_id': self.period.pk, 'count': 2}),
+            ('booking_detail', reverse('booking_detail', args=[booking.pk]), self.user, 'get', {}),
+            ('cancel_booking', reverse('cancel_booking', args=[booking.pk]), self.user, 'post', {}),
+            ('confirm_booking', reverse('confirm_booking', args=[booking.pk]), self.moderator, 'post', {}),
+            ('reject_booking', reverse('reject_booking', args=[booking.pk]), self.moderator, 'post', {}),
+            ('manage_bookings', reverse('manage_bookings'), self.moderator, 'get', {}),
+            ('initiate_payment', reverse('initiate_payment', args=[booking.pk]), self.user, 'post', {}),
+            ('payment_return', reverse('payment_return', args=[booking.pk]), self.user, 'get', {}),
+            ('payment_status', reverse('payment_status', args=[booking.pk]), self.user, 'get', {}),
+            ('check_cancellation_penalty', reverse('check_cancellation_penalty', args=[booking.pk]),
+             self.user, 'get', {}),
+            ('payment_webhook', reverse('payment_webhook'), None, 'post', {}),
+            ('create_review', reverse('create_review', args=[self.spaces[2].pk]), self.user, 'post',
+             {'rating': 5, 'comment': 'Отличное помещение для встреч'}),
+            ('delete_review', reverse('delete_review', args=[self.user_review.pk]), self.user, 'post', {}),
+            ('user_edit_review', reverse('user_edit_review', args=[self.user_review.pk]), self.user, 'get', {}),
+            ('edit_review', reverse('edit_review', args=[review.pk]), self.moderator, 'get', {}),
+            ('admin_delete_review', reverse('admin_delete_review', args=[review.pk]), self.moderator, 'post', {}),
+            ('space_reviews', reverse('space_reviews', args=[space.pk]), self.user, 'get', {}),
+            ('approve_review', reverse('approve_review', args=[review.pk]), self.moderator, 'post', {}),
+            ('bulk_moderate_reviews', reverse('bulk_moderate_reviews'), self.moderator, 'post',
+             {'ids': [review.pk], 'action': 'reject'}),
+            ('manage_reviews', reverse('manage_reviews'), self.moderator, 'get', {}),
+            ('get_price', reverse('get_price', args=[space.pk, self.period.pk]), self.user, 'get', {}),
+        ]
+
+    def _request(self, path: str, method: str, data: dict) -> tuple[int, int]:
+        """
+        Выполнить запрос с откатом изменений в БД.
+
+        Returns:
+            tuple: (код ответа, количество SQL запросов)
+        """
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(self.client, method)(path, data)
+            transaction.set_rollback(True)
+        return response.status_code, len(queries)
+
+    def _measure(self, path: str, user: Optional[User], method: str, data: dict) -> tuple[int, int]:
+        """
+        Посчитать SQL запросы страницы в установившемся режиме.
+
+        Сначала сессия и справочники прогреваются запросом главной
+        страницы. Первый запрос к странице проверяется на N+1, бюджет
+        проверяется по второму (с прогретым кэшем).
+
+        Returns:
+            tuple: (код ответа, количество SQL запросов)
+        """
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(user)
+        cache.clear()
+        self.client.get(reverse('home'))
+
+        self._request(path, method, data)
+        return self._request(path, method, data)
+
+    def test_every_url_has_budget(self):
+        """Тест: у каждого URL приложения есть бюджет и сценарий запроса."""
+        names = {pattern.name for pattern in rental_urls.urlpatterns if isinstance(pattern, URLPattern)}
+        self.assertEqual(names - set(QUERY_BUDGETS), set())
+        self.assertEqual(names - {case[0] for case in self.get_cases()}, set())
+
+    @mock.patch.object(PaymentService, '_initialized', False)
+    def test_views_within_query_budget(self):
+        """Тест: каждая страница укладывается в бюджет и не делает N+1 запросов."""
+        for name, path, user, method, data in self.get_cases():
+            with self.subTest(url=name):
+                status, count = self._measure(path, user, method, data)
+                self.assertLess(status, 500)
+                self.assertLessEqual(count, QUERY_BUDGETS.get(name, 0))
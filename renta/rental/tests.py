@@ -4,17 +4,20 @@
 Адаптировано под актуальную модель данных (models.py)
 """
 
-from django.test import TestCase, Client
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
 from datetime import timedelta
+from unittest import mock
 
 from .models import (
     CustomUser, Region, City, SpaceCategory, Space, SpaceImage,
     SpacePrice, PricingPeriod, BookingStatus, Booking, Transaction,
-    Review, Favorite, ActionLog
+    Review, Favorite, ActionLog, EmailOutbox, ModeratorNotification, BackgroundJob
 )
 
 User = get_user_model()
@@ -131,6 +134,8 @@ class BaseTestCase(TestCase):
     def setUp(self):
         """Создание клиента для каждого теста."""
         self.client = Client()
+        # Кэш (индекс избранного и т.п.) не должен переживать откат БД
+        cache.clear()
 
 
 # ==================== ТЕСТЫ АУТЕНТИФИКАЦИИ ====================
@@ -340,6 +345,52 @@ class ReviewTestCase(BaseTestCase):
         response = self.client.post(reverse('approve_review', args=[review.pk]))
         self.assertIn(response.status_code, [200, 302])
 
+    @mock.patch('rental.services.review_feed.REVIEW_FEED_PAGE_SIZE', 1)
+    def test_review_feed_pages_and_cache_invalidated_on_approval(self):
+        """Тест: лента отзывов листается курсором, кэш сбрасывается при одобрении."""
+        from .services.review_moderation import ReviewModeration
+
+        for author, comment in ((self.regular_user, 'Первый отзыв'), (self.another_user, 'Второй отзыв')):
+            Review.objects.create(space=self.space, author=author, rating=5, comment=comment, is_approved=True)
+        pending = Review.objects.create(
+            space=self.space, author=self.moderator_user, rating=4, comment='Новый отзыв'
+        )
+        url = reverse('space_reviews', args=[self.space.pk])
+
+        first = self.client.get(url).json()
+        self.assertIn('Второй отзыв', first['html'])
+        self.assertTrue(first['has_next'])
+        second = self.client.get(url, {'after': first['next_cursor'], 'format': 'json'}).json()
+        self.assertEqual([review['comment'] for review in second['reviews']], ['Первый отзыв'])
+        self.assertFalse(second['has_next'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ReviewModeration.set_approved([pending.pk], approved=True)
+        self.assertIn('Новый отзыв', self.client.get(url).json()['html'])
+
+    def test_review_feed_cache_key_uses_decoded_cursor(self):
+        """Тест: ключ кэша ленты строится по раскодированному курсору, мусор не кэшируется."""
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from .core.pagination import encode_cursor
+        from .services.review_feed import ReviewFeed
+
+        review = Review.objects.create(
+            space=self.space, author=self.regular_user, rating=5, comment='Отзыв', is_approved=True
+        )
+        cursor = encode_cursor(review.created_at, review.pk)
+        factory = RequestFactory()
+
+        self.assertEqual(ReviewFeed._cache_cursor(factory.get('/')), 'first')
+        self.assertEqual(ReviewFeed._cache_cursor(factory.get('/', {'after': cursor + '=='})), f'after:{cursor}')
+        self.assertEqual(ReviewFeed._cache_cursor(factory.get('/', {'before': cursor})), f'before:{cursor}')
+        self.assertIsNone(ReviewFeed._cache_cursor(factory.get('/', {'after': 'мусор'})))
+
+        cache.clear()
+        for junk in ('abc', 'xyz', '!!!'):
+            self.client.get(reverse('space_reviews', args=[self.space.pk]), {'after': junk})
+        self.assertFalse([key for key in cache._cache if 'review_feed:' in key])
+
 
 # ==================== ТЕСТЫ ИЗБРАННОГО ====================
 
@@ -364,6 +415,25 @@ class FavoriteTestCase(BaseTestCase):
         response = self.client.get(reverse('my_favorites'))
         self.assertEqual(response.status_code, 200)
 
+    def test_favorites_index_updated_write_through(self):
+        """Тест: переключение избранного обновляет кэшированный индекс без сброса."""
+        from .services.favorites_index import FavoritesIndex
+
+        self.client.login(username='user_test', password='UserPass123!')
+        self.assertEqual(FavoritesIndex.get(self.regular_user.id), frozenset())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('toggle_favorite', args=[self.space.pk]))
+        self.assertEqual(response.json()['favorites_count'], 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(FavoritesIndex.contains(self.regular_user.id, self.space.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('toggle_favorite', args=[self.space.pk]))
+        self.assertEqual(response.json()['status'], 'removed')
+        with self.assertNumQueries(0):
+            self.assertEqual(FavoritesIndex.count(self.regular_user.id), 0)
+
 
 # ==================== ТЕСТЫ ПРАВ ДОСТУПА ====================
 
@@ -405,6 +475,7 @@ class ModelTestCase(BaseTestCase):
             comment='Нормальный отзыв', # FIX: text -> comment
             is_approved=True
         )
+        self.space.refresh_from_db()  # счетчики рейтинга обновлены в БД сигналами
         avg_rating = self.space.get_avg_rating() # FIX: Имя метода в модели get_avg_rating
         self.assertEqual(avg_rating, 4.0)
 
@@ -423,9 +494,134 @@ class ModelTestCase(BaseTestCase):
             comment='Неодобренный отзыв', # FIX: text -> comment
             is_approved=False
         )
+        self.space.refresh_from_db()
         count = self.space.get_reviews_count()
         self.assertEqual(count, 1)
 
+    def test_rating_counters_follow_review_lifecycle(self):
+        """Тест: одобрение, правка, снятие одобрения и удаление меняют счетчики рейтинга."""
+        review = Review.objects.create(
+            space=self.space, author=self.regular_user, rating=4, comment='Отзыв'
+        )
+        self.space.refresh_from_db()
+        self.assertEqual(self.space.rating_count, 0)
+
+        review.is_approved = True
+        review.save()
+        review.rating = 2
+        review.save()
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.rating_sum, self.space.rating_count), (2, 1))
+        self.assertEqual(self.space.get_rating_distribution(), {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+
+        review.is_approved = False
+        review.save()
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.rating_sum, self.space.rating_count, self.space.rating_2_count), (0, 0, 0))
+
+        review.is_approved = True
+        review.save()
+        review.delete()
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.rating_sum, self.space.rating_count), (0, 0))
+
+    def test_space_save_writes_only_changed_fields(self):
+        """Тест: save() пишет только измененные поля и не загружает отложенные."""
+        space = Space.objects.only('title', 'updated_at').get(pk=self.space.pk)
+        Space.objects.filter(pk=space.pk).update(views_count=7)
+        Review.objects.create(space=self.space, author=self.regular_user, rating=5, comment='Отзыв', is_approved=True)
+
+        with self.assertNumQueries(0):
+            space.save()
+        space.title = 'Новое название'
+        with self.assertNumQueries(1) as context:
+            space.save()
+        self.assertNotIn('description', context.captured_queries[0]['sql'])
+
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.title, self.space.views_count, self.space.rating_count), ('Новое название', 7, 1))
+
+    def test_space_save_after_refresh_compares_with_refreshed_values(self):
+        """Тест: после refresh_from_db() save() сравнивает с перечитанными значениями."""
+        space = Space.objects.get(pk=self.space.pk)
+        original_title = space.title
+        Space.objects.filter(pk=space.pk).update(views_count=7, title='Изменено в БД')
+        space.refresh_from_db()
+
+        space.title = original_title
+        space.save()
+        Space.objects.filter(pk=space.pk).update(views_count=9)
+        space.description = 'Новое описание'
+        space.save()
+
+        space.refresh_from_db()
+        self.assertEqual((space.title, space.description, space.views_count), (original_title, 'Новое описание', 9))
+
+    def test_user_stats_follow_activity(self):
+        """Тест: статистика пользователя следует за бронированиями, отзывами и избранным."""
+        from .models import UserStats
+        from .services.user_stats import UserStatsService
+
+        booking = Booking.objects.create(
+            space=self.space, tenant=self.regular_user,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            period=self.rental_period, status=self.status_pending,
+            total_amount=Decimal('2000.00'), periods_count=2, price_per_period=Decimal('1000.00')
+        )
+        booking.status = self.status_confirmed
+        booking.save()
+        review = Review.objects.create(space=self.space, author=self.regular_user, rating=5, comment='Отзыв')
+        review.is_approved = True
+        review.save()
+        Favorite.objects.create(user=self.regular_user, space=self.space)
+
+        stats = UserStatsService.get(self.regular_user.pk)
+        self.assertEqual(
+            (stats.bookings_total, stats.bookings_pending, stats.bookings_confirmed, stats.total_spent),
+            (1, 0, 1, Decimal('2000.00'))
+        )
+        self.assertEqual((stats.reviews_count, stats.reviews_approved, stats.favorites_count), (1, 1, 1))
+
+        booking.delete()
+        review.delete()
+        stats = UserStats.objects.get(user=self.regular_user)
+        recomputed = UserStatsService.recompute([self.regular_user.pk])[self.regular_user.pk]
+        fields = ('bookings_total', 'bookings_confirmed', 'total_spent', 'reviews_count', 'favorites_count')
+        self.assertEqual(
+            [getattr(stats, name) for name in fields],
+            [getattr(recomputed, name) for name in fields]
+        )
+        self.assertEqual(stats.favorites_count, 1)
+
+    def test_bulk_moderation_updates_rating_counters(self):
+        """Тест: массовая модерация меняет статус и счетчики рейтинга помещения."""
+        reviews = [
+            Review.objects.create(space=self.space, author=author, rating=rating, comment='Отзыв')
+            for author, rating in ((self.regular_user, 5), (self.another_user, 3))
+        ]
+        ids = [review.pk for review in reviews]
+        self.client.login(username='user_test', password='UserPass123!')
+        response = self.client.post(reverse('bulk_moderate_reviews'), {'ids': ids, 'action': 'approve'})
+        self.assertEqual(response.status_code, 403)
+
+        self.client.login(username='moderator_test', password='ModeratorPass123!')
+        response = self.client.post(reverse('bulk_moderate_reviews'), {'ids': ids, 'action': 'approve'})
+        self.assertEqual(response.json()['updated'], 2)
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.rating_sum, self.space.rating_count), (8, 2))
+        self.assertEqual(self.space.get_rating_distribution(), {1: 0, 2: 0, 3: 1, 4: 0, 5: 1})
+
+        # Повторное одобрение не меняет счетчики
+        response = self.client.post(reverse('bulk_moderate_reviews'), {'ids': ids, 'action': 'approve'})
+        self.assertEqual(response.json()['updated'], 0)
+
+        response = self.client.post(reverse('bulk_moderate_reviews'), {'ids': ids[:1], 'action': 'reject'})
+        self.assertEqual(response.json()['updated'], 1)
+        self.assertFalse(Review.objects.get(pk=ids[0]).is_approved)
+        self.space.refresh_from_db()
+        self.assertEqual((self.space.rating_sum, self.space.rating_count, self.space.rating_5_count), (3, 1, 0))
+
 
 # ==================== ТЕСТЫ АДМИНИСТРАТИВНОЙ ПАНЕЛИ ====================
 
@@ -460,6 +656,268 @@ class AdminPanelTestCase(BaseTestCase):
         response = self.client.get('/admin/backup/')
         self.assertEqual(response.status_code, 200)
 
+    def test_action_logs_keyset_pagination(self):
+        """Тест: журнал действий листается по курсору без пропусков и повторов."""
+        moment = timezone.now() - timedelta(days=1)
+        created = [
+            ActionLog.objects.create(
+                action_type=ActionLog.ActionType.OTHER, model_name='Keyset', created_at=moment
+            )
+            for _ in range(60)
+        ]
+        self.client.login(username='admin_test', password='AdminPass123!')
+
+        first = self.client.get('/admin/reports/actions/', {'model': 'Keyset'}).context['logs']
+        self.assertEqual(len(first), 50)
+        self.assertFalse(first.has_previous)
+
+        second = self.client.get(
+            '/admin/reports/actions/', {'model': 'Keyset', 'after': first.next_cursor}
+        ).context['logs']
+        self.assertFalse(second.has_next)
+        seen = [log.pk for log in first] + [log.pk for log in second]
+        self.assertEqual(sorted(seen), sorted(log.pk for log in created))
+
+        back = self.client.get(
+            '/admin/reports/actions/', {'model': 'Keyset', 'before': second.previous_cursor}
+        ).context['logs']
+        self.assertEqual([log.pk for log in back], [log.pk for log in first])
+
+    def test_action_logs_user_autocomplete(self):
+        """Тест: фильтр журнала ищет пользователей через AJAX, а не выводит всех."""
+        self.client.login(username='admin_test', password='AdminPass123!')
+        response = self.client.get('/admin/reports/actions/')
+        self.assertNotIn('users', response.context)
+
+        data = self.client.get('/admin/reports/actions/users/', {'q': 'anoth'}).json()
+        self.assertEqual([user['username'] for user in data['results']], ['another_user'])
+
+    def test_dashboard_stats_cached_and_invalidated(self):
+        """Тест: сводные счетчики считаются одним запросом и сбрасываются сигналами."""
+        from .services.stats_service import StatsService
+
+        with self.assertNumQueries(1):
+            stats = StatsService.spaces()
+        self.assertEqual(stats['total'], Space.objects.count())
+        self.assertEqual(stats['featured'], Space.objects.filter(is_featured=True).count())
+        with self.assertNumQueries(0):
+            StatsService.spaces()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.space.is_active = False
+            self.space.save()
+        self.assertEqual(StatsService.spaces()['inactive'], Space.objects.filter(is_active=False).count())
+
+        self.client.login(username='moderator_test', password='ModeratorPass123!')
+        response = self.client.get(reverse('users_ajax'))
+        self.assertEqual(
+            response.json()['stats']['total'], CustomUser.objects.filter(is_superuser=False).count()
+        )
+
+    def test_booking_rollup_follows_bookings(self):
+        """Тест: дневные итоги следуют за бронированиями и совпадают с пересчетом."""
+        from .models import BookingDailyStats
+        from .services.booking_rollup import BookingRollup
+
+        bookings = [
+            Booking.objects.create(
+                space=self.space, tenant=self.regular_user,
+                start_datetime=timezone.now() + timedelta(days=day),
+                end_datetime=timezone.now() + timedelta(days=day, hours=2),
+                period=self.rental_period, status=self.status_pending,
+                total_amount=Decimal('1500.00'), periods_count=1, price_per_period=Decimal('1500.00')
+            )
+            for day in (1, 2, 3)
+        ]
+        bookings[0].status = self.status_confirmed
+        bookings[0].save()
+        bookings[1].delete()
+
+        today = timezone.localdate()
+        revenue = BookingRollup.summary(today, today, status_codes=['confirmed'])
+        self.assertEqual([(row['bookings'], row['revenue']) for row in revenue], [(1, Decimal('1500.00'))])
+
+        state = sorted(BookingDailyStats.objects.filter(bookings_count__gt=0).values_list(
+            'date', 'space_id', 'status_id', 'bookings_count', 'revenue'
+        ))
+        BookingRollup.recompute()
+        self.assertEqual(state, sorted(BookingDailyStats.objects.values_list(
+            'date', 'space_id', 'status_id', 'bookings_count', 'revenue'
+        )))
+
+        self.client.login(username='admin_test', password='AdminPass123!')
+        response = self.client.get('/admin/reports/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['top_spaces'][0]['bookings_count'], 2)
+
+    def test_report_exports_stream_all_formats(self):
+        """Тест: отчеты выгружаются потоком в CSV, JSON, JSON Lines и XLSX."""
+        import io
+        import json
+        import zipfile
+
+        for _ in range(3):
+            Booking.objects.create(
+                space=self.space, tenant=self.regular_user,
+                start_datetime=timezone.now() + timedelta(days=1),
+                end_datetime=timezone.now() + timedelta(days=1, hours=2),
+                period=self.rental_period, status=self.status_pending,
+                total_amount=Decimal('1000.00'), periods_count=1, price_per_period=Decimal('1000.00')
+            )
+        self.client.login(username='admin_test', password='AdminPass123!')
+
+        def export(fmt: str) -> bytes:
+            response = self.client.get(
+                reverse('interior_admin:export_report', args=[fmt]), {'type': 'bookings'}
+            )
+            self.assertTrue(response.streaming)
+            return b''.join(response.streaming_content)
+
+        self.assertEqual(len(export('csv').decode('utf-8-sig').strip().splitlines()), 4)
+        lines = export('jsonl').decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line)['total_amount'] for line in lines], [1000.0] * 3)
+        self.assertEqual(json.loads(export('json'))['count'], 3)
+        with zipfile.ZipFile(io.BytesIO(export('xlsx'))) as archive:
+            self.assertEqual(archive.read('xl/worksheets/sheet1.xml').count(b'<row>'), 4)
+
+        response = self.client.get(reverse('interior_admin:export_json'), {'type': 'users'})
+        usernames = [item['username'] for item in json.loads(b''.join(response.streaming_content))['data']]
+        self.assertEqual(sorted(usernames), sorted(CustomUser.objects.values_list('username', flat=True)))
+
+    def test_csv_export_escapes_formula_prefixes(self):
+        """Тест: значения CSV, похожие на формулы (в т.ч. с табуляцией и CR), экранируются."""
+        import csv
+        import io
+        from .services.report_export import REPORTS, ReportExport
+
+        values = ('=1+1', '@SUM(A1)', '\t=1+1', '\r=1+1', 'Текст', -5)
+        content = b''.join(ReportExport._encode_csv('bookings', REPORTS['bookings'], [values])).decode('utf-8-sig')
+        row = list(csv.reader(io.StringIO(content)))[1]
+        self.assertEqual(row, ["'=1+1", "'@SUM(A1)", "'\t=1+1", "'\r=1+1", 'Текст', '-5'])
+
+    def test_pdf_report_built_by_background_job_and_cached(self):
+        """Тест: PDF отчет формируется фоновым заданием, повторный запрос отдает готовый файл."""
+        import tempfile
+        from .services.background_jobs import BackgroundJobs
+
+        self.client.login(username='admin_test', password='AdminPass123!')
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                override_settings(REPORT_PDF_WORKERS=0, REPORT_CACHE_DIR=cache_dir):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(reverse('interior_admin:pdf_job_start'), {'type': 'actions'})
+            state = response.json()
+            self.assertEqual(state['status'], 'pending')
+            self.assertEqual(len(callbacks), 1)
+
+            job = BackgroundJobs.run(state['id'])
+            self.assertEqual(job.status, 'done')
+            self.assertEqual(self.client.get(state['status_url']).json()['progress'], 100)
+
+            again = self.client.post(reverse('interior_admin:pdf_job_start'), {'type': 'actions'}).json()
+            self.assertEqual(again['id'], job.pk)
+            response = self.client.get(again['download_url'])
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+            response.close()
+
+    def test_backup_streams_runs_as_job_and_restores(self):
+        """Тест: бэкап отдается потоком, создается фоновым заданием и восстанавливается."""
+        import gzip
+        import json
+        import os
+        import tempfile
+        from .services.background_jobs import BackgroundJobs
+        from .services.backup_engine import BackupEngine
+
+        self.client.login(username='admin_test', password='AdminPass123!')
+        with tempfile.TemporaryDirectory() as backup_dir, override_settings(BACKUP_DIR=backup_dir):
+            response = self.client.post(reverse('interior_admin:create_backup'), {'download_direct': 'true'})
+            self.assertTrue(response.streaming)
+            lines = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8').splitlines()
+            models = {json.loads(line)['model'] for line in lines}
+            self.assertIn('rental.space', models)
+            self.assertNotIn('sessions.session', models)
+
+            with self.captureOnCommitCallbacks():
+                self.client.post(reverse('interior_admin:create_backup'), {'download_direct': 'false'})
+            job = BackgroundJobs.run(BackgroundJob.objects.get(kind=BackgroundJob.Kind.BACKUP).pk)
+            self.assertEqual(job.status, BackgroundJob.Status.DONE)
+            path = os.path.join(backup_dir, job.file_name)
+            self.assertEqual([b['filename'] for b in BackupEngine.list_backups()], [job.file_name])
+
+            title = self.space.title
+            Space.objects.filter(pk=self.space.pk).update(title='Изменено')
+            Review.objects.create(space=self.space, author=self.regular_user, rating=5, comment='Новый отзыв')
+            BackupEngine.restore(path)
+            self.space.refresh_from_db()
+            self.assertEqual(self.space.title, title)
+            self.assertEqual(self.space.rating_count, Review.objects.filter(space=self.space, is_approved=True).count())
+
+    def test_backup_restores_into_flushed_database_with_user_gaps(self):
+        """Тест: копия восстанавливается в пустую БД при пропусках в id пользователей."""
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from .models import UserStats
+        from .services.backup_engine import BackupEngine
+
+        CustomUser.objects.create_user(username='deleted_user', email='deleted@test.com', password='Pass123!').delete()
+        user = CustomUser.objects.create_user(username='after_gap', email='gap@test.com', password='Pass123!')
+        Favorite.objects.create(user=user, space=self.space)
+        expected = dict(UserStats.objects.values_list('user_id', 'favorites_count'))
+
+        with tempfile.TemporaryDirectory() as backup_dir:
+            path = BackupEngine.write(os.path.join(backup_dir, BackupEngine.file_name('gzip')), codec='gzip')
+            call_command('flush', interactive=False, verbosity=0)
+            self.assertFalse(CustomUser.objects.exists())
+
+            BackupEngine.restore(path)
+
+        self.assertEqual(CustomUser.objects.get(username='after_gap').pk, user.pk)
+        self.assertEqual(dict(UserStats.objects.values_list('user_id', 'favorites_count')), expected)
+        self.assertEqual(expected[user.pk], 1)
+
+    def test_backup_round_trip_with_booking_status_changes(self):
+        """Тест: копия с бронированиями, менявшими статус, восстанавливается в пустую БД."""
+        import gzip
+        import json
+        import os
+        import tempfile
+        from django.core.management import call_command
+        from .models import BookingDailyStats, UserStats
+        from .services.backup_engine import BackupEngine
+
+        def book(days: int) -> Booking:
+            return Booking.objects.create(
+                space=self.space, tenant=self.regular_user,
+                start_datetime=timezone.now() + timedelta(days=days),
+                end_datetime=timezone.now() + timedelta(days=days, hours=2),
+                period=self.rental_period, status=self.status_pending,
+                total_amount=Decimal('1000.00'), periods_count=1, price_per_period=Decimal('1000.00')
+            )
+
+        confirmed = book(1)
+        confirmed.status = self.status_confirmed
+        confirmed.save()
+        book(2)
+        rollup = sorted(BookingDailyStats.objects.values_list('space_id', 'status_id', 'bookings_count'))
+        stats = UserStats.objects.values_list('bookings_total', 'bookings_pending', 'bookings_confirmed')
+
+        with tempfile.TemporaryDirectory() as backup_dir:
+            path = BackupEngine.write(os.path.join(backup_dir, BackupEngine.file_name('gzip')), codec='gzip')
+            with gzip.open(path, 'rt', encoding='utf-8') as backup:
+                models = {json.loads(line)['model'] for line in backup}
+            call_command('flush', interactive=False, verbosity=0)
+            BackupEngine.restore(path)
+
+        self.assertFalse(models & {'rental.bookingdailystats', 'rental.userstats'})
+        self.assertEqual(Booking.objects.get(pk=confirmed.pk).status_id, self.status_confirmed.pk)
+        self.assertEqual(
+            sorted(BookingDailyStats.objects.values_list('space_id', 'status_id', 'bookings_count')), rollup
+        )
+        self.assertEqual(stats.get(user=self.regular_user), (2, 1, 1))
+
+
 # ==================== ТЕСТЫ API ENDPOINTS ====================
 
 class APITestCase(BaseTestCase):
@@ -554,6 +1012,8 @@ class SecurityTestCase(BaseTestCase):
         response = self.client.get(reverse('space_detail', args=[self.space.pk]))
         # Скрипт должен быть экранирован
         self.assertNotContains(response, '<script>alert')
+        response = self.client.get(reverse('space_reviews', args=[self.space.pk]))
+        self.assertNotIn('<script>alert', response.json()['html'])
 
 
 # ==================== ТЕСТЫ ЛОГИРОВАНИЯ ====================
@@ -576,6 +1036,626 @@ class ActionLogTestCase(BaseTestCase):
         ).count()
         self.assertGreaterEqual(final_count, initial_count)
 
+    def test_buffered_writer_saves_batch_on_flush(self):
+        """Тест: запись журнала попадает в БД только после коммита и сброса буфера."""
+        from .services.action_log_writer import ActionLogWriter
+        from .services.logging_service import LoggingService
+
+        writer = ActionLogWriter(autostart=False)
+        with mock.patch('rental.services.action_log_writer.action_log_writer', writer):
+            with self.captureOnCommitCallbacks(execute=True):
+                LoggingService.log_action(
+                    self.regular_user, ActionLog.ActionType.UPDATE, 'Space', object_repr='Тест'
+                )
+                self.assertEqual(writer.queue.qsize(), 0)
+
+        self.assertEqual(writer.queue.qsize(), 1)
+        self.assertFalse(ActionLog.objects.filter(model_name='Space').exists())
+
+        writer.flush()
+        self.assertTrue(ActionLog.objects.filter(model_name='Space', user=self.regular_user).exists())
+
+    def test_buffered_writer_overflow_policy(self):
+        """Тест: при переполнении буфера запись отбрасывается или пишется сразу."""
+        from .services.action_log_writer import ActionLogWriter
+
+        def entry():
+            return ActionLog(action_type=ActionLog.ActionType.OTHER, model_name='Overflow')
+
+        dropping = ActionLogWriter(max_buffer=1, overflow_policy='drop', autostart=False)
+        dropping._enqueue(entry())
+        dropping._enqueue(entry())
+        self.assertEqual(dropping.dropped, 1)
+        self.assertEqual(ActionLog.objects.filter(model_name='Overflow').count(), 0)
+
+        syncing = ActionLogWriter(max_buffer=1, overflow_policy='sync', autostart=False)
+        syncing._enqueue(entry())
+        syncing._enqueue(entry())
+        self.assertEqual(ActionLog.objects.filter(model_name='Overflow').count(), 1)
+
+    def test_period_lookup_uses_field_range(self):
+        """Тест: фильтр периода отчёта строится по полю, а не по created_at::date."""
+        from .core import period_lookup
+
+        log = ActionLog.objects.create(action_type=ActionLog.ActionType.OTHER, model_name='Period')
+        day = timezone.localdate(log.created_at).isoformat()
+
+        lookup = period_lookup(day, day)
+        self.assertEqual(set(lookup), {'created_at__gte', 'created_at__lt'})
+        self.assertTrue(ActionLog.objects.filter(model_name='Period', **lookup).exists())
+        self.assertEqual(period_lookup('bad', None), {})
+
+    def test_ensure_partitions_moves_rows_from_default(self):
+        """Тест: строки месяца из партиции по умолчанию переносятся в созданную партицию."""
+        from .services.log_partitions import ActionLogPartitionService as service, add_months
+
+        month = service.current_month()
+        next_name = service.partition_name(add_months(month, 1))
+        with mock.patch.object(service, 'is_partitioned', return_value=True), \
+                mock.patch.object(service, 'list_partitions', return_value=[(service.partition_name(month), month)]), \
+                mock.patch.object(service, '_default_has_rows', side_effect=lambda cursor, target: target > month), \
+                mock.patch('rental.services.log_partitions.connection') as connection:
+            created = service.ensure_partitions(months_ahead=1)
+
+        executed = [call.args[0] for call in connection.cursor.return_value.__enter__.return_value.execute.call_args_list]
+        self.assertEqual(created, [next_name])
+        self.assertEqual([sql.split(' ')[0] for sql in executed], ['ALTER', 'CREATE', 'INSERT', 'DELETE', 'ALTER'])
+        self.assertIn('DETACH PARTITION "action_logs_default"', executed[0])
+        self.assertIn(f'INSERT INTO "{next_name}"', executed[2])
+        self.assertTrue(executed[4].endswith('ATTACH PARTITION "action_logs_default" DEFAULT'))
+
+    def test_archive_rotates_files_and_deletes_rows(self):
+        """Тест: архивация пишет файлы с манифестом и удаляет выгруженные строки."""
+        import gzip
+        import json
+        import os
+        import tempfile
+        from .services.log_archive import ActionLogArchiver
+
+        old = timezone.now() - timedelta(days=400)
+        for i in range(3):
+            ActionLog.objects.create(
+                user=self.regular_user, action_type=ActionLog.ActionType.OTHER,
+                model_name='Archive', object_repr=f'Запись {i}', created_at=old
+            )
+        recent = ActionLog.objects.create(action_type=ActionLog.ActionType.OTHER, model_name='Archive')
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            archiver = ActionLogArchiver(
+                output_dir, date_to=timezone.now() - timedelta(days=30),
+                max_rows_per_file=2, chunk_size=2
+            )
+            manifest = archiver.archive()
+
+            self.assertEqual(manifest['total_rows'], 3)
+            self.assertEqual([entry['rows'] for entry in manifest['files']], [2, 1])
+            self.assertEqual(archiver.verify(manifest), [])
+            with gzip.open(os.path.join(output_dir, manifest['files'][0]['name']), 'rt') as f:
+                self.assertEqual(json.loads(f.readline())['username'], 'user_test')
+
+            self.assertEqual(archiver.delete_archived(), 3)
+
+        self.assertEqual(list(ActionLog.objects.filter(model_name='Archive')), [recent])
+
+    def test_user_agents_deduplicated_and_parsed_once(self):
+        """Тест: одинаковые User-Agent хранятся одной записью справочника."""
+        from .models import UserAgent
+        from .services.action_log_writer import ActionLogWriter
+
+        chrome = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+        entries = []
+        for raw in (chrome, chrome, 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0) Mobile Safari/604.1'):
+            entry = ActionLog(action_type=ActionLog.ActionType.LOGIN, model_name='CustomUser')
+            entry.raw_user_agent = raw
+            entries.append(entry)
+
+        ActionLogWriter(autostart=False)._write(entries)
+
+        self.assertEqual(UserAgent.objects.count(), 2)
+        desktop = UserAgent.objects.get(browser='Chrome')
+        self.assertEqual((desktop.os, desktop.device), ('Windows', UserAgent.Device.DESKTOP))
+        self.assertEqual(desktop.action_logs.count(), 2)
+        self.assertEqual(UserAgent.objects.get(os='iOS').device, UserAgent.Device.MOBILE)
+
+    def test_backfill_moves_legacy_user_agents_into_lookup(self):
+        """Тест: строки старой колонки User-Agent переносятся в справочник."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection
+        from .services.user_agents import LEGACY_TABLE, UserAgentService
+
+        logs = [
+            ActionLog.objects.create(action_type=ActionLog.ActionType.LOGIN, model_name='CustomUser')
+            for _ in range(3)
+        ]
+        firefox = 'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE "{LEGACY_TABLE}" (log_id bigint, user_agent text)')
+            cursor.executemany(
+                f'INSERT INTO "{LEGACY_TABLE}" (log_id, user_agent) VALUES (%s, %s)',
+                [(log.pk, firefox) for log in logs[:2]] + [(logs[2].pk, 'curl/8.0')]
+            )
+
+        call_command('backfill_user_agents', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(
+            [log.user_agent.browser for log in ActionLog.objects.filter(model_name='CustomUser').order_by('pk')],
+            ['Firefox', 'Firefox', 'Бот']
+        )
+        with connection.cursor() as cursor:
+            self.assertNotIn(LEGACY_TABLE, connection.introspection.table_names(cursor))
+        self.assertEqual(UserAgentService.backfill_legacy(), 0)
+        self.assertEqual(UserAgentService.stash_legacy_column(), 0)
+
+
+# ==================== ТЕСТЫ ОЧЕРЕДИ ПИСЕМ ====================
+
+class EmailOutboxTestCase(BaseTestCase):
+    """Тесты очереди исходящих писем."""
+
+    def test_send_email_queues_instead_of_sending(self):
+        """Тест: send_email пишет письмо в очередь, а не отправляет сразу."""
+        from .services.email_service import send_email
+
+        self.assertTrue(send_email(
+            'Тема', 'user@test.com', 'verification_code',
+            {'user': self.regular_user, 'code': '123456'}
+        ))
+
+        self.assertEqual(len(mail.outbox), 0)
+        message = EmailOutbox.objects.get()
+        self.assertEqual(message.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(message.recipients, ['user@test.com'])
+
+    def test_sender_delivers_batch_and_marks_sent(self):
+        """Тест: обработчик отправляет пачку и отмечает письма отправленными."""
+        from .services.email_outbox import EmailOutboxService, OutboxSender
+
+        for i in range(3):
+            EmailOutboxService.enqueue(f'Письмо {i}', 'user@test.com', '<p>Текст</p>')
+
+        sender = OutboxSender()
+        stats = sender.send_batch()
+        sender.close()
+
+        self.assertEqual(stats['sent'], 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(
+            EmailOutbox.objects.filter(status=EmailOutbox.Status.SENT).count(), 3
+        )
+
+    def test_failed_send_is_retried_with_backoff(self):
+        """Тест: при ошибке письмо возвращается в очередь с задержкой."""
+        from .services.email_outbox import EmailOutboxService
+
+        message = EmailOutboxService.enqueue('Тема', 'user@test.com', '<p>Текст</p>')
+        EmailOutboxService.mark_failed(message, 'SMTP error')
+
+        message.refresh_from_db()
+        self.assertEqual(message.status, EmailOutbox.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertEqual(EmailOutboxService.claim_batch(), [])
+
+    def test_stale_sending_reclaim_counts_attempt(self):
+        """Тест: повторный захват зависшего письма засчитывает попытку, затем FAILED."""
+        from .services.email_outbox import STALE_SENDING_SECONDS, EmailOutboxService
+
+        message = EmailOutboxService.enqueue('Тема', 'user@test.com', '<p>Текст</p>')
+        stale = timezone.now() - timedelta(seconds=STALE_SENDING_SECONDS + 1)
+        max_attempts = EmailOutboxService.get_max_attempts()
+        EmailOutbox.objects.filter(pk=message.pk).update(
+            status=EmailOutbox.Status.SENDING, attempts=max_attempts - 2, updated_at=stale
+        )
+
+        self.assertEqual([m.attempts for m in EmailOutboxService.claim_batch()], [max_attempts - 1])
+
+        EmailOutbox.objects.filter(pk=message.pk).update(updated_at=stale)
+        self.assertEqual(EmailOutboxService.claim_batch(), [])
+        message.refresh_from_db()
+        self.assertEqual(message.status, EmailOutbox.Status.FAILED)
+        self.assertEqual(message.attempts, max_attempts)
+
+
+# ==================== ТЕСТЫ СВОДОК МОДЕРАТОРАМ ====================
+
+class ModeratorDigestTestCase(BaseTestCase):
+    """Тесты сводок уведомлений модераторам."""
+
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            space=self.space,
+            tenant=self.regular_user,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            period=self.rental_period,
+            status=self.status_pending,
+            total_amount=Decimal('2000.00'),
+            periods_count=2,
+            price_per_period=Decimal('1000.00')
+        )
+
+    def test_normal_events_are_collected_into_one_digest(self):
+        """Тест: обычные события копятся и уходят одной сводкой."""
+        from .services.moderator_digest import ModeratorDigestService
+
+        for i in range(5):
+            ModeratorDigestService.notify(self.booking, 'Предоплата получена', f'Событие {i}')
+
+        self.assertEqual(EmailOutbox.objects.count(), 0)
+        # Окно ещё не истекло — сводка не формируется
+        self.assertEqual(ModeratorDigestService.send_digest(), 0)
+
+        self.assertEqual(ModeratorDigestService.send_digest(force=True), 5)
+        recipients = ModeratorDigestService.get_moderator_emails()
+        self.assertEqual(EmailOutbox.objects.count(), len(recipients))
+        self.assertFalse(ModeratorNotification.objects.filter(digested_at__isnull=True).exists())
+
+    def test_high_priority_event_is_sent_immediately(self):
+        """Тест: событие с высоким приоритетом не ждёт сводки."""
+        from .services.moderator_digest import ModeratorDigestService, NotificationPriority
+
+        ModeratorDigestService.notify(
+            self.booking, 'Платеж отменен', 'Подозрение на мошенничество',
+            NotificationPriority.HIGH
+        )
+
+        self.assertEqual(ModeratorNotification.objects.count(), 0)
+        self.assertTrue(EmailOutbox.objects.filter(recipients=['moderator@test.com']).exists())
+
+
+# ==================== ТЕСТЫ ЗАКРЫТИЯ ПОМЕЩЕНИЯ ====================
+
+class SpaceClosureTestCase(BaseTestCase):
+    """Тесты массовой отмены бронирований при закрытии помещения."""
+
+    def _create_booking(self, days: int, prepayment: Decimal = None, payment_id: str = '') -> Booking:
+        return Booking.objects.create(
+            space=self.space,
+            tenant=self.regular_user,
+            start_datetime=timezone.now() + timedelta(days=days),
+            end_datetime=timezone.now() + timedelta(days=days, hours=2),
+            period=self.rental_period,
+            status=self.status_confirmed,
+            total_amount=Decimal('2000.00'),
+            periods_count=2,
+            price_per_period=Decimal('1000.00'),
+            prepayment_paid=prepayment is not None,
+            prepayment_amount=prepayment,
+            payment_id=payment_id
+        )
+
+    def test_close_space_cancels_future_bookings_and_refunds(self):
+        """Тест: будущие бронирования отменяются, предоплаты возвращаются."""
+        from .services.space_closure import SpaceClosureService
+
+        paid = self._create_booking(2, Decimal('200.00'), 'pay-ok')
+        failing = self._create_booking(3, Decimal('200.00'), 'pay-fail')
+        unpaid = self._create_booking(4)
+        past = self._create_booking(-2)
+
+        def fake_refund(payment_id, amount, description=None, idempotence_key=None):
+            self.assertEqual(idempotence_key, f'closure-{paid.id if payment_id == "pay-ok" else failing.id}-{payment_id}')
+            if payment_id == 'pay-fail':
+                return {'success': False, 'error': 'declined'}
+            return {'success': True, 'refund_id': 'refund-1', 'amount': amount}
+
+        progress = []
+        with mock.patch('rental.services.payment_service.PaymentService.create_refund', side_effect=fake_refund):
+            report = SpaceClosureService.close_space(
+                self.space, on_progress=lambda done, total, b, r: progress.append((done, total))
+            )
+
+        self.assertEqual(report['cancelled'], 3)
+        self.assertEqual(report['refunded'], 1)
+        self.assertEqual(report['failed'], [{'booking_id': failing.id, 'error': 'declined'}])
+        self.assertEqual(sorted(progress), [(1, 2), (2, 2)])
+
+        for booking in (paid, failing, unpaid):
+            booking.refresh_from_db()
+            self.assertEqual(booking.status.code, 'cancelled')
+        past.refresh_from_db()
+        self.assertEqual(past.status.code, 'confirmed')
+
+        self.assertFalse(paid.prepayment_paid)
+        self.assertTrue(failing.prepayment_paid)
+        self.assertTrue(Transaction.objects.filter(booking=paid, external_id='refund-1').exists())
+        self.space.refresh_from_db()
+        self.assertFalse(self.space.is_active)
+
+    def test_close_space_rerun_retries_failed_refund(self):
+        """Тест: повторный запуск возвращает предоплату, возврат которой не удался."""
+        from .services.space_closure import SpaceClosureService
+
+        booking = self._create_booking(3, Decimal('200.00'), 'pay-retry')
+        keys = []
+
+        def failing_refund(payment_id, amount, description=None, idempotence_key=None):
+            keys.append(idempotence_key)
+            return {'success': False, 'error': 'timeout'}
+
+        def ok_refund(payment_id, amount, description=None, idempotence_key=None):
+            keys.append(idempotence_key)
+            return {'success': True, 'refund_id': 'refund-retry', 'amount': amount}
+
+        with mock.patch('rental.services.payment_service.PaymentService.create_refund', side_effect=failing_refund):
+            first = SpaceClosureService.close_space(self.space)
+        self.assertEqual(first['failed'], [{'booking_id': booking.id, 'error': 'timeout'}])
+
+        with mock.patch('rental.services.payment_service.PaymentService.create_refund', side_effect=ok_refund):
+            second = SpaceClosureService.close_space(self.space)
+
+        self.assertEqual(second['cancelled'], 0)
+        self.assertEqual(second['refunded'], 1)
+        self.assertEqual(second['failed'], [])
+        self.assertEqual(keys, [f'closure-{booking.id}-pay-retry'] * 2)
+
+        booking.refresh_from_db()
+        self.assertEqual(booking.status.code, 'cancelled')
+        self.assertFalse(booking.prepayment_paid)
+        self.assertTrue(Transaction.objects.filter(booking=booking, external_id='refund-retry').exists())
+
+
+# ==================== ТЕСТЫ РЕЕСТРА СПРАВОЧНИКОВ ====================
+
+class ReferenceDataTestCase(BaseTestCase):
+    """Тесты реестра справочных данных."""
+
+    def test_reference_data_served_without_queries(self):
+        """Тест: в рамках запроса справочники не обращаются к БД."""
+        from .services import StatusService
+        from .services.reference_data import ReferenceData
+
+        ReferenceData.begin_request()
+        try:
+            with self.assertNumQueries(0):
+                self.assertEqual(StatusService.get_pending_status(), self.status_pending)
+                ReferenceData.pricing_periods()
+                ReferenceData.cities()
+        finally:
+            ReferenceData.end_request()
+
+    def test_snapshot_reloaded_after_change(self):
+        """Тест: изменение справочника сразу видно в реестре."""
+        from .services.reference_data import ReferenceData
+
+        ReferenceData.cities()
+        City.objects.create(name='Новый город', region=self.region)
+
+        self.assertIn('Новый город', [city.name for city in ReferenceData.cities()])
+
+    def test_process_local_cache_reported_outside_debug(self):
+        """Тест: кэш в памяти процесса вне DEBUG дает предупреждение rental.W001."""
+        from .checks import check_shared_cache
+
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([warning.id for warning in check_shared_cache()], ['rental.W001'])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache(), [])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(), [])
+
+
+# ==================== ТЕСТЫ ФИЛЬТРА НЕЦЕНЗУРНОЙ ЛЕКСИКИ ====================
+
+class ProfanityFilterTestCase(TestCase):
+    """Тесты однопроходного фильтра нецензурной лексики."""
+
+    def test_detection_through_obfuscation(self):
+        """Тест: мат находится сквозь leetspeak, разделители и повторы, чистый текст проходит."""
+        from .services import contains_profanity
+
+        self.assertEqual(contains_profanity('Отличное светлое помещение'), (False, []))
+        self.assertEqual(contains_profanity('ну ты $ук@')[1], ['сука'])
+        self.assertEqual(contains_profanity('х.у.й')[1], ['хуй'])
+        self.assertEqual(contains_profanity('хххуууууй')[1], ['хуй'])
+        self.assertFalse(contains_profanity('Соскучились по этому залу')[0])
+
+    def test_censor_uses_original_offsets(self):
+        """Тест: найденные слова цензурируются целиком по позициям в исходном тексте."""
+        from .services import censor_text, find_profanity
+
+        text = 'Ну и х.у.й с ним, fuck-up'
+        self.assertEqual(
+            sorted(find_profanity(text)),
+            [('fuck', 18, 22), ('хуй', 5, 10)]
+        )
+        self.assertEqual(censor_text(text), 'Ну и ***** с ним, ****-up')
+        self.assertEqual(censor_text('Чистый текст'), 'Чистый текст')
+
+    def test_word_joints_allowed_and_spaced_spellings_rejected(self):
+        from .services import censor_text, contains_profanity, validate_comment
+
+        for text in ('Тоже понравилось', 'Уже повторно бронируем', 'Мы уже пришли', 'ужели'):
+            self.assertEqual(contains_profanity(text), (False, []), text)
+        self.assertEqual(validate_comment('Тоже понравилось, уже повторно бронируем'), (True, ''))
+        self.assertEqual(censor_text('Мы уже пришли'), 'Мы уже пришли')
+        self.assertEqual(contains_profanity('ну и жопа')[1], ['жоп'])
+
+        for text in ('х у й', 'ж о п а', 'е б а т ь'):
+            self.assertTrue(contains_profanity(text)[0], text)
+            self.assertFalse(validate_comment(f'Отзыв: {text} полный')[0], text)
+
+
+# ==================== ТЕСТЫ ГЛОБАЛЬНОГО КОНТЕКСТА ====================
+
+class GlobalContextTestCase(BaseTestCase):
+    """Тесты ленивого контекстного процессора."""
+
+    def test_values_evaluated_on_access_once_per_request(self):
+        """Тест: счетчик избранного вычисляется при обращении и один раз за запрос."""
+        from django.test import RequestFactory
+        from .context_processors import global_context
+
+        Favorite.objects.create(user=self.regular_user, space=self.space)
+        request = RequestFactory().get('/spaces/')
+        request.user = self.regular_user
+
+        with self.assertNumQueries(0):
+            context = global_context(request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(context['favorites_count'], 1)
+            self.assertIs(global_context(request), context)
+            self.assertEqual(context['favorites_count'], 1)
+
+
+# ==================== ТЕСТЫ БЛОКИРОВКИ ПОЛЬЗОВАТЕЛЕЙ ====================
+
+class BlockedUserMiddlewareTestCase(BaseTestCase):
+    """Тесты проверки блокировки без запросов к БД."""
+
+    def test_unchanged_status_checked_without_queries(self):
+        """Тест: при неизменном статусе middleware не делает запросов к БД."""
+        from django.contrib.auth import SESSION_KEY
+        from django.test import RequestFactory
+        from .middleware import BlockedUserMiddleware
+
+        self.client.login(username='user_test', password='UserPass123!')
+        request = RequestFactory().get('/spaces/')
+        request.session = self.client.session
+        request.session.get(SESSION_KEY)  # загрузка сессии — работа SessionMiddleware
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(BlockedUserMiddleware(lambda r: None).process_request(request))
+
+    def test_block_forces_logout_on_next_request(self):
+        """Тест: после блокировки следующий запрос завершает сессию."""
+        from .services.user_block import UserBlockService
+
+        self.client.login(username='user_test', password='UserPass123!')
+        self.assertEqual(self.client.get(reverse('spaces_list')).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserBlockService.block(self.regular_user, reason='Спам', blocked_by=self.moderator_user)
+
+        response = self.client.get(reverse('spaces_list'))
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+# ==================== ТЕСТЫ МЕТРИК ЗАПРОСОВ ====================
+
+class RequestMetricsTestCase(BaseTestCase):
+    """Тесты заголовка Server-Timing и сводки производительности."""
+
+    @override_settings(SERVER_TIMING_PUBLIC=True)
+    def test_server_timing_header_and_aggregates(self):
+        """Тест: ответ содержит Server-Timing, запрос учтён в сводке по URL."""
+        from .services.request_metrics import RequestMetrics
+
+        RequestMetrics.aggregator.reset()
+        response = self.client.get(reverse('spaces_list'))
+
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+        rows = {row['url_name']: row for row in RequestMetrics.aggregator.snapshot()}
+        self.assertEqual(rows['spaces_list']['count'], 1)
+        self.assertGreater(rows['spaces_list']['avg_queries'], 0)
+
+    def test_repeated_queries_grouped_by_shape(self):
+        """Тест: запросы одного цикла с разными параметрами считаются повтором."""
+        from .services.request_metrics import find_repeated_queries
+
+        sql = [
+            'SELECT * FROM "space_images" WHERE "space_id" = %s',
+            'SELECT * FROM "space_images" WHERE "space_id" = 7',
+            'SELECT * FROM "spaces" WHERE "id" IN (%s, %s)',
+            'SELECT * FROM "spaces" WHERE "id" IN (%s)',
+        ]
+        self.assertEqual(find_repeated_queries(sql, threshold=3), [])
+        shapes = dict(find_repeated_queries(sql, threshold=2))
+        self.assertEqual(set(shapes.values()), {2})
+        self.assertEqual(len(shapes), 2)
+
+    @override_settings(SERVER_TIMING_PUBLIC=False)
+    def test_performance_page_staff_only(self):
+        """Тест: заголовок и страница производительности доступны только staff."""
+        response = self.client.get(reverse('spaces_list'))
+        self.assertNotIn('Server-Timing', response)
+
+        self.client.login(username='admin_test', password='AdminPass123!')
+        response = self.client.get(reverse('interior_admin:performance'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+
+    def test_prometheus_metrics_endpoint(self):
+        """Тест: /metrics отдаёт задержки по view и переходы статусов бронирований."""
+        booking = Booking.objects.create(
+            space=self.space,
+            tenant=self.regular_user,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            period=self.rental_period,
+            status=self.status_pending,
+            total_amount=Decimal('2000.00'),
+            periods_count=2,
+            price_per_period=Decimal('1000.00')
+        )
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.status = self.status_confirmed
+        booking.save()
+        self.client.get(reverse('spaces_list'))
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('interior_http_request_duration_seconds_bucket{', body)
+        self.assertIn('view="spaces_list"', body)
+        self.assertIn('interior_booking_transitions_total{from_status="new",to_status="pending"}', body)
+        self.assertIn('interior_booking_transitions_total{from_status="pending",to_status="confirmed"}', body)
+        self.assertIn('interior_email_outbox_pending', body)
+
+        with override_settings(METRICS_ALLOWED_IPS=['10.0.0.5']):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+
+
+# ==================== ТЕСТЫ ПЛАТЕЖЕЙ ====================
+
+class PaymentServiceTestCase(BaseTestCase):
+    """Тесты вызовов платежной системы (ЮKassa подменена)."""
+
+    def test_payment_calls_pass_idempotence_key(self):
+        """Тест: создание, подтверждение и отмена платежа передают ключ идемпотентности."""
+        from .services.payment_service import PaymentService
+
+        booking = Booking.objects.create(
+            space=self.space, tenant=self.regular_user,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            period=self.rental_period, status=self.status_pending,
+            total_amount=Decimal('2000.00'), periods_count=2, price_per_period=Decimal('1000.00')
+        )
+        payment = mock.Mock(id='pay-1', status='succeeded')
+        payment.confirmation.confirmation_url = 'https://pay.example/confirm'
+        payment.amount.value = '200.00'
+
+        with mock.patch.object(PaymentService, '_initialize', return_value=True), \
+                mock.patch('yookassa.Payment') as provider:
+            provider.create.return_value = payment
+            provider.capture.return_value = payment
+            provider.cancel.return_value = payment
+
+            result = PaymentService.create_payment(booking, 'https://site/return', idempotence_key='key-1')
+            self.assertTrue(result['success'], result)
+            self.assertEqual(result['confirmation_url'], 'https://pay.example/confirm')
+            self.assertEqual(provider.create.call_args.args[1], 'key-1')
+
+            result = PaymentService.capture_payment('pay-1', Decimal('200.00'), idempotence_key='key-2')
+            self.assertTrue(result['success'], result)
+            provider.capture.assert_called_once_with(
+                'pay-1', {'amount': {'value': '200.00', 'currency': 'RUB'}}, 'key-2'
+            )
+
+            self.assertTrue(PaymentService.cancel_payment('pay-1')['success'])
+            self.assertTrue(provider.cancel.call_args.args[1])
+
 
 # ==================== ИТОГОВАЯ СТАТИСТИКА ====================
 
@@ -17,7 +17,8 @@ from .views import (
     # Бронирования
     create_booking, booking_detail, cancel_booking,
     # Отзывы
-    create_review, edit_review, admin_delete_review, approve_review, manage_reviews,
+    space_reviews, create_review, edit_review, admin_delete_review, approve_review, bulk_moderate_reviews,
+    manage_reviews,
     manage_users, user_detail, block_user, unblock_user, verify_user_email,
 )
 from .views.favorites import check_favorite
@@ -117,6 +118,7 @@ urlpatterns = [
     path('payments/webhook/', payment_webhook, name='payment_webhook'),
 
     # ============== ОТЗЫВЫ ==============
+    path('spaces/<int:pk>/reviews/', space_reviews, name='space_reviews'),
     path('spaces/<int:pk>/review/', create_review, name='create_review'),
     path('reviews/<int:pk>/delete/', delete_review, name='delete_review'),
     path('reviews/<int:pk>/user-edit/', user_edit_review, name='user_edit_review'),
@@ -124,6 +126,7 @@ urlpatterns = [
     path('reviews/<int:pk>/admin-delete/', admin_delete_review, name='admin_delete_review'),
     path('reviews/<int:pk>/approve/', approve_review, name='approve_review'),
     path('manage/reviews/', manage_reviews, name='manage_reviews'),
+    path('manage/reviews/bulk/', bulk_moderate_reviews, name='bulk_moderate_reviews'),
 
     # ============== API (AJAX) ==============
     path('api/price/<int:space_id>/<int:period_id>/', get_price_for_period, name='get_price'),
@@ -16,6 +16,7 @@
 #   users.py      - Управление пользователями (модератор)
 #   categories.py - Управление категориями (модератор)
 #   admin_panel.py - Панель управления для модераторов
+#   metrics.py    - Метрики Prometheus (/metrics, подключается в renta/urls.py)
 #
 # ПРОЕКТ: ООО "ИНТЕРЬЕР" - Сайт аренды помещений
 # =============================================================================
@@ -34,7 +35,10 @@ from .bookings import (
     create_booking, booking_detail, cancel_booking,
     confirm_booking, reject_booking, manage_bookings, get_price_for_period
 )
-from .reviews import create_review, edit_review, admin_delete_review, approve_review, manage_reviews
+from .reviews import (
+    space_reviews, create_review, edit_review, admin_delete_review, approve_review, bulk_moderate_reviews,
+    manage_reviews
+)
 from .users import manage_users, user_detail, block_user, unblock_user, verify_user_email
 from .admin_panel import admin_panel
 
@@ -86,10 +90,12 @@ __all__ = [
     # -------------------------------------------------------------------------
     # ОТЗЫВЫ
     # -------------------------------------------------------------------------
+    'space_reviews',
     'create_review',
     'edit_review',
     'admin_delete_review',
     'approve_review',
+    'bulk_moderate_reviews',
     'manage_reviews',
 
     # -------------------------------------------------------------------------
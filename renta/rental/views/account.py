@@ -13,12 +13,13 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator, Page, EmptyPage, PageNotAnInteger
 from django.db import DatabaseError
-from django.db.models import Sum, Count
+from django.db.models import Count
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 
 from ..forms import UserProfileForm
 from ..models import Booking, Favorite, Review, CustomUser
+from ..services.user_stats import UserStatsService
 
 # Константы пагинации
 RECENT_BOOKINGS_LIMIT: int = 5
@@ -97,16 +98,14 @@ def dashboard(request: HttpRequest) -> HttpResponse:
             'space__images', 'space__prices'
         ).order_by('-created_at')[:RECENT_FAVORITES_LIMIT]
 
-        # User statistics
+        # User statistics (одна строка UserStats)
+        user_stats = UserStatsService.get(user.pk)
         stats: dict[str, Any] = {
-            'bookings_total': Booking.objects.filter(tenant=user).count(),
-            'bookings_active': Booking.objects.active().filter(tenant=user).count(),
-            'favorites_count': Favorite.objects.filter(user=user).count(),
-            'reviews_count': Review.objects.filter(author=user).count(),
-            'total_spent': Booking.objects.filter(
-                tenant=user,
-                status__code__in=['confirmed', 'completed']
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
+            'bookings_total': user_stats.bookings_total,
+            'bookings_active': user_stats.bookings_active,
+            'favorites_count': user_stats.favorites_count,
+            'reviews_count': user_stats.reviews_count,
+            'total_spent': user_stats.total_spent,
         }
 
         context: dict[str, Any] = {
@@ -227,29 +226,15 @@ def view_user_profile(request: HttpRequest, pk: int) -> HttpResponse:
             messages.error(request, 'У вас нет прав для просмотра профилей пользователей')
             return redirect('dashboard')
 
-        profile_user: CustomUser = get_object_or_404(
-            CustomUser.objects.select_related('profile'),
-            pk=pk
-        )
+        profile_user: CustomUser = get_object_or_404(CustomUser, pk=pk)
 
-        user_stats: dict[str, int] = {
-            'total_bookings': Booking.objects.filter(tenant=profile_user).count(),
-            'confirmed_bookings': Booking.objects.filter(
-                tenant=profile_user,
-                status__code__in=['confirmed', 'completed']
-            ).count(),
-            'cancelled_bookings': Booking.objects.filter(
-                tenant=profile_user,
-                status__code='cancelled'
-            ).count(),
-            'pending_bookings': Booking.objects.filter(
-                tenant=profile_user,
-                status__code='pending'
-            ).count(),
-            'total_spent': Booking.objects.filter(
-                tenant=profile_user,
-                status__code__in=['confirmed', 'completed']
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
+        stats = UserStatsService.get(profile_user.pk)
+        user_stats: dict[str, Any] = {
+            'total_bookings': stats.bookings_total,
+            'confirmed_bookings': stats.bookings_paid,
+            'cancelled_bookings': stats.bookings_cancelled,
+            'pending_bookings': stats.bookings_pending,
+            'total_spent': stats.total_spent,
         }
 
         recent_bookings = Booking.objects.filter(
@@ -286,7 +271,7 @@ def public_user_profile(request: HttpRequest, pk: int) -> HttpResponse:
 
         # Статистика (только публичная)
         user_stats: dict[str, int] = {
-            'reviews_count': Review.objects.filter(author=profile_user, is_approved=True).count(),
+            'reviews_count': UserStatsService.get(profile_user.pk).reviews_approved,
         }
 
         # Последние одобренные отзывы пользователя
@@ -33,9 +33,8 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse
-from django.db.models import Count, Q, Avg
 
-from ..models import Space, SpaceCategory, Booking, Review, CustomUser, City
+from ..services.stats_service import StatsService
 
 
 def is_moderator_or_admin(user) -> bool:
@@ -87,53 +86,13 @@ def admin_panel(request: HttpRequest) -> HttpResponse:
         messages.error(request, 'У вас нет доступа к панели управления.')
         return render(request, 'errors/403.html', status=403)
 
-    # Статистика помещений
-    spaces_stats = {
-        'total': Space.objects.count(),
-        'active': Space.objects.filter(is_active=True).count(),
-        'inactive': Space.objects.filter(is_active=False).count(),
-        'featured': Space.objects.filter(is_featured=True).count(),
-    }
-
-    # Статистика категорий
-    categories_stats = {
-        'total': SpaceCategory.objects.count(),
-        'active': SpaceCategory.objects.filter(is_active=True).count(),
-        'inactive': SpaceCategory.objects.filter(is_active=False).count(),
-    }
-
-    # Статистика бронирований
-    bookings_stats = {
-        'total': Booking.objects.count(),
-        'pending': Booking.objects.filter(status__code='pending').count(),
-        'confirmed': Booking.objects.filter(status__code='confirmed').count(),
-        'completed': Booking.objects.filter(status__code='completed').count(),
-        'cancelled': Booking.objects.filter(status__code='cancelled').count(),
-    }
-
-    # Статистика отзывов
-    reviews_stats = {
-        'total': Review.objects.count(),
-        'pending': Review.objects.filter(is_approved=False).count(),
-        'approved': Review.objects.filter(is_approved=True).count(),
-        'avg_rating': Review.objects.filter(is_approved=True).aggregate(avg=Avg('rating'))['avg'] or 0,
-    }
-
-    # Статистика пользователей
-    users_stats = {
-        'total': CustomUser.objects.count(),
-        'active': CustomUser.objects.filter(is_active=True).count(),
-        'blocked': CustomUser.objects.filter(is_blocked=True).count(),
-        'verified': CustomUser.objects.filter(email_verified=True).count(),
-        'admins': CustomUser.objects.filter(Q(is_staff=True) | Q(user_type='admin')).count(),
-        'moderators': CustomUser.objects.filter(user_type='moderator').count(),
-    }
-
-    # Статистика городов
-    cities_stats = {
-        'total': City.objects.count(),
-        'active': City.objects.filter(is_active=True).count(),
-    }
+    # Сводные счетчики: один запрос на модель, результат кэшируется
+    spaces_stats = StatsService.spaces()
+    categories_stats = StatsService.categories()
+    bookings_stats = StatsService.bookings()
+    reviews_stats = StatsService.reviews()
+    users_stats = StatsService.users()
+    cities_stats = StatsService.cities()
 
     # Секции управления с иконками и описаниями
     management_sections = [
@@ -175,10 +134,10 @@ def admin_panel(request: HttpRequest) -> HttpResponse:
             'color': 'success',
             'stats': [
                 {'label': 'Всего', 'value': bookings_stats['total']},
-                {'label': 'Ожидают', 'value': bookings_stats['pending']},
-                {'label': 'Подтверждено', 'value': bookings_stats['confirmed']},
+                {'label': 'Ожидают', 'value': bookings_stats.get('pending', 0)},
+                {'label': 'Подтверждено', 'value': bookings_stats.get('confirmed', 0)},
             ],
-            'badge': bookings_stats['pending'] if bookings_stats['pending'] > 0 else None,
+            'badge': bookings_stats.get('pending') or None,
             'actions': []
         },
         {
@@ -36,7 +36,7 @@ from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
@@ -304,25 +304,27 @@ def register_view(request: HttpRequest) -> HttpResponse:
 
         if form.is_valid():
             try:
-                user = form.save()
+                # Пользователь и письмо с кодом (в очереди email_outbox)
+                # сохраняются одной транзакцией
+                with transaction.atomic():
+                    user = form.save()
 
-                # Генерируем код подтверждения
-                code = ''.join(random.choices(string.digits, k=6))
+                    # Генерируем код подтверждения
+                    code = ''.join(random.choices(string.digits, k=6))
+                    code_queued = send_verification_code(user, code, request)
 
                 # Сохраняем в сессию
                 request.session['verification_user_id'] = user.id
                 request.session['verification_code'] = code
                 request.session['verification_code_time'] = timezone.now().isoformat()
 
-                # Отправляем код
-                try:
-                    send_verification_code(user, code, request)
+                if code_queued:
                     messages.info(
                         request,
                         'Регистрация почти завершена! Введите код, отправленный на вашу почту.'
                     )
-                except Exception as e:
-                    logger.warning(f"Could not send verification code: {e}")
+                else:
+                    logger.warning(f"Could not queue verification code for {user.email}")
                     messages.info(request, f'Код подтверждения: {code}')
 
                 return redirect('verify_email_code')
@@ -51,6 +51,7 @@ from django.views.decorators.http import require_POST
 
 from ..forms import BookingForm
 from ..models import Space, SpacePrice, PricingPeriod, Booking, BookingStatus
+from ..services.stats_service import StatsService
 from ..services.status_service import StatusService, StatusCodes
 from ..core.pagination import paginate, DEFAULT_PAGE_SIZE
 from ..core.decorators import moderator_required, handle_view_errors
@@ -450,14 +451,12 @@ def manage_bookings(request: HttpRequest) -> HttpResponse:
         if pending_only:
             bookings = bookings.filter(status__code=StatusCodes.PENDING)
 
-        from django.db.models import Count
-        status_stats = Booking.objects.values(
-            'status__code', 'status__name', 'status__color'
-        ).annotate(count=Count('id'))
+        counts = StatsService.bookings()
+        status_stats = StatsService.booking_statuses()
 
-        pending_count: int = Booking.objects.filter(status__code=StatusCodes.PENDING).count()
-        confirmed_count: int = Booking.objects.filter(status__code=StatusCodes.CONFIRMED).count()
-        completed_count: int = Booking.objects.filter(status__code=StatusCodes.COMPLETED).count()
+        pending_count: int = counts.get(StatusCodes.PENDING, 0)
+        confirmed_count: int = counts.get(StatusCodes.CONFIRMED, 0)
+        completed_count: int = counts.get(StatusCodes.COMPLETED, 0)
 
         bookings_page, paginator = paginate(bookings, request, BOOKINGS_PER_PAGE)
 
@@ -538,13 +537,20 @@ def cancel_booking(request: HttpRequest, pk: int) -> HttpResponse:
 
 
 @login_required
-def get_price_for_period(request: HttpRequest) -> JsonResponse:
+def get_price_for_period(
+        request: HttpRequest,
+        space_id: Optional[int] = None,
+        period_id: Optional[int] = None
+) -> JsonResponse:
     """
     AJAX endpoint для получения цены за период.
+
+    Параметры берутся из URL (api/price/<space_id>/<period_id>/)
+    или из GET (space_id, period_id, periods_count).
     """
     try:
-        space_id = request.GET.get('space_id')
-        period_id = request.GET.get('period_id')
+        space_id = space_id or request.GET.get('space_id')
+        period_id = period_id or request.GET.get('period_id')
         periods_count = request.GET.get('periods_count', 1)
 
         if not space_id or not period_id:
@@ -20,7 +20,7 @@
 Особенности:
 - Проверка прав доступа через can_moderate флаг пользователя
 - Генерация SEO-дружественных slug из названий категорий
-- Использование кэширования для ускорения работы (header_categories)
+- Реестр справочников (header_categories) сбрасывается сигналами при изменениях
 - Подсчет количества помещений в каждой категории через аннотации
 - AJAX поддержка для динамического переключения статусов
 - Валидация входных данных на стороне сервера
@@ -32,7 +32,6 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from django.core.cache import cache
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.db.models import Count, Q, QuerySet
 from django.http import HttpRequest, HttpResponse, JsonResponse
@@ -168,9 +167,6 @@ def add_category(request: HttpRequest) -> HttpResponse:
             is_active=is_active
         )
 
-        # Очищаем кэш категорий
-        cache.delete('header_categories')
-
         messages.success(request, f'Категория "{name}" успешно создана')
         return redirect('manage_categories')
 
@@ -251,9 +247,6 @@ def edit_category(request: HttpRequest, pk: int) -> HttpResponse:
         category.is_active = is_active
         category.save()
 
-        # Очищаем кэш категорий
-        cache.delete('header_categories')
-
         messages.success(request, f'Категория "{name}" успешно обновлена')
         return redirect('manage_categories')
 
@@ -303,9 +296,6 @@ def delete_category(request: HttpRequest, pk: int) -> HttpResponse:
         category_name = category.name
         category.delete()
 
-        # Очищаем кэш категорий
-        cache.delete('header_categories')
-
         messages.success(request, f'Категория "{category_name}" успешно удалена')
 
     return redirect('manage_categories')
@@ -336,9 +326,6 @@ def toggle_category_status(request: HttpRequest, pk: int) -> JsonResponse:
     category.is_active = not category.is_active
     category.save()
 
-    # Очищаем кэш категорий
-    cache.delete('header_categories')
-
     return JsonResponse({
         'success': True,
         'is_active': category.is_active,
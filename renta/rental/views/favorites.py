@@ -13,7 +13,7 @@
 Особенности:
 - Представления работают только через AJAX (используют @require_POST)
 - Защита декораторами @login_required и @require_POST
-- Оптимизированные запросы к базе данных
+- Состояние и количество избранного читаются из индекса (FavoritesIndex)
 - Подробное логирование ошибок для отладки
 - Дружественные JSON ответы для фронтенд интеграции
 ====================================================================
@@ -30,6 +30,7 @@ from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST
 
 from ..models import Space, Favorite
+from ..services.favorites_index import FavoritesIndex
 
 
 logger = logging.getLogger(__name__)
@@ -79,17 +80,24 @@ def toggle_favorite(request: HttpRequest, pk: int) -> JsonResponse:
         if not created:
             # Помещение уже было в избранном - удаляем
             favorite.delete()
+
+        # Индекс обновляется сигналами модели Favorite после коммита,
+        # поэтому текущее изменение учитывается явно
+        favorite_ids = FavoritesIndex.get(request.user.id)
+        favorites_count = len(favorite_ids | {space.pk} if created else favorite_ids - {space.pk})
+
+        if not created:
             return JsonResponse({
                 'status': 'removed',
                 'message': 'Удалено из избранного',
-                'favorites_count': Favorite.objects.filter(user=request.user).count()
+                'favorites_count': favorites_count
             })
 
         # Помещение добавлено в избранное
         return JsonResponse({
             'status': 'added',
             'message': 'Добавлено в избранное',
-            'favorites_count': Favorite.objects.filter(user=request.user).count()
+            'favorites_count': favorites_count
         })
 
     except Http404:
@@ -138,11 +146,8 @@ def check_favorite(request: HttpRequest, pk: int) -> JsonResponse:
         Ошибка: {'is_favorite': false, 'error': 'Произошла ошибка'}
     """
     try:
-        # Проверяем существование записи в избранном
-        is_favorite = Favorite.objects.filter(
-            user=request.user,
-            space_id=pk
-        ).exists()
+        # Проверяем по индексу избранного (без запроса к БД)
+        is_favorite = FavoritesIndex.contains(request.user.id, pk)
 
         return JsonResponse({'is_favorite': is_favorite})
 
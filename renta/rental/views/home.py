@@ -39,6 +39,7 @@ from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 
 from ..models import Space, City, SpaceCategory, CustomUser
+from ..services.reference_data import ReferenceData
 
 # Константы
 FEATURED_SPACES_LIMIT: int = 6
@@ -77,7 +78,7 @@ def home(request: HttpRequest) -> HttpResponse:
     """
     try:
         # Cities for search form
-        cities: QuerySet[City] = City.objects.filter(is_active=True).order_by('name')
+        cities = ReferenceData.cities()
 
         # Categories with space counts
         categories: QuerySet[SpaceCategory] = SpaceCategory.objects.filter(is_active=True).annotate(
@@ -0,0 +1,54 @@
+"""
+====================================================================
+ВЫДАЧА МЕТРИК PROMETHEUS ДЛЯ САЙТА АРЕНДЫ ПОМЕЩЕНИЙ "ИНТЕРЬЕР"
+====================================================================
+Этот файл содержит endpoint /metrics в текстовом формате Prometheus.
+
+Основные представления:
+- metrics_view: Метрики приложения (см. services/prometheus_metrics.py)
+
+Особенности:
+- Доступ с заголовком "Authorization: Bearer <METRICS_TOKEN>" или с
+  адресов METRICS_ALLOWED_IPS (по REMOTE_ADDR); по умолчанию список
+  адресов пуст, так как за локальным прокси REMOTE_ADDR — адрес прокси
+- В многопроцессном режиме отдаются суммарные значения всех воркеров
+====================================================================
+"""
+
+from __future__ import annotations
+
+import hmac
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from ..services.prometheus_metrics import PrometheusMetrics
+
+
+def _metrics_allowed(request: HttpRequest) -> bool:
+    """Разрешён ли сбор метрик этому клиенту."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if hmac.compare_digest(header, f'Bearer {token}'):
+            return True
+    remote_addr = request.META.get('REMOTE_ADDR')
+    return bool(remote_addr) and remote_addr in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+@require_GET
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Метрики приложения для Prometheus.
+
+    Args:
+        request: HTTP запрос
+
+    Returns:
+        HttpResponse: Метрики в текстовом формате или 403
+    """
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    body, content_type = PrometheusMetrics.render()
+    return HttpResponse(body, content_type=content_type)
@@ -12,24 +12,65 @@ from typing import Any
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import DatabaseError
-from django.db.models import Q, Avg
-from django.http import HttpRequest, HttpResponse, Http404
+from django.db.models import Q
+from django.http import HttpRequest, HttpResponse, Http404, JsonResponse
 from django.shortcuts import redirect, get_object_or_404, render
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 
 from ..forms.reviews import ReviewForm, ReviewCreateForm, ReviewEditForm
 from ..models import Space, Review, Booking
+from ..core import parse_int
 from ..core.pagination import paginate
 from ..services.status_service import StatusCodes
 from ..services.profanity_filter import validate_comment
+from ..services.review_feed import REVIEW_FEED_FORMATS, ReviewFeed
+from ..services.review_moderation import ReviewModeration
+from ..services.stats_service import StatsService
 
 
 # Константы
 REVIEWS_PER_PAGE: int = 10
+BULK_MODERATION_ACTIONS: frozenset[str] = frozenset({'approve', 'reject'})
+BULK_MODERATION_MAX_IDS: int = 1000
 
 logger = logging.getLogger(__name__)
 
 
+@require_GET
+def space_reviews(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    AJAX endpoint ленты одобренных отзывов помещения.
+
+    Отзывы отдаются страницами от новых к старым с навигацией по
+    курсору (параметр after), страницы кэшируются (services/review_feed.py).
+
+    Параметры GET:
+        after: Курсор следующей страницы (next_cursor предыдущего ответа)
+        format: 'html' (по умолчанию) — HTML фрагмент, 'json' — данные отзывов
+
+    Returns:
+        JsonResponse: JSON со страницей ленты:
+            - success: Успешность операции
+            - html | reviews: HTML отзывов или список отзывов
+            - next_cursor: Курсор следующей страницы (None — страница последняя)
+            - has_next: Есть ли следующая страница
+    """
+    fmt = request.GET.get('format', 'html')
+    if fmt not in REVIEW_FEED_FORMATS:
+        return JsonResponse({'success': False, 'error': 'Неизвестный формат'}, status=400)
+
+    if not Space.objects.filter(pk=pk, is_active=True).exists():
+        return JsonResponse({'success': False, 'error': 'Помещение не найдено'}, status=404)
+
+    try:
+        data = ReviewFeed.get_page(request, pk, fmt)
+    except DatabaseError as e:
+        logger.error(f"Error in space_reviews view for pk={pk}: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'error': 'Ошибка при загрузке отзывов'}, status=500)
+
+    return JsonResponse({'success': True, **data})
+
+
 @login_required
 @require_POST
 def create_review(request: HttpRequest, pk: int) -> HttpResponse:
@@ -268,14 +309,13 @@ def approve_review(request: HttpRequest, pk: int) -> HttpResponse:
             return redirect('home')
 
         review: Review = get_object_or_404(Review, pk=pk)
-        review.is_approved = True
-        review.save()
+        ReviewModeration.set_approved([review.pk], approved=True)
         messages.success(request, 'Отзыв одобрен и опубликован')
 
         referer = request.META.get('HTTP_REFERER')
         if referer:
             return redirect(referer)
-        return redirect('space_detail', pk=review.space.pk)
+        return redirect('space_detail', pk=review.space_id)
 
     except Http404:
         raise
@@ -285,6 +325,54 @@ def approve_review(request: HttpRequest, pk: int) -> HttpResponse:
         return redirect('home')
 
 
+@login_required
+@require_POST
+def bulk_moderate_reviews(request: HttpRequest) -> JsonResponse:
+    """
+    AJAX endpoint для массового одобрения или отклонения отзывов
+    (только для администраторов и модераторов).
+
+    Параметры POST:
+        ids: ID отзывов (повторяющийся параметр)
+        action: 'approve' | 'reject'
+
+    Returns:
+        JsonResponse: JSON с результатом операции:
+            - success: Успешность операции
+            - updated: Количество отзывов, статус которых изменился
+            - message / error: Сообщение о результате
+    """
+    if not request.user.can_moderate:
+        return JsonResponse({'success': False, 'error': 'Недостаточно прав'}, status=403)
+
+    action = request.POST.get('action')
+    if action not in BULK_MODERATION_ACTIONS:
+        return JsonResponse({'success': False, 'error': 'Неизвестное действие'}, status=400)
+
+    review_ids = {parse_int(value) for value in request.POST.getlist('ids')}
+    review_ids.discard(None)
+    if not review_ids:
+        return JsonResponse({'success': False, 'error': 'Не выбраны отзывы'}, status=400)
+    if len(review_ids) > BULK_MODERATION_MAX_IDS:
+        return JsonResponse({
+            'success': False,
+            'error': f'Можно выбрать не более {BULK_MODERATION_MAX_IDS} отзывов'
+        }, status=400)
+
+    try:
+        approved = action == 'approve'
+        updated = ReviewModeration.set_approved(review_ids, approved=approved)
+    except DatabaseError as e:
+        logger.error(f"Error in bulk_moderate_reviews view: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'error': 'Ошибка при модерации отзывов'}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'message': f'{"Одобрено" if approved else "Отклонено"} отзывов: {updated}'
+    })
+
+
 @login_required
 def manage_reviews(request: HttpRequest) -> HttpResponse:
     """
@@ -325,11 +413,11 @@ def manage_reviews(request: HttpRequest) -> HttpResponse:
                 Q(comment__icontains=search_query)
             )
 
-        all_reviews = Review.objects.all()
-        pending_count = all_reviews.filter(is_approved=False).count()
-        approved_count = all_reviews.filter(is_approved=True).count()
-        total_count = all_reviews.count()
-        avg_rating = all_reviews.aggregate(avg=Avg('rating'))['avg'] or 0
+        counts = StatsService.reviews()
+        pending_count = counts['pending']
+        approved_count = counts['approved']
+        total_count = counts['total']
+        avg_rating = counts['avg_rating_all']
 
         reviews_page, _ = paginate(reviews, request, REVIEWS_PER_PAGE)
 
@@ -9,7 +9,7 @@
 Основные представления:
 - spaces_list: Список помещений с фильтрацией, сортировкой и пагинацией
 - spaces_ajax: AJAX endpoint для динамической фильтрации помещений
-- space_detail: Детальная страница помещения с отзывами, изображениями и ценами
+- space_detail: Детальная страница помещения с рейтингом, изображениями и ценами
 - manage_spaces: Панель управления помещениями для администраторов
 - add_space: Добавление нового помещения
 - edit_space: Редактирование существующего помещения
@@ -26,7 +26,6 @@
 - MAX_ITEMS_PER_PAGE: Максимальное количество элементов на странице
 - MIN_RATING, MAX_RATING: Границы рейтинга
 - RELATED_SPACES_LIMIT: Количество похожих помещений на детальной странице
-- MAX_RECENT_REVIEWS: Максимальное количество отображаемых отзывов
 
 Особенности:
 - поиск
@@ -43,7 +42,7 @@ import logging
 import re
 from typing import Any
 
-from django.db.models import Q, Avg, Count, Min, QuerySet
+from django.db.models import Q, Min, Prefetch, QuerySet
 from django.core.paginator import Paginator, Page, EmptyPage, PageNotAnInteger
 from django.http import HttpRequest, HttpResponse, Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
@@ -52,9 +51,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
 
-from ..models import Space, City, SpaceCategory, Favorite, SpaceImage, SpacePrice, PricingPeriod
+from ..models import Space, SpaceImage, SpacePrice
 from ..forms.spaces import SpaceForm, SpaceImageForm
+from ..services.favorites_index import FavoritesIndex
 from ..services.geocoding_service import geocode_address
+from ..services.reference_data import ReferenceData
+from ..services.stats_service import StatsService
 
 # Константы пагинации
 DEFAULT_ITEMS_PER_PAGE: int = 12
@@ -62,7 +64,6 @@ MAX_ITEMS_PER_PAGE: int = 48
 MIN_RATING: int = 1
 MAX_RATING: int = 5
 RELATED_SPACES_LIMIT: int = 4
-MAX_RECENT_REVIEWS: int = 10
 
 logger = logging.getLogger(__name__)
 
@@ -292,12 +293,12 @@ def spaces_list(request: HttpRequest) -> HttpResponse:
         spaces: QuerySet[Space] = Space.objects.active().select_related(
             'city', 'city__region', 'category', 'owner'
         ).prefetch_related(
-            'images', 'prices', 'prices__period', 'reviews'
+            'images', 'prices', 'prices__period'
         )
 
         # Get filter data
-        cities: QuerySet[City] = City.objects.filter(is_active=True).order_by('name')
-        categories: QuerySet[SpaceCategory] = SpaceCategory.objects.filter(is_active=True).order_by('name')
+        cities = ReferenceData.cities()
+        categories = ReferenceData.categories()
 
         category_param = request.GET.get('category', '')
         category_ids = []
@@ -322,12 +323,11 @@ def spaces_list(request: HttpRequest) -> HttpResponse:
         # Apply filters
         spaces = _apply_filters(spaces, filters)
 
-        # Add annotations for sorting and display
+        # Add annotations for sorting
+        # (рейтинг карточек и сортировка берутся из счетчиков рейтинга помещения)
         spaces = spaces.annotate(
-            min_price_value=Min('prices__price'),
-            avg_rating=Avg('reviews__rating'),
-            reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
-        )
+            min_price_value=Min('prices__price')
+        ).with_avg_rating()
 
         # Apply sorting
         spaces = _apply_sorting(spaces, sort_by)
@@ -345,13 +345,8 @@ def spaces_list(request: HttpRequest) -> HttpResponse:
         except (EmptyPage, PageNotAnInteger):
             spaces_page = paginator.get_page(1)
 
-        # Get favorite IDs for authenticated users
-        favorite_ids: set[int] = set()
-        if request.user.is_authenticated:
-            favorite_ids = set(
-                Favorite.objects.filter(user=request.user)
-                .values_list('space_id', flat=True)
-            )
+        # ID избранных помещений из индекса (без запроса к БД)
+        favorite_ids = FavoritesIndex.get(request.user.id)
 
         context: dict[str, Any] = {
             'spaces': spaces_page,
@@ -409,7 +404,7 @@ def spaces_ajax(request: HttpRequest) -> JsonResponse:
         spaces: QuerySet[Space] = Space.objects.active().select_related(
             'city', 'city__region', 'category', 'owner'
         ).prefetch_related(
-            'images', 'prices', 'prices__period', 'reviews'
+            'images', 'prices', 'prices__period'
         )
 
         category_param = request.GET.get('category', '')
@@ -436,11 +431,10 @@ def spaces_ajax(request: HttpRequest) -> JsonResponse:
         spaces = _apply_filters(spaces, filters)
 
         # Add annotations
+        # (рейтинг карточек и сортировка берутся из счетчиков рейтинга помещения)
         spaces = spaces.annotate(
-            min_price_value=Min('prices__price'),
-            avg_rating=Avg('reviews__rating'),
-            reviews_count=Count('reviews', filter=Q(reviews__is_approved=True))
-        )
+            min_price_value=Min('prices__price')
+        ).with_avg_rating()
 
         # Apply sorting
         spaces = _apply_sorting(spaces, sort_by)
@@ -458,13 +452,8 @@ def spaces_ajax(request: HttpRequest) -> JsonResponse:
         except (EmptyPage, PageNotAnInteger):
             spaces_page = paginator.get_page(1)
 
-        # Get favorite IDs for authenticated users
-        favorite_ids: set[int] = set()
-        if request.user.is_authenticated:
-            favorite_ids = set(
-                Favorite.objects.filter(user=request.user)
-                .values_list('space_id', flat=True)
-            )
+        # ID избранных помещений из индекса (без запроса к БД)
+        favorite_ids = FavoritesIndex.get(request.user.id)
 
         # Рендерим только карточки
         html = render_to_string('spaces/_spaces_grid.html', {
@@ -510,7 +499,6 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
         - main_image: Главное (основное) изображение
         - space_prices: Активные цены помещения по периодам
         - related_spaces: Похожие помещения (та же категория или город)
-        - reviews: Последние одобренные отзывы
         - avg_rating: Средний рейтинг (округленный до 1 знака)
         - reviews_count: Общее количество одобренных отзывов
         - rating_distribution: Распределение рейтингов по звездам
@@ -524,10 +512,7 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
                 'city', 'city__region', 'category', 'owner'
             ).prefetch_related(
                 'images',
-                'prices',
-                'prices__period',
-                'reviews',
-                'reviews__author'
+                Prefetch('prices', queryset=SpacePrice.objects.select_related('period'))
             ),
             pk=pk,
             is_active=True
@@ -539,12 +524,12 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
         except Exception as e:
             logger.warning(f"Failed to increment views for space {pk}: {e}")
 
-        # Get images
-        images = space.get_all_images()
-        main_image = images.filter(is_primary=True).first() or images.first()
+        # Get images (из prefetch_related, без отдельных запросов)
+        images = list(space.images.all())
+        main_image = space.get_main_image()
 
         # Get active prices
-        space_prices = space.prices.filter(is_active=True).select_related('period')
+        space_prices = [price for price in space.prices.all() if price.is_active]
 
         # Related spaces (same category or city)
         related_spaces: QuerySet[Space] = Space.objects.active().filter(
@@ -554,29 +539,16 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
         ).select_related(
             'city', 'category'
         ).prefetch_related(
-            'images', 'prices'
+            'images'
         ).annotate(
             min_price_value=Min('prices__price')
         ).order_by('?')[:RELATED_SPACES_LIMIT]
 
-        # Approved reviews with stats
-        approved_reviews = space.reviews.filter(is_approved=True)
-        reviews = approved_reviews.select_related(
-            'author'
-        ).order_by('-created_at')[:MAX_RECENT_REVIEWS]
-
-        reviews_stats: dict[str, Any] = approved_reviews.aggregate(
-            avg_rating=Avg('rating'),
-            total_count=Count('id')
-        )
-        avg_rating: float = reviews_stats['avg_rating'] or 0
-        reviews_count: int = reviews_stats['total_count'] or 0
-
-        # Rating distribution
-        rating_distribution: dict[int, int] = {
-            i: approved_reviews.filter(rating=i).count()
-            for i in range(MIN_RATING, MAX_RATING + 1)
-        }
+        # Отзывы загружаются страницами с ленты space_reviews (views/reviews.py)
+        # Статистика и распределение по звёздам из счетчиков помещения
+        avg_rating: float = space.get_avg_rating()
+        reviews_count: int = space.get_reviews_count()
+        rating_distribution: dict[int, int] = space.get_rating_distribution()
 
         # Convert to list for template iteration
         rating_list = []
@@ -593,9 +565,7 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
         is_favorite: bool = False
         can_review: bool = False
         if request.user.is_authenticated:
-            is_favorite = Favorite.objects.filter(
-                user=request.user, space=space
-            ).exists()
+            is_favorite = FavoritesIndex.contains(request.user.id, space.id)
             can_review = not space.reviews.filter(author=request.user).exists()
 
         context: dict[str, Any] = {
@@ -604,8 +574,7 @@ def space_detail(request: HttpRequest, pk: int) -> HttpResponse:
             'main_image': main_image,
             'space_prices': space_prices,
             'related_spaces': related_spaces,
-            'reviews': reviews,
-            'avg_rating': round(avg_rating, 1),
+            'avg_rating': avg_rating,
             'reviews_count': reviews_count,
             'rating_distribution': rating_distribution,
             'rating_list': rating_list,
@@ -651,12 +620,7 @@ def manage_spaces(request: HttpRequest) -> HttpResponse:
     ).prefetch_related('images').order_by('-created_at')
 
     # Статистика
-    stats = {
-        'total': spaces.count(),
-        'active': spaces.filter(is_active=True).count(),
-        'featured': spaces.filter(is_featured=True).count(),
-        'inactive': spaces.filter(is_active=False).count(),
-    }
+    stats = StatsService.spaces()
 
     # Пагинация
     paginator = Paginator(spaces, 12)
@@ -681,7 +645,7 @@ def add_space(request: HttpRequest) -> HttpResponse:
         messages.error(request, 'У вас нет прав для добавления помещений')
         return redirect('dashboard')
 
-    pricing_periods = PricingPeriod.objects.all().order_by('sort_order')
+    pricing_periods = ReferenceData.pricing_periods()
 
     # ИСПРАВЛЕНИЕ: Используем правильное имя переменной из settings.py
     yandex_api_key = getattr(settings, 'YANDEX_GEOCODER_API_KEY', '')
@@ -764,7 +728,7 @@ def edit_space(request: HttpRequest, pk: int) -> HttpResponse:
         messages.error(request, 'У вас нет прав для редактирования этого помещения')
         return redirect('dashboard')
 
-    pricing_periods = PricingPeriod.objects.all().order_by('sort_order')
+    pricing_periods = ReferenceData.pricing_periods()
     current_prices = {sp.period_id: sp.price for sp in space.prices.all()}
     yandex_api_key = getattr(settings, 'YANDEX_MAPS_API_KEY', '')
 
@@ -21,6 +21,8 @@
 
 Вспомогательные функции:
 - _get_users_queryset: Общая логика получения и фильтрации пользователей
+- _fill_missing_stats: Статистика пользователям страницы без строки UserStats
+- _moderation_stats: Счетчики пользователей для страницы управления
 
 Константы:
 - USERS_PER_PAGE: Количество пользователей на странице по умолчанию
@@ -40,17 +42,19 @@ from typing import Any
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Sum, Q
+from django.db.models import F, Q
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_POST
-from django.utils import timezone
 
-from ..models import CustomUser, Booking, Review, Favorite
+from ..models import CustomUser, Booking, Review
 from ..core.pagination import paginate
 from ..core.decorators import moderator_required
 from ..forms.users import UserEditForm
+from ..services.stats_service import StatsService
+from ..services.user_block import UserBlockService
+from ..services.user_stats import UserStatsService
 
 
 USERS_PER_PAGE: int = 20
@@ -62,12 +66,13 @@ def _get_users_queryset(request: HttpRequest):
     """
     Общая логика получения и фильтрации пользователей.
     """
+    # Счетчики из строки статистики пользователя (UserStats, один LEFT JOIN)
     users = CustomUser.objects.filter(
         is_superuser=False
     ).annotate(
-        bookings_count=Count('bookings'),
-        reviews_count=Count('reviews'),
-        total_spent=Sum('bookings__total_amount', filter=Q(bookings__status__code__in=['confirmed', 'completed']))
+        bookings_count=F('activity_stats__bookings_total'),
+        reviews_count=F('activity_stats__reviews_count'),
+        total_spent=F('activity_stats__total_spent'),
     ).order_by('-created_at')
 
     user_type_filter = request.GET.get('type', '')
@@ -95,6 +100,37 @@ def _get_users_queryset(request: HttpRequest):
     return users, user_type_filter, status_filter, search_query
 
 
+def _fill_missing_stats(users_page: Any) -> None:
+    """
+    Подставить статистику пользователям страницы, у которых ее еще нет.
+
+    Строки статистики создаются пересчетом одним набором запросов
+    на всю страницу (обычно только для пользователей, созданных до
+    появления UserStats и не обработанных командой rebuild_user_stats).
+    """
+    missing = [u.pk for u in users_page if u.bookings_count is None]
+    if not missing:
+        return
+    stats = UserStatsService.recompute(missing)
+    for u in users_page:
+        if u.pk in stats:
+            u.bookings_count = stats[u.pk].bookings_total
+            u.reviews_count = stats[u.pk].reviews_count
+            u.total_spent = stats[u.pk].total_spent
+
+
+def _moderation_stats() -> dict[str, int]:
+    """Счетчики пользователей для страницы управления (без суперпользователей)."""
+    counts = StatsService.users()
+    return {
+        'total': counts['regular_total'],
+        'users': counts['regular_users'],
+        'moderators': counts['moderators'],
+        'blocked': counts['blocked'],
+        'verified': counts['regular_verified'],
+    }
+
+
 @login_required
 @moderator_required
 def manage_users(request: HttpRequest) -> HttpResponse:
@@ -104,15 +140,10 @@ def manage_users(request: HttpRequest) -> HttpResponse:
     try:
         users, user_type_filter, status_filter, search_query = _get_users_queryset(request)
 
-        stats = {
-            'total': CustomUser.objects.filter(is_superuser=False).count(),
-            'users': CustomUser.objects.filter(user_type='user', is_superuser=False).count(),
-            'moderators': CustomUser.objects.filter(user_type='moderator').count(),
-            'blocked': CustomUser.objects.filter(is_blocked=True).count(),
-            'verified': CustomUser.objects.filter(email_verified=True, is_superuser=False).count(),
-        }
+        stats = _moderation_stats()
 
         users_page, paginator = paginate(users, request, USERS_PER_PAGE)
+        _fill_missing_stats(users_page)
 
         context: dict[str, Any] = {
             'users': users_page,
@@ -138,15 +169,10 @@ def users_ajax(request: HttpRequest) -> JsonResponse:
     try:
         users, user_type_filter, status_filter, search_query = _get_users_queryset(request)
 
-        stats = {
-            'total': CustomUser.objects.filter(is_superuser=False).count(),
-            'users': CustomUser.objects.filter(user_type='user', is_superuser=False).count(),
-            'moderators': CustomUser.objects.filter(user_type='moderator').count(),
-            'blocked': CustomUser.objects.filter(is_blocked=True).count(),
-            'verified': CustomUser.objects.filter(email_verified=True, is_superuser=False).count(),
-        }
+        stats = _moderation_stats()
 
         users_page, paginator = paginate(users, request, USERS_PER_PAGE)
+        _fill_missing_stats(users_page)
 
         html = render_to_string('users/_users_table.html', {
             'users': users_page,
@@ -180,22 +206,15 @@ def user_detail(request: HttpRequest, pk: int) -> HttpResponse:
             messages.error(request, 'Нет доступа к этому пользователю')
             return redirect('manage_users')
 
+        stats = UserStatsService.get(user.pk)
         user_stats = {
-            'total_bookings': Booking.objects.filter(tenant=user).count(),
-            'confirmed_bookings': Booking.objects.filter(
-                tenant=user, status__code__in=['confirmed', 'completed']
-            ).count(),
-            'cancelled_bookings': Booking.objects.filter(
-                tenant=user, status__code='cancelled'
-            ).count(),
-            'pending_bookings': Booking.objects.filter(
-                tenant=user, status__code='pending'
-            ).count(),
-            'total_spent': Booking.objects.filter(
-                tenant=user, status__code__in=['confirmed', 'completed']
-            ).aggregate(total=Sum('total_amount'))['total'] or 0,
-            'reviews_count': Review.objects.filter(author=user).count(),
-            'favorites_count': Favorite.objects.filter(user=user).count(),
+            'total_bookings': stats.bookings_total,
+            'confirmed_bookings': stats.bookings_paid,
+            'cancelled_bookings': stats.bookings_cancelled,
+            'pending_bookings': stats.bookings_pending,
+            'total_spent': stats.total_spent,
+            'reviews_count': stats.reviews_count,
+            'favorites_count': stats.favorites_count,
         }
 
         recent_bookings = Booking.objects.filter(
@@ -283,11 +302,7 @@ def block_user(request: HttpRequest, pk: int) -> HttpResponse:
 
         block_reason = request.POST.get('block_reason', '').strip()
 
-        user.is_blocked = True
-        user.block_reason = block_reason
-        user.blocked_at = timezone.now()
-        user.blocked_by = request.user
-        user.save()
+        UserBlockService.block(user, reason=block_reason, blocked_by=request.user)
 
         messages.success(request, f'Пользователь {user.username} заблокирован')
         logger.info(f"User {user.username} blocked by {request.user.username}. Reason: {block_reason}")
@@ -310,11 +325,7 @@ def unblock_user(request: HttpRequest, pk: int) -> HttpResponse:
     try:
         user = get_object_or_404(CustomUser, pk=pk)
 
-        user.is_blocked = False
-        user.block_reason = ''
-        user.blocked_at = None
-        user.blocked_by = None
-        user.save()
+        UserBlockService.unblock(user)
 
         messages.success(request, f'Пользователь {user.username} разблокирован')
         logger.info(f"User {user.username} unblocked by {request.user.username}")